@@ -37,6 +37,29 @@ class Settings(BaseSettings):
     DATABASE_TYPE: str = "sqlite"
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_CACHE_SIZE_KIB: int = 16 * 1024
+    # Threads running blocking sqlite3 calls for async callers
+    DB_EXECUTOR_WORKERS: int = 8
+    
+    # Result Cache Settings
+    RESULT_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Answer listings and aggregates (without rollups) from an in-memory columnar snapshot
+    COLUMNAR_ENGINE: bool = False
+    
+    # Pagination Settings
+    PAGE_SIZE: int = 10
+    PAGE_COUNT_CACHE_SIZE: int = 256
+    PAGE_COUNT_CACHE_TTL: int = 300
+    
+    # Query Session Settings
+    SESSION_TTL: int = 3600
+    SESSION_MAX_ENTRIES: int = 1000
+    SESSION_MAX_BYTES: int = 4 * 1024 * 1024
+    SESSION_SWEEP_INTERVAL: float = 60.0
     
     # API Settings
     API_PREFIX: str = "/api"
@@ -54,6 +77,41 @@ class Settings(BaseSettings):
     LLM_TEMPERATURE: float = 0.1
     MAX_SEARCH_RESULTS: int = 3
     
+    # LLM Transport Settings
+    LLM_API_BASE: str = "https://api.together.xyz/v1"
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    LLM_MAX_IN_FLIGHT: int = 8
+    LLM_MAX_KEEPALIVE: int = 8
+    
+    # LLM Record/Replay Settings (see app.llm.transport)
+    LLM_TRANSPORT_MODE: str = "live"  # live, record or replay
+    LLM_RECORDINGS_DB_PATH: str = os.path.join(BASE_DIR, "cache", "llm_recordings.db")
+    LLM_REPLAY_LATENCY: float = 0.0
+    LLM_REPLAY_JITTER: float = 0.0
+    
+    # LLM Response Cache Settings
+    LLM_CACHE_DB_PATH: str = os.path.join(BASE_DIR, "cache", "llm_response_cache.db")
+    LLM_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    LLM_CACHE_DEFAULT_TTL: int = 600
+    LLM_CACHE_TTLS: Dict[str, int] = {
+        "intent_analysis": 7 * 24 * 3600,
+        "sql_generation": 24 * 3600,
+        "default": 600
+    }
+    
+    # Local Intent Classifier Settings
+    INTENT_CONFIDENCE_THRESHOLD: float = 0.85
+    INTENT_AUDIT_RATE: float = 0.0
+    
+    # Speculative Answer Settings
+    SPECULATIVE_SQL: bool = True
+    ANSWER_DEADLINE_SECONDS: float = 20.0
+    
+    # Metrics Settings
+    METRICS_ENABLED: bool = True
+    # Add each request's per-stage timings to the response metadata
+    METRICS_STAGE_BREAKDOWN: bool = False
+    
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -0,0 +1,251 @@
+"""
+Per-stage timing spans and Prometheus-style metrics.
+
+Hot-path stages (entity extraction, classification, each LLM call, SQL
+build, SQL execution and formatting) are wrapped in ``span(stage)`` or
+decorated with ``timed(stage)``. Every span is observed into a latency
+histogram labelled by stage, exported as text by ``render_metrics`` for the
+``/metrics`` endpoint. Inside a request started with ``request_trace`` the
+span is also added to that request's trace, which carries the request ID and
+gives the per-stage breakdown that can be returned in response metadata.
+Tasks inherit the trace of the request that started them, so a request that
+joins another's in-flight computation (``SingleFlight``) records no stages.
+
+Spans cost two ``perf_counter`` calls, a context variable lookup and one
+short lock; nested spans (an LLM call inside classification) are each timed
+in full, so a breakdown's stages can add up to more than the request.
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Upper bounds in seconds; the last, implicit bucket is +Inf
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, safe to observe from any thread"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Cumulative bucket counts (the last one is +Inf), sum and count"""
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative, running = [], 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    """Stage and request latency histograms and stage error counters"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._stages: Dict[str, Histogram] = {}
+        self._requests = Histogram(buckets)
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _stage(self, stage: str) -> Histogram:
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def observe_stage(self, stage: str, seconds: float, failed: bool = False) -> None:
+        self._stage(stage).observe(seconds)
+        if failed:
+            with self._lock:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def observe_request(self, seconds: float) -> None:
+        self._requests.observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages = {}
+            self._requests = Histogram(self.buckets)
+            self._errors = {}
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP chatbot_stage_duration_seconds Time spent in each pipeline stage",
+            "# TYPE chatbot_stage_duration_seconds histogram"
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            errors = sorted(self._errors.items())
+        for stage, histogram in stages:
+            lines.extend(_histogram_lines("chatbot_stage_duration_seconds", histogram, f'stage="{stage}"'))
+        lines.extend([
+            "# HELP chatbot_stage_errors_total Spans that ended with an exception",
+            "# TYPE chatbot_stage_errors_total counter"
+        ])
+        for stage, count in errors:
+            lines.append(f'chatbot_stage_errors_total{{stage="{stage}"}} {count}')
+        lines.extend([
+            "# HELP chatbot_request_duration_seconds Time to answer a traced request",
+            "# TYPE chatbot_request_duration_seconds histogram"
+        ])
+        lines.extend(_histogram_lines("chatbot_request_duration_seconds", self._requests, ""))
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, histogram: Histogram, labels: str) -> List[str]:
+    cumulative, total, count = histogram.snapshot()
+    prefix = f"{labels}," if labels else ""
+    lines = [
+        f'{name}_bucket{{{prefix}le="{bound:g}"}} {value}'
+        for bound, value in zip(histogram.buckets, cumulative)
+    ]
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative[-1]}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {total:.6f}")
+    lines.append(f"{name}_count{suffix} {count}")
+    return lines
+
+
+class RequestTrace:
+    """Spans of one request, by request ID"""
+
+    __slots__ = ("request_id", "started", "spans")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Total seconds and span count per stage, in the order their first spans ended"""
+        stages: Dict[str, Dict[str, float]] = {}
+        for stage, seconds in self.spans:
+            entry = stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+            entry["seconds"] += seconds
+            entry["count"] += 1
+        for entry in stages.values():
+            entry["seconds"] = round(entry["seconds"], 6)
+        return stages
+
+
+_registry = MetricsRegistry()
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def get_metrics() -> MetricsRegistry:
+    """The process-wide metrics registry"""
+    return _registry
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Trace of the request being handled, or None outside one"""
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as ``stage``"""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _registry.observe_stage(stage, elapsed, failed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append((stage, elapsed))
+            logger.debug(f"[{trace.request_id}] {stage} took {elapsed * 1000:.2f} ms")
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """
+    Decorator timing every call of a function, coroutine function or async
+    generator function (until the generator finishes) as ``stage``
+    """
+    def decorate(fn: F) -> F:
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def timed_generator(*args: Any, **kwargs: Any) -> Any:
+                generator = fn(*args, **kwargs)
+                with span(stage):
+                    try:
+                        async for item in generator:
+                            yield item
+                    finally:
+                        await generator.aclose()
+            return timed_generator  # type: ignore[return-value]
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def timed_coroutine(*args: Any, **kwargs: Any) -> Any:
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return timed_coroutine  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def timed_function(*args: Any, **kwargs: Any) -> Any:
+            with span(stage):
+                return fn(*args, **kwargs)
+        return timed_function  # type: ignore[return-value]
+    return decorate
+
+
+@contextmanager
+def request_trace(request_id: Optional[str] = None) -> Iterator[RequestTrace]:
+    """
+    Collect the spans of the enclosed request under ``request_id`` (a new
+    one if not given). Tasks started inside inherit the trace.
+    """
+    trace = RequestTrace(request_id or uuid.uuid4().hex)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        if settings.METRICS_ENABLED:
+            _registry.observe_request(trace.elapsed())
+
+
+def render_metrics() -> str:
+    """Text for the ``/metrics`` endpoint"""
+    return _registry.render()
@@ -0,0 +1,263 @@
+"""Aggregate Questions
+
+"How many projects are in Zomba?", "total budget of education projects" and
+"average completion by district" are answered from the rollups materialised
+by ``app.database.migrations``: the question is parsed into a measure, an
+optional breakdown dimension and filters on the rollup dimensions, bound to
+an ``aggregate.*`` template and the rows are summarised here. Databases
+without the rollups get the same answer from the ``aggregate.scan`` template.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from .migrations import ROLLUP_ALL, ROLLUP_DIMENSIONS
+from .query_templates import QUERY_TEMPLATES, BoundQuery
+
+# Measure -> (display name, column of the aggregate templates)
+MEASURES = {
+    "count": ("number of projects", "project_count"),
+    "total_budget": ("total budget", "total_budget"),
+    "average_budget": ("average budget", "average_budget"),
+    "total_expenditure": ("total expenditure", "total_expenditure"),
+    "average_expenditure": ("average expenditure", "average_expenditure"),
+    "average_completion": ("average completion", "average_completion"),
+}
+
+# Checked in order; averages come first so "average budget" is not a total
+_MEASURE_PATTERNS = tuple(
+    (measure, re.compile(pattern, re.IGNORECASE))
+    for measure, pattern in (
+        ("average_budget", r"\b(?:average|avg|mean)\s+(?:project\s+)?(?:budget|cost|allocation)s?\b"),
+        ("average_expenditure", r"\b(?:average|avg|mean)\s+(?:project\s+)?(?:expenditure|spending|spend)\b"),
+        ("average_completion",
+         r"\b(?:average|avg|mean|overall)\s+(?:completion|progress)\b|\b(?:completion|progress)\b.*\bon average\b"),
+        ("total_budget",
+         r"\b(?:total|sum|combined|overall|aggregate)\b.*\b(?:budget|cost|allocation)s?\b"
+         r"|\bhow much\b.*\b(?:budget|budgeted|allocated|cost)\b"),
+        ("total_expenditure", r"\b(?:total|sum|combined|overall|how much)\b.*\b(?:expenditure|spending|spent)\b"),
+        ("count", r"\bhow many\b|\bnumber of\b|\bcount\b"),
+    )
+)
+
+# Words that ask for a breakdown even without a measure phrase
+_BREAKDOWN_WORDS = re.compile(r"\b(?:breakdown|distribution|compare|comparison|statistics|summary)\b", re.IGNORECASE)
+
+_DIMENSION_WORDS = r"(region|district|sector|status|statuse|fiscal year|financial year|year)s?"
+
+_GROUP_BY_PATTERNS = (
+    re.compile(
+        rf"\b(?:by|per|for each|each|across|between|among)\s+(?:the\s+|different\s+|all\s+|every\s+)?{_DIMENSION_WORDS}\b",
+        re.IGNORECASE
+    ),
+    re.compile(
+        rf"\bwhich\s+{_DIMENSION_WORDS}\s+(?:has|have|had|gets?|got|received?)\s+(?:the\s+)?"
+        r"(?:most|highest|largest|biggest|least|lowest|smallest|fewest)\b",
+        re.IGNORECASE
+    ),
+)
+
+_DIMENSION_ALIASES = {
+    "region": "region",
+    "district": "district",
+    "sector": "sector",
+    "status": "status",
+    "statuse": "status",
+    "fiscal year": "fiscal_year",
+    "financial year": "fiscal_year",
+    "year": "fiscal_year",
+}
+
+# "2023/24", "2023-2024", "FY 2023"
+_FISCAL_YEAR = re.compile(r"\b(20\d{2})(?:\s*[/-]\s*(\d{2}(?:\d{2})?))?\b")
+
+_DIMENSION_LABELS = {
+    "region": ("region", "regions"),
+    "district": ("district", "districts"),
+    "sector": ("sector", "sectors"),
+    "status": ("status", "statuses"),
+    "fiscal_year": ("fiscal year", "fiscal years"),
+}
+
+AGGREGATE_FIELDS = ("Projects", "Total budget", "Average budget", "Total expenditure", "Average completion")
+
+
+@dataclass(frozen=True)
+class AggregateRequest:
+    """A parsed aggregate question"""
+    measure: str
+    group_by: Optional[str] = None
+    # Rollup dimension -> key (see migrations.rollup_dimension_sql)
+    filters: Mapping[str, str] = field(default_factory=dict)
+
+
+def parse_aggregate_question(text: str) -> Optional[AggregateRequest]:
+    """Measure and breakdown asked for in ``text``, or None if it is not an aggregate question"""
+    group_by = None
+    for pattern in _GROUP_BY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            group_by = _DIMENSION_ALIASES[match.group(1).lower()]
+            break
+
+    measure = next((name for name, pattern in _MEASURE_PATTERNS if pattern.search(text)), None)
+    if measure is None:
+        if group_by is None and not _BREAKDOWN_WORDS.search(text):
+            return None
+        # "Which district has the highest budget?", "compare budgets between sectors"
+        lowered = text.lower()
+        if "budget" in lowered or "cost" in lowered:
+            measure = "total_budget"
+        elif "expenditure" in lowered or "spent" in lowered or "spending" in lowered:
+            measure = "total_expenditure"
+        elif "completion" in lowered or "progress" in lowered:
+            measure = "average_completion"
+        else:
+            measure = "count"
+    return AggregateRequest(measure=measure, group_by=group_by)
+
+
+def match_fiscal_year(text: str, labels: Iterable[str]) -> Optional[str]:
+    """
+    The stored fiscal year label a question refers to, or None.
+
+    "2023/24" and "2023-2024" must match both years; a single year matches
+    the fiscal year that starts in it ("April 2023 / March 2024").
+    """
+    match = _FISCAL_YEAR.search(text)
+    if not match:
+        return None
+    start, end = match.group(1), match.group(2)
+    if end and len(end) == 2:
+        end = start[:2] + end
+    for label in labels:
+        years = re.findall(r"20\d{2}", label)
+        if not years or years[0] != start:
+            continue
+        if end is None or end in years:
+            return label
+    return None
+
+
+def bind_aggregate(request: AggregateRequest, rollups: bool = True) -> BoundQuery:
+    """Bind a request to the rollup templates, or to the scan fallback without rollups"""
+    filters = {
+        dimension: request.filters.get(dimension) or ROLLUP_ALL
+        for dimension in ROLLUP_DIMENSIONS
+        if dimension != request.group_by
+    }
+    if not rollups:
+        if request.group_by:
+            filters[request.group_by] = ROLLUP_ALL
+        return QUERY_TEMPLATES.bind(
+            "aggregate.scan", measure=request.measure, group_by=request.group_by or ROLLUP_ALL, **filters
+        )
+    if request.group_by:
+        return QUERY_TEMPLATES.bind(f"aggregate.rollup.by_{request.group_by}", measure=request.measure, **filters)
+    return QUERY_TEMPLATES.bind("aggregate.rollup", measure=request.measure, **filters)
+
+
+def dimension_label(dimension: str, key: Optional[str]) -> str:
+    """Display form of a rollup key ("roads and bridges" -> "Roads and Bridges")"""
+    if not key:
+        return "Unspecified"
+    if dimension == "fiscal_year":
+        return key
+    if dimension == "status":
+        return key.capitalize()
+    return " ".join(word if word in ("and", "of") else word.capitalize() for word in key.split())
+
+
+def _scope(row: Mapping[str, Any], group_by: Optional[str]) -> str:
+    """Phrase describing the filters of a result row, e.g. " in Zomba district" """
+    parts = []
+    for dimension in ROLLUP_DIMENSIONS:
+        key = row.get(dimension)
+        if dimension == group_by or key == ROLLUP_ALL:
+            continue
+        label = dimension_label(dimension, key)
+        if dimension == "status":
+            parts.append(f"that are {label.lower()}")
+        elif dimension == "fiscal_year":
+            parts.append(f"in fiscal year {label}")
+        elif dimension == "region":
+            parts.append(f"in the {label}" if label.lower().endswith("region") else f"in the {label} region")
+        elif dimension == "district":
+            parts.append(f"in {label} district")
+        else:
+            parts.append(f"in the {label} sector")
+    return "".join(f" {part}" for part in parts)
+
+
+def format_measure(measure: str, value: Any) -> str:
+    """Display a measure value: MWK amounts, percentages or a plain count"""
+    if value is None:
+        return "Unknown"
+    if measure == "count":
+        return f"{int(value):,}"
+    if measure == "average_completion":
+        return f"{float(value):.1f}%"
+    return f"MWK {float(value):,.2f}"
+
+
+def _figures(row: Mapping[str, Any]) -> List[str]:
+    return [
+        format_measure("count", row.get("project_count")),
+        format_measure("total_budget", row.get("total_budget")),
+        format_measure("average_budget", row.get("average_budget")),
+        format_measure("total_expenditure", row.get("total_expenditure")),
+        format_measure("average_completion", row.get("average_completion")),
+    ]
+
+
+def _total_message(row: Mapping[str, Any], measure: str) -> str:
+    count = int(row.get("project_count") or 0)
+    scope = _scope(row, None)
+    value = format_measure(measure, row.get(MEASURES[measure][1]))
+    noun = "project" if count == 1 else "projects"
+    if measure == "count":
+        return f"There {'is' if count == 1 else 'are'} {count:,} {noun}{scope}."
+    if measure == "average_completion":
+        return f"The {count:,} {noun}{scope} are {value} complete on average."
+    message = f"The {MEASURES[measure][0]} of the {count:,} {noun}{scope} is {value}."
+    budgeted = row.get("budgeted_count")
+    if measure in ("total_budget", "average_budget") and budgeted is not None and budgeted < count:
+        message += f" {count - budgeted:,} of them have no budget recorded."
+    return message
+
+
+def _breakdown_message(rows: List[Mapping[str, Any]], measure: str, group_by: str) -> str:
+    top = rows[0]
+    singular, plural = _DIMENSION_LABELS[group_by]
+    superlative = "the most projects" if measure == "count" else f"the highest {MEASURES[measure][0]}"
+    value = format_measure(measure, top.get(MEASURES[measure][1]))
+    return (
+        f"{dimension_label(group_by, top.get(group_by))} has {superlative} ({value}) "
+        f"of the {len(rows)} {plural if len(rows) != 1 else singular}{_scope(top, group_by)}."
+    )
+
+
+def format_aggregate_results(rows: List[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Response items (a summary line and a table) for the rows of an aggregate template"""
+    if not rows:
+        return []
+    first = rows[0]
+    measure = first.get("measure") if first.get("measure") in MEASURES else "count"
+    group_by = first.get("group_by")
+    if group_by not in ROLLUP_DIMENSIONS:
+        return [
+            {"type": "text", "message": _total_message(first, measure), "data": {}},
+            {"type": "table", "message": "Summary", "data": {
+                "headers": list(AGGREGATE_FIELDS),
+                "rows": [_figures(first)]
+            }},
+        ]
+    singular = _DIMENSION_LABELS[group_by][0]
+    return [
+        {"type": "text", "message": _breakdown_message(rows, measure, group_by), "data": {}},
+        {"type": "table", "message": f"Breakdown by {singular}", "data": {
+            "headers": [singular.capitalize()] + list(AGGREGATE_FIELDS),
+            "rows": [[dimension_label(group_by, row.get(group_by))] + _figures(row) for row in rows]
+        }},
+    ]
@@ -0,0 +1,174 @@
+"""Non-blocking Database Execution
+
+``sqlite3`` calls block the thread they run on, and the services that used
+to make them directly from ``async def`` methods blocked the event loop and
+every other request on the worker. This module runs them on one shared,
+bounded pool of database threads instead, using the tuned connections of
+``app.database.pool`` (which are opened with ``check_same_thread=False``).
+
+A bounded thread pool was preferred over ``aiosqlite``: aiosqlite keeps one
+thread per open connection, while here the number of threads is fixed by
+``DB_EXECUTOR_WORKERS`` however many connections the pools hold, and the
+pooled connections, their PRAGMAs and the template statistics are reused.
+
+Awaiting coroutines that are cancelled (for example because the client
+disconnected) take their work with them: a job still waiting in the queue is
+dropped, and a running query is stopped with ``Connection.interrupt()``.
+Queue depth, waits and cancellations are reported by ``get_stats``.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from ..core.config import settings
+from .pool import SQLiteConnectionPool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Job:
+    """State of one submitted call, shared between the event loop and its worker thread"""
+
+    __slots__ = ("connection", "cancelled")
+
+    def __init__(self):
+        self.connection: Optional[sqlite3.Connection] = None
+        self.cancelled = False
+
+
+class AsyncDatabaseExecutor:
+    """Runs blocking database calls on a bounded pool of threads for async callers"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers if max_workers is not None else settings.DB_EXECUTOR_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sqlite")
+        self._lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "interrupted": 0,
+            "queued": 0,
+            "running": 0,
+            "peak_queued": 0,
+            "total_queue_wait": 0.0,
+            "max_queue_wait": 0.0
+        }
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call ``fn(*args)`` on a database thread and return its result"""
+        return await self._submit(lambda job: fn(*args))
+
+    async def run_on(self, pool: SQLiteConnectionPool, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Call ``fn(connection, *args)`` on a database thread with a connection
+        checked out of ``pool``; the connection is interrupted if the caller
+        is cancelled while ``fn`` runs.
+        """
+        def work(job: _Job) -> T:
+            with pool.connection() as conn:
+                job.connection = conn
+                try:
+                    if job.cancelled:
+                        raise asyncio.CancelledError()
+                    return fn(conn, *args)
+                finally:
+                    job.connection = None
+
+        return await self._submit(work)
+
+    async def _submit(self, work: Callable[[_Job], T]) -> T:
+        job = _Job()
+        enqueued = time.perf_counter()
+        with self._lock:
+            self.stats["submitted"] += 1
+            self.stats["queued"] += 1
+            self.stats["peak_queued"] = max(self.stats["peak_queued"], self.stats["queued"])
+
+        def call() -> T:
+            waited = time.perf_counter() - enqueued
+            with self._lock:
+                self.stats["queued"] -= 1
+                self.stats["running"] += 1
+                self.stats["total_queue_wait"] += waited
+                self.stats["max_queue_wait"] = max(self.stats["max_queue_wait"], waited)
+            try:
+                result = work(job)
+            except BaseException:
+                with self._lock:
+                    self.stats["running"] -= 1
+                    self.stats["failed" if not job.cancelled else "cancelled"] += 1
+                raise
+            with self._lock:
+                self.stats["running"] -= 1
+                self.stats["completed"] += 1
+            return result
+
+        future = self._executor.submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():
+                # Still queued: it will never run
+                with self._lock:
+                    self.stats["queued"] -= 1
+                    self.stats["cancelled"] += 1
+            else:
+                job.cancelled = True
+                conn = job.connection
+                if conn is not None:
+                    conn.interrupt()
+                    with self._lock:
+                        self.stats["interrupted"] += 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs, waits and outcome counters"""
+        with self._lock:
+            started = self.stats["submitted"] - self.stats["queued"]
+            return {
+                **self.stats,
+                "max_workers": self.max_workers,
+                "avg_queue_wait": self.stats["total_queue_wait"] / max(1, started)
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work; queued jobs still run"""
+        self._executor.shutdown(wait=False)
+
+
+_executor: Optional[AsyncDatabaseExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> AsyncDatabaseExecutor:
+    """Return the process-wide database executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = AsyncDatabaseExecutor()
+                logger.info(f"Created database executor with {_executor.max_workers} workers")
+    return _executor
+
+
+def get_db_executor_stats() -> Optional[Dict[str, Any]]:
+    """Statistics of the shared executor, or None before it is first used"""
+    return _executor.get_stats() if _executor is not None else None
+
+
+def shutdown_db_executor() -> None:
+    """Shut down and forget the shared executor"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
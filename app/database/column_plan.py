@@ -0,0 +1,171 @@
+"""Column Plans for Response Formatting
+
+A ``ColumnPlan`` describes how a result set is displayed: for each display
+label, the source column(s) it is read from (the first spelling present
+wins) and the formatter applied to the value. The plan is compiled once per
+result set against its columns, so the candidate spellings are resolved once
+rather than probed on every row, and is then applied to every row.
+
+``format_rows`` applies it to ``Row``s (or dict rows) and ``format_frame``
+to a pandas DataFrame, both one column at a time; DataFrames use a field's
+vectorised formatter where it has one.
+"""
+
+from dataclasses import dataclass, field as dataclass_field
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .rows import Columns, Row, as_rows
+
+# ``missing`` value of fields left out of the output when none of their columns exist
+OMIT = object()
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+@dataclass(frozen=True)
+class DisplayField:
+    """One display field: label, candidate source columns per input, and formatters"""
+    label: str
+    # One tuple of candidate column names per formatter argument
+    inputs: Tuple[Tuple[str, ...], ...]
+    format: Callable[..., Any] = _identity
+    # Used as the value when none of the input columns exist (OMIT drops the field)
+    missing: Any = None
+    # Series -> Series formatter for DataFrames; ``format`` is mapped over the values without it
+    vector_format: Optional[Callable[..., pd.Series]] = dataclass_field(default=None, compare=False)
+
+
+def column(label: str, *candidates: str, format: Callable[[Any], Any] = _identity, missing: Any = None,
+           vector_format: Optional[Callable[[pd.Series], pd.Series]] = None) -> DisplayField:
+    """A field read from the first of ``candidates`` present"""
+    return DisplayField(label, (tuple(candidates),), format, missing, vector_format)
+
+
+def _reader(format_value: Callable[..., Any], positions: List[Optional[int]]) -> Callable[[Sequence[Any]], Any]:
+    """Function formatting one field from a row's value tuple, specialised for the common shapes"""
+    if len(positions) == 1:
+        position = positions[0]
+        if format_value is _identity:
+            return itemgetter(position)
+        return lambda values: format_value(values[position])
+    return lambda values: format_value(*(None if position is None else values[position] for position in positions))
+
+
+def _resolve_frame_column(frame_columns: Mapping[str, str], candidates: Sequence[str]) -> Optional[str]:
+    for name in candidates:
+        found = frame_columns.get(name, frame_columns.get(name.lower()))
+        if found is not None:
+            return found
+    return None
+
+
+class ColumnPlan:
+    """Display fields of a result set, compiled once per result set and applied to every row"""
+
+    def __init__(self, fields: Sequence[DisplayField]):
+        self.fields = tuple(fields)
+
+    @property
+    def labels(self) -> List[str]:
+        return [field.label for field in self.fields]
+
+    def compile(self, columns: Columns) -> Callable[[Row], Dict[str, Any]]:
+        """Row formatter for result sets with ``columns``; every column lookup happens here"""
+        labels, readers = [], []
+        for field in self.fields:
+            positions = [columns.position(*candidates) for candidates in field.inputs]
+            if all(position is None for position in positions):
+                if field.missing is not OMIT:
+                    labels.append(field.label)
+                    readers.append(lambda values, missing=field.missing: missing)
+                continue
+            labels.append(field.label)
+            readers.append(_reader(field.format, positions))
+
+        def format_row(row: Row) -> Dict[str, Any]:
+            values = row._values
+            return dict(zip(labels, [read(values) for read in readers]))
+
+        return format_row
+
+    def format_rows(self, rows: Sequence[Mapping[str, Any]], on_error: Optional[Callable[[Exception], None]] = None
+                    ) -> List[Dict[str, Any]]:
+        """
+        Format every row. With ``on_error``, rows that fail to format are
+        reported to it and skipped instead of raising.
+
+        Rows are formatted a column at a time: the value tuples are
+        transposed, each formatter is mapped over its column and unformatted
+        columns are copied as they are.
+        """
+        rows = as_rows(rows)
+        if not rows:
+            return []
+        columns = rows[0].columns
+        try:
+            return self._format_columns(columns, [row._values for row in rows])
+        except Exception:
+            if on_error is None:
+                raise
+        # Format row by row to find and skip the rows that fail
+        format_row = self.compile(columns)
+        formatted = []
+        for row in rows:
+            try:
+                formatted.append(format_row(row))
+            except Exception as e:
+                on_error(e)
+        return formatted
+
+    def _format_columns(self, columns: Columns, values: List[Sequence[Any]]) -> List[Dict[str, Any]]:
+        count = len(values)
+        transposed = list(zip(*values))
+        labels, outputs = [], []
+        for field in self.fields:
+            positions = [columns.position(*candidates) for candidates in field.inputs]
+            if all(position is None for position in positions):
+                if field.missing is not OMIT:
+                    labels.append(field.label)
+                    outputs.append([field.missing] * count)
+                continue
+            inputs = [transposed[position] if position is not None else [None] * count for position in positions]
+            labels.append(field.label)
+            if field.format is _identity and len(inputs) == 1:
+                outputs.append(inputs[0])
+            else:
+                outputs.append(list(map(field.format, *inputs)))
+        return [dict(zip(labels, row)) for row in zip(*outputs)]
+
+    def format_frame(self, frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Format every row of a DataFrame, one column at a time"""
+        if frame.empty:
+            return []
+        frame_columns: Dict[str, str] = {}
+        for name in frame.columns:
+            frame_columns.setdefault(str(name), name)
+        for name in frame.columns:
+            frame_columns.setdefault(str(name).lower(), name)
+
+        formatted: Dict[str, Any] = {}
+        for field in self.fields:
+            sources = [_resolve_frame_column(frame_columns, candidates) for candidates in field.inputs]
+            if all(source is None for source in sources):
+                if field.missing is not OMIT:
+                    formatted[field.label] = [field.missing] * len(frame)
+                continue
+            series = [
+                frame[source] if source is not None else pd.Series([None] * len(frame), index=frame.index, dtype=object)
+                for source in sources
+            ]
+            if field.vector_format is not None:
+                formatted[field.label] = list(field.vector_format(*series))
+            else:
+                formatted[field.label] = [field.format(*values) for values in zip(*series)]
+
+        labels = list(formatted)
+        return [dict(zip(labels, values)) for values in zip(*formatted.values())]
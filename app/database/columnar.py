@@ -0,0 +1,357 @@
+"""In-memory Columnar Snapshot of proj_dashboard
+
+Classified queries (districts, sectors, statuses, project names, budget and
+date ranges) can be evaluated against a snapshot of the filter and sort
+columns held as NumPy arrays instead of being sent to SQLite. Text columns are
+dictionary-encoded against a sorted vocabulary, so set membership is one
+table lookup per row and range filters on dates are integer comparisons on
+the codes. Filters become boolean masks, top-k uses ``argpartition`` before
+sorting only the candidates, and group totals are ``bincount``s over the
+codes.
+
+Only row ids are selected in memory; the few rows returned are then fetched
+from SQLite by rowid (``classification.*.rows``), so the snapshot does not
+hold display columns. The snapshot is rebuilt whenever the database file
+changes. Callers fall back to SQL for anything it cannot express.
+
+``select_in_memory`` answers two kinds of request query from the snapshot:
+first listing pages (``project.*.results``, ``project.general``), whose page
+and match count become a ``project.listing.rows`` fetch, and aggregates on
+databases without rollups (``aggregate.scan``), whose group totals become
+``aggregate.rows``. Loading a snapshot reads the whole table, so request
+paths only use one that is already current (``current_snapshot``) and build
+it on a database thread.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from .aggregates import MEASURES
+from .migrations import (
+    ROLLUP_ALL, ROLLUP_DIMENSIONS, TABLE, budget_num_sql, completion_num_sql, status_key_sql, table_columns
+)
+from .pagination import LISTING_PAGE_SIZE
+from .query_templates import QUERY_TEMPLATES, BoundQuery
+from .result_cache import file_version
+
+logger = logging.getLogger(__name__)
+
+# Encoded column -> SQL expression it is read from (the filter key semantics)
+ENCODED_COLUMNS = {
+    "district": "LOWER(TRIM(DISTRICT))",
+    "sector": "LOWER(TRIM(PROJECTSECTOR))",
+    "status": status_key_sql(),
+    "region": "LOWER(TRIM(REGION))",
+    "name": "LOWER(PROJECTNAME)",
+    "start_date": "STARTDATE",
+    "end_date": "COMPLETIONESTIDATE",
+    "fiscal_year": "TRIM(FISCALYEAR)",
+}
+
+NUMERIC_COLUMNS = {
+    "budget": budget_num_sql("BUDGET"),
+    "expenditure": budget_num_sql("TOTALEXPENDITUREYEAR"),
+    "completion": completion_num_sql(),
+    # Tie-break of the classification.general ORDER BY
+    "status_rank": (
+        "CASE WHEN LOWER(PROJECTSTATUS) LIKE '%ongoing%' THEN 1 "
+        "WHEN LOWER(PROJECTSTATUS) LIKE '%completed%' THEN 2 ELSE 3 END"
+    ),
+}
+
+REQUIRED_COLUMNS = (
+    "DISTRICT", "PROJECTSECTOR", "PROJECTSTATUS", "REGION", "PROJECTNAME",
+    "STARTDATE", "COMPLETIONESTIDATE", "BUDGET", "TOTALEXPENDITUREYEAR", "COMPLETIONPERCENTAGE", "FISCALYEAR"
+)
+
+# First-page listing templates and the snapshot column their parameter filters
+LISTING_FILTERS = {
+    "project.district.results": "district",
+    "project.sector.results": "sector",
+    "project.general": None,
+}
+
+# Snapshot value columns behind the aggregate measures
+_AGGREGATE_VALUES = (("budget", "budget"), ("expenditure", "expenditure"), ("completion", "completion"))
+
+
+def encode(values: Sequence[Optional[object]]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Dictionary-encode values against their sorted distinct values.
+
+    Code 0 is NULL and code ``i + 1`` is ``vocabulary[i]``, so codes compare
+    in the same order as the values.
+    """
+    values = [None if value is None else str(value) for value in values]
+    vocabulary = sorted({value for value in values if value is not None})
+    index = {value: code for code, value in enumerate(vocabulary, start=1)}
+    codes = np.fromiter((index.get(value, 0) for value in values), dtype=np.int32, count=len(values))
+    return codes, vocabulary
+
+
+class ColumnarSnapshot:
+    """Filter, sort and group columns of proj_dashboard as NumPy arrays"""
+
+    def __init__(self, rowids: np.ndarray, codes: Dict[str, np.ndarray], vocabularies: Dict[str, List[str]],
+                 numbers: Dict[str, np.ndarray]):
+        self.rowids = rowids
+        self.codes = codes
+        self.vocabularies = vocabularies
+        self.numbers = numbers
+        # Sort key for "budget DESC" with NULLs last, as SQLite orders them
+        self._budget_order = np.where(np.isnan(numbers["budget"]), np.inf, -numbers["budget"])
+
+    def __len__(self) -> int:
+        return len(self.rowids)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "ColumnarSnapshot":
+        """Read the snapshot columns of every proj_dashboard row"""
+        columns = {column.upper() for column in table_columns(conn)}
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"{TABLE} has no {', '.join(missing)} column(s)")
+
+        expressions = ["rowid"] + list(ENCODED_COLUMNS.values()) + list(NUMERIC_COLUMNS.values())
+        rows = conn.execute(f"SELECT {', '.join(expressions)} FROM {TABLE} ORDER BY rowid").fetchall()
+        values = list(zip(*rows)) if rows else [()] * len(expressions)
+
+        rowids = np.array(values[0], dtype=np.int64)
+        codes, vocabularies = {}, {}
+        for offset, name in enumerate(ENCODED_COLUMNS, start=1):
+            codes[name], vocabularies[name] = encode(values[offset])
+        numbers = {}
+        for offset, name in enumerate(NUMERIC_COLUMNS, start=1 + len(ENCODED_COLUMNS)):
+            numbers[name] = np.array(
+                [np.nan if value is None else value for value in values[offset]], dtype=np.float64
+            )
+        return cls(rowids, codes, vocabularies, numbers)
+
+    def _member_table(self, column: str, wanted: Iterable[str]) -> np.ndarray:
+        """Boolean lookup table over the codes of ``column``: True for wanted values"""
+        vocabulary = self.vocabularies[column]
+        table = np.zeros(len(vocabulary) + 1, dtype=bool)
+        for value in wanted:
+            position = bisect_left(vocabulary, value)
+            if position < len(vocabulary) and vocabulary[position] == value:
+                table[position + 1] = True
+        return table
+
+    def mask(
+        self,
+        districts: Sequence[str] = (),
+        sectors: Sequence[str] = (),
+        statuses: Sequence[str] = (),
+        projects: Sequence[str] = (),
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Rows matching every given filter, as the classification templates match them.
+
+        Empty filters match everything. Districts and sectors are compared as
+        lower-cased keys, statuses as status keys and projects as
+        case-insensitive substrings of the name.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for column, wanted in (
+            ("district", [str(value).lower() for value in districts]),
+            ("sector", [str(value).lower() for value in sectors]),
+            ("status", list(statuses)),
+        ):
+            if wanted:
+                mask &= self._member_table(column, wanted)[self.codes[column]]
+        if projects:
+            terms = [str(project).lower() for project in projects]
+            table = np.array(
+                [False] + [any(term in name for term in terms) for name in self.vocabularies["name"]], dtype=bool
+            )
+            mask &= table[self.codes["name"]]
+        budget = self.numbers["budget"]
+        if budget_min is not None:
+            mask &= budget >= budget_min
+        if budget_max is not None:
+            mask &= budget <= budget_max
+        if start_date is not None:
+            codes = self.codes["start_date"]
+            mask &= (codes > bisect_left(self.vocabularies["start_date"], str(start_date))) & (codes > 0)
+        if end_date is not None:
+            codes = self.codes["end_date"]
+            mask &= (codes <= bisect_right(self.vocabularies["end_date"], str(end_date))) & (codes > 0)
+        return mask
+
+    def name_rank(self, name: str) -> np.ndarray:
+        """Per row: 1 for an exact name match, 2 for a prefix match, 3 otherwise"""
+        name = str(name).lower()
+        ranks = np.array(
+            [3] + [1 if value == name else 2 if value.startswith(name) else 3 for value in self.vocabularies["name"]],
+            dtype=np.int8
+        )
+        return ranks[self.codes["name"]]
+
+    def key_mask(self, column: str, key: str) -> np.ndarray:
+        """Rows whose rollup key for ``column`` is ``key``; NULL and blank values have the key ''"""
+        mask = self._member_table(column, [key])[self.codes[column]]
+        if key == "":
+            mask |= self.codes[column] == 0
+        return mask
+
+    def top_k(self, mask: np.ndarray, k: int, name: Optional[str] = None, by_status: bool = True) -> List[int]:
+        """
+        Row ids of the first ``k`` matching rows, in classification query order.
+
+        That is budget descending (NULLs last), then ongoing before completed
+        projects, then rowid; with ``name``, exact and prefix name matches
+        come first. Without ``by_status`` the order is that of the project
+        listings: budget descending, then rowid.
+        """
+        keys = [self._budget_order, self.numbers["status_rank"], self.rowids]
+        if not by_status:
+            del keys[1]
+        if name is not None:
+            keys.insert(0, self.name_rank(name))
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > k > 0:
+            # Keep every row tied with the k-th on the leading key, then sort only those
+            leading = keys[0][candidates]
+            kth = np.partition(leading, k - 1)[k - 1]
+            candidates = candidates[leading <= kth]
+        order = np.lexsort(tuple(key[candidates] for key in reversed(keys)))
+        return self.rowids[candidates[order[:k]]].tolist()
+
+    def group_totals(self, mask: np.ndarray, by: str, value: str = "budget") -> Dict[Optional[str], Tuple[int, float]]:
+        """``{group: (row count, sum of value)}`` over the matching rows, NULL values counting as 0"""
+        codes = self.codes[by][mask]
+        size = len(self.vocabularies[by]) + 1
+        counts = np.bincount(codes, minlength=size)
+        sums = np.bincount(codes, weights=np.nan_to_num(self.numbers[value][mask]), minlength=size)
+        labels = [None] + self.vocabularies[by]
+        return {
+            labels[code]: (int(counts[code]), float(sums[code]))
+            for code in np.flatnonzero(counts)
+        }
+
+
+def _listing_query(snapshot: ColumnarSnapshot, query: BoundQuery) -> BoundQuery:
+    column = LISTING_FILTERS[query.template]
+    if column is None:
+        mask = np.ones(len(snapshot), dtype=bool)
+    else:
+        mask = snapshot.key_mask(column, str(query.params[column]).lower())
+    rowids = snapshot.top_k(mask, LISTING_PAGE_SIZE, by_status=False)
+    return QUERY_TEMPLATES.bind("project.listing.rows", rowids=json.dumps(rowids), total=int(mask.sum()))
+
+
+def _group_totals(snapshot: ColumnarSnapshot, mask: np.ndarray, by: Optional[str], value: str) -> Dict[str, Tuple[int, float]]:
+    """``group_totals`` keyed by rollup key (NULL and blank merged into ''), or one '' group without ``by``"""
+    if by is None:
+        return {"": (int(mask.sum()), float(np.nansum(snapshot.numbers[value][mask])))} if mask.any() else {}
+    totals: Dict[str, Tuple[int, float]] = {}
+    for label, (count, total) in snapshot.group_totals(mask, by, value).items():
+        previous_count, previous_total = totals.get(label or "", (0, 0.0))
+        totals[label or ""] = (previous_count + count, previous_total + total)
+    return totals
+
+
+def _aggregate_query(snapshot: ColumnarSnapshot, query: BoundQuery) -> BoundQuery:
+    params = query.params
+    group_by = None if params["group_by"] == ROLLUP_ALL else params["group_by"]
+    mask = np.ones(len(snapshot), dtype=bool)
+    for dimension in ROLLUP_DIMENSIONS:
+        if dimension != group_by and params[dimension] != ROLLUP_ALL:
+            mask &= snapshot.key_mask(dimension, params[dimension])
+
+    # Sums over every matching row, averages over the rows where the value is known
+    groups: Dict[str, Dict[str, Any]] = {}
+    for name, value in _AGGREGATE_VALUES:
+        known = mask & ~np.isnan(snapshot.numbers[value])
+        for key, (count, total) in _group_totals(snapshot, mask, group_by, value).items():
+            groups.setdefault(key, {})["project_count"] = count
+            groups[key][f"{name}_sum"] = total
+        for key, (count, _) in _group_totals(snapshot, known, group_by, value).items():
+            groups[key][f"{name}_n"] = count
+
+    rows = []
+    for key, group in groups.items():
+        row = {"measure": params["measure"], "group_by": group_by}
+        row.update({dimension: key if dimension == group_by else params[dimension] for dimension in ROLLUP_DIMENSIONS})
+        budgeted, spent, rated = group.get("budget_n", 0), group.get("expenditure_n", 0), group.get("completion_n", 0)
+        row.update({
+            "project_count": group["project_count"],
+            "total_budget": group["budget_sum"],
+            "budgeted_count": budgeted,
+            "average_budget": group["budget_sum"] / budgeted if budgeted else None,
+            "total_expenditure": group["expenditure_sum"],
+            "average_expenditure": group["expenditure_sum"] / spent if spent else None,
+            "average_completion": group["completion_sum"] / rated if rated else None,
+        })
+        rows.append(row)
+    # ORDER BY the measure DESC (NULLs last) LIMIT 50, as aggregate.scan does
+    column = MEASURES.get(params["measure"], MEASURES["count"])[1]
+    rows.sort(key=lambda row: -row[column] if row[column] is not None else math.inf)
+    return QUERY_TEMPLATES.bind("aggregate.rows", rows=json.dumps(rows[:50]))
+
+
+def select_in_memory(snapshot: ColumnarSnapshot, query: Any) -> Optional[BoundQuery]:
+    """
+    Query fetching the answer to ``query`` as selected by the snapshot, or
+    None when the snapshot does not evaluate that template
+    """
+    template = getattr(query, "template", None)
+    if template in LISTING_FILTERS:
+        return _listing_query(snapshot, query)
+    if template == "aggregate.scan":
+        return _aggregate_query(snapshot, query)
+    return None
+
+
+_snapshots: Dict[str, Tuple[Tuple, ColumnarSnapshot]] = {}
+_snapshots_lock = threading.Lock()
+
+
+def current_snapshot(db_path: str) -> Optional[ColumnarSnapshot]:
+    """The snapshot of a database file if one is built and up to date; never builds one"""
+    key = os.path.realpath(db_path)
+    entry = _snapshots.get(key)
+    if entry is not None and entry[0] == file_version(key):
+        return entry[1]
+    return None
+
+
+def get_snapshot(db_path: str) -> Optional[ColumnarSnapshot]:
+    """Shared snapshot of a database file, rebuilt when the file changes; None if it cannot be read"""
+    key = os.path.realpath(db_path)
+    version = file_version(key)
+    entry = _snapshots.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _snapshots_lock:
+        entry = _snapshots.get(key)
+        if entry is None or entry[0] != version:
+            start_time = time.perf_counter()
+            try:
+                conn = sqlite3.connect(f"file:{quote(key)}?mode=ro", uri=True)
+                try:
+                    snapshot = ColumnarSnapshot.load(conn)
+                finally:
+                    conn.close()
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Could not build columnar snapshot of {key}: {str(e)}")
+                return None
+            logger.info(f"Built columnar snapshot of {key} with {len(snapshot)} rows "
+                        f"in {time.perf_counter() - start_time:.2f}s")
+            entry = (version, snapshot)
+            _snapshots[key] = entry
+    return entry[1]
@@ -1,13 +1,34 @@
-from typing import Dict, List, Any, Union, Optional, Tuple
+from typing import Dict, List, Any, AsyncIterator, Mapping, Union, Optional, Tuple
 from datetime import datetime
+import asyncio
 import logging
 import time
 import traceback
 import os
 import re
+from types import MappingProxyType
 from pydantic import BaseModel, Field, ValidationError
 from together import Together
 from ..models import DatabaseManager
+from ..llm.client import LLMClientError, get_llm_client
+from ..llm.transport import replaying
+from ..utils.gazetteer import Gazetteer, get_gazetteer
+from ..utils.fuzzy_index import TrigramIndex, get_name_index
+from ..utils.speculation import speculate
+from ..utils.single_flight import SingleFlight, canonical_question
+from ..core.config import settings
+from ..core.metrics import span, timed
+from .query_templates import QUERY_TEMPLATES, BoundQuery, SQLQuery, display_sql, fts_prefix_query
+from .migrations import canonical_status, has_filter_keys, has_rollups, has_search_index, normalise_key
+from .aggregates import (
+    AggregateRequest, bind_aggregate, format_aggregate_results, match_fiscal_year, parse_aggregate_question
+)
+from .result_cache import file_version, get_result_cache
+from .async_executor import get_db_executor
+from .columnar import ColumnarSnapshot, current_snapshot, get_snapshot, select_in_memory
+from .pagination import LISTING_PAGE_SIZE, InvalidCursorError, PageCountCache, PageCursor, strip_sort_keys
+from .rows import Row, make_rows
+from .column_plan import ColumnPlan, DisplayField, column
 import os
 import json
 import sqlite3
@@ -15,9 +36,155 @@ import pandas as pd
 # Import the new LLM classification module
 from ..llm_classification.service import QueryClassificationService
 from ..llm_classification.classifier import QueryType
+from ..llm_classification.intent import INTENTS, IntentPrediction, LocalIntentClassifier
 
 logger = logging.getLogger(__name__)
 
+# Valid Malawi districts as stored in proj_dashboard
+VALID_DISTRICTS = (
+    'Balaka', 'Blantyre', 'Chikwawa', 'Chiradzulu', 'Chitipa', 'Dedza', 
+    'Dowa', 'Karonga', 'Kasungu', 'Likoma', 'Lilongwe', 'Machinga', 
+    'Mangochi', 'Mchinji', 'Mulanje', 'Mwanza', 'Mzimba', 'Neno', 
+    'Nkhata Bay', 'Nkhotakota', 'Nsanje', 'Ntcheu', 'Ntchisi', 'Phalombe', 
+    'Rumphi', 'Salima', 'Thyolo', 'Zomba'
+)
+
+# Common misspellings and aliases mapped to district names
+DISTRICT_VARIATIONS = MappingProxyType({
+    "nkhatabay": "Nkhata Bay",
+    "nkata bay": "Nkhata Bay",
+    "nkhotacota": "Nkhotakota",
+    "lilongway": "Lilongwe",
+    "blantire": "Blantyre",
+    "blantrye": "Blantyre",
+    "zomba city": "Zomba",
+    "mzuzu": "Mzimba",  # Mzuzu is in Mzimba district
+})
+
+# Sector keywords mapped to exact database values
+SECTOR_MAPPING = MappingProxyType({
+    "Education": ("education", "school", "training", "learning", "college", "university", "classroom"),
+    "Roads and bridges": ("road", "bridge", "transport", "highway", "railway", "infrastructure"),
+    "Commercial services": ("commercial", "market", "business", "trade", "shop", "service"),
+    "Health": ("health", "healthcare", "medical", "hospital", "clinic", "dispensary", "maternity"),
+    "Water and sanitation": ("water", "sanitation", "irrigation", "dam", "borehole", "sewage", "waste", "drainage"),
+    "Agriculture and environment": ("agriculture", "farming", "crops", "livestock", "irrigation", "environment", "environmental"),
+    "Community security initiatives": ("security", "police", "community security", "police unit", "safety")
+})
+
+# Words that imply a sector in a question, beyond the sector names themselves
+SECTOR_KEYWORDS = MappingProxyType({
+    "Education": ("school", "classroom", "education", "teacher", "student", "learning", "teaching", "college", "university"),
+    "Health": ("hospital", "clinic", "health", "medical", "healthcare", "doctor", "nurse", "patient", "disease", "treatment", "medicine"),
+    "Roads and bridges": ("road", "bridge", "highway", "street", "transport", "transportation", "traffic", "infrastructure"),
+    "Water and sanitation": ("water", "sanitation", "hygiene", "toilet", "borehole", "sewage", "drainage"),
+    "Agriculture and environment": ("agriculture", "farming", "crop", "livestock", "irrigation", "environment", "conservation", "forest"),
+    "Commercial services": ("market", "business", "commercial", "trade", "shop", "store", "enterprise", "economic", "commerce"),
+    "Community security initiatives": ("security", "police", "safety", "protection", "crime", "guard", "patrol"),
+})
+
+
+def _static_gazetteer_terms() -> Tuple[Tuple[str, str, str], ...]:
+    """(term, kind, value) for the curated district spellings and sector keywords"""
+    terms = [(district, "district", district) for district in VALID_DISTRICTS]
+    terms += [(variation, "district", district) for variation, district in DISTRICT_VARIATIONS.items()]
+    for mapping in (SECTOR_KEYWORDS, SECTOR_MAPPING):
+        for sector, keywords in mapping.items():
+            terms.append((sector, "sector", sector))
+            for keyword in keywords:
+                terms.append((keyword, "sector", sector))
+                if not keyword.endswith("s"):
+                    terms.append((keyword + "s", "sector", sector))
+    return tuple(terms)
+
+
+# Curated terms merged with the database values in the gazetteer
+GAZETTEER_TERMS = _static_gazetteer_terms()
+
+# Minimum trigram similarity for a misspelt name to be corrected to an indexed one
+PROJECT_MATCH_SCORE = 0.6
+DISTRICT_MATCH_SCORE = 0.5
+
+# Phrasings that name a district, for misspelt names the gazetteer does not know
+_DISTRICT_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:in|at|from|of|for)\s+(?:the\s+)?([a-zA-Z\s]+?)(?:\s+district|\s*(?:$|[,\.]|\s+(?:and|or|projects?|sector)))',
+    r'([a-zA-Z\s]+?)\s+district\b',
+    r'\b([a-zA-Z]+)(?:\s+projects?|\s+region|\s+area)\b',
+    r'projects?\s+(?:in|at|located in|based in)\s+([a-zA-Z\s]+?)(?:\s+district)?',
+    r'\bin\s+([a-zA-Z]+)\b',
+))
+_DISTRICT_NOISE = re.compile(r'\b(The|And|Or|Projects?|In|At|From|Of|For)\b', re.IGNORECASE)
+
+# Query types of the rule-based path that need no LLM intent check when they return rows
+STRUCTURED_QUERY_TYPES = ("specific", "aggregate", "district_query", "sector_query")
+
+# Gazetteer entity kinds that filter an aggregate question, by rollup dimension
+AGGREGATE_FILTER_KINDS = {"district": "district", "region": "region", "sector": "sector"}
+
+# The optional prefix keeps a negation with the status word, so that
+# canonical_status can refuse "not completed" instead of reading "completed"
+_AGGREGATE_STATUS = re.compile(
+    r"((?:\b(?:not|never|no longer)|n't)\s+(?:(?:yet|been|be)\s+)*|\b(?:in|un|non)-?|\b)"
+    r"(completed?|finished|ongoing|in progress|on track|active|delayed|behind|stalled|cancelled|approved|pending)\b",
+    re.IGNORECASE
+)
+
+INTENT_PROMPT = """You are an expert at understanding user intent for a Malawi infrastructure projects database. The database contains ONLY the following information:
+            - Project names and locations (districts)
+            - Project sectors (Infrastructure, Education, etc.)
+            - Project status (Active, Completed, etc.)
+            - Project budgets and completion percentages
+            - Project start and completion dates
+
+            Given this user query, determine if it is:
+            1. A GREETING (e.g., hello, hi, hey)
+            2. A GENERAL QUESTION about what the system can do
+            3. A SPECIFIC QUESTION about projects that needs SQL (ONLY if it asks about data we actually have)
+            4. OTHER (if it asks about data we don't have, like ages, names of people, etc.)
+            
+            Respond with just one word: GREETING, GENERAL, SQL, or OTHER.
+            
+            User query: {query}"""
+
+def _display_budget(value: Any) -> str:
+    try:
+        return f"MWK {float(value):,.2f}"
+    except (ValueError, TypeError):
+        return "Unknown"
+
+
+def _display_location(district: Any, region: Any, ta: Any) -> str:
+    """Location from district, region and traditional authority"""
+    parts = [str(part) for part in (district, region, ta) if part is not None]
+    return ", ".join(parts) if parts else "Unknown"
+
+
+def _fetch_one(conn: sqlite3.Connection, query: SQLQuery) -> Optional[Any]:
+    """First row of a query on a pooled connection (for ``run_on``)"""
+    return QUERY_TEMPLATES.execute_fetchone(conn.cursor(), query)
+
+
+def _fetch_all(conn: sqlite3.Connection, query: SQLQuery) -> List[Any]:
+    """Every row of a query on a pooled connection (for ``run_on``)"""
+    return QUERY_TEMPLATES.execute_fetchall(conn.cursor(), query)
+
+
+# Columns of the project list shown for listings, in display order:
+# display label <- source columns -> formatter
+PROJECT_LIST_PLAN = ColumnPlan([
+    column("Name of project", "PROJECTNAME", "project_name", missing="Unknown"),
+    column("Fiscal year", "FISCALYEAR", "fiscal_year", missing="Unknown"),
+    DisplayField("Location", (("DISTRICT",), ("REGION",), ("TRADITIONALAUTHORITY", "traditional_authority")),
+          _display_location, missing="Unknown"),
+    column("Budget", "BUDGET", "total_budget", format=_display_budget, missing="Unknown"),
+    column("Status", "PROJECTSTATUS", "status", missing="Unknown"),
+    column("Sector", "PROJECTSECTOR", "project_sector", missing="Unknown"),
+])
+PROJECT_LIST_FIELDS = tuple(PROJECT_LIST_PLAN.labels)
+
+# Project rows per table chunk on the streaming endpoint
+STREAM_CHUNK_SIZE = 5
+
 class SQLQueryError(Exception):
     """Custom exception for SQL query generation errors"""
     def __init__(self, message: str, query: str = "", stage: str = "", details: Dict[str, Any] = None):
@@ -87,7 +254,12 @@ class QueryResult(BaseModel):
     completion_date: Optional[str] = Field(None, description="Project completion date")
 
 class LangChainSQLIntegration:
-    """Integration with LangChain for SQL query generation"""
+    """Integration with LangChain for SQL query generation
+    
+    Construction is expensive (Together client, API probe, database manager and
+    classifier), so the application creates one instance at startup and shares
+    it across requests via ``app.dependencies.get_sql_chain``.
+    """
     
     def __init__(self):
         """Initialize the integration"""
@@ -96,70 +268,154 @@ class LangChainSQLIntegration:
             model = os.getenv("LLM_MODEL", "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo-128K")
             temperature = float(os.getenv("LLM_TEMPERATURE", "0.1"))
             
-            # Get API key from environment
+            # Get API key from environment; replayed responses
+            # (LLM_TRANSPORT_MODE=replay) need no key or network
+            replay = replaying()
             api_key = os.getenv("TOGETHER_API_KEY")
-            if not api_key:
+            if not api_key and not replay:
                 raise ValueError("TOGETHER_API_KEY environment variable is not set")
             
             # Set the API key directly
             import together
             together.api_key = api_key
             
-            # Initialize Together client
-            self.client = Together()
+            # Initialize Together client (model listing only) and the shared
+            # async client used for every completion
+            self.client = Together() if not replay else None
+            self.llm = get_llm_client()
             self.model = model
             self.temperature = temperature
             
             # Initialize database manager
             self.db_manager = DatabaseManager()
             
+            # Use the indexed filter columns, search index and aggregate
+            # rollups when the database has been migrated
+            self.filter_keys, self.search_index, self.rollups = self._detect_schema_features()
+            
+            # Listing totals shared by every page of the same filter
+            self.page_counts = PageCountCache()
+            
+            # Results of repeated queries, dropped whenever the database file changes
+            self.result_cache = get_result_cache(self.db_manager.db_path)
+            
+            # Identical questions asked at the same time share one computation
+            self.in_flight = SingleFlight()
+            
+            # Regex intent stage that lets get_answer skip the intent prompt
+            self.intent_classifier = LocalIntentClassifier()
+            
             # Initialize the query classification service
             self.query_classifier = QueryClassificationService()
+            self.query_classifier.use_filter_keys = self.filter_keys
             
             # Test the API connection and log available models
-            try:
-                models = self.client.models.list()
-                logger.info("Successfully connected to Together API")
-                logger.info(f"Using model: {self.model}")
-            except Exception as e:
-                logger.warning(f"Could not fetch model list: {str(e)}")
-            
-            # Initialize list of valid districts
-            self.valid_districts = [
-                'Balaka', 'Blantyre', 'Chikwawa', 'Chiradzulu', 'Chitipa', 'Dedza', 
-                'Dowa', 'Karonga', 'Kasungu', 'Likoma', 'Lilongwe', 'Machinga', 
-                'Mangochi', 'Mchinji', 'Mulanje', 'Mwanza', 'Mzimba', 'Neno', 
-                'Nkhata Bay', 'Nkhotakota', 'Nsanje', 'Ntcheu', 'Ntchisi', 'Phalombe', 
-                'Rumphi', 'Salima', 'Thyolo', 'Zomba'
-            ]
-            
-            # Initialize district variations mapping
-            self.district_variations = {
-                "nkhatabay": "Nkhata Bay",
-                "nkata bay": "Nkhata Bay",
-                "nkhotacota": "Nkhotakota",
-                "lilongway": "Lilongwe",
-                "blantire": "Blantyre",
-                "blantrye": "Blantyre",
-                "zomba city": "Zomba",
-                "mzuzu": "Mzimba",  # Mzuzu is in Mzimba district
-            }
+            if replay:
+                logger.info(f"Replaying recorded LLM responses for model: {self.model}")
+            else:
+                try:
+                    models = self.client.models.list()
+                    logger.info("Successfully connected to Together API")
+                    logger.info(f"Using model: {self.model}")
+                except Exception as e:
+                    logger.warning(f"Could not fetch model list: {str(e)}")
             
-            # Initialize sector mapping with exact database values
-            self.sector_mapping = {
-                "Education": ["education", "school", "training", "learning", "college", "university", "classroom"],
-                "Roads and bridges": ["road", "bridge", "transport", "highway", "railway", "infrastructure"],
-                "Commercial services": ["commercial", "market", "business", "trade", "shop", "service"],
-                "Health": ["health", "healthcare", "medical", "hospital", "clinic", "dispensary", "maternity"],
-                "Water and sanitation": ["water", "sanitation", "irrigation", "dam", "borehole", "sewage", "waste", "drainage"],
-                "Agriculture and environment": ["agriculture", "farming", "crops", "livestock", "irrigation", "environment", "environmental"],
-                "Community security initiatives": ["security", "police", "community security", "police unit", "safety"]
-            }
+            # District and sector lookup tables are module constants so every
+            # request sharing this instance reads the same immutable data
+            self.valid_districts = VALID_DISTRICTS
+            self.district_variations = DISTRICT_VARIATIONS
+            self.sector_mapping = SECTOR_MAPPING
             
         except Exception as e:
             logger.error(f"Error initializing LangChainSQLIntegration: {str(e)}")
             raise
 
+    async def aclose(self) -> None:
+        """Release the Together client and database resources on shutdown"""
+        close = getattr(self.client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"Error closing Together client: {str(e)}")
+        logger.info("LangChainSQLIntegration closed")
+
+    def _detect_schema_features(self) -> Tuple[bool, bool, bool]:
+        """Check whether proj_dashboard has the filter key columns, search index and rollups"""
+        try:
+            with self.db_manager.get_connection() as conn:
+                filter_keys = has_filter_keys(conn)
+                search_index = has_search_index(conn)
+                rollups = has_rollups(conn)
+        except Exception as e:
+            logger.warning(f"Could not inspect proj_dashboard schema: {str(e)}")
+            return False, False, False
+        if not filter_keys:
+            logger.warning("proj_dashboard has no filter key columns, using LIKE filters "
+                           "(run app/database/migrations.py to add them)")
+        if not search_index:
+            logger.warning("proj_dashboard has no search index, using LIKE name lookups")
+        if not rollups:
+            logger.warning("proj_dashboard has no aggregate rollups, computing aggregates by scanning")
+        return filter_keys, search_index, rollups
+
+    def _canonical_district(self, district: str) -> Optional[str]:
+        """Map a district mention to its stored name, or None if it is not one"""
+        key = normalise_key(district)
+        if not key:
+            return None
+        for valid_district in self.valid_districts:
+            if valid_district.lower() == key:
+                return valid_district
+        return self.district_variations.get(key.replace(" ", "")) or self.district_variations.get(key)
+
+    def _canonical_sector(self, sector: str) -> Optional[str]:
+        """Map a sector mention ("roads", "water") to its stored sector name"""
+        key = normalise_key(sector)
+        if not key:
+            return None
+        for sector_name, keywords in self.sector_mapping.items():
+            if sector_name.lower() == key:
+                return sector_name
+        for candidate in (key, key.rstrip("s")):
+            for sector_name, keywords in self.sector_mapping.items():
+                if candidate in keywords:
+                    return sector_name
+        return None
+
+    async def _refresh_indexes(self) -> None:
+        """
+        Rebuild the gazetteer and name indexes on a database thread when the
+        data has changed, so the lookups that follow only read them
+        """
+        version = file_version(os.path.realpath(self.db_manager.db_path))
+        if getattr(self, "_indexes_version", None) == version:
+            return
+        await get_db_executor().run(self._build_indexes)
+        self._indexes_version = version
+
+    def _build_indexes(self) -> None:
+        self._gazetteer()
+        self._name_index("project")
+        self._name_index("district")
+
+    def _gazetteer(self) -> Gazetteer:
+        """Entity gazetteer for this database, rebuilt when its data changes"""
+        return get_gazetteer(self.db_manager.db_path, GAZETTEER_TERMS)
+
+    def _name_index(self, kind: str) -> TrigramIndex:
+        """Trigram index of project or district names, rebuilt when the data changes"""
+        static_values = self.valid_districts if kind == "district" else ()
+        return get_name_index(self.db_manager.db_path, kind, static_values)
+
+    def _closest_project_name(self, text: str) -> str:
+        """The indexed project name closest to a possibly misspelt one, if close enough"""
+        try:
+            return self._name_index("project").best(text, min_score=PROJECT_MATCH_SCORE) or ""
+        except Exception as e:
+            logger.warning(f"Project name index lookup failed: {str(e)}")
+            return ""
+
     async def _extract_sql_from_text(self, text: str) -> str:
         """Extract SQL query from LLM response"""
         logger.info(f"Extracting SQL from text: {repr(text)}")
@@ -191,12 +447,11 @@ class LangChainSQLIntegration:
     async def _get_llm_response(self, prompt: str) -> str:
         """Get response from LLM using Together API"""
         try:
-            import together
             logger.info(f"Sending prompt to LLM: {repr(prompt)}")
             
-            # Use the Together API directly with the completion endpoint
-            response = together.Complete.create(
-                prompt=prompt,
+            # Non-blocking completion over the shared pooled client
+            completion = await self.llm.complete(
+                prompt,
                 model=self.model,
                 max_tokens=1024,
                 temperature=self.temperature,
@@ -206,7 +461,7 @@ class LangChainSQLIntegration:
             )
             
             # Extract the raw text from the response
-            raw_text = response['output']['choices'][0]['text']
+            raw_text = completion.text
             logger.info(f"Raw LLM response: {repr(raw_text)}")
             
             # For intent detection, just return the raw text
@@ -357,28 +612,18 @@ Just ask me what you'd like to know about these projects!"""
         WHERE LOWER(projectsector) LIKE '%infrastructure%';
         """.strip()
 
-    def _get_basic_project_query(self, district: str = None, status: str = None) -> str:
+    def _get_basic_project_query(self, district: str = None, status: str = None) -> BoundQuery:
         """Get SQL query for basic project information"""
-        conditions = []
+        status_key = canonical_status(status) if status else None
+        if not self.filter_keys or (status and not status_key):
+            return QUERY_TEMPLATES.bind("project.basic.like", district=district or None, status=status or None)
+        if district and status_key:
+            return QUERY_TEMPLATES.bind("project.basic.district_status", district=district, status=status_key)
         if district:
-            conditions.append(f"LOWER(district) = '{district.lower()}'")
-        if status:
-            conditions.append(f"LOWER(projectstatus) = '{status.lower()}'")
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        
-        return f"""
-        SELECT 
-            projectname as project_name,
-            district,
-            projectsector as project_sector,
-            projectstatus as project_status,
-            COALESCE(budget, 0) as total_budget,
-            COALESCE(completionpercentage, 0) as completion_percentage
-        FROM proj_dashboard 
-        WHERE {where_clause}
-        ORDER BY total_budget DESC;
-        """.strip()
+            return QUERY_TEMPLATES.bind("project.basic.district", district=district)
+        if status_key:
+            return QUERY_TEMPLATES.bind("project.basic.status", status=status_key)
+        return QUERY_TEMPLATES.bind("project.basic")
 
     def _get_total_budget_query(self) -> str:
         """Get query for total budget across all projects"""
@@ -390,79 +635,31 @@ Just ask me what you'd like to know about these projects!"""
             FROM proj_dashboard;
         """
 
-    async def _extract_sector(self, user_query: str) -> Optional[str]:
-        """Extract sector from user query"""
-        try:
-            query = user_query.lower()
-            
-            # Define exact sector mappings with their lowercase versions for matching
-            sectors = {
-                'Education': ['education', 'school', 'classroom', 'teaching', 'learning', 'educational'],
-                'Roads and bridges': ['roads and bridges', 'road', 'bridge', 'transport', 'road infrastructure'],
-                'Commercial services': ['commercial services', 'commercial', 'business', 'trade', 'market'],
-                'Health': ['health', 'hospital', 'clinic', 'medical', 'healthcare', 'health center'],
-                'Water and sanitation': ['water and sanitation', 'water', 'sanitation', 'borehole', 'hygiene'],
-                'Agriculture and environment': ['agriculture and environment', 'agriculture', 'farming', 'crops', 'environment'],
-                'Community security initiatives': ['community security', 'security', 'police', 'safety']
-            }
-            
-            # Log what we're looking for
-            logger.info(f"Extracting sector from query: '{query}'")
-            
-            # First check for exact sector mentions
-            for sector, keywords in sectors.items():
-                # Check for exact name match first
-                if sector.lower() in query:
-                    logger.info(f"Found exact sector match: {sector}")
-                    return sector
-                
-                # Then check for keyword matches
-                for keyword in keywords:
-                    if f" {keyword} " in f" {query} ":
-                        logger.info(f"Found sector '{sector}' from keyword: '{keyword}'")
-                        return sector
-            
-            # Second pass: check for partial matches at word boundaries
-            for sector, keywords in sectors.items():
-                for keyword in keywords:
-                    if keyword in query.split():
-                        logger.info(f"Found sector '{sector}' from word boundary match: '{keyword}'")
-                        return sector
-            
-            # Third pass: check for contains matches for short queries
-            if len(query.split()) <= 10:  # Only for short queries to avoid false positives
-                for sector, keywords in sectors.items():
-                    for keyword in keywords:
-                        if len(keyword) > 3 and keyword in query:  # Only match keywords longer than 3 chars
-                            logger.info(f"Found sector '{sector}' from substring match: '{keyword}'")
-                            return sector
-            
-            logger.info("No sector found in query")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error extracting sector: {str(e)}")
-            logger.error(traceback.format_exc())
-            return None
-
-    async def generate_sql_query(self, query: str) -> Union[str, Tuple[str, str], Tuple[str, str]]:
+    @timed("sql_build")
+    async def generate_sql_query(self, query: str) -> Tuple[Union[SQLQuery, Tuple[SQLQuery, SQLQuery]], str]:
         """Generate SQL query based on user input."""
         logging.info(f"Generating SQL query for: {query}")
         
         # First try to extract project name
+        await self._refresh_indexes()
         project_name = await self._extract_project_name(query)
         if project_name:
             logging.info(f"Found specific project query: {project_name}")
             sql = self._build_specific_project_sql(project_name)
             return sql, "specific"
+        
+        # Counts, totals and averages are read from the aggregate rollups
+        aggregate = await self._build_aggregate_sql(query)
+        if aggregate is not None:
+            logging.info(f"Found aggregate query: {aggregate.template}")
+            return aggregate, "aggregate"
             
         # Check for district query
         district_match = re.search(r'(?:in|at|for)\s+(?:the\s+)?([A-Za-z]+)\s+(?:district|area)', query.lower())
         if district_match:
             district = district_match.group(1)
             logging.info(f"Found district query: {district}")
-            count_sql, results_sql = self._build_district_sql(district)
-            return (count_sql, results_sql), "district_query"
+            return self._build_district_sql(district), "district_query"
             
         # Check for sector query
         sector_keywords = ['health', 'education', 'agriculture', 'water', 'sanitation', 'transport', 'roads']
@@ -471,143 +668,87 @@ Just ask me what you'd like to know about these projects!"""
             sector = sector_match.group(1)
             if sector.lower() in sector_keywords:
                 logging.info(f"Found sector query: {sector}")
-                count_sql, results_sql = self._build_sector_sql(sector)
-                return (count_sql, results_sql), "sector_query"
+                return self._build_sector_sql(sector), "sector_query"
         
         # Default to general query
         logging.info("No specific criteria found, using general query")
         sql = self._build_general_query_sql()
         return sql, "general"
 
-    def _build_specific_project_sql(self, project_name: str) -> str:
+    def _build_specific_project_sql(self, project_name: str) -> BoundQuery:
         """Build SQL query for specific project search."""
-        sql = f"""SELECT 
-                        PROJECTNAME as project_name,
-                        PROJECTCODE as project_code,
-                        PROJECTSECTOR as project_sector,
-                        PROJECTSTATUS as status,
-                        STAGE,
-                        REGION,
-                        DISTRICT,
-                        TRADITIONALAUTHORITY,
-                        BUDGET as total_budget,
-                        TOTALEXPENDITUREYEAR as total_expenditure,
-                        FUNDINGSOURCE as funding_source,
-                        STARTDATE as start_date,
-                        COMPLETIONESTIDATE as completion_date,
-                        LASTVISIT as last_monitoring_visit,
-                        COMPLETIONPERCENTAGE as completion_progress,
-                        CONTRACTORNAME as contractor,
-                        SIGNINGDATE as contract_signing_date,
-                        PROJECTDESC as description,
-                        FISCALYEAR as fiscal_year
-                  FROM proj_dashboard
-                    WHERE LOWER(PROJECTNAME) LIKE LOWER('%{project_name}%')
-                    ORDER BY 
-                        CASE 
-                            WHEN LOWER(PROJECTNAME) = LOWER('{project_name}') THEN 1
-                            WHEN LOWER(PROJECTNAME) LIKE LOWER('{project_name}%') THEN 2
-                            WHEN LOWER(PROJECTNAME) LIKE LOWER('%{project_name}%') THEN 3
-                            ELSE 4
-                        END,
-                        BUDGET DESC NULLS LAST
-                    LIMIT 10;"""
-        return sql
-
-    def _build_district_sql(self, district: str) -> Tuple[str, str]:
-        """Build SQL query for district-specific search."""
-        # Count query
-        count_sql = f"""SELECT COUNT(*) as total_count
-                  FROM proj_dashboard
-                    WHERE LOWER(DISTRICT) LIKE LOWER('%{district}%')"""
-                    
-        # Results query
-        results_sql = f"""SELECT 
-                        PROJECTNAME as project_name,
-                        PROJECTCODE as project_code,
-                        PROJECTSECTOR as project_sector,
-                        PROJECTSTATUS as status,
-                        STAGE,
-                        REGION,
-                        DISTRICT,
-                        TRADITIONALAUTHORITY,
-                        BUDGET as total_budget,
-                        TOTALEXPENDITUREYEAR as total_expenditure,
-                        FUNDINGSOURCE as funding_source,
-                        STARTDATE as start_date,
-                        COMPLETIONESTIDATE as completion_date,
-                        LASTVISIT as last_monitoring_visit,
-                        COMPLETIONPERCENTAGE as completion_progress,
-                        CONTRACTORNAME as contractor,
-                        SIGNINGDATE as contract_signing_date,
-                        PROJECTDESC as description,
-                        FISCALYEAR as fiscal_year
-                  FROM proj_dashboard
-                    WHERE LOWER(DISTRICT) LIKE LOWER('%{district}%')
-                    ORDER BY BUDGET DESC NULLS LAST
-                    LIMIT 10;"""
-        return (count_sql, results_sql)
-
-    def _build_general_query_sql(self) -> str:
+        match = fts_prefix_query(project_name) if self.search_index else None
+        if match:
+            return QUERY_TEMPLATES.bind("project.specific", match=match, name=project_name)
+        return QUERY_TEMPLATES.bind("project.specific.like", name=project_name)
+
+    async def _search_project_name(self, text: str) -> str:
+        """Return the best matching project name from the search index, if any"""
+        match = fts_prefix_query(text) if self.search_index else None
+        if not match:
+            return ""
+        try:
+            row = await get_db_executor().run_on(
+                self.db_manager.pool, _fetch_one, QUERY_TEMPLATES.bind("project.search.names", match=match)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Project name search failed: {str(e)}")
+            return ""
+        return row[0] if row else ""
+
+    async def _build_aggregate_sql(self, query: str) -> Optional[BoundQuery]:
+        """Aggregate query for a count, total or average question, or None for other questions"""
+        request = parse_aggregate_question(query)
+        if request is None:
+            return None
+        
+        filters = {}
+        for match in self._gazetteer().tag(query):
+            dimension = AGGREGATE_FILTER_KINDS.get(match.kind)
+            if dimension and dimension not in filters:
+                filters[dimension] = normalise_key(match.value)
+        status = _AGGREGATE_STATUS.search(query)
+        if status:
+            status_key = canonical_status(status.group(0))
+            if status_key is None:
+                # A negated status cannot be answered from one rollup key
+                logger.info(f"Negated status in aggregate question: {status.group(0)!r}")
+                return None
+            filters["status"] = status_key
+        fiscal_year = match_fiscal_year(query, await self._fiscal_year_labels()) if re.search(r"\b20\d{2}\b", query) else None
+        if fiscal_year:
+            filters["fiscal_year"] = fiscal_year
+        
+        request = AggregateRequest(measure=request.measure, group_by=request.group_by, filters=filters)
+        return bind_aggregate(request, rollups=self.rollups)
+
+    async def _fiscal_year_labels(self) -> List[str]:
+        """Fiscal year labels as stored in the database"""
+        template = "aggregate.fiscal_years" if self.rollups else "aggregate.fiscal_years.scan"
+        try:
+            rows = await get_db_executor().run_on(self.db_manager.pool, _fetch_all, QUERY_TEMPLATES.bind(template))
+        except sqlite3.Error as e:
+            logger.warning(f"Fiscal year lookup failed: {str(e)}")
+            return []
+        return [row[0] for row in rows]
+
+    def _build_district_sql(self, district: str) -> BoundQuery:
+        """Build SQL query for district-specific search (page and total in one statement)."""
+        canonical = self._canonical_district(district) if self.filter_keys else None
+        if canonical:
+            return QUERY_TEMPLATES.bind("project.district.results", district=canonical)
+        return QUERY_TEMPLATES.bind("project.district.results.like", district=district)
+
+    def _build_general_query_sql(self) -> BoundQuery:
         """Build SQL query for general search."""
-        sql = """SELECT 
-                        PROJECTNAME as project_name,
-                        PROJECTCODE as project_code,
-                        PROJECTSECTOR as project_sector,
-                        PROJECTSTATUS as status,
-                        STAGE,
-                        REGION,
-                        DISTRICT,
-                        TRADITIONALAUTHORITY,
-                        BUDGET as total_budget,
-                        TOTALEXPENDITUREYEAR as total_expenditure,
-                        FUNDINGSOURCE as funding_source,
-                        STARTDATE as start_date,
-                        COMPLETIONESTIDATE as completion_date,
-                        LASTVISIT as last_monitoring_visit,
-                        COMPLETIONPERCENTAGE as completion_progress,
-                        CONTRACTORNAME as contractor,
-                        SIGNINGDATE as contract_signing_date,
-                        PROJECTDESC as description,
-                        FISCALYEAR as fiscal_year
-                  FROM proj_dashboard
-                    ORDER BY BUDGET DESC NULLS LAST
-                    LIMIT 10;"""
-        return sql
-
-    def _build_sector_sql(self, sector: str) -> Tuple[str, str]:
-        """Build SQL query for sector-specific search."""
-        # Count query
-        count_sql = f"""SELECT COUNT(*) as total_count
-                  FROM proj_dashboard
-                    WHERE LOWER(PROJECTSECTOR) LIKE LOWER('%{sector}%')"""
-                    
-        # Results query
-        results_sql = f"""SELECT 
-                        PROJECTNAME as project_name,
-                        PROJECTCODE as project_code,
-                        PROJECTSECTOR as project_sector,
-                        PROJECTSTATUS as status,
-                        STAGE,
-                        REGION,
-                        DISTRICT,
-                        TRADITIONALAUTHORITY,
-                        BUDGET as total_budget,
-                        TOTALEXPENDITUREYEAR as total_expenditure,
-                        FUNDINGSOURCE as funding_source,
-                        STARTDATE as start_date,
-                        COMPLETIONESTIDATE as completion_date,
-                        LASTVISIT as last_monitoring_visit,
-                        COMPLETIONPERCENTAGE as completion_progress,
-                        CONTRACTORNAME as contractor,
-                        SIGNINGDATE as contract_signing_date,
-                        PROJECTDESC as description,
-                        FISCALYEAR as fiscal_year
-                  FROM proj_dashboard
-                    WHERE LOWER(PROJECTSECTOR) LIKE LOWER('%{sector}%')
-                    ORDER BY BUDGET DESC NULLS LAST
-                    LIMIT 10;"""
-        return (count_sql, results_sql)
+        return QUERY_TEMPLATES.bind("project.general" if self.filter_keys else "project.general.like")
+
+    def _build_sector_sql(self, sector: str) -> BoundQuery:
+        """Build SQL query for sector-specific search (page and total in one statement)."""
+        canonical = self._canonical_sector(sector) if self.filter_keys else None
+        if canonical:
+            return QUERY_TEMPLATES.bind("project.sector.results", sector=canonical)
+        return QUERY_TEMPLATES.bind("project.sector.results.like", sector=sector)
 
     async def generate_natural_response(self, results: List[Dict[str, Any]], user_query: str, sql_query: str = None, query_type: str = None) -> Dict[str, Any]:
         """Generate a natural language response from query results."""
@@ -924,7 +1065,7 @@ Just ask me what you'd like to know about these projects!"""
                 "metadata": {
                     "total_results": len(results),
                     "query_time": "0.00s",
-                    "sql_query": sql_query
+                    "sql_query": display_sql(sql_query)
                 }
             }
             
@@ -942,6 +1083,53 @@ Just ask me what you'd like to know about these projects!"""
                 }
             }
 
+    def _listing_pagination(self, sql_query: SQLQuery, results: List[Dict[str, Any]], total_count: int) -> Optional[Dict[str, Any]]:
+        """
+        Pagination block for a first listing page, or None if it cannot be paged.
+        
+        Pageable listings hand out a keyset cursor for "show more" and seed the
+        count cache so later pages do not count again. ``results`` must still
+        carry the sort columns.
+        """
+        page = PageCursor.for_listing(sql_query, LISTING_PAGE_SIZE) if results else None
+        if page is None:
+            return None
+        self.page_counts.set(page, total_count)
+        next_page = page.next(results, total_count)
+        return {
+            "has_more": next_page is not None,
+            "current_page": 1,
+            "total_pages": (total_count + page.page_size - 1) // page.page_size,
+            "next_cursor": next_page.encode() if next_page else None,
+            "next_page_command": "show more" if next_page else None
+        }
+
+    @staticmethod
+    def _summary_message(results: List[Dict[str, Any]], total_count: int, query_type: str) -> str:
+        """One-line summary of a listing, e.g. "Found 12 projects in the Health sector." """
+        if query_type == "sector_query":
+            # Extract sector name from the first result if available
+            sector_name = "unknown"
+            if results:
+                for key in ["PROJECTSECTOR", "projectsector", "project_sector"]:
+                    if key in results[0]:
+                        sector_name = results[0][key]
+                        break
+            return f"Found {total_count} projects in the {sector_name} sector."
+        return f"Found {total_count} projects matching your query."
+
+    @staticmethod
+    def _format_project(project: Mapping[str, Any]) -> Dict[str, Any]:
+        """Display values of one project row, keyed by PROJECT_LIST_FIELDS"""
+        return PROJECT_LIST_PLAN.format_rows([project])[0]
+
+    def _format_projects(self, results: List[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+        """Format project rows for display, skipping rows that cannot be formatted"""
+        return PROJECT_LIST_PLAN.format_rows(
+            results, on_error=lambda e: logger.error(f"Error formatting project: {str(e)}")
+        )
+
+    @timed("formatting")
     async def format_response(self, query_results: Union[List[Dict[str, Any]], Tuple[int, List[Dict[str, Any]]]], 
                              sql_query: str, query_time: float, user_query: str, query_type: str) -> Dict[str, Any]:
         """Format the response in a consistent way"""
@@ -950,8 +1138,11 @@ Just ask me what you'd like to know about these projects!"""
             results = query_results[1] if isinstance(query_results, tuple) else query_results
             total_count = query_results[0] if isinstance(query_results, tuple) else len(results)
             
+            pagination = self._listing_pagination(sql_query, results, total_count)
+            strip_sort_keys(results)
+            
             # Format SQL query for metadata
-            formatted_sql = sql_query.strip() if isinstance(sql_query, str) else sql_query[1].strip()
+            formatted_sql = display_sql(sql_query)
             
             # Create metadata
             metadata = {
@@ -959,7 +1150,8 @@ Just ask me what you'd like to know about these projects!"""
                 "query_time": f"{query_time:.2f}s",
                 "sql_query": formatted_sql,
                 "original_query": user_query,
-                "query_type": query_type
+                "query_type": query_type,
+                "result_cache": self._result_cache_summary()
             }
             
             # Handle case where no results found
@@ -969,85 +1161,28 @@ Just ask me what you'd like to know about these projects!"""
                     "metadata": metadata
                 }
             
-            # Format results based on query type
-            formatted_results = []
-            
-            # Add summary message
-            summary_message = ""
-            if query_type == "sector_query":
-                # Extract sector name from the first result if available
-                sector_name = "unknown"
-                if results and len(results) > 0:
-                    # Try to get the sector from the first result
-                    for key in ["PROJECTSECTOR", "projectsector", "project_sector"]:
-                        if key in results[0]:
-                            sector_name = results[0][key]
-                            break
-                
-                summary_message = f"Found {total_count} projects in the {sector_name} sector."
-            else:
-                summary_message = f"Found {total_count} projects matching your query."
+            # Totals and breakdowns are summarised rather than listed
+            if query_type == "aggregate":
+                return {
+                    "response": format_aggregate_results(results),
+                    "metadata": metadata
+                }
             
-            formatted_results.append({
+            # Format results based on query type
+            formatted_results = [{
                 "type": "text",
-                "message": summary_message,
+                "message": self._summary_message(results, total_count, query_type),
                 "data": {}
-            })
+            }]
             
             # Format project details (up to 10)
-            formatted_projects = []
-            for project in results[:10]:
-                try:
-                    project_data = {}
-                    
-                    # Helper function to get values with case-insensitive keys
-                    def get_value(keys):
-                        for key in keys:
-                            if key in project:
-                                return project[key]
-                            if key.lower() in project:
-                                return project[key.lower()]
-                        return "Unknown"
-                    
-                    # Get project name
-                    project_data["Name of project"] = get_value(["PROJECTNAME", "project_name"])
-                    
-                    # Get fiscal year
-                    project_data["Fiscal year"] = get_value(["FISCALYEAR", "fiscal_year"])
-                    
-                    # Get location
-                    district = get_value(["DISTRICT", "district"])
-                    region = get_value(["REGION", "region"])
-                    ta = get_value(["TRADITIONALAUTHORITY", "traditional_authority"])
-                    location_parts = [p for p in [district, region, ta] if p != "Unknown"]
-                    project_data["Location"] = ", ".join(location_parts) if location_parts else "Unknown"
-                    
-                    # Get budget
-                    budget = None
-                    for key in ["BUDGET", "total_budget", "budget"]:
-                        if key in project and project[key] is not None:
-                            try:
-                                budget = float(project[key])
-                                break
-                            except (ValueError, TypeError):
-                                continue
-                    project_data["Budget"] = f"MWK {budget:,.2f}" if budget is not None else "Unknown"
-                    
-                    # Get remaining fields
-                    project_data["Status"] = get_value(["PROJECTSTATUS", "status", "projectstatus"])
-                    project_data["Sector"] = get_value(["PROJECTSECTOR", "project_sector", "projectsector"])
-                    
-                    formatted_projects.append(project_data)
-                except Exception as e:
-                    logger.error(f"Error formatting project: {str(e)}")
-                    continue
-            
+            formatted_projects = self._format_projects(results[:10])
             if formatted_projects:
                 formatted_results.append({
                     "type": "list",
                     "message": "Project List",
                     "data": {
-                        "fields": ["Name of project", "Fiscal year", "Location", "Budget", "Status", "Sector"],
+                        "fields": list(PROJECT_LIST_FIELDS),
                         "values": formatted_projects
                     }
                 })
@@ -1060,10 +1195,13 @@ Just ask me what you'd like to know about these projects!"""
                         "data": {}
                     })
             
-            return {
+            response = {
                 "response": formatted_results,
                 "metadata": metadata
             }
+            if pagination:
+                response["pagination"] = pagination
+            return response
 
         except Exception as e:
             logger.error(f"Error formatting response: {str(e)}")
@@ -1075,119 +1213,267 @@ Just ask me what you'd like to know about these projects!"""
                 }],
                 "metadata": {
                     "error": str(e),
-                    "sql_query": sql_query,
+                    "sql_query": display_sql(sql_query),
                     "query_time": f"{query_time:.2f}s",
                     "original_query": user_query
                 }
             }
 
-    async def execute_query(self, query: Union[str, Tuple[str, str]]) -> Union[List[Dict[str, Any]], Tuple[int, List[Dict[str, Any]]]]:
-        """Execute a SQL query and return results as a list of dictionaries"""
+    async def stream_answer(self, user_query: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a query as a sequence of events, each sent as soon as it is ready.
+        
+        Yields, in order: a ``text`` result with the summary line as soon as the
+        query has run, ``table`` results carrying the project rows in chunks of
+        ``chunk_size``, ``token`` events with the LLM narrative as it is
+        generated, and a final ``metadata`` event. Aggregate questions yield
+        their summary line and table instead of project rows and a narrative.
+        Result payloads use the same shapes as ``format_response``.
+        """
+        start_time = time.time()
+        sql_query, query_type = await self.generate_sql_query(user_query)
+        query_results = await self.execute_query(sql_query)
+        
+        results = query_results[1] if isinstance(query_results, tuple) else query_results
+        total_count = query_results[0] if isinstance(query_results, tuple) else len(results)
+        pagination = self._listing_pagination(sql_query, results, total_count)
+        strip_sort_keys(results)
+        
+        if not results:
+            yield {"event": "result", "result": {
+                "type": "text",
+                "message": f"No projects found matching your query about {user_query}.",
+                "data": {}
+            }}
+        elif query_type == "aggregate":
+            for result in format_aggregate_results(results):
+                yield {"event": "result", "result": result}
+        else:
+            yield {"event": "result", "result": {
+                "type": "text",
+                "message": self._summary_message(results, total_count, query_type),
+                "data": {}
+            }}
+            
+            shown = results[:LISTING_PAGE_SIZE]
+            for offset in range(0, len(shown), chunk_size):
+                rows = self._format_projects(shown[offset:offset + chunk_size])
+                if rows:
+                    yield {"event": "result", "result": {
+                        "type": "table",
+                        "message": "Project List",
+                        "data": {
+                            "headers": list(PROJECT_LIST_FIELDS),
+                            "rows": [[row[field] for field in PROJECT_LIST_FIELDS] for row in rows]
+                        }
+                    }}
+            
+            # The narrative is a nice-to-have: rows already sent stay valid if the LLM fails
+            try:
+                async for text in self.llm.stream(
+                    self._narrative_prompt(user_query, shown, total_count),
+                    model=self.model,
+                    max_tokens=256,
+                    temperature=self.temperature
+                ):
+                    yield {"event": "token", "text": text}
+            except LLMClientError as e:
+                logger.warning(f"Narrative stream failed: {str(e)}")
+                yield {"event": "error", "message": "The narrative summary is unavailable right now."}
+        
+        yield {"event": "metadata", "metadata": {
+            "total_results": total_count,
+            "query_time": f"{time.time() - start_time:.2f}s",
+            "sql_query": display_sql(sql_query),
+            "original_query": user_query,
+            "query_type": query_type,
+            "result_cache": self._result_cache_summary(),
+            "pagination": pagination
+        }}
+
+    def _narrative_prompt(self, user_query: str, results: List[Dict[str, Any]], total_count: int) -> str:
+        """Prompt asking for a short narrative over the projects already shown"""
+        lines = []
+        for project in self._format_projects(results):
+            lines.append("; ".join(f"{field}: {project[field]}" for field in PROJECT_LIST_FIELDS))
+        return (
+            "You are a helpful assistant describing Malawi infrastructure projects.\n"
+            f"Question: {user_query}\n"
+            f"{total_count} projects matched. The largest are:\n"
+            + "\n".join(f"- {line}" for line in lines)
+            + "\nWrite two or three sentences summarising these projects for the user. "
+            "Use only the facts listed above.\nSummary:"
+        )
+
+    @timed("sql_execution")
+    async def execute_query(self, query: Union[SQLQuery, Tuple[SQLQuery, SQLQuery]]) -> Union[List[Dict[str, Any]], Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Execute a SQL query and return results as a list of dictionaries.
+        
+        Queries that carry their match count (a template with a total column)
+        and legacy (count, results) pairs return ``(total_count, results)``;
+        the total is reported once, not copied into every row. Read queries
+        are answered from the result cache while the database is unchanged.
+        With ``COLUMNAR_ENGINE`` on, listings and aggregates the columnar
+        snapshot can evaluate are selected from it (see ``select_in_memory``).
+        """
         try:
-            logger.info(f"Executing query: {query}")
-            
-            # Connect to the database
-            with self.db_manager.get_connection() as connection:
-                cursor = connection.cursor()
-                # Check if we have a tuple of count and results query
-                if isinstance(query, tuple) and len(query) == 2:
-                    count_query, results_query = query
-                    
-                    # Execute count query first
-                    cursor.execute(count_query)
-                    count_result = cursor.fetchone()
-                    total_count = count_result[0] if count_result else 0
-                    logger.info(f"Count query returned: {total_count}")
-                    logger.info(f"Count query was: {count_query}")
-                    
-                    # Then execute results query
-                    cursor.execute(results_query)
-                    columns = [desc[0] for desc in cursor.description]
-                    results = []
-                    logger.info(f"Results query columns: {columns}")
-                    for row in cursor.fetchall():
-                        result = {}
-                        for i, value in enumerate(row):
-                            # Store the original column name
-                            result[columns[i]] = value
-                            
-                            # Also store lowercase version for case-insensitive access
-                            # This helps with formatting where column names may be accessed in different cases
-                            lower_key = columns[i].lower()
-                            if lower_key not in result:
-                                result[lower_key] = value
-                        
-                        # Print the first result to help debug
-                        if len(results) == 0:
-                            logger.info(f"First result keys: {list(result.keys())}")
-                            
-                        results.append(result)
-                    
-                    # If we have results, make sure each result has the total_count field for formatting
-                    if results:
-                        for result in results:
-                            result['total_count'] = total_count
-                            result['total_projects'] = total_count
-                    
-                    logger.info(f"Query results with total_count={total_count} and {len(results)} results")
-                    return total_count, results
-                else:
-                    # Single query case
-                    cursor.execute(query)
-                    columns = [desc[0] for desc in cursor.description]
-                    results = []
-                    logger.info(f"Single query columns: {columns}")
-                    for row in cursor.fetchall():
-                        result = {}
-                        for i, value in enumerate(row):
-                            # Store the original column name
-                            result[columns[i]] = value
-                            
-                            # Also store lowercase version for case-insensitive access
-                            lower_key = columns[i].lower()
-                            if lower_key not in result:
-                                result[lower_key] = value
-                        results.append(result)
-                    return results
+            cached = self.result_cache.get(query)
+            if cached is not None:
+                logger.info(f"Result cache hit for query: {query}")
+                return cached
+            
+            # sqlite3 blocks, so the query runs on a database thread, not the event loop
+            result = await get_db_executor().run_on(
+                self.db_manager.pool, self._run_query, query, self._columnar_snapshot()
+            )
+            self.result_cache.set(query, result)
+            return result
+        except asyncio.CancelledError:
+            logger.info(f"Query cancelled: {query}")
+            raise
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             logger.error(f"Query was: {query}")
             raise SQLQueryError(f"Database error: {str(e)}", str(query), "execution")
 
+    def _columnar_snapshot(self) -> Optional[ColumnarSnapshot]:
+        """
+        The columnar snapshot when ``COLUMNAR_ENGINE`` is on and it is up to date.
+        
+        A missing or stale snapshot is (re)built in the background on a
+        database thread, and queries run as SQL until it is ready.
+        """
+        if not settings.COLUMNAR_ENGINE:
+            return None
+        snapshot = current_snapshot(self.db_manager.db_path)
+        if snapshot is None:
+            build = getattr(self, "_snapshot_build", None)
+            if build is None or build.done():
+                self._snapshot_build = asyncio.ensure_future(
+                    get_db_executor().run(get_snapshot, self.db_manager.db_path)
+                )
+        return snapshot
+
+    def _run_query(
+        self,
+        connection: sqlite3.Connection,
+        query: Union[SQLQuery, Tuple[SQLQuery, SQLQuery]],
+        snapshot: Optional[ColumnarSnapshot] = None
+    ) -> Union[List[Dict[str, Any]], Tuple[int, List[Dict[str, Any]]]]:
+        """Run a query (or count/results pair) on a connection, bypassing the result cache"""
+        if snapshot is not None:
+            query = select_in_memory(snapshot, query) or query
+        logger.info(f"Executing query: {query}")
+        
+        cursor = connection.cursor()
+        # Check if we have a tuple of count and results query
+        if isinstance(query, tuple) and len(query) == 2:
+            count_query, results_query = query
+            
+            # Execute count query first
+            count_result = QUERY_TEMPLATES.execute_fetchone(cursor, count_query)
+            total_count = count_result[0] if count_result else 0
+            logger.info(f"Count query returned: {total_count}")
+            
+            # Then execute results query
+            results, _ = self._fetch_rows(cursor, results_query)
+            logger.info(f"Query results with total_count={total_count} and {len(results)} results")
+            return total_count, results
+        
+        # Single query case
+        total_column = getattr(query, "total_column", None)
+        results, total_count = self._fetch_rows(cursor, query, total_column)
+        if total_column is None:
+            return results
+        
+        logger.info(f"Query results with total_count={total_count} and {len(results)} results")
+        return total_count, results
+
+    def _result_cache_summary(self) -> Dict[str, Any]:
+        """Result cache hit ratio for response metadata"""
+        stats = self.result_cache.get_stats()
+        return {key: stats[key] for key in ("hits", "misses", "hit_ratio")}
+
+    def _fetch_rows(self, cursor: sqlite3.Cursor, query: SQLQuery, total_column: Optional[str] = None) -> Tuple[List[Row], int]:
+        """
+        Execute a query and fetch all rows as ``Row``s sharing one column index.
+        
+        ``total_column`` is lifted out of the rows and returned as the total;
+        every row carries the same window count and an empty page means no
+        matches.
+        """
+        values = QUERY_TEMPLATES.execute_fetchall(cursor, query)
+        columns = [desc[0] for desc in cursor.description]
+        if total_column not in columns:
+            return make_rows(columns, values), len(values)
+        total_count = values[0][columns.index(total_column)] if values else 0
+        return make_rows(columns, values, hidden=[total_column]), total_count
+
+    async def answer_query(self, user_query: str) -> Dict[str, Any]:
+        """
+        Answer a question through generate_sql_query, execute_query and
+        format_response. Identical questions asked concurrently share one
+        computation; each caller gets its own copy of the response.
+        """
+        return await self.in_flight.run(
+            ("query", canonical_question(user_query)),
+            lambda: self._answer_query(user_query)
+        )
+
+    async def _answer_query(self, user_query: str) -> Dict[str, Any]:
+        start_time = time.time()
+        sql_query, query_type = await self.generate_sql_query(user_query)
+        logger.info(f"Generated SQL query: {sql_query}, type: {query_type}")
+        
+        query_results = await self.execute_query(sql_query)
+        query_time = time.time() - start_time
+        
+        return await self.format_response(
+            query_results=query_results,
+            sql_query=sql_query,
+            query_time=query_time,
+            user_query=user_query,
+            query_type=query_type
+        )
+
     async def get_answer(self, user_query: str) -> Dict[str, Any]:
-        """Get answer for user query"""
-        try:
-            # First, detect query intent
-            intent_prompt = """You are an expert at understanding user intent for a Malawi infrastructure projects database. The database contains ONLY the following information:
-            - Project names and locations (districts)
-            - Project sectors (Infrastructure, Education, etc.)
-            - Project status (Active, Completed, etc.)
-            - Project budgets and completion percentages
-            - Project start and completion dates
+        """
+        Get answer for user query; concurrent identical questions are
+        answered by one shared computation (see ``answer_query``).
+        """
+        return await self.in_flight.run(
+            ("answer", canonical_question(user_query)),
+            lambda: self._get_answer(user_query)
+        )
 
-            Given this user query, determine if it is:
-            1. A GREETING (e.g., hello, hi, hey)
-            2. A GENERAL QUESTION about what the system can do
-            3. A SPECIFIC QUESTION about projects that needs SQL (ONLY if it asks about data we actually have)
-            4. OTHER (if it asks about data we don't have, like ages, names of people, etc.)
-            
-            Respond with just one word: GREETING, GENERAL, SQL, or OTHER.
-            
-            User query: {query}"""
-            
-            # First try LLM-based intent detection
-            intent = await self._get_llm_response(intent_prompt.format(query=user_query)).strip().upper()
-            logger.info(f"LLM detected intent: {intent} for query: {user_query}")
-            
-            # If no clear intent, try pattern matching
-            if intent not in ["GREETING", "GENERAL", "SQL", "OTHER"]:
-                if re.search(r'\b(hi|hello|hey|greetings|howdy)\b', user_query.lower()):
-                    intent = "GREETING"
-                elif re.search(r'\b(what|how|tell me about|explain|help|can you|able to)\b', user_query.lower()):
-                    intent = "GENERAL"
-                else:
-                    intent = "OTHER"
-                logger.info(f"Pattern matching detected intent: {intent}")
+    async def _get_answer(self, user_query: str) -> Dict[str, Any]:
+        """
+        Get answer for user query.
+        
+        Confident local intents are acted on directly. Otherwise the LLM
+        intent call and the rule-based SQL path run speculatively side by
+        side: a rule-based answer for a structured question is committed as
+        soon as it is ready and the LLM call is cancelled; a non-SQL intent
+        from the LLM cancels the SQL path. Both are bounded by
+        ``ANSWER_DEADLINE_SECONDS``.
+        """
+        start_time = time.time()
+        try:
+            # Local rules first; the LLM is only asked when they are unsure
+            with span("classification"):
+                prediction = self.intent_classifier.predict(user_query)
+            if self.intent_classifier.should_skip_llm(prediction):
+                intent = prediction.intent
+                self.intent_classifier.record(user_query, prediction)
+                logger.info(f"Local intent: {intent} ({prediction.rule}) for query: {user_query}")
+            elif settings.SPECULATIVE_SQL:
+                intent, answer = await self._speculative_intent(user_query, prediction)
+                if answer is not None:
+                    return answer
+            else:
+                intent = await self._llm_intent(user_query, prediction)
+                self.intent_classifier.record(user_query, prediction, intent)
             
             # Handle greetings
             if intent == "GREETING":
@@ -1228,7 +1514,7 @@ Just ask me what you'd like to know about these projects!"""
                         "results": [{"type": "help", "message": response}],
                         "metadata": {
                             "total_results": 1,
-                            "query_time": "0.1s",
+                            "query_time": f"{time.time() - start_time:.2f}s",
                             "sql_query": ""
                         }
                     }
@@ -1237,17 +1523,8 @@ Just ask me what you'd like to know about these projects!"""
             # Handle SQL queries
             if intent == "SQL":
                 try:
-                    # Generate and execute SQL query
-                    sql_query, query_type = await self.generate_sql_query(user_query)
-                    logger.info(f"Generated SQL query: {sql_query}")
-                    
-                    # Execute query
-                    logger.info(f"Executing SQL query: {sql_query}")
-                    results = await self.execute_query(sql_query)
-                    
-                    # Format response using the format_response function
-                    return await self.format_response(results, sql_query, 0.1, user_query, query_type)
-                    
+                    _, answer = await self._rule_based_answer(user_query)
+                    return answer
                 except Exception as e:
                     logger.error(f"SQL generation/execution failed: {str(e)}")
                     raise
@@ -1271,7 +1548,7 @@ Just ask me what you'd like to know about these projects!"""
                     "results": [{"type": "other", "message": response}],
                     "metadata": {
                         "total_results": 1,
-                        "query_time": "0.1s",
+                        "query_time": f"{time.time() - start_time:.2f}s",
                         "sql_query": ""
                     }
                 }
@@ -1282,6 +1559,72 @@ Just ask me what you'd like to know about these projects!"""
             logger.error(traceback.format_exc())
             raise ValueError(f"Failed to get answer: {str(e)}")
 
+    @timed("classification")
+    async def _llm_intent(self, user_query: str, prediction: IntentPrediction) -> str:
+        """Ask the LLM for the intent, falling back to the local prediction"""
+        intent = (await self._get_llm_response(INTENT_PROMPT.format(query=user_query))).strip().upper()
+        logger.info(f"LLM detected intent: {intent} for query: {user_query}")
+        
+        # If no clear intent, fall back to the local prediction
+        if intent not in INTENTS:
+            intent = prediction.intent
+            logger.info(f"Pattern matching detected intent: {intent}")
+        return intent
+
+    async def _rule_based_answer(self, user_query: str) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Answer through the deterministic SQL path.
+        
+        Returns ``(structured, response)``; ``structured`` is True when the
+        rules recognised a project, district or sector and found rows, i.e.
+        the answer can be trusted without asking the LLM for the intent.
+        """
+        start_time = time.time()
+        sql_query, query_type = await self.generate_sql_query(user_query)
+        logger.info(f"Generated SQL query: {sql_query}")
+        results = await self.execute_query(sql_query)
+        rows = results[1] if isinstance(results, tuple) else results
+        structured = query_type in STRUCTURED_QUERY_TYPES and bool(rows)
+        response = await self.format_response(results, sql_query, time.time() - start_time, user_query, query_type)
+        return structured, response
+
+    async def _speculative_intent(self, user_query: str, prediction: IntentPrediction) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Race the LLM intent call against the rule-based SQL answer.
+        
+        Returns ``(intent, answer)``; ``answer`` is the SQL response when that
+        path was committed, and None when the caller should handle ``intent``.
+        """
+        def accept(name: str, result: Any, results: Dict[str, Any]) -> bool:
+            if name == "sql":
+                structured, _ = result
+                return structured or results.get("intent") == "SQL"
+            # A non-SQL intent makes the SQL path moot; SQL waits for its answer
+            return result != "SQL" or "sql" in results
+        
+        outcome = await speculate(
+            {
+                "intent": self._llm_intent(user_query, prediction),
+                "sql": self._rule_based_answer(user_query),
+            },
+            accept,
+            deadline=settings.ANSWER_DEADLINE_SECONDS
+        )
+        # A cancelled LLM call counts as skipped in the intent statistics
+        llm_intent = outcome.results.get("intent")
+        self.intent_classifier.record(user_query, prediction, llm_intent)
+        
+        if outcome.winner == "intent" and llm_intent != "SQL":
+            return llm_intent, None
+        if "sql" in outcome.results:
+            # Committed, confirmed by the LLM, or the only answer left
+            return "SQL", outcome.results["sql"][1]
+        if "sql" in outcome.errors:
+            raise outcome.errors["sql"]
+        if outcome.timed_out:
+            raise TimeoutError(f"No answer within {settings.ANSWER_DEADLINE_SECONDS}s")
+        raise outcome.errors.get("intent") or RuntimeError("No answer path succeeded")
+
     async def process_query(self, user_query: str) -> Dict[str, Any]:
         """Process a user query and return formatted results"""
         try:
@@ -1297,7 +1640,7 @@ Just ask me what you'd like to know about these projects!"""
             metadata = {
                 "total_results": len(results) if isinstance(results, list) else results[0] if isinstance(results, tuple) else 0,
                 "query_time": f"{query_time:.2f}s",
-                "sql_query": sql_query[1] if isinstance(sql_query, tuple) else sql_query,
+                "sql_query": display_sql(sql_query),
                 "original_query": user_query,
                 "query_type": query_type
             }
@@ -1391,7 +1734,7 @@ Just ask me what you'd like to know about these projects!"""
                     "metadata": {
                         "total_results": 0,
                         "query_time": f"{time.time() - start_time:.2f}s",
-                        "sql_query": sql_query[1] if isinstance(sql_query, tuple) else sql_query
+                        "sql_query": display_sql(sql_query)
                     }
                 }
                 
@@ -1724,40 +2067,56 @@ Example queries:
             logger.error(f"Error formatting specific project: {str(e)}")
             return "Error: Unable to format project details"
 
-    async def process_paginated_query(self, user_query: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
-        """Process a query with pagination parameters"""
+    async def process_paginated_query(self, user_query: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process a listing query one keyset page at a time.
+        
+        Without ``cursor`` the query is parsed and its first page returned;
+        with the ``next_cursor`` token of a previous response the following
+        page is fetched by seeking past that page's last row.
+        """
         start_time = time.time()
         
         try:
-            # Generate the SQL query
-            sql_query = await self._generate_sql_query(user_query)
-            
-            # Modify the query to include pagination
-            if not sql_query.lower().strip().endswith(";"):
-                sql_query += ";"
-                
-            # Remove existing LIMIT clause if present
-            sql_query = re.sub(r"\s+LIMIT\s+\d+\s*;", ";", sql_query)
-            
-            # Add new LIMIT and OFFSET clauses
-            sql_query = sql_query[:-1]  # Remove trailing semicolon
-            sql_query += f" LIMIT {limit} OFFSET {offset};"
-            
-            # Execute the query
-            logger.info(f"Executing paginated SQL query: {sql_query}")
-            results = await self._execute_query(sql_query)
-            
-            # Generate count query to get total results
-            count_query = self._generate_count_query(sql_query)
-            count_results = await self._execute_query(count_query)
-            total_results = count_results[0].get("count", len(results))
-            
-            # Format the response
-            response = await self._format_paginated_results(
-                results, user_query, sql_query, total_results, limit, offset
+            if cursor:
+                page = PageCursor.decode(cursor)
+            else:
+                sql_query, query_type = await self.generate_sql_query(user_query)
+                page = PageCursor.for_listing(sql_query, limit or settings.PAGE_SIZE) if self.filter_keys else None
+                if page is None:
+                    # Not a pageable listing: answer in one response
+                    results = await self.execute_query(sql_query)
+                    return await self.format_response(results, sql_query, time.time() - start_time, user_query, query_type)
+            
+            # Totals are counted once per filter, not once per page
+            total_results = self.page_counts.get(page)
+            if total_results is None:
+                count_rows = await self.execute_query(page.count_query())
+                total_results = count_rows[0]["total_count"] if count_rows else 0
+                self.page_counts.set(page, total_results)
+            
+            page_query = page.page_query()
+            results = await self.execute_query(page_query)
+            next_page = page.next(results, total_results)
+            strip_sort_keys(results)
+            
+            return await self._format_paginated_results(
+                results, page_query, total_results, page, next_page, time.time() - start_time
             )
-            
-            return response
+        except InvalidCursorError as e:
+            logger.warning(f"Rejected pagination cursor: {str(e)}")
+            return {
+                "results": [{
+                    "type": "error",
+                    "message": "This page of results is no longer available. Please ask your question again.",
+                    "data": {}
+                }],
+                "metadata": {
+                    "total_results": 0,
+                    "query_time": f"{time.time() - start_time:.2f}s",
+                    "sql_query": ""
+                }
+            }
         except Exception as e:
             logger.error(f"Error processing paginated query: {str(e)}")
             return {
@@ -1768,67 +2127,29 @@ Example queries:
                 }],
                 "metadata": {
                     "total_results": 0,
-                    "query_time": f"{time.time() - self.start_time:.2f}s",
+                    "query_time": f"{time.time() - start_time:.2f}s",
                     "sql_query": ""
                 }
             }
 
-    def _generate_count_query(self, sql_query: str) -> str:
-        """Generate a count query from a SELECT query"""
-        # Parse the original query
-        from_pos = sql_query.lower().find("from")
-        where_pos = sql_query.lower().find("where")
-        
-        if from_pos == -1:
-            return "SELECT COUNT(*) as count FROM proj_dashboard;"
-        
-        # Extract FROM clause and beyond
-        if where_pos != -1:
-            from_clause = sql_query[from_pos:where_pos]
-            where_clause = sql_query[where_pos:]
-            
-            # Remove ORDER BY, LIMIT and OFFSET clauses
-            order_pos = where_clause.lower().find("order by")
-            limit_pos = where_clause.lower().find("limit")
-            
-            if order_pos != -1:
-                where_clause = where_clause[:order_pos]
-            elif limit_pos != -1:
-                where_clause = where_clause[:limit_pos]
-            
-            return f"SELECT COUNT(*) as count {from_clause} {where_clause};"
-        
-        # No WHERE clause
-        remaining = sql_query[from_pos:]
-        order_pos = remaining.lower().find("order by")
-        limit_pos = remaining.lower().find("limit")
-        
-        if order_pos != -1:
-            remaining = remaining[:order_pos]
-        elif limit_pos != -1:
-            remaining = remaining[:limit_pos]
-        
-        return f"SELECT COUNT(*) as count {remaining};"
-
     async def _format_paginated_results(
         self,
         results: List[Dict[str, Any]],
-        user_query: str,
-        sql_query: str,
+        sql_query: SQLQuery,
         total_results: int,
-        limit: int,
-        offset: int
+        page: PageCursor,
+        next_page: Optional[PageCursor],
+        query_time: float
     ) -> Dict[str, Any]:
-        """Format paginated results with metadata"""
-        current_page = (offset // limit) + 1
-        total_pages = (total_results + limit - 1) // limit
-        start_index = offset + 1
-        end_index = min(offset + limit, total_results)
+        """Format one page of results with its pagination block"""
+        total_pages = (total_results + page.page_size - 1) // page.page_size
+        start_index = (page.page - 1) * page.page_size + 1
+        end_index = start_index + len(results) - 1
         
         formatted_results = []
         
         # Add header message
-        if offset == 0:
+        if page.page == 1:
             message = f"Found {total_results} results. Showing {start_index}-{end_index}:"
         else:
             message = f"Showing results {start_index}-{end_index} of {total_results}:"
@@ -1849,7 +2170,7 @@ Example queries:
                 "message": "Project Details",
                 "data": {
                     "headers": headers,
-                    "rows": results
+                    "rows": [dict(row) for row in results]
                 }
             })
         
@@ -1857,103 +2178,51 @@ Example queries:
             "results": formatted_results,
             "metadata": {
                 "total_results": total_results,
-                "current_page": current_page,
+                "current_page": page.page,
                 "total_pages": total_pages,
-                "page_size": limit,
-                "query_time": f"{time.time() - self.start_time:.2f}s",
-                "sql_query": sql_query
+                "page_size": page.page_size,
+                "query_time": f"{query_time:.2f}s",
+                "sql_query": display_sql(sql_query),
+                "count_cache": self.page_counts.get_stats(),
+                "result_cache": self._result_cache_summary()
             },
             "pagination": {
-                "has_more": current_page < total_pages,
-                "has_previous": current_page > 1,
-                "current_page": current_page,
+                "has_more": next_page is not None,
+                "current_page": page.page,
                 "total_pages": total_pages,
-                "next_page_command": "show more" if current_page < total_pages else None,
-                "prev_page_command": "previous page" if current_page > 1 else None
+                "next_cursor": next_page.encode() if next_page else None,
+                "next_page_command": "show more" if next_page else None
             }
         }
 
+    @timed("entity_extraction")
     async def _extract_district(self, query: str) -> str:
-        """Extract district name from query text using enhanced pattern matching"""
+        """Extract district name from query text"""
         logger.info(f"Extracting district from query: {query}")
+        await self._refresh_indexes()
         
-        # First check for exact district name matches
-        for district in self.valid_districts:
-            # Check for exact district name in the query
-            if district.lower() in query.lower():
-                logger.info(f"Found exact district match: {district}")
-                return district
-        
-        # Check for district variations
-        for variation, district in self.district_variations.items():
-            if variation.lower() in query.lower():
-                logger.info(f"Found district variation: {variation} -> {district}")
-                return district
-        
-        # Common patterns for district queries
-        patterns = [
-            # Direct district mentions
-            r'(?:in|at|from|of|for)\s+(?:the\s+)?([a-zA-Z\s]+?)(?:\s+district|\s*(?:$|[,\.]|\s+(?:and|or|projects?|sector)))',
-            r'([a-zA-Z\s]+?)\s+district\b',
-            r'\b([a-zA-Z]+)(?:\s+projects?|\s+region|\s+area)\b',
-            
-            # Question-based patterns
-            r'(?:which|what|show|list)\s+projects?\s+(?:are|exist|located)\s+(?:in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?\s*[?]?',
-            r'(?:can you|please)\s+(?:show|list|display)\s+(?:me|all)\s+projects?\s+(?:in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            r'(?:i want|need)\s+to\s+(?:see|find|get)\s+projects?\s+(?:in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            
-            # Direct patterns
-            r'projects?\s+(?:in|at|located in|based in)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            r'(?:list|show|display)\s+projects?\s+(?:from|in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            r'(?:find|search for)\s+projects?\s+(?:in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            
-            # Complex patterns
-            r'(?:tell|give)\s+me\s+(?:about|information about)\s+projects?\s+(?:in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            r'(?:looking for|need information about)\s+projects?\s+(?:in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            r'(?:what are|show me)\s+the\s+projects?\s+(?:in|at)\s+([a-zA-Z\s]+?)(?:\s+district)?',
-            
-            # Simpler patterns for direct district mentions
-            r'\b([a-zA-Z]+)\s+district\b',
-            r'\bin\s+([a-zA-Z]+)\b',
-            r'\bprojects\s+in\s+([a-zA-Z]+)\b'
-        ]
+        # Names and known spellings of every district in one pass
+        district = self._gazetteer().first(query, "district")
+        if district:
+            logger.info(f"Found district in gazetteer: {district}")
+            return district
         
+        # Otherwise pull a candidate out of the phrasing and fuzzy-match it
         query = query.lower()
-        
-        # Try pattern matching
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+        for pattern in _DISTRICT_PATTERNS:
+            match = pattern.search(query)
             if match:
                 district = match.group(1).strip()
                 # Clean up the district name
-                district = re.sub(r'\s+', ' ', district)  # Normalize spaces
-                district = ' '.join(word.title() for word in district.split())  # Title case
+                district = ' '.join(word.title() for word in district.split())
                 # Remove common words that might be captured
-                district = re.sub(r'\b(The|And|Or|Projects?|In|At|From|Of|For)\b', '', district, flags=re.IGNORECASE)
-                district = district.strip()
+                district = _DISTRICT_NOISE.sub('', district).strip()
                 if district:
                     logger.info(f"Found district through pattern matching: {district}")
                     return self._validate_district(district)
         
         return None
         
-        # If no pattern match, check for direct district mentions
-        for district in self.valid_districts:
-            if district.lower() in query:
-                logger.info(f"Found district through direct mention: {district}")
-                return district
-        
-        # If still no match, try fuzzy matching with words that start with uppercase
-        words = [word for word in query.split() if word[0].isupper()]
-        for word in words:
-            district = self._validate_district(word)
-            if district:
-                logger.info(f"Found district through fuzzy matching: {district}")
-                return district
-        
-        logger.info("No district found in query")
-        return ""
-        
     def _validate_district(self, district: str) -> str:
         """Validate and normalize district name using fuzzy matching"""
         if not district:
@@ -1962,17 +2231,12 @@ Example queries:
         district = district.strip().title()
         logger.info(f"Validating district name: {district}")
         
-        # Check for exact match (case insensitive)
-        for valid_district in self.valid_districts:
-            if valid_district.lower() == district.lower():
-                logger.info(f"Exact match found: {valid_district}")
-                return valid_district
-        
-        # Check variations mapping
-        normalized_key = district.lower().replace(" ", "")
-        if normalized_key in self.district_variations:
-            logger.info(f"Variation match found: {district} -> {self.district_variations[normalized_key]}")
-            return self.district_variations[normalized_key]
+        # Exact names and known spellings (case insensitive)
+        gazetteer = self._gazetteer()
+        exact = gazetteer.lookup(district, "district") or gazetteer.lookup(district.replace(" ", ""), "district")
+        if exact:
+            logger.info(f"Gazetteer match found: {district} -> {exact}")
+            return exact
         
         # Check if the district name is contained in any valid district
         for valid_district in self.valid_districts:
@@ -1980,12 +2244,11 @@ Example queries:
                 logger.info(f"Substring match found: {district} -> {valid_district}")
                 return valid_district
         
-        # Fuzzy match using difflib
-        from difflib import get_close_matches
-        matches = get_close_matches(district, self.valid_districts, n=1, cutoff=0.6)  # Lower cutoff for better matching
-        if matches:
-            logger.info(f"Fuzzy match found: {district} -> {matches[0]}")
-            return matches[0]
+        # Closest district name by trigram similarity
+        closest = self._name_index("district").best(district, min_score=DISTRICT_MATCH_SCORE)
+        if closest:
+            logger.info(f"Fuzzy match found: {district} -> {closest}")
+            return closest
         
         # If all else fails, try matching the first few characters
         for valid_district in self.valid_districts:
@@ -1996,114 +2259,20 @@ Example queries:
         logger.warning(f"No valid district match found for: {district}")
         return ""
 
+    @timed("entity_extraction")
     async def _extract_sector(self, user_query: str) -> Optional[str]:
-        """Extract sector from user query with enhanced pattern matching"""
+        """Extract sector from user query (sector names, database values and keywords)"""
         if not user_query:
             return None
             
         try:
-            # Normalize the user query
-            normalized_query = user_query.lower()
-            logger.info(f"Extracting sector from query: {normalized_query}")
-            
-            # Define all valid sectors
-            valid_sectors = [
-                "Education", 
-                "Roads and bridges", 
-                "Commercial services", 
-                "Health", 
-                "Water and sanitation", 
-                "Agriculture and environment", 
-                "Community security initiatives"
-            ]
+            logger.info(f"Extracting sector from query: {user_query}")
+            await self._refresh_indexes()
+            sector = self._gazetteer().first(user_query, "sector")
+            if sector:
+                logger.info(f"Found sector in gazetteer: {sector}")
+                return sector
             
-            # First check for exact sector name matches
-            for sector in valid_sectors:
-                # Check for exact sector name in the query
-                if sector.lower() in normalized_query:
-                    logger.info(f"Found exact sector match: {sector}")
-                    return sector
-            
-            # Check for sector-specific indicators in the query
-            if "sector" in normalized_query:
-                logger.info(f"Found 'sector' keyword in query: {user_query}")
-                
-                # Extract what sector they're asking about using exact sector names
-                sector_patterns = [
-                    r"\b(education|roads and bridges|commercial services|health|water and sanitation|agriculture and environment|community security initiatives)\s+sector",
-                    r"sector\s+of\s+(education|roads and bridges|commercial services|health|water and sanitation|agriculture and environment|community security initiatives)",
-                    r"sector\s+projects\s+in\s+(education|roads and bridges|commercial services|health|water and sanitation|agriculture and environment|community security initiatives)",
-                    r"(education|roads and bridges|commercial services|health|water and sanitation|agriculture and environment|community security initiatives)\s+sector\s+projects"
-                ]
-                
-                for pattern in sector_patterns:
-                    match = re.search(pattern, normalized_query)
-                    if match:
-                        sector = match.group(1)
-                        logger.info(f"Extracted sector '{sector}' from pattern")
-                        # Return the exact sector name from the database with proper capitalization
-                        for valid_sector in valid_sectors:
-                            if valid_sector.lower() == sector.lower():
-                                return valid_sector
-            
-            # Check for education-specific keywords
-            education_keywords = ["school", "classroom", "education", "teacher", "student", "learning", "teaching", "college", "university"]
-            for keyword in education_keywords:
-                if keyword in normalized_query:
-                    logger.info(f"Found Education sector via keyword '{keyword}'")
-                    return "Education"
-            
-            # Check for health-specific keywords
-            health_keywords = ["hospital", "clinic", "health", "medical", "healthcare", "doctor", "nurse", "patient", "disease", "treatment", "medicine"]
-            for keyword in health_keywords:
-                if keyword in normalized_query:
-                    logger.info(f"Found Health sector via keyword '{keyword}'")
-                    return "Health"
-            
-            # Check for roads and bridges-specific keywords
-            roads_keywords = ["road", "bridge", "highway", "street", "transport", "transportation", "traffic", "infrastructure"]
-            for keyword in roads_keywords:
-                if keyword in normalized_query:
-                    logger.info(f"Found Roads and bridges sector via keyword '{keyword}'")
-                    return "Roads and bridges"
-            
-            # Check for water-specific keywords
-            water_keywords = ["water", "sanitation", "hygiene", "toilet", "borehole", "well", "tap", "sewage", "drainage"]
-            for keyword in water_keywords:
-                if keyword in normalized_query:
-                    logger.info(f"Found Water and sanitation sector via keyword '{keyword}'")
-                    return "Water and sanitation"
-            
-            # Check for agriculture-specific keywords
-            agriculture_keywords = ["agriculture", "farming", "crop", "livestock", "irrigation", "environment", "conservation", "forest", "land"]
-            for keyword in agriculture_keywords:
-                if keyword in normalized_query:
-                    logger.info(f"Found Agriculture and environment sector via keyword '{keyword}'")
-                    return "Agriculture and environment"
-            
-            # Check for commercial services-specific keywords
-            commercial_keywords = ["market", "business", "commercial", "trade", "shop", "store", "enterprise", "economic", "commerce"]
-            for keyword in commercial_keywords:
-                if keyword in normalized_query:
-                    logger.info(f"Found Commercial services sector via keyword '{keyword}'")
-                    return "Commercial services"
-            
-            # Check for security-specific keywords
-            security_keywords = ["security", "police", "safety", "protection", "crime", "community", "guard", "patrol"]
-            for keyword in security_keywords:
-                if keyword in normalized_query:
-                    logger.info(f"Found Community security initiatives sector via keyword '{keyword}'")
-                    return "Community security initiatives"
-            
-            # If no direct match, use keyword mapping from self.sector_mapping
-            if hasattr(self, 'sector_mapping') and self.sector_mapping:
-                for sector, keywords in self.sector_mapping.items():
-                    for keyword in keywords:
-                        pattern = rf"\b{keyword.lower()}\b"
-                        if re.search(pattern, normalized_query):
-                            logger.info(f"Found sector {sector} via sector_mapping keyword '{keyword}'")
-                            return sector
-                        
             logger.info("No sector found in query")
             return None
             
@@ -2112,9 +2281,11 @@ Example queries:
             logger.error(traceback.format_exc())
             return None
 
+    @timed("entity_extraction")
     async def _extract_project_name(self, query: str) -> str:
         """Extract project name from query text using enhanced pattern matching"""
         logger.info(f"Extracting project name from query: {query}")
+        await self._refresh_indexes()
         
         query = query.strip()
         
@@ -2153,8 +2324,30 @@ Example queries:
                 project_name = re.sub(r'\s+project$', '', project_name, flags=re.IGNORECASE)
                 if project_name:
                     logger.info(f"Found project name through pattern matching: {project_name}")
+                    # Correct misspellings against the known names; otherwise
+                    # leave the name to the search in the specific query
+                    closest = self._closest_project_name(project_name)
+                    if closest and closest.lower() != project_name.lower():
+                        logger.info(f"Corrected project name: {project_name} -> {closest}")
+                        return closest
                     return project_name
         
+        # Fall back to the search index for "tell me about X" style questions,
+        # leaving district, sector and aggregate questions to their own builders
+        about = re.search(
+            r'(?:tell me about|details (?:of|for|on|about)|information (?:on|about))\s+(?:the\s+)?([^?.]+)',
+            query, re.IGNORECASE
+        )
+        if about and not re.search(r'\b(?:projects|districts?|sectors?|regions?|all|total|budget)\b', about.group(1), re.IGNORECASE):
+            project_name = await self._search_project_name(about.group(1))
+            if project_name:
+                logger.info(f"Found project name through search index: {project_name}")
+                return project_name
+            project_name = self._closest_project_name(about.group(1))
+            if project_name:
+                logger.info(f"Found project name through fuzzy match: {project_name}")
+                return project_name
+        
         logger.info("No project name found in query")
         return ""
 
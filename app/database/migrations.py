@@ -0,0 +1,481 @@
+"""Schema Migrations for proj_dashboard
+
+The PMIS export stores districts, sectors and statuses as free text and
+budgets as text or numbers, so filters used to be written as
+``LOWER(DISTRICT) LIKE '%x%'`` and ``CAST(COALESCE(...) AS FLOAT)``, neither of
+which can use an index. The migrations here add canonicalised filter columns
+(``district_key``, ``sector_key``, ``status_key``, ``budget_num``,
+``completion_num``) with B-tree indexes, keep them in sync with triggers, and
+record the applied version in ``PRAGMA user_version``. A second migration
+adds an FTS5 index over the free-text project columns for name searches. A
+third materialises project counts, budget and expenditure sums and
+completion for every combination of region, district, sector, status and
+fiscal year (``proj_dashboard_rollup``), so aggregate questions are answered
+with a single primary-key lookup instead of a scan.
+
+Run them from the setup/import scripts; the application only reads the
+result and falls back to the LIKE-based templates when they are missing.
+"""
+
+import logging
+import re
+import sqlite3
+from typing import Callable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+TABLE = "proj_dashboard"
+
+# Canonical status values and the fragments of PROJECTSTATUS that map to them.
+# Rules are checked in order; the first match wins.
+STATUS_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("completed", ("complet", "handed over", "finished", "done")),
+    ("stalled", ("stall",)),
+    ("cancelled", ("cancel",)),
+    ("delayed", ("delay", "behind")),
+    ("ongoing", ("on track", "ongoing", "in progress", "progress", "implementation", "active")),
+    ("approved", ("approved", "planning", "not started", "pending")),
+)
+
+STATUS_KEYS = tuple(key for key, _ in STATUS_RULES) + ("unknown", "other")
+
+# Text right before a status fragment that negates it: "not (yet) completed",
+# "isn't finished", "incomplete", "uncompleted", "non-active"
+_NEGATED_STATUS = re.compile(r"(?:\b(?:not|never|no longer)|n't)\s+(?:(?:yet|been|be)\s+)*$|\b(?:in|un|non)-?$")
+
+SEARCH_TABLE = f"{TABLE}_fts"
+
+# Columns indexed for project search, in bm25 weight order (see query_templates)
+SEARCH_COLUMNS = ("PROJECTNAME", "PROJECTDESC", "TRADITIONALAUTHORITY", "CONTRACTORNAME")
+
+ROLLUP_TABLE = f"{TABLE}_rollup"
+ROLLUP_SETS_TABLE = f"{TABLE}_rollup_sets"
+
+# Marker stored in a rollup dimension that is aggregated over ("all districts")
+ROLLUP_ALL = "*"
+
+# Rollup dimensions, in primary key order, and the source column of each
+ROLLUP_DIMENSIONS = {
+    "region": "REGION",
+    "district": "DISTRICT",
+    "sector": "PROJECTSECTOR",
+    "status": "PROJECTSTATUS",
+    "fiscal_year": "FISCALYEAR",
+}
+
+# Stored per rollup row; averages are derived from the sums and counts
+_ROLLUP_MEASURES = ("project_count", "budget_sum", "budget_n", "expenditure_sum", "expenditure_n", "completion_sum")
+
+ROLLUP_SOURCE_COLUMNS = tuple(ROLLUP_DIMENSIONS.values()) + ("BUDGET", "TOTALEXPENDITUREYEAR", "COMPLETIONPERCENTAGE")
+
+FILTER_KEY_COLUMNS = {
+    "district_key": "TEXT",
+    "sector_key": "TEXT",
+    "status_key": "TEXT",
+    "budget_num": "REAL",
+    "completion_num": "REAL",
+}
+
+
+def normalise_key(value: Optional[str]) -> Optional[str]:
+    """Python twin of the SQL ``LOWER(TRIM(x))`` used for district/sector keys"""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+def canonical_status(value: Optional[str]) -> Optional[str]:
+    """
+    Map free-text status (from the data or the user) to a status key.
+
+    A negated status ("not completed", "incomplete", "unfinished") has no key,
+    so callers fall back to matching the text rather than inverting it.
+    """
+    if value is None or not str(value).strip():
+        return None
+    text = str(value).strip().lower()
+    if text in STATUS_KEYS:
+        return text
+    for key, fragments in STATUS_RULES:
+        for fragment in fragments:
+            position = text.find(fragment)
+            if position >= 0:
+                return None if _NEGATED_STATUS.search(text[:position]) else key
+    return None
+
+
+def status_key_sql(column: str = "PROJECTSTATUS") -> str:
+    """SQL CASE expression computing status_key from a status column"""
+    branches = []
+    for key, fragments in STATUS_RULES:
+        condition = " OR ".join(f"LOWER({column}) LIKE '%{fragment}%'" for fragment in fragments)
+        branches.append(f"WHEN {condition} THEN '{key}'")
+    return (
+        f"CASE WHEN {column} IS NULL OR TRIM({column}) = '' THEN 'unknown' "
+        + " ".join(branches)
+        + " ELSE 'other' END"
+    )
+
+
+def budget_num_sql(column: str = "BUDGET") -> str:
+    """SQL expression turning '1,200,000', 'MWK 5000' or 5000.0 into a REAL"""
+    text = f"CAST({column} AS TEXT)"
+    return (
+        f"CASE WHEN {column} IS NULL OR TRIM({text}) = '' THEN NULL "
+        f"ELSE CAST(REPLACE(REPLACE(REPLACE({text}, ',', ''), 'MWK', ''), ' ', '') AS REAL) END"
+    )
+
+
+def completion_num_sql(column: str = "COMPLETIONPERCENTAGE") -> str:
+    """SQL expression for completion percentage as a REAL (missing means 0)"""
+    return f"CAST(COALESCE({column}, 0) AS REAL)"
+
+
+def rollup_dimension_sql(dimension: str, prefix: str = "") -> str:
+    """SQL expression for the rollup key of a dimension; blanks become ''"""
+    column = prefix + ROLLUP_DIMENSIONS[dimension]
+    if dimension == "status":
+        return status_key_sql(column)
+    if dimension == "fiscal_year":
+        return f"COALESCE(TRIM({column}), '')"
+    return f"COALESCE(LOWER(TRIM({column})), '')"
+
+
+def _rollup_select(prefix: str = "", sign: str = "") -> str:
+    """
+    SELECT list of one rollup row per grouping set for a project row.
+
+    Each row of the sets table is a bit mask; bit ``i`` replaces the ``i``-th
+    dimension with ``ROLLUP_ALL``. ``sign`` is "-" to subtract a row.
+    """
+    budget = budget_num_sql(prefix + "BUDGET")
+    expenditure = budget_num_sql(prefix + "TOTALEXPENDITUREYEAR")
+    dimensions = [
+        f"CASE WHEN mask & {1 << bit} THEN '{ROLLUP_ALL}' ELSE {rollup_dimension_sql(dimension, prefix)} END AS {dimension}"
+        for bit, dimension in enumerate(ROLLUP_DIMENSIONS)
+    ]
+    measures = [
+        f"{sign}1",
+        f"{sign}COALESCE({budget}, 0)",
+        f"{sign}({budget} IS NOT NULL)",
+        f"{sign}COALESCE({expenditure}, 0)",
+        f"{sign}({expenditure} IS NOT NULL)",
+        f"{sign}{completion_num_sql(prefix + 'COMPLETIONPERCENTAGE')}",
+    ]
+    measures = [f"{value} AS {measure}" for value, measure in zip(measures, _ROLLUP_MEASURES)]
+    return ",\n                ".join(dimensions + measures)
+
+
+
+def _rollup_delta_sql(prefix: str, sign: str = "") -> str:
+    """Upsert adding (or with sign "-" removing) one project row to every rollup it belongs to"""
+    dimensions = ", ".join(ROLLUP_DIMENSIONS)
+    updates = ", ".join(f"{measure} = {measure} + excluded.{measure}" for measure in _ROLLUP_MEASURES)
+    return f"""INSERT INTO {ROLLUP_TABLE} ({dimensions}, {", ".join(_ROLLUP_MEASURES)})
+            SELECT {_rollup_select(prefix, sign)}
+            FROM {ROLLUP_SETS_TABLE} WHERE 1
+            ON CONFLICT ({dimensions}) DO UPDATE SET {updates};"""
+
+
+def _rollup_prune_sql(prefix: str) -> str:
+    """Delete the emptied rollup rows a removed project row belonged to"""
+    conditions = " AND ".join(
+        f"{dimension} IN ('{ROLLUP_ALL}', {rollup_dimension_sql(dimension, prefix)})"
+        for dimension in ROLLUP_DIMENSIONS
+    )
+    return f"DELETE FROM {ROLLUP_TABLE} WHERE project_count <= 0 AND {conditions};"
+
+
+def _filter_key_assignments(prefix: str = "") -> str:
+    """SET clause computing every filter key from the source columns"""
+    return ",\n            ".join([
+        f"district_key = LOWER(TRIM({prefix}DISTRICT))",
+        f"sector_key = LOWER(TRIM({prefix}PROJECTSECTOR))",
+        f"status_key = {status_key_sql(prefix + 'PROJECTSTATUS')}",
+        f"budget_num = {budget_num_sql(prefix + 'BUDGET')}",
+        f"completion_num = {completion_num_sql(prefix + 'COMPLETIONPERCENTAGE')}",
+    ])
+
+
+def table_columns(conn: sqlite3.Connection, table: str = TABLE) -> List[str]:
+    """Return the column names of a table (empty if it does not exist)"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def has_filter_keys(conn: sqlite3.Connection) -> bool:
+    """Feature detection: are the canonical filter columns present?"""
+    try:
+        columns = {column.lower() for column in table_columns(conn)}
+    except sqlite3.Error:
+        return False
+    return set(FILTER_KEY_COLUMNS) <= columns
+
+
+def has_search_index(conn: sqlite3.Connection) -> bool:
+    """Feature detection: does the FTS5 project search table exist?"""
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+        ).fetchone()
+    except sqlite3.Error:
+        return False
+    return row is not None
+
+
+def has_rollups(conn: sqlite3.Connection) -> bool:
+    """Feature detection: does the materialised aggregate table exist?"""
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (ROLLUP_TABLE,)
+        ).fetchone()
+    except sqlite3.Error:
+        return False
+    return row is not None
+
+
+def _fill_rollups(conn: sqlite3.Connection) -> None:
+    """Group proj_dashboard into its finest cells once, then roll the cells up into every grouping set"""
+    dimensions = ", ".join(ROLLUP_DIMENSIONS)
+    positions = ", ".join(str(position) for position in range(1, len(ROLLUP_DIMENSIONS) + 1))
+    budget = budget_num_sql("BUDGET")
+    expenditure = budget_num_sql("TOTALEXPENDITUREYEAR")
+    cells = [f"{rollup_dimension_sql(dimension)} AS {dimension}" for dimension in ROLLUP_DIMENSIONS] + [
+        "COUNT(*) AS project_count",
+        f"COALESCE(SUM({budget}), 0) AS budget_sum",
+        f"COUNT({budget}) AS budget_n",
+        f"COALESCE(SUM({expenditure}), 0) AS expenditure_sum",
+        f"COUNT({expenditure}) AS expenditure_n",
+        f"SUM({completion_num_sql()}) AS completion_sum",
+    ]
+    rolled = [
+        f"CASE WHEN mask & {1 << bit} THEN '{ROLLUP_ALL}' ELSE cells.{dimension} END"
+        for bit, dimension in enumerate(ROLLUP_DIMENSIONS)
+    ] + [f"SUM(cells.{measure})" for measure in _ROLLUP_MEASURES]
+    conn.execute(f"DELETE FROM {ROLLUP_TABLE}")
+    conn.execute(f"""
+        INSERT INTO {ROLLUP_TABLE} ({dimensions}, {", ".join(_ROLLUP_MEASURES)})
+        SELECT {", ".join(rolled)}
+        FROM (
+            SELECT {", ".join(cells)}
+            FROM {TABLE}
+            GROUP BY {positions}
+        ) AS cells CROSS JOIN {ROLLUP_SETS_TABLE}
+        GROUP BY {positions}
+    """)
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute every rollup row from proj_dashboard, e.g. after a bulk import"""
+    if not has_rollups(conn):
+        return
+    with conn:
+        _fill_rollups(conn)
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> None:
+    """Re-read every row into the search index and merge its segments"""
+    if not has_search_index(conn):
+        return
+    with conn:
+        conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+        conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def _migrate_filter_keys(conn: sqlite3.Connection) -> bool:
+    """Add canonical filter columns, backfill them, index them, keep them in sync"""
+    existing = {column.lower() for column in table_columns(conn)}
+    for column, column_type in FILTER_KEY_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {column} {column_type}")
+
+    conn.execute(f"UPDATE {TABLE} SET\n            {_filter_key_assignments()}")
+
+    conn.execute(f"DROP TRIGGER IF EXISTS {TABLE}_filter_keys_ai")
+    conn.execute(f"DROP TRIGGER IF EXISTS {TABLE}_filter_keys_au")
+    conn.execute(f"""
+        CREATE TRIGGER {TABLE}_filter_keys_ai AFTER INSERT ON {TABLE}
+        BEGIN
+            UPDATE {TABLE} SET
+            {_filter_key_assignments('NEW.')}
+            WHERE rowid = NEW.rowid;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {TABLE}_filter_keys_au
+        AFTER UPDATE OF DISTRICT, PROJECTSECTOR, PROJECTSTATUS, BUDGET, COMPLETIONPERCENTAGE ON {TABLE}
+        BEGIN
+            UPDATE {TABLE} SET
+            {_filter_key_assignments('NEW.')}
+            WHERE rowid = NEW.rowid;
+        END
+    """)
+
+    # Composite indexes serve "projects in X ordered by budget" without a sort
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_district_key ON {TABLE} (district_key, budget_num DESC)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_sector_key ON {TABLE} (sector_key, budget_num DESC)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_status_key ON {TABLE} (status_key, budget_num DESC)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_budget_num ON {TABLE} (budget_num DESC)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_completion_num ON {TABLE} (completion_num)")
+    return True
+
+
+def _migrate_search_index(conn: sqlite3.Connection) -> bool:
+    """Create an external-content FTS5 index over the free-text project columns"""
+    existing = {column.upper() for column in table_columns(conn)}
+    missing = [column for column in SEARCH_COLUMNS if column not in existing]
+    if missing:
+        logger.warning(f"{TABLE} has no {', '.join(missing)} column(s), skipping search index")
+        return False
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"NEW.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"OLD.{column}" for column in SEARCH_COLUMNS)
+
+    conn.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+            {columns},
+            content='{TABLE}',
+            content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{suffix}")
+    conn.execute(f"""
+        CREATE TRIGGER {SEARCH_TABLE}_ai AFTER INSERT ON {TABLE}
+        BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (NEW.rowid, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {SEARCH_TABLE}_ad AFTER DELETE ON {TABLE}
+        BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', OLD.rowid, {old_values});
+        END
+    """)
+    # Only the indexed columns; the filter key triggers update other columns
+    conn.execute(f"""
+        CREATE TRIGGER {SEARCH_TABLE}_au AFTER UPDATE OF {columns} ON {TABLE}
+        BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', OLD.rowid, {old_values});
+            INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (NEW.rowid, {new_values});
+        END
+    """)
+
+    conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def _migrate_rollups(conn: sqlite3.Connection) -> bool:
+    """Create the aggregate rollup table, backfill it and keep it in sync with triggers"""
+    existing = {column.upper() for column in table_columns(conn)}
+    missing = [column for column in ROLLUP_SOURCE_COLUMNS if column not in existing]
+    if missing:
+        logger.warning(f"{TABLE} has no {', '.join(missing)} column(s), skipping aggregate rollups")
+        return False
+
+    dimensions = ", ".join(ROLLUP_DIMENSIONS)
+    conn.execute(f"DROP TABLE IF EXISTS {ROLLUP_SETS_TABLE}")
+    conn.execute(f"CREATE TABLE {ROLLUP_SETS_TABLE} (mask INTEGER PRIMARY KEY)")
+    conn.executemany(
+        f"INSERT INTO {ROLLUP_SETS_TABLE} (mask) VALUES (?)",
+        [(mask,) for mask in range(1 << len(ROLLUP_DIMENSIONS))]
+    )
+
+    conn.execute(f"DROP TABLE IF EXISTS {ROLLUP_TABLE}")
+    conn.execute(f"""
+        CREATE TABLE {ROLLUP_TABLE} (
+            {" TEXT NOT NULL, ".join(ROLLUP_DIMENSIONS)} TEXT NOT NULL,
+            project_count INTEGER NOT NULL,
+            budget_sum REAL NOT NULL,
+            budget_n INTEGER NOT NULL,
+            expenditure_sum REAL NOT NULL,
+            expenditure_n INTEGER NOT NULL,
+            completion_sum REAL NOT NULL,
+            PRIMARY KEY ({dimensions})
+        ) WITHOUT ROWID
+    """)
+    _fill_rollups(conn)
+
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {ROLLUP_TABLE}_{suffix}")
+    conn.execute(f"""
+        CREATE TRIGGER {ROLLUP_TABLE}_ai AFTER INSERT ON {TABLE}
+        BEGIN
+            {_rollup_delta_sql('NEW.')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {ROLLUP_TABLE}_ad AFTER DELETE ON {TABLE}
+        BEGIN
+            {_rollup_delta_sql('OLD.', '-')}
+            {_rollup_prune_sql('OLD.')}
+        END
+    """)
+    # Only the source columns; the filter key triggers update other columns
+    conn.execute(f"""
+        CREATE TRIGGER {ROLLUP_TABLE}_au AFTER UPDATE OF {", ".join(ROLLUP_SOURCE_COLUMNS)} ON {TABLE}
+        BEGIN
+            {_rollup_delta_sql('OLD.', '-')}
+            {_rollup_delta_sql('NEW.')}
+            {_rollup_prune_sql('OLD.')}
+        END
+    """)
+    return True
+
+
+# Ordered list of (version, description, migration); append new entries only.
+# A migration returns False when the table lacks the columns it needs.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], bool]]] = [
+    (1, "canonical filter columns and indexes", _migrate_filter_keys),
+    (2, "FTS5 project search index", _migrate_search_index),
+    (3, "materialised aggregate rollups", _migrate_rollups),
+]
+
+
+def apply_migrations(target: Union[str, sqlite3.Connection]) -> int:
+    """
+    Apply pending migrations to a database file or open connection.
+
+    Returns the schema version after migrating. Databases without a
+    proj_dashboard table are left untouched. A skipped migration holds the
+    version below it, so it is retried on the next run; the migrations after
+    it still run and are reapplied then.
+    """
+    conn = sqlite3.connect(target) if isinstance(target, str) else target
+    try:
+        if not table_columns(conn):
+            logger.info(f"No {TABLE} table found, skipping migrations")
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        skipped = False
+        for migration_version, description, migration in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            logger.info(f"Applying migration {migration_version}: {description}")
+            with conn:
+                if not migration(conn):
+                    logger.warning(f"Migration {migration_version} skipped, staying at version {version}")
+                    skipped = True
+                elif not skipped:
+                    conn.execute(f"PRAGMA user_version = {int(migration_version)}")
+                    version = migration_version
+
+        conn.execute("ANALYZE")
+        conn.commit()
+        return version
+    finally:
+        if isinstance(target, str):
+            conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "pmisProjects.db"
+    print(f"{db_path} is at schema version {apply_migrations(db_path)}")
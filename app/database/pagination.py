@@ -0,0 +1,204 @@
+"""
+Keyset pagination for project listings.
+
+Listings are ordered by ``(budget_num DESC, rowid)`` and each page seeks past
+the last row of the previous one instead of using ``OFFSET``, so every page
+costs the same however deep the user scrolls. The position is handed to the
+client as an opaque cursor token. Totals are counted once per filter and
+cached, rather than re-counted for every page.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from ..core.config import settings
+from .query_templates import QUERY_TEMPLATES, BoundQuery
+from .rows import Row
+
+logger = logging.getLogger(__name__)
+
+CURSOR_VERSION = 1
+
+# Listing templates that can be paged, mapped to their listing kind; each
+# kind has "project.<kind>.page" and "project.<kind>.count" templates
+PAGED_LISTINGS = {
+    "project.district.results": "district",
+    "project.sector.results": "sector",
+    "project.general": "general",
+}
+
+# LIMIT of the listing templates, i.e. the size of the first page
+LISTING_PAGE_SIZE = 10
+
+# Sort key columns added by the page templates; stripped from returned rows
+SORT_COLUMNS = ("sort_budget", "sort_rowid")
+
+# Seek position before the first row: above any budget, any rowid
+_START = (float("inf"), 0)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor token cannot be decoded"""
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Position in a listing: the filters plus the sort key of the last row seen"""
+    kind: str
+    filters: Mapping[str, Any] = field(default_factory=dict)
+    page_size: int = 10
+    page: int = 1
+    # (budget_num, rowid) of the last row on the previous page; None before
+    # the first page. A None budget means the NULL-budget tail was reached.
+    after: Optional[Tuple[Optional[float], int]] = None
+
+    def encode(self) -> str:
+        """Serialise to an opaque, URL-safe token"""
+        payload = {
+            "v": CURSOR_VERSION,
+            "k": self.kind,
+            "f": dict(self.filters),
+            "n": self.page_size,
+            "p": self.page,
+            "a": list(self.after) if self.after is not None else None,
+        }
+        raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "PageCursor":
+        """Parse a token produced by ``encode``"""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            if payload.get("v") != CURSOR_VERSION or payload["k"] not in PAGED_LISTINGS.values():
+                raise InvalidCursorError("Unsupported pagination cursor")
+            after = payload["a"]
+            if after is not None:
+                budget, rowid = after
+                after = (None if budget is None else float(budget), int(rowid))
+            page_size, page = int(payload["n"]), int(payload["p"])
+            # Tokens come back from the client, so the page bounds are re-checked
+            if not 1 <= page_size <= settings.MAX_PAGE_SIZE or page < 1:
+                raise InvalidCursorError("Pagination cursor is out of range")
+            return cls(
+                kind=payload["k"],
+                filters=dict(payload["f"]),
+                page_size=page_size,
+                page=page,
+                after=after
+            )
+        except InvalidCursorError:
+            raise
+        except (binascii.Error, ValueError, TypeError, KeyError, AttributeError) as e:
+            raise InvalidCursorError(f"Malformed pagination cursor: {str(e)}")
+
+    @classmethod
+    def for_listing(cls, query: BoundQuery, page_size: int = 10) -> Optional["PageCursor"]:
+        """
+        Cursor for the first page of a listing query, or None if it cannot be
+        paged. ``page_size`` is clamped to ``1..MAX_PAGE_SIZE``, the bounds
+        ``decode`` accepts, so every cursor handed out can be sent back.
+        """
+        kind = PAGED_LISTINGS.get(getattr(query, "template", None))
+        if kind is None:
+            return None
+        page_size = max(1, min(int(page_size), settings.MAX_PAGE_SIZE))
+        return cls(kind=kind, filters=dict(query.params), page_size=page_size)
+
+    def page_query(self) -> BoundQuery:
+        """Bind the seek query for this page"""
+        after_budget, after_rowid = self.after if self.after is not None else _START
+        return QUERY_TEMPLATES.bind(
+            f"project.{self.kind}.page",
+            after_budget=after_budget,
+            after_rowid=after_rowid,
+            page_size=self.page_size,
+            **self.filters
+        )
+
+    def count_query(self) -> BoundQuery:
+        """Bind the total-count query for this listing's filters"""
+        return QUERY_TEMPLATES.bind(f"project.{self.kind}.count", **self.filters)
+
+    def next(self, rows: List[Mapping[str, Any]], total: int) -> Optional["PageCursor"]:
+        """
+        Cursor for the page after ``rows``, or None when this was the last page.
+
+        ``rows`` must still carry the sort columns (see ``strip_sort_keys``).
+        """
+        if len(rows) < self.page_size or self.page * self.page_size >= total:
+            return None
+        last = rows[-1]
+        return replace(self, page=self.page + 1, after=(last["sort_budget"], last["sort_rowid"]))
+
+
+def strip_sort_keys(rows: List[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+    """Remove the sort columns from rows (in place) once the next cursor has been taken"""
+    if rows and isinstance(rows[0], Row):
+        # Result rows share one column index: hide the columns once for all of them
+        columns = rows[0].columns.without(SORT_COLUMNS)
+        rows[:] = [row.with_columns(columns) for row in rows]
+        return rows
+    for row in rows:
+        for column in SORT_COLUMNS:
+            row.pop(column, None)
+    return rows
+
+
+class PageCountCache:
+    """Small LRU of listing totals keyed by listing kind and filter values"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.PAGE_COUNT_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else settings.PAGE_COUNT_CACHE_TTL
+        self._entries: "OrderedDict[Tuple, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(cursor: PageCursor) -> Tuple:
+        return (cursor.kind, tuple(sorted((name, str(value)) for name, value in cursor.filters.items())))
+
+    def get(self, cursor: PageCursor) -> Optional[int]:
+        key = self.key(cursor)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, cursor: PageCursor, total: int) -> None:
+        key = self.key(cursor)
+        with self._lock:
+            self._entries[key] = (total, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,257 @@
+"""SQLite Connection Pool
+
+This module provides a shared, thread-safe pool of tuned SQLite connections.
+Connections are opened read-only through a URI with ``check_same_thread=False``
+and get their PRAGMAs applied exactly once when created, so request handlers
+no longer pay for ``os.path.exists`` + ``sqlite3.connect`` + teardown on every
+query.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from ..core.config import settings
+from .query_templates import QUERY_TEMPLATES
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no connection becomes available within the pool timeout"""
+    pass
+
+
+def resolve_sqlite_path(database_url: str) -> str:
+    """Turn a ``sqlite:///`` URL or relative path into an absolute file path"""
+    db_path = database_url or ""
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path[len("sqlite:///"):]
+    return os.path.abspath(db_path)
+
+
+class SQLiteConnectionPool:
+    """Bounded pool of pre-configured SQLite connections
+
+    ``pool_size`` connections are kept open once created; up to
+    ``max_overflow`` extra connections may be opened under load and are
+    closed again when returned. Callers that find the pool exhausted wait up
+    to ``timeout`` seconds for a connection to be released.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: Optional[int] = None,
+        max_overflow: Optional[int] = None,
+        timeout: Optional[float] = None,
+        read_only: bool = True,
+        mmap_size: Optional[int] = None,
+        cache_size_kib: Optional[int] = None
+    ):
+        self.db_path = os.path.abspath(db_path)
+        self.pool_size = pool_size if pool_size is not None else settings.DB_POOL_SIZE
+        self.max_overflow = max_overflow if max_overflow is not None else settings.DB_MAX_OVERFLOW
+        self.timeout = timeout if timeout is not None else settings.DB_POOL_TIMEOUT
+        self.read_only = read_only
+        self.mmap_size = mmap_size if mmap_size is not None else settings.DB_MMAP_SIZE
+        self.cache_size_kib = cache_size_kib if cache_size_kib is not None else settings.DB_CACHE_SIZE_KIB
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self._wal_checked = False
+
+        self.stats = {
+            "checkouts": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0
+        }
+
+    @property
+    def max_connections(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    def _ensure_wal(self) -> None:
+        """Switch the database to WAL once; journal_mode persists in the file"""
+        if self._wal_checked:
+            return
+        self._wal_checked = True
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+                logger.info(f"SQLite journal_mode for {self.db_path}: {mode}")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # A read-only filesystem keeps its current journal mode
+            logger.warning(f"Could not enable WAL on {self.db_path}: {str(e)}")
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Database file not found: {self.db_path}")
+        self._ensure_wal()
+
+        mode = "ro" if self.read_only else "rw"
+        uri = f"file:{quote(self.db_path)}?mode={mode}"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=QUERY_TEMPLATES.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        if self.read_only:
+            conn.execute("PRAGMA query_only=ON")
+
+        with self._lock:
+            self.stats["connections_created"] += 1
+        return conn
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """Check a connection out of the pool"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        start_time = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                can_create = self._created < self.max_connections
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                with self._lock:
+                    self.stats["waits"] += 1
+                try:
+                    conn = self._idle.get(timeout=timeout if timeout is not None else self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self.stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out waiting for a connection to {self.db_path} "
+                        f"({self.max_connections} in use)"
+                    )
+
+        waited = time.perf_counter() - start_time
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["in_use"] += 1
+            self.stats["peak_in_use"] = max(self.stats["peak_in_use"], self.stats["in_use"])
+            self.stats["total_wait_time"] += waited
+            self.stats["max_wait_time"] = max(self.stats["max_wait_time"], waited)
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection; overflow connections are closed"""
+        with self._lock:
+            self.stats["in_use"] -= 1
+            keep = not self._closed and self._idle.qsize() < self.pool_size
+            if not keep:
+                self._created -= 1
+        if conn.in_transaction:
+            conn.rollback()
+        if keep:
+            self._idle.put(conn)
+        else:
+            conn.close()
+            with self._lock:
+                self.stats["connections_closed"] += 1
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        """Context manager that checks a connection out and returns it"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return utilisation and wait time statistics"""
+        checkouts = self.stats["checkouts"]
+        return {
+            **self.stats,
+            "db_path": self.db_path,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "open_connections": self._created,
+            "idle_connections": self._idle.qsize(),
+            "utilisation": self.stats["in_use"] / max(1, self.max_connections),
+            "avg_wait_time": self.stats["total_wait_time"] / max(1, checkouts)
+        }
+
+    def close(self) -> None:
+        """Close every idle connection and refuse new checkouts"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+                self.stats["connections_closed"] += 1
+
+
+_pools: Dict[Tuple[str, bool], SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, read_only: bool = True) -> SQLiteConnectionPool:
+    """Return the shared pool for a database file, creating it on first use"""
+    key = (os.path.abspath(db_path), read_only)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = SQLiteConnectionPool(key[0], read_only=read_only)
+                _pools[key] = pool
+                logger.info(f"Created SQLite pool for {key[0]} (size={pool.pool_size}, overflow={pool.max_overflow})")
+    return pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Return statistics for every shared pool"""
+    return {
+        f"{db_path}:{'ro' if read_only else 'rw'}": pool.get_stats()
+        for (db_path, read_only), pool in list(_pools.items())
+    }
+
+
+def close_all_pools() -> None:
+    """Close and forget every shared pool"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,664 @@
+"""SQL Query Templates
+
+Every query shape the chatbot issues against ``proj_dashboard`` is registered
+here once as a fixed SQL string with named parameters. Builders bind user text
+to a template instead of formatting it into the statement, so the statement
+text stays identical across requests, SQLite's prepared-statement cache gets
+hits, and user input can never change the shape of the query.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Union
+
+from .migrations import (
+    ROLLUP_ALL, ROLLUP_DIMENSIONS, ROLLUP_TABLE, budget_num_sql, completion_num_sql, rollup_dimension_sql
+)
+
+logger = logging.getLogger(__name__)
+
+# Extra statement cache slots for ad-hoc SQL (LLM generated queries, PRAGMAs)
+STATEMENT_CACHE_HEADROOM = 16
+
+_PARAM_PATTERN = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Words that carry no signal in a project name search
+SEARCH_STOPWORDS = frozenset({
+    "a", "an", "and", "at", "for", "in", "of", "on", "the", "to", "project", "projects"
+})
+
+
+@dataclass(frozen=True)
+class QueryTemplate:
+    """A named, fixed SQL statement with named parameters"""
+    name: str
+    sql: str
+    description: str = ""
+    params: FrozenSet[str] = field(default_factory=frozenset)
+    total_column: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class BoundQuery:
+    """A template together with the parameter values for one execution"""
+    template: str
+    sql: str
+    params: Mapping[str, Any] = field(default_factory=dict)
+    # Column carrying the full match count (a COUNT(*) OVER() window) on
+    # every row; executors lift it out of the rows into the envelope
+    total_column: Optional[str] = None
+
+    def display_sql(self) -> str:
+        """Render the statement with parameters inlined, for logs and metadata only"""
+        def render(match: "re.Match") -> str:
+            name = match.group(1)
+            if name not in self.params:
+                return match.group(0)
+            value = self.params[name]
+            if value is None:
+                return "NULL"
+            if isinstance(value, (int, float)):
+                return str(value)
+            return "'" + str(value).replace("'", "''") + "'"
+        return _PARAM_PATTERN.sub(render, self.sql)
+
+    def __str__(self) -> str:
+        return self.display_sql()
+
+
+SQLQuery = Union[str, BoundQuery]
+
+
+def display_sql(query: Union[SQLQuery, tuple, None]) -> str:
+    """Return printable SQL for a plain string, a bound query or a (count, results) pair"""
+    if query is None:
+        return ""
+    if isinstance(query, tuple):
+        query = query[-1] if query else ""
+    if isinstance(query, BoundQuery):
+        return query.display_sql().strip()
+    return str(query).strip()
+
+
+def json_list(values: Optional[Iterable[Any]]) -> Optional[str]:
+    """Encode a list filter for ``json_each``; empty lists become NULL (no filter)"""
+    values = [v for v in (values or []) if v is not None and str(v).strip()]
+    return json.dumps(values) if values else None
+
+
+def fts_prefix_query(text: Optional[str]) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression of quoted prefix terms.
+
+    Terms are OR-ed so partial names still match; bm25 ranks rows that match
+    more (and rarer) terms first. Returns None when nothing searchable is left.
+    """
+    tokens = [token.lower() for token in _SEARCH_TOKEN.findall(text or "")]
+    terms = [token for token in tokens if token not in SEARCH_STOPWORDS] or tokens
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"*' for term in dict.fromkeys(terms))
+
+
+class QueryTemplateRegistry:
+    """Registry of query templates with per-template execution timing"""
+
+    def __init__(self):
+        self._templates: Dict[str, QueryTemplate] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, sql: str, description: str = "", total_column: Optional[str] = None) -> QueryTemplate:
+        """Register a template; the SQL must only use named parameters"""
+        sql = sql.strip()
+        if "?" in sql:
+            raise ValueError(f"Template {name} must use named parameters, not '?'")
+        template = QueryTemplate(
+            name=name,
+            sql=sql,
+            description=description,
+            params=frozenset(_PARAM_PATTERN.findall(sql)),
+            total_column=total_column
+        )
+        with self._lock:
+            self._templates[name] = template
+            self._stats.setdefault(name, self._empty_stats())
+        return template
+
+    def get(self, name: str) -> QueryTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise KeyError(f"Unknown query template: {name}")
+
+    def bind(self, name: str, /, **params: Any) -> BoundQuery:
+        """Bind parameter values to a template"""
+        template = self.get(name)
+        missing = template.params - params.keys()
+        if missing:
+            raise ValueError(f"Missing parameters for template {name}: {sorted(missing)}")
+        unknown = params.keys() - template.params
+        if unknown:
+            raise ValueError(f"Unknown parameters for template {name}: {sorted(unknown)}")
+        return BoundQuery(template=name, sql=template.sql, params=dict(params), total_column=template.total_column)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._templates)
+
+    @property
+    def statement_cache_size(self) -> int:
+        """Prepared-statement cache size: every template plus headroom for ad-hoc SQL"""
+        return len(self._templates) + STATEMENT_CACHE_HEADROOM
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {"executions": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0, "last_time": 0.0}
+
+    def record(self, name: str, elapsed: float, error: bool = False) -> None:
+        """Record one execution of a template (or of ad-hoc SQL under "adhoc")"""
+        with self._lock:
+            stats = self._stats.setdefault(name, self._empty_stats())
+            stats["executions"] += 1
+            stats["total_time"] += elapsed
+            stats["last_time"] = elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+            if error:
+                stats["errors"] += 1
+
+    def _timed(self, cursor, query: SQLQuery, fetch: Callable[[Any], Any]) -> Any:
+        if isinstance(query, BoundQuery):
+            name, sql, params = query.template, query.sql, query.params
+        else:
+            name, sql, params = "adhoc", query, ()
+        start_time = time.perf_counter()
+        try:
+            result = fetch(cursor.execute(sql, params))
+        except Exception:
+            self.record(name, time.perf_counter() - start_time, error=True)
+            raise
+        self.record(name, time.perf_counter() - start_time)
+        return result
+
+    def execute_fetchall(self, cursor, query: SQLQuery) -> List[Any]:
+        """
+        Execute a bound query (or plain SQL) on a cursor and fetch every row.
+        
+        SQLite steps through most of a query while rows are fetched, so the
+        recorded time covers the fetch as well as the statement.
+        """
+        return self._timed(cursor, query, lambda executed: executed.fetchall())
+
+    def execute_fetchone(self, cursor, query: SQLQuery) -> Optional[Any]:
+        """Execute a bound query (or plain SQL) and fetch its first row, timing both"""
+        return self._timed(cursor, query, lambda executed: executed.fetchone())
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return execution counts and timings (statement plus fetch) per template"""
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "avg_time": stats["total_time"] / max(1, stats["executions"])
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = self._empty_stats()
+
+
+QUERY_TEMPLATES = QueryTemplateRegistry()
+
+PROJECT_DETAIL_COLUMNS = """
+    PROJECTNAME as project_name,
+    PROJECTCODE as project_code,
+    PROJECTSECTOR as project_sector,
+    PROJECTSTATUS as status,
+    STAGE,
+    REGION,
+    DISTRICT,
+    TRADITIONALAUTHORITY,
+    BUDGET as total_budget,
+    TOTALEXPENDITUREYEAR as total_expenditure,
+    FUNDINGSOURCE as funding_source,
+    STARTDATE as start_date,
+    COMPLETIONESTIDATE as completion_date,
+    LASTVISIT as last_monitoring_visit,
+    COMPLETIONPERCENTAGE as completion_progress,
+    CONTRACTORNAME as contractor,
+    SIGNINGDATE as contract_signing_date,
+    PROJECTDESC as description,
+    FISCALYEAR as fiscal_year"""
+
+# bm25 weights follow migrations.SEARCH_COLUMNS: name, description,
+# traditional authority, contractor
+_SEARCH_HITS = """WITH hits AS (
+        SELECT rowid AS hit_rowid, bm25(proj_dashboard_fts, 10.0, 2.0, 1.0, 1.0) AS hit_rank
+        FROM proj_dashboard_fts
+        WHERE proj_dashboard_fts MATCH :match
+        ORDER BY hit_rank
+        LIMIT 50
+    )"""
+
+QUERY_TEMPLATES.register(
+    "project.specific",
+    f"""{_SEARCH_HITS}
+    SELECT {PROJECT_DETAIL_COLUMNS}
+    FROM hits
+    JOIN proj_dashboard ON proj_dashboard.rowid = hits.hit_rowid
+    ORDER BY
+        CASE WHEN LOWER(PROJECTNAME) = LOWER(:name) THEN 0 ELSE 1 END,
+        hit_rank
+    LIMIT 10""",
+    "Projects found through the full-text index, exact name first, then by bm25"
+)
+
+QUERY_TEMPLATES.register(
+    "project.search.names",
+    f"""{_SEARCH_HITS}
+    SELECT PROJECTNAME as project_name, hit_rank as rank
+    FROM hits
+    JOIN proj_dashboard ON proj_dashboard.rowid = hits.hit_rowid
+    ORDER BY hit_rank
+    LIMIT 5""",
+    "Best matching project names for a free-text mention"
+)
+
+QUERY_TEMPLATES.register(
+    "project.specific.like",
+    f"""SELECT {PROJECT_DETAIL_COLUMNS}
+    FROM proj_dashboard
+    WHERE LOWER(PROJECTNAME) LIKE '%' || LOWER(:name) || '%'
+    ORDER BY
+        CASE
+            WHEN LOWER(PROJECTNAME) = LOWER(:name) THEN 1
+            WHEN LOWER(PROJECTNAME) LIKE LOWER(:name) || '%' THEN 2
+            ELSE 3
+        END,
+        BUDGET DESC NULLS LAST
+    LIMIT 10""",
+    "Projects whose name contains the given text, exact and prefix matches first (no search index)"
+)
+
+# Filter templates come in two flavours. The default one filters on the
+# canonical, indexed columns added by app.database.migrations; the ".like"
+# fallback keeps the original substring match for databases that have not
+# been migrated or values that do not canonicalise.
+#
+# District and sector listings return the page and the full match count in
+# one statement: COUNT(*) OVER() is evaluated over every matching row before
+# LIMIT applies, so the table is read once instead of once per count query.
+# The indexed variants also return the (budget_num, rowid) sort key so the
+# first page can hand out a keyset cursor for the next one.
+for _kind, _key_filter, _like_filter in (
+    ("district", "district_key = LOWER(:district)", "LOWER(DISTRICT) LIKE '%' || LOWER(:district) || '%'"),
+    ("sector", "sector_key = LOWER(:sector)", "LOWER(PROJECTSECTOR) LIKE '%' || LOWER(:sector) || '%'"),
+):
+    QUERY_TEMPLATES.register(
+        f"project.{_kind}.results",
+        f"""SELECT {PROJECT_DETAIL_COLUMNS},
+    budget_num as sort_budget, rowid as sort_rowid,
+    COUNT(*) OVER() as total_count
+    FROM proj_dashboard
+    WHERE {_key_filter}
+    ORDER BY budget_num DESC, rowid
+    LIMIT 10""",
+        f"Largest projects in a {_kind}, with the total number of matches",
+        total_column="total_count"
+    )
+
+    QUERY_TEMPLATES.register(
+        f"project.{_kind}.results.like",
+        f"""SELECT {PROJECT_DETAIL_COLUMNS},
+    COUNT(*) OVER() as total_count
+    FROM proj_dashboard
+    WHERE {_like_filter}
+    ORDER BY BUDGET DESC NULLS LAST
+    LIMIT 10""",
+        f"Largest projects whose {_kind} contains the given text, with the total number of matches",
+        total_column="total_count"
+    )
+
+QUERY_TEMPLATES.register(
+    "project.general",
+    f"""SELECT {PROJECT_DETAIL_COLUMNS},
+    budget_num as sort_budget, rowid as sort_rowid,
+    COUNT(*) OVER() as total_count
+    FROM proj_dashboard
+    ORDER BY budget_num DESC, rowid
+    LIMIT 10""",
+    "Largest projects overall, with the total number of projects",
+    total_column="total_count"
+)
+
+# A listing page already selected and counted in memory by
+# app.database.columnar: the same columns as the listings above, fetched by
+# rowid in the order given, with the match count bound as a parameter
+QUERY_TEMPLATES.register(
+    "project.listing.rows",
+    f"""SELECT {PROJECT_DETAIL_COLUMNS},
+    budget_num as sort_budget, proj_dashboard.rowid as sort_rowid,
+    :total as total_count
+    FROM json_each(:rowids) AS selected
+    JOIN proj_dashboard ON proj_dashboard.rowid = selected.value
+    ORDER BY selected.key""",
+    "Listing rows and match count chosen by the columnar snapshot",
+    total_column="total_count"
+)
+
+QUERY_TEMPLATES.register(
+    "project.general.like",
+    f"""SELECT {PROJECT_DETAIL_COLUMNS}
+    FROM proj_dashboard
+    ORDER BY BUDGET DESC NULLS LAST
+    LIMIT 10""",
+    "Largest projects overall (unmigrated schema)"
+)
+
+# Keyset pages for the listings above (see app.database.pagination). Rows
+# with a budget are walked in (budget_num DESC, rowid) order by seeking past
+# the last key seen; rows without a budget follow in rowid order. A NULL
+# :after_budget means the previous page already ended in that NULL tail.
+for _kind, _filter in (
+    ("district", "district_key = LOWER(:district)"),
+    ("sector", "sector_key = LOWER(:sector)"),
+    ("general", "1 = 1"),
+):
+    QUERY_TEMPLATES.register(
+        f"project.{_kind}.page",
+        f"""SELECT * FROM (
+        SELECT * FROM (
+            SELECT {PROJECT_DETAIL_COLUMNS},
+                budget_num as sort_budget, rowid as sort_rowid
+            FROM proj_dashboard
+            WHERE {_filter}
+              AND budget_num <= :after_budget
+              AND (budget_num < :after_budget OR rowid > :after_rowid)
+            ORDER BY budget_num DESC, rowid
+            LIMIT :page_size
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT {PROJECT_DETAIL_COLUMNS},
+                NULL as sort_budget, rowid as sort_rowid
+            FROM proj_dashboard
+            WHERE {_filter}
+              AND budget_num IS NULL
+              AND rowid > CASE WHEN :after_budget IS NULL THEN :after_rowid ELSE -9223372036854775808 END
+            ORDER BY rowid
+            LIMIT :page_size
+        )
+    )
+    ORDER BY sort_budget IS NULL, sort_budget DESC, sort_rowid
+    LIMIT :page_size""",
+        f"One keyset page of the {_kind} listing"
+    )
+
+    QUERY_TEMPLATES.register(
+        f"project.{_kind}.count",
+        f"""SELECT COUNT(*) as total_count
+    FROM proj_dashboard
+    WHERE {_filter}""",
+        f"Total size of the {_kind} listing"
+    )
+
+_BASIC_COLUMNS = """SELECT
+        projectname as project_name,
+        district,
+        projectsector as project_sector,
+        projectstatus as project_status,
+        COALESCE(budget, 0) as total_budget,
+        COALESCE(completionpercentage, 0) as completion_percentage
+    FROM proj_dashboard"""
+
+# One shape per filter combination so each statement can use its index
+for _suffix, _where in (
+    ("", ""),
+    (".district", "WHERE district_key = LOWER(:district)"),
+    (".status", "WHERE status_key = :status"),
+    (".district_status", "WHERE district_key = LOWER(:district) AND status_key = :status"),
+):
+    QUERY_TEMPLATES.register(
+        f"project.basic{_suffix}",
+        f"""{_BASIC_COLUMNS}
+    {_where}
+    ORDER BY budget_num DESC""",
+        "Basic project listing filtered on canonical district and status keys"
+    )
+
+QUERY_TEMPLATES.register(
+    "project.basic.like",
+    f"""{_BASIC_COLUMNS}
+    WHERE (:district IS NULL OR LOWER(district) = LOWER(:district))
+      AND (:status IS NULL OR LOWER(projectstatus) = LOWER(:status))
+    ORDER BY total_budget DESC""",
+    "Basic project listing with optional district and status filters (unmigrated schema)"
+)
+
+# List filters are passed as JSON arrays and expanded with json_each, so any
+# number of districts/sectors/statuses share one statement
+_CLASSIFICATION_KEY_FILTERS = """
+    WHERE (:districts IS NULL OR district_key IN (SELECT LOWER(value) FROM json_each(:districts)))
+      AND (:sectors IS NULL OR sector_key IN (SELECT LOWER(value) FROM json_each(:sectors)))
+      AND (:projects IS NULL OR EXISTS (
+            SELECT 1 FROM json_each(:projects) p
+            WHERE LOWER(projectname) LIKE '%' || LOWER(p.value) || '%'))
+      AND (:statuses IS NULL OR status_key IN (SELECT value FROM json_each(:statuses)))
+      AND (:budget_min IS NULL OR budget_num >= :budget_min)
+      AND (:budget_max IS NULL OR budget_num <= :budget_max)
+      AND (:start_date IS NULL OR startdate >= :start_date)
+      AND (:end_date IS NULL OR completionestidate <= :end_date)"""
+
+_CLASSIFICATION_LIKE_FILTERS = """
+    WHERE (:districts IS NULL OR EXISTS (
+            SELECT 1 FROM json_each(:districts) d
+            WHERE LOWER(district) LIKE '%' || LOWER(d.value) || '%'))
+      AND (:sectors IS NULL OR EXISTS (
+            SELECT 1 FROM json_each(:sectors) s
+            WHERE LOWER(projectsector) LIKE '%' || LOWER(s.value) || '%'))
+      AND (:projects IS NULL OR EXISTS (
+            SELECT 1 FROM json_each(:projects) p
+            WHERE LOWER(projectname) LIKE '%' || LOWER(p.value) || '%'))
+      AND (:statuses IS NULL OR EXISTS (
+            SELECT 1 FROM json_each(:statuses) st
+            WHERE LOWER(projectstatus) LIKE '%' || LOWER(st.value) || '%'))
+      AND (:budget_min IS NULL OR CAST(REPLACE(REPLACE(budget, ',', ''), 'MWK', '') AS FLOAT) >= :budget_min)
+      AND (:budget_max IS NULL OR CAST(REPLACE(REPLACE(budget, ',', ''), 'MWK', '') AS FLOAT) <= :budget_max)
+      AND (:start_date IS NULL OR startdate >= :start_date)
+      AND (:end_date IS NULL OR completionestidate <= :end_date)"""
+
+_CLASSIFICATION_SPECIFIC_COLUMNS = """SELECT
+        projectname as project_name,
+        projectcode as project_code,
+        projectsector as project_sector,
+        projectstatus as status,
+        stage,
+        region,
+        district as location,
+        traditionalauthority,
+        budget as total_budget,
+        TOTALEXPENDITUREYEAR as total_expenditure,
+        fundingsource as funding_source,
+        startdate as start_date,
+        completionestidate as completion_date,
+        lastvisit as last_monitoring_visit,
+        completionpercentage as completion_progress,
+        contractorname as contractor,
+        signingdate as contract_signing_date,
+        projectdesc as description,
+        fiscalyear as fiscal_year"""
+
+_CLASSIFICATION_GENERAL_COLUMNS = """SELECT
+        projectname as project_name,
+        fiscalyear as fiscal_year,
+        district as location,
+        budget as total_budget,
+        projectstatus as status,
+        projectsector as project_sector"""
+
+for _suffix, _filters, _budget in (
+    ("", _CLASSIFICATION_KEY_FILTERS, "budget_num"),
+    (".like", _CLASSIFICATION_LIKE_FILTERS, "budget"),
+):
+    QUERY_TEMPLATES.register(
+        f"classification.specific{_suffix}",
+        f"""{_CLASSIFICATION_SPECIFIC_COLUMNS}
+    FROM proj_dashboard
+    {_filters}
+    ORDER BY
+        CASE
+            WHEN LOWER(projectname) = LOWER(:project_name) THEN 1
+            WHEN LOWER(projectname) LIKE LOWER(:project_name) || '%' THEN 2
+            ELSE 3
+        END,
+        {_budget} DESC
+    LIMIT 1""",
+        "Single project detail for a classified specific query"
+    )
+
+    QUERY_TEMPLATES.register(
+        f"classification.general{_suffix}",
+        f"""{_CLASSIFICATION_GENERAL_COLUMNS}
+    FROM proj_dashboard
+    {_filters}
+    ORDER BY
+        {_budget} DESC,
+        CASE
+            WHEN LOWER(projectstatus) LIKE '%ongoing%' THEN 1
+            WHEN LOWER(projectstatus) LIKE '%completed%' THEN 2
+            ELSE 3
+        END
+    LIMIT 10""",
+        "Project listing for a classified general query"
+    )
+
+# Rows already selected and ordered in memory by app.database.columnar,
+# fetched by rowid in the order given
+for _kind, _columns in (
+    ("specific", _CLASSIFICATION_SPECIFIC_COLUMNS),
+    ("general", _CLASSIFICATION_GENERAL_COLUMNS),
+):
+    QUERY_TEMPLATES.register(
+        f"classification.{_kind}.rows",
+        f"""{_columns}
+    FROM json_each(:rowids) AS selected
+    JOIN proj_dashboard ON proj_dashboard.rowid = selected.value
+    ORDER BY selected.key""",
+        f"Classified {_kind} query rows chosen by the columnar snapshot"
+    )
+
+# Aggregates read the rollups materialised by app.database.migrations: every
+# dimension is bound to a key or to ROLLUP_ALL, so a total is one primary-key
+# lookup and a breakdown one short range of the key. The ".scan" fallback
+# computes the same columns from proj_dashboard for unmigrated databases.
+# Every row echoes the requested measure and breakdown for the formatter.
+_AGGREGATE_ORDER = """CASE :measure
+        WHEN 'total_budget' THEN total_budget
+        WHEN 'average_budget' THEN average_budget
+        WHEN 'total_expenditure' THEN total_expenditure
+        WHEN 'average_expenditure' THEN average_expenditure
+        WHEN 'average_completion' THEN average_completion
+        ELSE project_count
+    END DESC"""
+
+def _rollup_columns(group_by: str = "NULL") -> str:
+    return f"""SELECT :measure as measure, {group_by} as group_by,
+    {", ".join(ROLLUP_DIMENSIONS)},
+    project_count,
+    budget_sum as total_budget,
+    budget_n as budgeted_count,
+    budget_sum / NULLIF(budget_n, 0) as average_budget,
+    expenditure_sum as total_expenditure,
+    expenditure_sum / NULLIF(expenditure_n, 0) as average_expenditure,
+    completion_sum / NULLIF(project_count, 0) as average_completion
+    FROM {ROLLUP_TABLE}"""
+
+
+QUERY_TEMPLATES.register(
+    "aggregate.rollup",
+    f"""{_rollup_columns()}
+    WHERE {" AND ".join(f"{dimension} = :{dimension}" for dimension in ROLLUP_DIMENSIONS)}""",
+    "Counts, budget, expenditure and completion for one combination of filters"
+)
+
+for _dimension in ROLLUP_DIMENSIONS:
+    QUERY_TEMPLATES.register(
+        f"aggregate.rollup.by_{_dimension}",
+        f"""{_rollup_columns(f"'{_dimension}'")}
+    WHERE {" AND ".join(
+        f"{dimension} != '{ROLLUP_ALL}'" if dimension == _dimension else f"{dimension} = :{dimension}"
+        for dimension in ROLLUP_DIMENSIONS
+    )}
+    ORDER BY {_AGGREGATE_ORDER}, {_dimension}
+    LIMIT 50""",
+        f"Aggregates per {_dimension} for one combination of the other filters"
+    )
+
+_SCAN_BUDGET = budget_num_sql("BUDGET")
+_SCAN_EXPENDITURE = budget_num_sql("TOTALEXPENDITUREYEAR")
+
+QUERY_TEMPLATES.register(
+    "aggregate.scan",
+    f"""SELECT :measure as measure, NULLIF(:group_by, '{ROLLUP_ALL}') as group_by,
+    {", ".join(
+        f"CASE WHEN :group_by = '{dimension}' THEN {rollup_dimension_sql(dimension)} ELSE :{dimension} END as {dimension}"
+        for dimension in ROLLUP_DIMENSIONS
+    )},
+    COUNT(*) as project_count,
+    COALESCE(SUM({_SCAN_BUDGET}), 0) as total_budget,
+    COUNT({_SCAN_BUDGET}) as budgeted_count,
+    AVG({_SCAN_BUDGET}) as average_budget,
+    COALESCE(SUM({_SCAN_EXPENDITURE}), 0) as total_expenditure,
+    AVG({_SCAN_EXPENDITURE}) as average_expenditure,
+    AVG({completion_num_sql()}) as average_completion
+    FROM proj_dashboard
+    WHERE {" AND ".join(
+        f"(:{dimension} = '{ROLLUP_ALL}' OR {rollup_dimension_sql(dimension)} = :{dimension})"
+        for dimension in ROLLUP_DIMENSIONS
+    )}
+    GROUP BY {", ".join(str(position) for position in range(3, len(ROLLUP_DIMENSIONS) + 3))}
+    ORDER BY {_AGGREGATE_ORDER}
+    LIMIT 50""",
+    "Aggregates computed from proj_dashboard, optionally per dimension (no rollups)"
+)
+
+# Aggregate rows computed in memory by app.database.columnar, with the
+# columns of aggregate.scan, returned in the order given
+AGGREGATE_ROW_COLUMNS = ("measure", "group_by") + tuple(ROLLUP_DIMENSIONS) + (
+    "project_count", "total_budget", "budgeted_count", "average_budget",
+    "total_expenditure", "average_expenditure", "average_completion"
+)
+
+QUERY_TEMPLATES.register(
+    "aggregate.rows",
+    f"""SELECT {", ".join(f"json_extract(value, '$.{column}') as {column}" for column in AGGREGATE_ROW_COLUMNS)}
+    FROM json_each(:rows)
+    ORDER BY key""",
+    "Aggregates computed by the columnar snapshot (no rollups)"
+)
+
+QUERY_TEMPLATES.register(
+    "aggregate.fiscal_years",
+    f"""SELECT fiscal_year
+    FROM {ROLLUP_TABLE}
+    WHERE {" AND ".join(f"{dimension} = '{ROLLUP_ALL}'" for dimension in ROLLUP_DIMENSIONS if dimension != "fiscal_year")}
+      AND fiscal_year NOT IN ('{ROLLUP_ALL}', '')""",
+    "Fiscal year labels present in the rollups"
+)
+
+QUERY_TEMPLATES.register(
+    "aggregate.fiscal_years.scan",
+    """SELECT DISTINCT TRIM(FISCALYEAR) as fiscal_year
+    FROM proj_dashboard
+    WHERE FISCALYEAR IS NOT NULL AND TRIM(FISCALYEAR) != ''""",
+    "Fiscal year labels present in proj_dashboard (no rollups)"
+)
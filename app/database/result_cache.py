@@ -0,0 +1,191 @@
+"""
+Result-set cache for read queries.
+
+Popular listings ("projects in Lilongwe", "education projects") run the same
+statement with the same parameters many times a day. Results are kept in an
+LRU bounded by entry count and an approximate byte budget, keyed by the
+whitespace-normalised SQL plus the bound parameters.
+
+Entries are tied to a version token of the database file: the mtime and size
+of the file and of its ``-wal`` file. Any write, including a full PMIS
+re-import, changes the token and empties the cache on the next lookup.
+``PRAGMA data_version`` is not used for this because its value is only
+comparable within a single connection, and lookups come from many pooled
+connections.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+from ..core.config import settings
+from .query_templates import BoundQuery, SQLQuery
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_READ_STATEMENT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def normalise_sql(sql: str) -> str:
+    """Collapse whitespace and trailing semicolons so formatting does not split keys"""
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";").strip()
+
+
+def file_version(db_path: str) -> Tuple:
+    """Version token of a database file: (mtime_ns, size) of the file and its WAL"""
+    token = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            token.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            token.append(None)
+    return tuple(token)
+
+
+def _copy_result(result: Any) -> Any:
+    """
+    Copy dict rows so callers can mutate what they get back without touching
+    the cache. ``Row``s are read-only and are shared.
+    """
+    if isinstance(result, tuple):
+        return tuple(_copy_result(part) for part in result)
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else row for row in result]
+    return result
+
+
+def _result_size(result: Any) -> int:
+    """Approximate in-memory size of a result, from its JSON length"""
+    try:
+        return len(json.dumps(result, default=lambda value: dict(value) if isinstance(value, Mapping) else str(value)))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class ResultCache:
+    """LRU of query results for one database file, invalidated when the file changes"""
+
+    def __init__(self, db_path: str, max_bytes: Optional[int] = None, max_entries: Optional[int] = None):
+        self.db_path = os.path.realpath(db_path)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.RESULT_CACHE_MAX_BYTES
+        self.max_entries = max_entries if max_entries is not None else settings.RESULT_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "uncacheable": 0}
+
+    def version(self) -> Tuple:
+        """Version token of the database (see ``file_version``)"""
+        return file_version(self.db_path)
+
+    @staticmethod
+    def key(query: SQLQuery) -> Optional[Hashable]:
+        """Cache key for a read query, or None if the query should not be cached"""
+        if isinstance(query, tuple):
+            parts = tuple(ResultCache.key(part) for part in query)
+            return None if None in parts else parts
+        if isinstance(query, BoundQuery):
+            sql, params = query.sql, query.params
+        else:
+            sql, params = str(query), {}
+        if not _READ_STATEMENT.match(sql):
+            return None
+        try:
+            frozen_params = json.dumps(params, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return None
+        return (normalise_sql(sql), frozen_params)
+
+    def _check_version(self) -> None:
+        """Drop every entry if the database changed since they were stored (lock held)"""
+        version = self.version()
+        if version != self._version:
+            if self._entries:
+                logger.info(f"Database {self.db_path} changed, dropping {len(self._entries)} cached results")
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, query: SQLQuery) -> Optional[Any]:
+        """Return a copy of the cached result for ``query``, or None"""
+        key = self.key(query)
+        if key is None:
+            with self._lock:
+                self.stats["uncacheable"] += 1
+            return None
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return _copy_result(entry[0])
+
+    def set(self, query: SQLQuery, result: Any) -> None:
+        """Store a copy of ``result`` for ``query``, evicting least recently used entries"""
+        key = self.key(query)
+        if key is None:
+            return
+        size = _result_size(result)
+        if size > self.max_bytes:
+            return
+        result = _copy_result(result)
+        with self._lock:
+            self._check_version()
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(db_path: str) -> ResultCache:
+    """Return the shared result cache for a database file, creating it on first use"""
+    key = os.path.realpath(db_path)
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(key)
+            if cache is None:
+                cache = ResultCache(key)
+                _caches[key] = cache
+    return cache
+
+
+def get_result_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistics for every result cache, keyed by database path"""
+    return {path: cache.get_stats() for path, cache in list(_caches.items())}
@@ -0,0 +1,139 @@
+"""Compact Query Result Rows
+
+``execute_query`` returns each row as a ``Row``: the value tuple fetched by
+sqlite3 plus a reference to one ``Columns`` index shared by every row of the
+result set. Column names are looked up case-insensitively through that index,
+so rows no longer store a lower-case copy of every value, and formatters
+resolve the columns they need once per result set (``Columns.getter``)
+instead of probing each row for several key spellings.
+
+Rows are read-only mappings: ``row["PROJECTNAME"]``, ``row["projectname"]``,
+``row.get(...)``, ``"district" in row`` and ``dict(row)`` behave as they did
+on the dict rows that came before. Columns can be hidden from a result set
+(``without``) without copying the values.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class Columns:
+    """Column names of a result set with a case-insensitive name -> position index"""
+
+    __slots__ = ("names", "positions", "_index")
+
+    def __init__(self, names: Sequence[str], positions: Optional[Sequence[int]] = None):
+        self.names: Tuple[str, ...] = tuple(names)
+        self.positions: Tuple[int, ...] = tuple(positions) if positions is not None else tuple(range(len(self.names)))
+        index: Dict[str, int] = {}
+        # Exact names win over lower-case aliases, and the first of duplicate names wins
+        for name, position in zip(self.names, self.positions):
+            index.setdefault(name, position)
+        for name, position in zip(self.names, self.positions):
+            index.setdefault(name.lower(), position)
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"Columns({list(self.names)!r})"
+
+    def position(self, *candidates: str) -> Optional[int]:
+        """Value position of the first candidate name present, ignoring case, or None"""
+        for name in candidates:
+            position = self._index.get(name)
+            if position is None:
+                position = self._index.get(name.lower())
+            if position is not None:
+                return position
+        return None
+
+    def getter(self, *candidates: str, default: Any = None) -> Callable[["Row"], Any]:
+        """
+        Function reading the first of ``candidates`` present in these columns
+        from a row, or returning ``default`` if none of them is.
+        """
+        position = self.position(*candidates)
+        if position is None:
+            return lambda row: default
+        return lambda row: row._values[position]
+
+    def without(self, names: Iterable[str]) -> "Columns":
+        """These columns with ``names`` hidden; the positions of the rest are unchanged"""
+        hidden = {name.lower() for name in names}
+        kept = [(name, position) for name, position in zip(self.names, self.positions) if name.lower() not in hidden]
+        return Columns([name for name, _ in kept], [position for _, position in kept])
+
+
+class Row(Mapping):
+    """One result row: a value tuple read through the result set's shared ``Columns``"""
+
+    __slots__ = ("_columns", "_values")
+
+    def __init__(self, columns: Columns, values: Sequence[Any]):
+        self._columns = columns
+        self._values = values
+
+    @property
+    def columns(self) -> Columns:
+        return self._columns
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._columns.position(key) if isinstance(key, str) else None
+        if position is None:
+            raise KeyError(key)
+        return self._values[position]
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._columns.position(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns.names)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return f"Row({dict(self)!r})"
+
+    def __reduce__(self):
+        return Row, (self._columns, self._values)
+
+    def __copy__(self) -> "Row":
+        return self
+
+    def __deepcopy__(self, memo) -> "Row":
+        # Rows are immutable, so copies can share them
+        return self
+
+    def with_columns(self, columns: Columns) -> "Row":
+        """This row's values read through ``columns`` (e.g. with some columns hidden)"""
+        return Row(columns, self._values)
+
+
+def make_rows(names: Sequence[str], values: Iterable[Sequence[Any]], hidden: Iterable[str] = ()) -> List[Row]:
+    """Rows over ``values`` sharing one column index, with the ``hidden`` columns left out"""
+    columns = Columns(names)
+    hidden = list(hidden)
+    if hidden:
+        columns = columns.without(hidden)
+    return [Row(columns, row) for row in values]
+
+
+def as_rows(rows: Sequence[Mapping]) -> List[Row]:
+    """
+    ``rows`` as ``Row``s sharing one column index.
+
+    A result set from ``execute_query`` is returned as it is; other mappings
+    (dict rows built by tests or older callers) are re-indexed by the keys of
+    the first row.
+    """
+    if not rows:
+        return []
+    first = rows[0]
+    if isinstance(first, Row) and all(isinstance(row, Row) and row.columns is first.columns for row in rows):
+        return list(rows)
+    names = list(first.keys())
+    columns = Columns(names)
+    return [Row(columns, tuple(row.get(name) for name in names)) for row in rows]
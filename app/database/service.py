@@ -8,6 +8,9 @@ import pandas as pd
 import logging
 from typing import Dict, Any, List
 from ..core.config import settings
+from .async_executor import get_db_executor
+from .pool import get_pool, resolve_sqlite_path
+from .query_templates import QUERY_TEMPLATES, SQLQuery
 
 logger = logging.getLogger(__name__)
 
@@ -16,32 +19,25 @@ class DatabaseService:
     
     def __init__(self):
         """Initialize database service"""
-        self.db_path = settings.DATABASE_URL.replace('sqlite:///', '')
+        self.db_path = resolve_sqlite_path(settings.DATABASE_URL)
+        self.pool = get_pool(self.db_path)
+    
+    @staticmethod
+    def _fetch_dicts(conn: sqlite3.Connection, query: SQLQuery) -> List[Dict]:
+        # Execute query (bound templates keep their parameters)
+        cursor = conn.cursor()
+        
+        # Convert to list of dictionaries
+        results = [dict(row) for row in QUERY_TEMPLATES.execute_fetchall(cursor, query)]
+        
+        cursor.close()
+        return results
         
-    async def execute_query(self, query: str) -> List[Dict]:
+    async def execute_query(self, query: SQLQuery) -> List[Dict]:
         """Execute a SQL query and return results as a list of dictionaries"""
         try:
-            # Create connection
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            
-            # Create cursor
-            cursor = conn.cursor()
-            
-            # Execute query
-            cursor.execute(query)
-            
-            # Fetch results
-            rows = cursor.fetchall()
-            
-            # Convert to list of dictionaries
-            results = [dict(row) for row in rows]
-            
-            # Close cursor and connection
-            cursor.close()
-            conn.close()
-            
-            return results
+            # Run on a pooled connection on a database thread, off the event loop
+            return await get_db_executor().run_on(self.pool, self._fetch_dicts, query)
             
         except sqlite3.Error as e:
             logger.error(f"Database error executing query: {str(e)}")
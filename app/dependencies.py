@@ -1,12 +1,19 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 import logging
+import threading
 from functools import lru_cache
-from app.models import QueryParser
+from typing import Optional
+from app.query_parser import QueryParser
+from app.database.langchain_sql import LangChainSQLIntegration
 
 logger = logging.getLogger(__name__)
 
+# Process-wide integration used when the app was started without the lifespan hook
+_sql_chain: Optional[LangChainSQLIntegration] = None
+_sql_chain_lock = threading.Lock()
+
 @lru_cache()
 def get_templates():
     template_dir = Path(__file__).parent / "templates"
@@ -19,6 +26,32 @@ def get_templates():
 def get_query_parser():
     return QueryParser()
 
+def get_shared_sql_chain() -> LangChainSQLIntegration:
+    """Return the process-wide LangChainSQLIntegration, creating it on first use"""
+    global _sql_chain
+    if _sql_chain is None:
+        with _sql_chain_lock:
+            if _sql_chain is None:
+                logger.info("Creating shared LangChainSQLIntegration")
+                _sql_chain = LangChainSQLIntegration()
+    return _sql_chain
+
+async def close_shared_sql_chain() -> None:
+    """Close the process-wide LangChainSQLIntegration if one was created"""
+    global _sql_chain
+    with _sql_chain_lock:
+        sql_chain, _sql_chain = _sql_chain, None
+    if sql_chain is not None:
+        await sql_chain.aclose()
+
+def get_sql_chain(request: Request) -> LangChainSQLIntegration:
+    """FastAPI dependency returning the integration created by the lifespan hook"""
+    sql_chain = getattr(request.app.state, "sql_chain", None)
+    if sql_chain is None:
+        sql_chain = get_shared_sql_chain()
+        request.app.state.sql_chain = sql_chain
+    return sql_chain
+
 @lru_cache()
 def get_model():
     try:
@@ -0,0 +1,345 @@
+"""
+Non-blocking LLM client for the Together API.
+
+All LLM call sites share one ``LLMClient`` so that requests reuse a pooled
+keep-alive HTTP connection, respect a per-call timeout and never exceed a
+configurable number of in-flight completions. The client talks to the REST
+endpoints directly with ``httpx.AsyncClient`` so the event loop is never
+blocked while waiting on the model.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import timed
+from app.llm.transport import check_mode, make_transport
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClientError(Exception):
+    """Raised when an LLM request fails, times out or returns an unusable payload"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+
+@dataclass
+class LLMCompletion:
+    """Text and accounting information returned by a single LLM call"""
+    text: str
+    model: str
+    usage: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+class LLMClient:
+    """Async Together API client with connection pooling and back-pressure"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        transport_mode: Optional[str] = None
+    ):
+        """
+        Initialize the client. Nothing is opened until the first request.
+
+        Args:
+            api_key: Together API key (defaults to TOGETHER_API_KEY)
+            base_url: API root, e.g. https://api.together.xyz/v1
+            model: Default model used when a call does not name one
+            timeout: Default per-call timeout in seconds
+            max_in_flight: Maximum number of concurrent LLM requests
+            max_keepalive: Number of idle keep-alive connections to retain
+            transport: Optional httpx transport (used by tests); in record
+                mode it is the transport that is recorded
+            transport_mode: live, record or replay (defaults to LLM_TRANSPORT_MODE,
+                see ``app.llm.transport``)
+        """
+        self.api_key = api_key or os.getenv("TOGETHER_API_KEY") or settings.TOGETHER_API_KEY
+        self.base_url = (base_url or settings.LLM_API_BASE).rstrip("/")
+        self.model = model or os.getenv("LLM_MODEL", settings.LLM_MODEL)
+        self.timeout = timeout if timeout is not None else settings.LLM_TIMEOUT_SECONDS
+        self.max_in_flight = max_in_flight or settings.LLM_MAX_IN_FLIGHT
+        self.max_keepalive = max_keepalive or settings.LLM_MAX_KEEPALIVE
+        self.transport = transport
+        self.transport_mode = check_mode(transport_mode or settings.LLM_TRANSPORT_MODE)
+
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing: Set[asyncio.Task] = set()
+
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "in_flight": 0,
+            "max_in_flight_seen": 0,
+            "total_wait_time": 0.0,
+            "total_response_time": 0.0
+        }
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            # Connections cannot be shared between event loops, so a new loop
+            # (e.g. a fresh asyncio.run in a script) gets its own pool
+            if self._http is not None and not self._http.is_closed:
+                self._retire_http(self._http, self._http_loop, loop)
+            limits = httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_keepalive
+            )
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=self.timeout,
+                limits=limits,
+                transport=make_transport(self.transport_mode, self.transport, limits)
+            )
+            self._http_loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._http
+
+    def _retire_http(
+        self,
+        http: httpx.AsyncClient,
+        old_loop: Optional[asyncio.AbstractEventLoop],
+        loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """Close a pool left behind by another event loop without blocking this one"""
+        if old_loop is not None and old_loop.is_running():
+            # Still serving requests in another thread; close it there
+            asyncio.run_coroutine_threadsafe(http.aclose(), old_loop)
+            return
+        closing = loop.create_task(http.aclose())
+        self._closing.add(closing)
+        closing.add_done_callback(self._closing.discard)
+
+    @timed("llm_call")
+    async def _post(self, path: str, payload: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        """POST a JSON payload, holding a semaphore slot for the whole round-trip"""
+        http = self._get_http()
+        wait_start = time.perf_counter()
+        async with self._semaphore:
+            self.stats["total_wait_time"] += time.perf_counter() - wait_start
+            self.stats["calls"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight_seen"] = max(self.stats["max_in_flight_seen"], self.stats["in_flight"])
+            start_time = time.perf_counter()
+            try:
+                response = await http.post(
+                    path,
+                    json=payload,
+                    timeout=timeout if timeout is not None else self.timeout
+                )
+                response.raise_for_status()
+                return response.json()
+            except httpx.TimeoutException as e:
+                self.stats["failures"] += 1
+                self.stats["timeouts"] += 1
+                raise LLMClientError(f"LLM request to {path} timed out") from e
+            except httpx.HTTPStatusError as e:
+                self.stats["failures"] += 1
+                raise LLMClientError(
+                    f"LLM request to {path} failed: {e.response.text[:200]}",
+                    status_code=e.response.status_code
+                ) from e
+            except (httpx.HTTPError, ValueError) as e:
+                self.stats["failures"] += 1
+                raise LLMClientError(f"LLM request to {path} failed: {str(e)}") from e
+            finally:
+                self.stats["in_flight"] -= 1
+                self.stats["total_response_time"] += time.perf_counter() - start_time
+
+    async def complete(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.1,
+        timeout: Optional[float] = None,
+        **params: Any
+    ) -> LLMCompletion:
+        """Run a plain text completion"""
+        model = model or self.model
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            **params
+        }
+        start_time = time.perf_counter()
+        data = await self._post("/completions", payload, timeout)
+        try:
+            text = data["choices"][0]["text"]
+        except (KeyError, IndexError, TypeError) as e:
+            self.stats["failures"] += 1
+            raise LLMClientError(f"Unexpected completion payload: {str(data)[:200]}") from e
+        return LLMCompletion(
+            text=text or "",
+            model=data.get("model", model),
+            usage=data.get("usage") or {},
+            elapsed=time.perf_counter() - start_time
+        )
+
+    @timed("llm_call")
+    async def stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.1,
+        timeout: Optional[float] = None,
+        **params: Any
+    ) -> AsyncIterator[str]:
+        """
+        Run a text completion with ``stream=True`` and yield text deltas as
+        they arrive. The semaphore slot is held until the stream is exhausted
+        or the consumer stops iterating.
+        """
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+            **params
+        }
+        http = self._get_http()
+        wait_start = time.perf_counter()
+        async with self._semaphore:
+            self.stats["total_wait_time"] += time.perf_counter() - wait_start
+            self.stats["calls"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight_seen"] = max(self.stats["max_in_flight_seen"], self.stats["in_flight"])
+            start_time = time.perf_counter()
+            try:
+                async with http.stream(
+                    "POST",
+                    "/completions",
+                    json=payload,
+                    timeout=timeout if timeout is not None else self.timeout
+                ) as response:
+                    if response.status_code >= 400:
+                        body = (await response.aread()).decode("utf-8", "replace")
+                        raise LLMClientError(
+                            f"LLM request to /completions failed: {body[:200]}",
+                            status_code=response.status_code
+                        )
+                    # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            choice = json.loads(data)["choices"][0]
+                        except (ValueError, KeyError, IndexError, TypeError):
+                            continue
+                        text = choice.get("text") or (choice.get("delta") or {}).get("content")
+                        if text:
+                            yield text
+            except LLMClientError:
+                self.stats["failures"] += 1
+                raise
+            except httpx.TimeoutException as e:
+                self.stats["failures"] += 1
+                self.stats["timeouts"] += 1
+                raise LLMClientError("LLM request to /completions timed out") from e
+            except httpx.HTTPError as e:
+                self.stats["failures"] += 1
+                raise LLMClientError(f"LLM request to /completions failed: {str(e)}") from e
+            finally:
+                self.stats["in_flight"] -= 1
+                self.stats["total_response_time"] += time.perf_counter() - start_time
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.1,
+        timeout: Optional[float] = None,
+        **params: Any
+    ) -> LLMCompletion:
+        """Run a chat completion"""
+        model = model or self.model
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            **params
+        }
+        start_time = time.perf_counter()
+        data = await self._post("/chat/completions", payload, timeout)
+        try:
+            text = data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            self.stats["failures"] += 1
+            raise LLMClientError(f"Unexpected chat payload: {str(data)[:200]}") from e
+        return LLMCompletion(
+            text=text or "",
+            model=data.get("model", model),
+            usage=data.get("usage") or {},
+            elapsed=time.perf_counter() - start_time
+        )
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        loop = asyncio.get_running_loop()
+        closing = [task for task in self._closing if task.get_loop() is loop]
+        if closing:
+            await asyncio.gather(*closing, return_exceptions=True)
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        self._http_loop = None
+
+
+_llm_client: Optional[LLMClient] = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use"""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = LLMClient()
+    return _llm_client
+
+
+async def close_llm_client() -> None:
+    """Close the process-wide LLM client if one was created"""
+    global _llm_client
+    with _llm_client_lock:
+        llm_client, _llm_client = _llm_client, None
+    if llm_client is not None:
+        await llm_client.aclose()
@@ -11,9 +11,12 @@ import time
 import hashlib
 from typing import Dict, List, Optional, Union, Any
 
-from together import Together
 import os
-from functools import lru_cache
+
+from app.core.config import settings
+from .client import LLMClient, get_llm_client
+from .transport import replaying
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +38,9 @@ class LLMResponseManager:
         temperature: float = 0.1,
         max_tokens: int = 1024,
         api_key: Optional[str] = None,
-        cache_size: int = 100
+        cache_size: int = 100,
+        llm_client: Optional[LLMClient] = None,
+        response_cache: Optional[ResponseCache] = None
     ):
         """
         Initialize the LLM Response Manager.
@@ -45,7 +50,9 @@ class LLMResponseManager:
             temperature: Temperature parameter for generation
             max_tokens: Maximum tokens to generate in responses
             api_key: Together API key (defaults to environment variable)
-            cache_size: Size of the LRU cache for responses
+            cache_size: Maximum number of responses kept in memory
+            llm_client: Async LLM client (defaults to the shared client)
+            response_cache: Two-tier response cache (defaults to one built from settings)
         """
         self.model_name = model_name
         self.temperature = temperature
@@ -53,10 +60,16 @@ class LLMResponseManager:
         
         # Initialize Together client
         self.api_key = api_key or os.environ.get("TOGETHER_API_KEY")
-        if not self.api_key:
+        # Replayed responses need no key
+        if not self.api_key and not replaying():
             raise ValueError("Together API key must be provided or set as TOGETHER_API_KEY env variable")
         
-        self.together_client = Together(api_key=self.api_key)
+        if llm_client is not None:
+            self.llm_client = llm_client
+        elif api_key:
+            self.llm_client = LLMClient(api_key=self.api_key, model=self.model_name)
+        else:
+            self.llm_client = get_llm_client()
         
         # Track token usage
         self.token_usage = {
@@ -65,10 +78,20 @@ class LLMResponseManager:
             "total_tokens": 0
         }
         
+        # Response cache: in-memory LRU in front of the SQLite store
+        self.cache = response_cache or ResponseCache(
+            db_path=settings.LLM_CACHE_DB_PATH,
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+            max_entries=cache_size,
+            ttls=settings.LLM_CACHE_TTLS,
+            default_ttl=settings.LLM_CACHE_DEFAULT_TTL
+        )
+        
         # Stats tracking
         self.stats = {
             "calls": 0,
             "cache_hits": 0,
+            "cache_misses": 0,
             "failures": 0,
             "avg_response_time": 0
         }
@@ -124,28 +147,35 @@ Generate a natural, helpful response that:
 Your response should be in plain text format suitable for display to the user."""
         }
     
-    @lru_cache(maxsize=100)
-    def _get_cached_response(self, prompt_hash: str):
+    def _cache_namespace(self, prompt_type: str) -> str:
+        """
+        Namespace for cached entries of a prompt type.
+        
+        Changing the model, temperature or the template text of the prompt
+        type yields a new namespace, so stale entries are never served.
+        """
+        template = self.prompt_templates.get(prompt_type, "")
+        return ResponseCache.fingerprint(self.model_name, str(self.temperature), prompt_type, template)
+    
+    async def _get_cached_response(self, prompt_hash: str, prompt_type: str = "default") -> Optional[str]:
         """Get a cached response by prompt hash."""
-        # This is a placeholder for a more sophisticated caching mechanism
-        # In a real implementation, this would likely use Redis or a similar cache
-        return None
+        return await self.cache.aget(self._cache_namespace(prompt_type), prompt_hash)
     
-    def _store_cached_response(self, prompt_hash: str, response: str):
+    async def _store_cached_response(self, prompt_hash: str, response: str, prompt_type: str = "default"):
         """Store a response in the cache."""
-        # This is a placeholder for a more sophisticated caching mechanism
-        pass
+        await self.cache.aset(self._cache_namespace(prompt_type), prompt_hash, response, prompt_type)
     
     def _create_prompt_hash(self, system_prompt: str, user_prompt: str) -> str:
         """Create a hash of the prompt for caching purposes."""
         combined = f"{system_prompt}||{user_prompt}"
         return hashlib.md5(combined.encode()).hexdigest()
     
-    def get_response(
+    async def get_response(
         self,
         user_prompt: str,
         system_prompt: Optional[str] = None,
-        use_cache: bool = True
+        use_cache: bool = True,
+        prompt_type: str = "default"
     ) -> str:
         """
         Get a response from the LLM.
@@ -154,6 +184,7 @@ Your response should be in plain text format suitable for display to the user.""
             user_prompt: The user's prompt
             system_prompt: Optional system prompt (defaults to base_system)
             use_cache: Whether to use the response cache
+            prompt_type: Template name, used for the cache TTL and namespace
             
         Returns:
             The LLM's response text
@@ -167,35 +198,35 @@ Your response should be in plain text format suitable for display to the user.""
         # Check cache
         if use_cache:
             prompt_hash = self._create_prompt_hash(system_prompt, user_prompt)
-            cached_response = self._get_cached_response(prompt_hash)
-            if cached_response:
+            cached_response = await self._get_cached_response(prompt_hash, prompt_type)
+            if cached_response is not None:
                 self.stats["cache_hits"] += 1
                 logger.info(f"Cache hit for prompt hash {prompt_hash[:8]}")
                 return cached_response
+            self.stats["cache_misses"] += 1
         
         try:
-            # Call LLM API
-            response = self.together_client.chat.completions.create(
-                model=self.model_name,
-                messages=[
+            # Call LLM API without blocking the event loop
+            response = await self.llm_client.chat(
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
+                model=self.model_name,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens
             )
             
             # Extract response text
-            response_text = response.choices[0].message.content
+            response_text = response.text
             
             # Update token usage
-            self.token_usage["prompt_tokens"] += response.usage.prompt_tokens
-            self.token_usage["completion_tokens"] += response.usage.completion_tokens
-            self.token_usage["total_tokens"] += response.usage.total_tokens
+            for key in self.token_usage:
+                self.token_usage[key] += response.usage.get(key, 0)
             
             # Cache response if caching is enabled
             if use_cache:
-                self._store_cached_response(prompt_hash, response_text)
+                await self._store_cached_response(prompt_hash, response_text, prompt_type)
             
             # Update response time stats
             elapsed = time.time() - start_time
@@ -211,7 +242,7 @@ Your response should be in plain text format suitable for display to the user.""
             self.stats["failures"] += 1
             raise
     
-    def analyze_intent(self, query: str) -> Dict[str, Any]:
+    async def analyze_intent(self, query: str) -> Dict[str, Any]:
         """
         Analyze the intent of a user query.
         
@@ -222,7 +253,7 @@ Your response should be in plain text format suitable for display to the user.""
             A dictionary containing intent analysis
         """
         prompt = self.prompt_templates["intent_analysis"].format(query=query)
-        response = self.get_response(prompt, use_cache=True)
+        response = await self.get_response(prompt, use_cache=True, prompt_type="intent_analysis")
         
         try:
             # Parse the JSON response
@@ -259,7 +290,7 @@ Your response should be in plain text format suitable for display to the user.""
         # Default to SPECIFIC for anything else
         return "SPECIFIC"
     
-    def generate_sql(self, query: str, schema: str, intent_data: Dict) -> str:
+    async def generate_sql(self, query: str, schema: str, intent_data: Dict) -> str:
         """
         Generate an SQL query based on the user's query and intent analysis.
         
@@ -277,9 +308,9 @@ Your response should be in plain text format suitable for display to the user.""
             intent_data=json.dumps(intent_data)
         )
         
-        return self.get_response(prompt, use_cache=True)
+        return await self.get_response(prompt, use_cache=True, prompt_type="sql_generation")
     
-    def generate_response(self, query: str, results: List[Dict]) -> str:
+    async def generate_response(self, query: str, results: List[Dict]) -> str:
         """
         Generate a natural language response based on query results.
         
@@ -297,7 +328,7 @@ Your response should be in plain text format suitable for display to the user.""
             results_json=results_json
         )
         
-        return self.get_response(prompt, use_cache=False)  # Don't cache responses as they're data-dependent
+        return await self.get_response(prompt, use_cache=False)  # Don't cache responses as they're data-dependent
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """
@@ -310,7 +341,10 @@ Your response should be in plain text format suitable for display to the user.""
             "token_usage": self.token_usage,
             "calls": self.stats["calls"],
             "cache_hits": self.stats["cache_hits"],
+            "cache_misses": self.stats["cache_misses"],
+            "cache_evictions": self.cache.stats["evictions"],
             "cache_hit_rate": self.stats["cache_hits"] / max(1, self.stats["calls"]),
+            "cache": self.cache.get_stats(),
             "failures": self.stats["failures"],
             "avg_response_time": self.stats["avg_response_time"]
         }
@@ -0,0 +1,267 @@
+"""
+Two-tier cache for LLM responses.
+
+Responses are kept in an in-process LRU bounded by a byte budget, in front of
+a persistent SQLite store so that cached prompts survive restarts and are
+shared between workers. Every entry carries an expiry time derived from the
+TTL of its prompt type, and a namespace fingerprint (model name plus template
+text) so that changing either silently invalidates older entries.
+
+Async callers use ``aget``/``aset``: the memory tier answers inline, and the
+SQLite tier is read and written on a worker thread, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """In-memory LRU with a byte budget backed by a SQLite response store"""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_bytes: int = 8 * 1024 * 1024,
+        max_entries: int = 1000,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: int = 600
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: SQLite file for the persistent tier (None disables it)
+            max_bytes: Byte budget of the in-memory tier
+            max_entries: Maximum number of entries in the in-memory tier
+            ttls: TTL in seconds per prompt type
+            default_ttl: TTL for prompt types without an explicit entry
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+
+        # key -> (response, expires_at, size_in_bytes)
+        self._memory: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        # Guards the memory tier and stats; the SQLite tier has its own lock so
+        # memory lookups never wait behind disk I/O on another thread
+        self._lock = threading.Lock()
+        self._store_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "stores": 0
+        }
+
+        if db_path:
+            self._init_store()
+
+    def _init_store(self) -> None:
+        """Open the persistent tier and drop rows that have already expired"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    prompt_type TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires "
+                "ON llm_response_cache (expires_at)"
+            )
+            self._conn.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response store unavailable at {self.db_path}: {str(e)}")
+            self._conn = None
+
+    @staticmethod
+    def fingerprint(*parts: str) -> str:
+        """Build a short namespace fingerprint from model name and template text"""
+        return hashlib.md5("||".join(parts).encode()).hexdigest()[:12]
+
+    def ttl_for(self, prompt_type: str) -> int:
+        """Return the TTL in seconds configured for a prompt type"""
+        return self.ttls.get(prompt_type, self.default_ttl)
+
+    def get(self, namespace: str, prompt_hash: str) -> Optional[str]:
+        """Return a cached response or None on a miss"""
+        key = f"{namespace}:{prompt_hash}"
+        now = time.time()
+        response = self._memory_get(key, now)
+        if response is None:
+            response = self._store_get(key, now)
+        if response is None:
+            self._count("misses")
+        return response
+
+    async def aget(self, namespace: str, prompt_hash: str) -> Optional[str]:
+        """Like ``get``, with the SQLite lookup run on a worker thread"""
+        key = f"{namespace}:{prompt_hash}"
+        now = time.time()
+        response = self._memory_get(key, now)
+        if response is None and self._conn is not None:
+            response = await asyncio.to_thread(self._store_get, key, now)
+        if response is None:
+            self._count("misses")
+        return response
+
+    def set(self, namespace: str, prompt_hash: str, response: str, prompt_type: str = "default") -> None:
+        """Store a response in both tiers"""
+        entry = self._memory_set(namespace, prompt_hash, response, prompt_type)
+        if entry is not None:
+            self._store_put(*entry)
+
+    async def aset(self, namespace: str, prompt_hash: str, response: str, prompt_type: str = "default") -> None:
+        """Like ``set``, with the SQLite write run on a worker thread"""
+        entry = self._memory_set(namespace, prompt_hash, response, prompt_type)
+        if entry is not None and self._conn is not None:
+            await asyncio.to_thread(self._store_put, *entry)
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        """Look a key up in the memory tier, dropping it if expired"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            response, expires_at, size = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return response
+            del self._memory[key]
+            self._memory_bytes -= size
+            self.stats["expirations"] += 1
+            return None
+
+    def _store_get(self, key: str, now: float) -> Optional[str]:
+        """Look a key up in the persistent tier and promote a live entry into memory"""
+        with self._store_lock:
+            if self._conn is None:
+                return None
+            try:
+                row = self._conn.execute(
+                    "SELECT response, expires_at FROM llm_response_cache WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM response store read failed: {str(e)}")
+                return None
+        if row is None:
+            return None
+        response, expires_at = row
+        with self._lock:
+            if expires_at <= now:
+                self.stats["expirations"] += 1
+                return None
+            self._remember(key, response, expires_at)
+            self.stats["hits"] += 1
+            self.stats["disk_hits"] += 1
+        return response
+
+    def _memory_set(
+        self, namespace: str, prompt_hash: str, response: str, prompt_type: str
+    ) -> Optional[Tuple[str, str, str, str, float, float]]:
+        """Insert into the memory tier; returns the row for the persistent tier, or None if not cached"""
+        ttl = self.ttl_for(prompt_type)
+        if ttl <= 0:
+            return None
+        key = f"{namespace}:{prompt_hash}"
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self.stats["stores"] += 1
+        return key, namespace, prompt_type, response, now, expires_at
+
+    def _store_put(self, key: str, namespace: str, prompt_type: str, response: str, created_at: float, expires_at: float) -> None:
+        """Write one entry to the persistent tier"""
+        with self._store_lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_response_cache "
+                    "(cache_key, namespace, prompt_type, response, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, namespace, prompt_type, response, created_at, expires_at)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM response store write failed: {str(e)}")
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        """Insert into the memory tier and evict least recently used entries (call with the lock held)"""
+        size = len(key) + len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[2]
+        self._memory[key] = (response, expires_at, size)
+        self._memory_bytes += size
+        while self._memory and (self._memory_bytes > self.max_bytes or len(self._memory) > self.max_entries):
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        with self._store_lock:
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_response_cache")
+                self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and memory usage"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / max(1, lookups),
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "max_bytes": self.max_bytes,
+            "persistent": self._conn is not None
+        }
+
+    def close(self) -> None:
+        """Close the persistent tier"""
+        with self._store_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
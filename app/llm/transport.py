@@ -0,0 +1,223 @@
+"""
+Record/replay transports for the LLM client.
+
+``LLMClient`` sends every completion through an httpx transport, chosen by
+``LLM_TRANSPORT_MODE``:
+
+- ``live``: the network, as before.
+- ``record``: the network, with every successful response also saved in a
+  local SQLite store under the hash of its request. Requests already in the
+  store are answered from it, so record mode doubles as a warm cache.
+- ``replay``: answered only from the store, after ``LLM_REPLAY_LATENCY``
+  seconds (plus a jitter seeded by the request hash, so runs repeat). A
+  request that was never recorded fails with a 404, which the client raises
+  as an ``LLMClientError``.
+
+The request hash covers the endpoint and the whole JSON payload (model,
+prompt or messages and sampling parameters), so a recording is only reused
+for an identical call. Streamed completions are recorded as their complete
+event stream and replayed in one piece.
+
+Replay never touches the network or needs an API key, so throughput and
+tail-latency tests can run locally at no cost.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_MODES = ("live", "record", "replay")
+
+
+def request_hash(request: httpx.Request) -> str:
+    """Hash of an LLM request: endpoint path plus canonical JSON payload"""
+    try:
+        body = json.dumps(json.loads(request.content), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        body = request.content.decode("utf-8", "replace")
+    return hashlib.sha256(f"{request.url.path}\n{body}".encode("utf-8")).hexdigest()
+
+
+class RecordingStore:
+    """Recorded LLM responses by request hash, in SQLite and held in memory for replay"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_recordings (
+                request_hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                body BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # hash -> (content type, body); recordings are small, so all are loaded
+        self._recordings: Dict[str, Tuple[str, bytes]] = {
+            key: (content_type, bytes(body))
+            for key, content_type, body in self._conn.execute(
+                "SELECT request_hash, content_type, body FROM llm_recordings"
+            )
+        }
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+    def __len__(self) -> int:
+        return len(self._recordings)
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """Content type and body recorded for a request hash, or None"""
+        recording = self._recordings.get(key)
+        with self._lock:
+            self.stats["hits" if recording is not None else "misses"] += 1
+        return recording
+
+    def put(self, key: str, path: str, content_type: str, body: bytes) -> None:
+        """Record a response, replacing any earlier one for the same request"""
+        with self._lock:
+            self._recordings[key] = (content_type, body)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_recordings (request_hash, path, content_type, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, path, content_type, body, time.time())
+            )
+            self._conn.commit()
+            self.stats["recorded"] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"recordings": len(self._recordings), **self.stats}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _recorded_response(request: httpx.Request, recording: Tuple[str, bytes]) -> httpx.Response:
+    content_type, body = recording
+    return httpx.Response(200, headers={"Content-Type": content_type}, content=body, request=request)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forwards to ``inner`` and records successful responses; recorded requests are served from the store"""
+
+    def __init__(self, store: RecordingStore, inner: httpx.AsyncBaseTransport):
+        self.store = store
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_hash(request)
+        recording = self.store.get(key)
+        if recording is not None:
+            return _recorded_response(request, recording)
+
+        response = await self.inner.handle_async_request(request)
+        body = await response.aread()
+        await response.aclose()
+        if response.status_code == 200:
+            content_type = response.headers.get("Content-Type", "application/json")
+            # SQLite writes block, so they are kept off the event loop
+            await asyncio.to_thread(self.store.put, key, request.url.path, content_type, body)
+        # The body has been read, so it is returned without the transfer encoding
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded responses after an injected latency; never uses the network"""
+
+    def __init__(self, store: RecordingStore, latency: float = 0.0, jitter: float = 0.0):
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+
+    def _delay(self, key: str) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + random.Random(int(key[:8], 16)).uniform(-self.jitter, self.jitter))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_hash(request)
+        delay = self._delay(key)
+        if delay:
+            await asyncio.sleep(delay)
+        recording = self.store.get(key)
+        if recording is None:
+            logger.warning(f"No LLM recording for request {key[:12]} to {request.url.path}")
+            return httpx.Response(404, text=f"No recording for request {key}", request=request)
+        return _recorded_response(request, recording)
+
+
+_stores: Dict[str, RecordingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_recording_store(db_path: Optional[str] = None) -> RecordingStore:
+    """The store for ``db_path`` (default ``LLM_RECORDINGS_DB_PATH``), shared by every client"""
+    db_path = os.path.abspath(db_path or settings.LLM_RECORDINGS_DB_PATH)
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = RecordingStore(db_path)
+            logger.info(f"Opened LLM recording store at {db_path} ({len(store)} recordings)")
+        return store
+
+
+def check_mode(mode: str) -> str:
+    """Normalised transport mode, or ValueError if it is not one of TRANSPORT_MODES"""
+    mode = (mode or "live").lower()
+    if mode not in TRANSPORT_MODES:
+        raise ValueError(f"Unknown LLM transport mode {mode!r}; expected one of {', '.join(TRANSPORT_MODES)}")
+    return mode
+
+
+def replaying() -> bool:
+    """Whether the configured transport mode is replay, so no network or API key is needed"""
+    return check_mode(settings.LLM_TRANSPORT_MODE) == "replay"
+
+
+def make_transport(
+    mode: str,
+    inner: Optional[httpx.AsyncBaseTransport] = None,
+    limits: Optional[httpx.Limits] = None,
+    store: Optional[RecordingStore] = None
+) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Transport for ``mode``. ``inner`` (default: a pooled network transport
+    with ``limits``) is what live and record mode send requests to; live mode
+    returns it unchanged, so None means httpx's own default.
+    """
+    mode = check_mode(mode)
+    if mode == "live":
+        return inner
+    store = store or get_recording_store()
+    if mode == "replay":
+        return ReplayTransport(store, settings.LLM_REPLAY_LATENCY, settings.LLM_REPLAY_JITTER)
+    if inner is None:
+        inner = httpx.AsyncHTTPTransport(limits=limits) if limits is not None else httpx.AsyncHTTPTransport()
+    return RecordingTransport(store, inner)
@@ -16,8 +16,9 @@ from enum import Enum
 import time
 from fuzzywuzzy import fuzz
 
-# Import Together API client
-from together import Together
+# Shared async LLM client
+from app.llm.client import get_llm_client
+from app.utils.fuzzy_index import TrigramIndex
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +51,12 @@ class LLMClassifier:
         "Rumphi", "Salima", "Thyolo", "Zomba"
     ]
     
+    # Trigram index over MALAWI_DISTRICTS; only its top candidates are scored
+    DISTRICT_INDEX = TrigramIndex(MALAWI_DISTRICTS)
+    
+    # Minimum trigram similarity for a misspelt district to be corrected
+    DISTRICT_MATCH_SCORE = 0.5
+    
     DISTRICT_PATTERNS = [
         # Base patterns for explicit district mentions
         r"\b(projects?|works|developments?|initiatives?)\b.*\b(in|around|for|of)\s+([\w\s]+?)(\s+district)?\b",
@@ -106,7 +113,7 @@ Previous context: {context}
             list: List of matching district names
         """
         matches = []
-        for district in self.MALAWI_DISTRICTS:
+        for district, _ in self.DISTRICT_INDEX.search(input_name, limit=5):
             if fuzz.ratio(input_name.lower(), district.lower()) > min_ratio:
                 matches.append(district)
         return matches
@@ -150,6 +157,11 @@ Previous context: {context}
         if district in self.MALAWI_DISTRICTS:
             return district
         
+        # Closest district by trigram similarity
+        closest = self.DISTRICT_INDEX.best(district, min_score=self.DISTRICT_MATCH_SCORE)
+        if closest:
+            return closest
+        
         # Fuzzy match (simple implementation)
         for known_district in self.MALAWI_DISTRICTS:
             if district in known_district or known_district in district:
@@ -359,22 +371,31 @@ Previous context: {context}
             )
     
     async def _call_llm(self, prompt: str) -> str:
-        """Call the LLM service (placeholder)"""
-        # TODO: Implement actual LLM call
-        return """
-        {
-            "query_type": "general",
-            "confidence": 0.8,
-            "project_identifier": null,
-            "filters": {
-                "districts": [],
-                "sectors": [],
-                "status": [],
-                "budget_range": {"min": null, "max": null},
-                "time_range": {"start": null, "end": null}
+        """Call the LLM service"""
+        try:
+            completion = await get_llm_client().chat(
+                [{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=500
+            )
+            return completion.text
+        except Exception as e:
+            logger.error(f"Error calling LLM: {e}")
+            # Return default response for errors
+            return """
+            {
+                "query_type": "general",
+                "confidence": 0.8,
+                "project_identifier": null,
+                "filters": {
+                    "districts": [],
+                    "sectors": [],
+                    "status": [],
+                    "budget_range": {"min": null, "max": null},
+                    "time_range": {"start": null, "end": null}
+                }
             }
-        }
-        """
+            """
     
     def _parse_llm_response(self, response: str) -> Dict[str, Any]:
         """Parse LLM response into structured data"""
@@ -0,0 +1,154 @@
+"""
+Local intent classification for get_answer.
+
+``get_answer`` sorts every question into GREETING, GENERAL, SQL or OTHER
+before doing anything else, and used to ask the LLM every time, even for
+"hi" or "projects in Zomba district". The rules here are the regexes that
+already existed for this job: the fallback patterns of
+``LangChainSQLIntegration._get_llm_response`` and a condensed copy of the
+project, district, sector, status, budget and time patterns of
+``HybridClassifier``. Each rule carries a confidence. When the best rule
+reaches ``INTENT_CONFIDENCE_THRESHOLD`` the LLM call is skipped.
+
+Every decision is counted and logged. The log records whether the LLM
+was skipped and, when it was consulted, whether it agreed. That gives the
+skip rate and disagreement rate per confidence band, for tuning the
+threshold from production logs. ``INTENT_AUDIT_RATE`` sends a random share
+of confident predictions to the LLM anyway, so that disagreement above the
+threshold is measured too.
+"""
+
+import logging
+import random
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Pattern, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTENTS = ("GREETING", "GENERAL", "SQL", "OTHER")
+
+_PROJECT_WORDS = r"(?:projects?|construction|building|infrastructure|contractors?|budgets?)"
+_SECTOR_WORDS = (
+    r"(?:health|healthcare|hospitals?|clinics?|medical|education|schools?|classrooms?|university|college|"
+    r"water|sanitation|boreholes?|irrigation|drainage|transport|roads?|highways?|bridges?|"
+    r"agriculture|farming|livestock|markets?|commercial|security|police)"
+)
+_STATUS_WORDS = r"(?:completed|finished|ongoing|current|in progress|active|delayed|stalled|planned|approved|cancelled)"
+
+# (intent, confidence, name, pattern); the most confident matching rule wins
+INTENT_RULES: Tuple[Tuple[str, float, str, Pattern], ...] = tuple(
+    (intent, confidence, name, re.compile(pattern, re.IGNORECASE))
+    for intent, confidence, name, pattern in (
+        # A bare greeting, nothing else
+        ("GREETING", 0.95, "greeting_only",
+         r"^\s*(?:hi|hello|hey|greetings|howdy|good\s+(?:morning|afternoon|evening))"
+         r"(?:\s+(?:there|all|bot|chatbot))?\s*[!.,?]*\s*$"),
+        # Questions about the assistant itself
+        ("GENERAL", 0.9, "capabilities",
+         r"\b(?:what\s+can\s+you\s+do|what\s+(?:kind|sort|type)s?\s+of\s+(?:questions|information|data|things)"
+         r"|how\s+(?:do|can)\s+i\s+use\s+(?:you|this)|what\s+are\s+you|who\s+are\s+you"
+         r"|what\s+(?:do|can)\s+you\s+(?:know|help)|^\s*help\s*[!.?]*\s*$)"),
+        # Project codes and named projects (HybridClassifier project patterns)
+        ("SQL", 0.95, "project_code", r"\bMW-[A-Z]{2}-[A-Z0-9]{2}\b"),
+        ("SQL", 0.9, "named_project",
+         r"(?:tell|show|give)\s+(?:me|us)\s+(?:about|details\s+of|information\s+about)\s+(?:the\s+)?"
+         r"[\w\s-]+?\s+(?:project|block|bridge|road|school|hospital|clinic|borehole|market)\b"),
+        # Listings by district (HybridClassifier district patterns)
+        ("SQL", 0.9, "district_listing",
+         rf"\b{_PROJECT_WORDS}\b.*\b(?:in|at|located\s+in|based\s+in|for)\s+\w+|\b\w+\s+district\b"),
+        # Sector, status, budget and time filters on projects
+        ("SQL", 0.9, "sector_listing", rf"\b{_SECTOR_WORDS}\s+(?:sector|projects?|initiatives)\b"),
+        ("SQL", 0.9, "status_listing", rf"\b{_STATUS_WORDS}\s+(?:\w+\s+)?projects?\b|\bprojects?\s+(?:that|which)\s+are\s+{_STATUS_WORDS}\b"),
+        ("SQL", 0.9, "budget_filter",
+         r"\b(?:budget|cost|costing|worth|valued\s+at)\b.*\b(?:more\s+than|over|above|less\s+than|under|below|between)\b"),
+        ("SQL", 0.9, "time_filter", rf"\b{_PROJECT_WORDS}\s+(?:in|from|during|after|since|before|between)\s+(?:the\s+years?\s+)?\d{{4}}\b"),
+        ("SQL", 0.9, "aggregate",
+         rf"\b(?:how\s+many|total|sum|average|number\s+of|count)\b.*\b(?:{_PROJECT_WORDS}|{_SECTOR_WORDS})\b"),
+        # Project vocabulary without a recognisable shape
+        ("SQL", 0.6, "project_words", rf"\b(?:{_PROJECT_WORDS}|{_SECTOR_WORDS})\b"),
+        # HybridClassifier unrelated patterns: single words that are not about projects
+        ("OTHER", 0.9, "unrelated_word",
+         r"^\s*(?:cat|dog|food|weather|time|date|thanks|thank\s+you|bye|goodbye|ok|okay)\s*[!.?]*\s*$"),
+        # Personal data the database does not hold
+        ("OTHER", 0.7, "personal_data",
+         r"\b(?:age|ages|salary|salaries|phone|email|wife|husband|birthday|home\s+address)\b"),
+        # _get_llm_response fallback patterns: weak on their own
+        ("GREETING", 0.5, "greeting_word", r"\b(?:hi|hello|hey|greetings|howdy)\b"),
+        ("GENERAL", 0.4, "question_word", r"\b(?:what|how|tell me about|explain|help|can you|able to)\b"),
+    )
+)
+
+
+@dataclass(frozen=True)
+class IntentPrediction:
+    """Locally predicted intent, its confidence and the rule that produced it"""
+    intent: str
+    confidence: float
+    rule: Optional[str] = None
+
+
+class LocalIntentClassifier:
+    """Regex intent stage in front of the LLM intent prompt"""
+
+    def __init__(self, threshold: Optional[float] = None, audit_rate: Optional[float] = None):
+        self.threshold = threshold if threshold is not None else settings.INTENT_CONFIDENCE_THRESHOLD
+        self.audit_rate = audit_rate if audit_rate is not None else settings.INTENT_AUDIT_RATE
+        self._lock = threading.Lock()
+        self.stats = {"predictions": 0, "skipped": 0, "llm_checked": 0, "disagreements": 0, "audited": 0}
+        # Confidence band -> {"checked": n, "disagreed": n}, for threshold tuning
+        self._bands: Dict[str, Dict[str, int]] = {}
+
+    def predict(self, query: str) -> IntentPrediction:
+        """Best matching rule for ``query``; OTHER with confidence 0 if none match"""
+        best = IntentPrediction("OTHER", 0.0)
+        for intent, confidence, name, pattern in INTENT_RULES:
+            if confidence > best.confidence and pattern.search(query):
+                best = IntentPrediction(intent, confidence, name)
+        return best
+
+    def should_skip_llm(self, prediction: IntentPrediction) -> bool:
+        """True if the prediction is confident enough to answer without the LLM"""
+        if prediction.confidence < self.threshold:
+            return False
+        if self.audit_rate and random.random() < self.audit_rate:
+            with self._lock:
+                self.stats["audited"] += 1
+            return False
+        return True
+
+    def record(self, query: str, prediction: IntentPrediction, llm_intent: Optional[str] = None) -> None:
+        """Count a decision; ``llm_intent`` is the LLM's answer when it was consulted"""
+        band = f"{min(int(prediction.confidence * 10), 9) / 10:.1f}"
+        disagreed = llm_intent is not None and llm_intent != prediction.intent
+        with self._lock:
+            self.stats["predictions"] += 1
+            if llm_intent is None:
+                self.stats["skipped"] += 1
+            else:
+                self.stats["llm_checked"] += 1
+                counts = self._bands.setdefault(band, {"checked": 0, "disagreed": 0})
+                counts["checked"] += 1
+                if disagreed:
+                    self.stats["disagreements"] += 1
+                    counts["disagreed"] += 1
+        logger.info(
+            f"intent local={prediction.intent} confidence={prediction.confidence:.2f} "
+            f"rule={prediction.rule} llm={llm_intent or '-'} skipped={llm_intent is None} "
+            f"disagreed={disagreed} query={query!r}"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            predictions = self.stats["predictions"]
+            checked = self.stats["llm_checked"]
+            return {
+                **self.stats,
+                "threshold": self.threshold,
+                "skip_rate": self.stats["skipped"] / predictions if predictions else 0.0,
+                "disagreement_rate": self.stats["disagreements"] / checked if checked else 0.0,
+                "bands": {band: dict(counts) for band, counts in sorted(self._bands.items())},
+            }
@@ -11,7 +11,7 @@ import re
 from typing import Dict, Any, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
-from together import Together
+from app.llm.client import get_llm_client
 
 logger = logging.getLogger(__name__)
 
@@ -67,9 +67,8 @@ Query: {query}
 
 Previous context: {context}
 """
-        # Initialize Together API
-        self.together = Together()
-        self.together.api_key = "YOUR_API_KEY"  # Replace with actual key
+        # Shared async LLM client (pooled connections, bounded concurrency)
+        self.llm = get_llm_client()
         
     async def classify_query(self, query: str, context: Optional[Dict[str, Any]] = None) -> QueryClassification:
         """
@@ -157,14 +156,14 @@ Previous context: {context}
         """Call the LLM service"""
         try:
             # Call the LLM
-            response = await self.together.chat.completions.create(
+            completion = await self.llm.chat(
+                [{"role": "user", "content": prompt}],
                 model="mistralai/Mixtral-8x7B-Instruct-v0.1",
-                messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,  # Low temperature for more consistent classification
                 max_tokens=500
             )
             
-            return response.choices[0].message.content
+            return completion.text
             
         except Exception as e:
             logger.error(f"Error calling LLM: {e}")
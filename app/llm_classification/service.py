@@ -5,11 +5,15 @@ This module provides services to integrate the hybrid classifier
 with the existing codebase.
 """
 
+import json
 import logging
 import asyncio
 from typing import Dict, Any, List, Optional, Tuple, Union
 
 from .hybrid_classifier import HybridClassifier, QueryClassification, QueryType, QueryParameters
+from ..database.query_templates import QUERY_TEMPLATES, BoundQuery, json_list
+from ..database.columnar import ColumnarSnapshot
+from ..database.migrations import canonical_status, normalise_key
 
 logger = logging.getLogger(__name__)
 
@@ -45,11 +49,36 @@ Example Variations:
 - "Dowa infrastructure initiatives"
 """
 
+# Sector names mapped to the project sector fragments they should match
+SECTOR_LIKE_TERMS = {
+    "health": ["health", "medical", "hospital"],
+    "education": ["education", "school", "learning"],
+    "water": ["water", "sanitation"],
+    "transport": ["transport", "road", "infrastructure"],
+    "agriculture": ["agriculture", "farming", "crop"]
+}
+
+# Sector names mapped to the sector_key values they select on a migrated database
+SECTOR_KEYS = {
+    "health": ["health"],
+    "education": ["education"],
+    "water": ["water and sanitation"],
+    "sanitation": ["water and sanitation"],
+    "transport": ["roads and bridges"],
+    "roads": ["roads and bridges"],
+    "agriculture": ["agriculture and environment"],
+    "commercial": ["commercial services"],
+    "security": ["community security initiatives"]
+}
+
 class QueryClassificationService:
     """
     Service to handle query classification and integration with existing codebase
     """
     
+    # Set by the owner once it knows proj_dashboard has the indexed filter keys
+    use_filter_keys = False
+    
     def __init__(self):
         """Initialize the classification service"""
         self.classifier = HybridClassifier()
@@ -88,138 +117,110 @@ class QueryClassificationService:
         result = await self.classifier.classify_query(query)
         return result
     
-    def generate_sql_from_classification(self, classification: QueryClassification) -> str:
+    def generate_sql_from_classification(self, classification: QueryClassification) -> BoundQuery:
         """Generate SQL query based on classification"""
-        # Base SQL query with all fields for specific queries
-        if classification.parameters.projects:
-            sql = """
-            SELECT 
-                projectname as project_name,
-                projectcode as project_code,
-                projectsector as project_sector,
-                projectstatus as status,
-                stage,
-                region,
-                district as location,
-                traditionalauthority,
-                budget as total_budget,
-                TOTALEXPENDITUREYEAR as total_expenditure,
-                fundingsource as funding_source,
-                startdate as start_date,
-                completionestidate as completion_date,
-                lastvisit as last_monitoring_visit,
-                completionpercentage as completion_progress,
-                contractorname as contractor,
-                signingdate as contract_signing_date,
-                projectdesc as description,
-                fiscalyear as fiscal_year
-            FROM 
-                proj_dashboard
-            """
-        else:
-            # Use basic fields for general queries
-            sql = """
-            SELECT 
-                projectname as project_name,
-                fiscalyear as fiscal_year,
-                district as location,
-                budget as total_budget,
-                projectstatus as status,
-                projectsector as project_sector
-            FROM 
-                proj_dashboard
-            """
-        
-        # List to collect WHERE clauses
-        where_clauses = []
-        
-        # Add district filter
-        if classification.parameters.districts and not any(d.lower() == 'the' for d in classification.parameters.districts):
-            district_conditions = []
-            for district in classification.parameters.districts:
-                district_conditions.append(f"LOWER(district) LIKE '%{district.lower()}%'")
-            where_clauses.append(f"({' OR '.join(district_conditions)})")
+        params = classification.parameters
         
-        # Add sector filter
-        if classification.parameters.sectors:
-            sector_conditions = []
-            for sector in classification.parameters.sectors:
-                # Special handling for health sector
-                if sector.lower() == "health":
-                    sector_conditions.append("(LOWER(projectsector) LIKE '%health%' OR LOWER(projectsector) LIKE '%medical%' OR LOWER(projectsector) LIKE '%hospital%')")
-                # Special handling for education sector
-                elif sector.lower() == "education":
-                    sector_conditions.append("(LOWER(projectsector) LIKE '%education%' OR LOWER(projectsector) LIKE '%school%' OR LOWER(projectsector) LIKE '%learning%')")
-                # Special handling for water sector
-                elif sector.lower() == "water":
-                    sector_conditions.append("(LOWER(projectsector) LIKE '%water%' OR LOWER(projectsector) LIKE '%sanitation%')")
-                # Special handling for transport sector
-                elif sector.lower() == "transport":
-                    sector_conditions.append("(LOWER(projectsector) LIKE '%transport%' OR LOWER(projectsector) LIKE '%road%' OR LOWER(projectsector) LIKE '%infrastructure%')")
-                # Special handling for agriculture sector
-                elif sector.lower() == "agriculture":
-                    sector_conditions.append("(LOWER(projectsector) LIKE '%agriculture%' OR LOWER(projectsector) LIKE '%farming%' OR LOWER(projectsector) LIKE '%crop%')")
-                else:
-                    sector_conditions.append(f"LOWER(projectsector) LIKE '%{sector.lower()}%'")
-            where_clauses.append(f"({' OR '.join(sector_conditions)})")
+        # Ignore the stray "the" the district extractor sometimes returns
+        districts = [d for d in params.districts if d.lower() != 'the']
         
-        # Add project filter
-        if classification.parameters.projects:
-            project_conditions = []
-            for project in classification.parameters.projects:
-                project_conditions.append(f"LOWER(projectname) LIKE '%{project.lower()}%'")
-            where_clauses.append(f"({' OR '.join(project_conditions)})")
+        filters = {
+            "projects": json_list(params.projects),
+            "budget_min": params.budget_range.get("min"),
+            "budget_max": params.budget_range.get("max"),
+            "start_date": params.time_range.get("start"),
+            "end_date": params.time_range.get("end")
+        }
+        key_filters = self._key_filters(districts, params.sectors, params.status) if self.use_filter_keys else None
+        if key_filters is not None:
+            filters.update(key_filters)
+            suffix = ""
+        else:
+            # Expand sectors into the LIKE fragments each one should match
+            sector_terms = []
+            for sector in params.sectors:
+                sector_terms.extend(SECTOR_LIKE_TERMS.get(sector.lower(), [sector.lower()]))
+            filters.update({
+                "districts": json_list(districts),
+                "sectors": json_list(sector_terms),
+                "statuses": json_list(params.status)
+            })
+            suffix = ".like"
         
-        # Add budget filter
-        if classification.parameters.budget_range["min"] is not None:
-            where_clauses.append(f"CAST(REPLACE(REPLACE(budget, ',', ''), 'MWK', '') AS FLOAT) >= {classification.parameters.budget_range['min']}")
-        if classification.parameters.budget_range["max"] is not None:
-            where_clauses.append(f"CAST(REPLACE(REPLACE(budget, ',', ''), 'MWK', '') AS FLOAT) <= {classification.parameters.budget_range['max']}")
+        # Specific project queries prioritise exact and prefix name matches
+        if params.projects:
+            return QUERY_TEMPLATES.bind(
+                f"classification.specific{suffix}",
+                project_name=params.projects[0],
+                **filters
+            )
+        return QUERY_TEMPLATES.bind(f"classification.general{suffix}", **filters)
+    
+    def columnar_query(self, classification: QueryClassification, snapshot: Optional[ColumnarSnapshot]) -> Optional[BoundQuery]:
+        """
+        Select the rows for a classification from an in-memory snapshot.
         
-        # Add status filter
-        if classification.parameters.status:
-            status_conditions = []
-            for status in classification.parameters.status:
-                status_conditions.append(f"LOWER(projectstatus) LIKE '%{status.lower()}%'")
-            where_clauses.append(f"({' OR '.join(status_conditions)})")
+        Returns a query fetching the chosen rows by rowid, in order, or None
+        when the filters need SQL (a value without a canonical key, or no
+        snapshot).
+        """
+        if snapshot is None:
+            return None
+        params = classification.parameters
+        districts = [d for d in params.districts if d.lower() != 'the']
+        keys = self._key_values(districts, params.sectors, params.status)
+        if keys is None:
+            return None
         
-        # Add time range filter
-        if classification.parameters.time_range["start"] is not None:
-            where_clauses.append(f"startdate >= '{classification.parameters.time_range['start']}'")
-        if classification.parameters.time_range["end"] is not None:
-            where_clauses.append(f"completionestidate <= '{classification.parameters.time_range['end']}'")
+        mask = snapshot.mask(
+            districts=keys["districts"],
+            sectors=keys["sectors"],
+            statuses=keys["statuses"],
+            projects=params.projects,
+            budget_min=params.budget_range.get("min"),
+            budget_max=params.budget_range.get("max"),
+            start_date=params.time_range.get("start"),
+            end_date=params.time_range.get("end")
+        )
+        if params.projects:
+            rowids = snapshot.top_k(mask, 1, name=params.projects[0])
+            return QUERY_TEMPLATES.bind("classification.specific.rows", rowids=json.dumps(rowids))
+        rowids = snapshot.top_k(mask, 10)
+        return QUERY_TEMPLATES.bind("classification.general.rows", rowids=json.dumps(rowids))
+    
+    def _key_filters(self, districts: List[str], sectors: List[str], statuses: List[str]) -> Optional[Dict[str, Any]]:
+        """Canonical key filters as template parameters, or None (see ``_key_values``)"""
+        keys = self._key_values(districts, sectors, statuses)
+        if keys is None:
+            return None
+        return {name: json_list(values) for name, values in keys.items()}
+    
+    def _key_values(self, districts: List[str], sectors: List[str], statuses: List[str]) -> Optional[Dict[str, List[str]]]:
+        """
+        Translate classified filters into canonical key values.
         
-        # Combine WHERE clauses
-        if where_clauses:
-            sql += "\nWHERE " + " AND ".join(where_clauses)
+        Returns None when any value has no canonical form, so the caller can
+        fall back to the substring-matching templates instead of dropping it.
+        """
+        sector_keys = []
+        for sector in sectors:
+            key = normalise_key(sector)
+            if key in SECTOR_KEYS:
+                sector_keys.extend(SECTOR_KEYS[key])
+            elif any(key in values for values in SECTOR_KEYS.values()):
+                sector_keys.append(key)
+            else:
+                return None
         
-        # Add ORDER BY clause
-        if classification.parameters.projects:
-            # For specific project queries, prioritize exact matches
-            sql += """
-            ORDER BY 
-                CASE 
-                    WHEN LOWER(projectname) = LOWER(?) THEN 1
-                    WHEN LOWER(projectname) LIKE LOWER(?) THEN 2
-                    ELSE 3
-                END,
-                budget DESC
-            LIMIT 1
-            """
-        else:
-            # For general queries, sort by budget and status
-            sql += """
-            ORDER BY 
-                budget DESC,
-                CASE 
-                    WHEN LOWER(projectstatus) LIKE '%ongoing%' THEN 1
-                    WHEN LOWER(projectstatus) LIKE '%completed%' THEN 2
-                    ELSE 3
-                END
-            LIMIT 10
-            """
+        status_keys = [canonical_status(status) for status in statuses]
+        if None in status_keys:
+            return None
         
-        return sql
+        return {
+            "districts": [normalise_key(d) for d in districts if normalise_key(d)],
+            "sectors": sector_keys,
+            "statuses": status_keys
+        }
     
     def generate_explanation_from_classification(self, classification: QueryClassification, total_results: int = 0) -> str:
         """
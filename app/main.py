@@ -3,6 +3,7 @@
 This module contains the main FastAPI application and route handlers.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -16,6 +17,10 @@ from .response_formatter import ResponseFormatter
 from .database.service import DatabaseService
 from .core.config import settings
 from .routers import chat
+from .dependencies import get_shared_sql_chain, close_shared_sql_chain
+from .llm.client import close_llm_client
+from .database.pool import close_all_pools
+from .database.async_executor import shutdown_db_executor
 from .llm_classification.new_classifier import LLMClassifier
 from .services.llm_service import LLMService
 import ssl
@@ -28,11 +33,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared services once at startup and release them on shutdown"""
+    app.state.sql_chain = get_shared_sql_chain()
+    logger.info("Shared LangChainSQLIntegration ready")
+    try:
+        yield
+    finally:
+        app.state.sql_chain = None
+        await close_shared_sql_chain()
+        await close_llm_client()
+        shutdown_db_executor()
+        close_all_pools()
+        logger.info("Shared LangChainSQLIntegration, LLM client, database executor and pools closed")
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -6,6 +6,8 @@ import pandas as pd
 import sqlite3
 from contextlib import contextmanager
 import os
+from .database.pool import get_pool
+from .database.query_templates import QUERY_TEMPLATES, SQLQuery
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +77,8 @@ class ChatRequest(BaseModel):
     """Request model for chat endpoint"""
     message: str
     session_id: Optional[str] = None
+    # next_cursor token from a previous paginated response ("show more")
+    cursor: Optional[str] = None
 
 class ResultData(BaseModel):
     """Model for result data"""
@@ -105,41 +109,30 @@ class DatabaseManager:
             db_path = os.path.abspath(db_path)
             
         self.db_path = db_path
+        # Read-only connections are pooled and shared by every manager for this file
+        self.pool = get_pool(self.db_path)
         logger.info(f"Using database at: {self.db_path}")
 
     @contextmanager
     def get_connection(self):
-        conn = None
         try:
-            if not os.path.exists(self.db_path):
-                raise FileNotFoundError(f"Database file not found: {self.db_path}")
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable row factory for named columns
-            yield conn
+            with self.pool.connection() as conn:
+                yield conn
         except sqlite3.Error as e:
             logger.error(f"Database connection error: {e}")
             raise
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
             raise
-        finally:
-            if conn:
-                conn.close()
 
-    def execute_query(self, query: str) -> Tuple[List[Dict[str, Any]], float]:
+    def execute_query(self, query: SQLQuery) -> Tuple[List[Dict[str, Any]], float]:
         start_time = datetime.now()
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query)
-            results = [dict(row) for row in cursor.fetchall()]
+            with self.pool.connection() as conn:
+                results = [dict(row) for row in QUERY_TEMPLATES.execute_fetchall(conn.cursor(), query)]
             query_time = (datetime.now() - start_time).total_seconds()
             return results, query_time
         except Exception as e:
             logger.error(f"Query execution error: {e}")
             logger.error(f"Failed query: {query}")
-            raise
-        finally:
-            if conn:
-                conn.close()
\ No newline at end of file
+            raise
\ No newline at end of file
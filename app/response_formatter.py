@@ -8,8 +8,21 @@ import pandas as pd
 from datetime import datetime
 import logging
 
+from .database.column_plan import OMIT, ColumnPlan, column
+
 logger = logging.getLogger(__name__)
 
+# Date spellings accepted by format_value, tried in order
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%Y/%m/%d',
+    '%d-%m-%Y',
+    '%m-%d-%Y'
+]
+DISPLAY_DATE_FORMAT = '%B %d, %Y'
+
 class ResponseFormatter:
     """Formats query responses for output"""
     
@@ -26,6 +39,8 @@ class ResponseFormatter:
             ("PROJECTSTATUS", "Status"),
             ("PROJECTSECTOR", "Project Sector")
         ]
+        # Compiled once; format_general_query applies it a column at a time
+        self.general_project_plan = self._column_plan(self.general_project_fields)
         
         # Define fields for specific queries - exactly 12 fields
         self.specific_project_fields = [
@@ -110,26 +125,17 @@ class ResponseFormatter:
             try:
                 if isinstance(value, str):
                     # Try different date formats
-                    date_formats = [
-                        '%Y-%m-%d',
-                        '%d/%m/%Y',
-                        '%m/%d/%Y',
-                        '%Y/%m/%d',
-                        '%d-%m-%Y',
-                        '%m-%d-%Y'
-                    ]
-                    
-                    for fmt in date_formats:
+                    for fmt in DATE_FORMATS:
                         try:
                             date_obj = datetime.strptime(value, fmt)
-                            return date_obj.strftime('%B %d, %Y')
+                            return date_obj.strftime(DISPLAY_DATE_FORMAT)
                         except:
                             continue
                             
                     # If no format matches, return original
                     return value
                 elif isinstance(value, datetime):
-                    return value.strftime('%B %d, %Y')
+                    return value.strftime(DISPLAY_DATE_FORMAT)
                 else:
                     return str(value)
             except Exception as e:
@@ -147,6 +153,76 @@ class ResponseFormatter:
         else:
             return str(value)
     
+    def _null_mask(self, series: pd.Series) -> pd.Series:
+        """Values format_value shows as NULL_VALUE: missing or blank"""
+        return series.isna() | (series.astype(str).str.strip() == '')
+    
+    def format_series(self, series: pd.Series, format_type: str = None) -> pd.Series:
+        """
+        Vectorised ``format_value`` over a column: the same output as
+        formatting each value, with parsing done a column at a time.
+        """
+        nulls = self._null_mask(series)
+        text = series.astype(str)
+        
+        if format_type == "currency":
+            cleaned = (
+                text.str.replace('MWK', '', regex=False)
+                .str.replace('MK', '', regex=False)
+                .str.replace(',', '', regex=False)
+                .str.strip()
+            )
+            numbers = pd.to_numeric(cleaned, errors='coerce')
+            # Only plain strings and numbers take the vectorised path; bools,
+            # "nan" and anything else to_numeric rejects go through format_value
+            plain = series.map(lambda value: isinstance(value, (str, int, float)) and not isinstance(value, bool))
+            parsed = numbers.notna() & plain & ~nulls
+            formatted = text.copy()
+            formatted[parsed] = numbers[parsed].map(lambda value: "MWK 0.00" if value == 0 else f"MWK {value:,.2f}")
+        elif format_type == "date":
+            formatted = text.copy()
+            is_text = (series.map(type) == str) & ~nulls
+            dates = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+            for fmt in DATE_FORMATS:
+                remaining = is_text & dates.isna()
+                if not remaining.any():
+                    break
+                dates[remaining] = pd.to_datetime(series[remaining], format=fmt, errors='coerce')
+            parsed = dates.notna()
+            if parsed.any():
+                # DISPLAY_DATE_FORMAT built from the date parts; much faster than Series.dt.strftime
+                shown = dates[parsed]
+                formatted[parsed] = (
+                    shown.dt.month_name() + " " + shown.dt.day.astype(str).str.zfill(2) + ", "
+                    + shown.dt.year.astype(str)
+                )
+        elif format_type == "percentage":
+            return series.map(lambda value: self.format_value(value, format_type))
+        else:
+            formatted = text
+            parsed = ~nulls
+        
+        # Whatever the vectorised parse rejected (dates outside the datetime64
+        # range, datetime objects, unparseable text) is formatted one by one
+        rest = ~parsed & ~nulls
+        if rest.any():
+            formatted[rest] = series[rest].map(lambda value: self.format_value(value, format_type))
+        return formatted.mask(nulls, self.NULL_VALUE)
+    
+    def _column_plan(self, fields: List[tuple]) -> ColumnPlan:
+        """Column plan of (db field, display name[, format type]) tuples; absent fields are left out"""
+        plan = []
+        for db_field, display_name, *format_type in fields:
+            format_type = format_type[0] if format_type else None
+            plan.append(column(
+                display_name,
+                db_field,
+                format=lambda value, format_type=format_type: self.format_value(value, format_type),
+                missing=OMIT,
+                vector_format=lambda series, format_type=format_type: self.format_series(series, format_type)
+            ))
+        return ColumnPlan(plan)
+    
     def format_response(self, results: List[Dict], query_type: str, metadata: Dict = None) -> Dict:
         """Format query results into a natural language response"""
         try:
@@ -300,14 +376,7 @@ class ResponseFormatter:
     def format_general_query(self, results: pd.DataFrame) -> Dict[str, Any]:
         """Format a general query response"""
         try:
-            formatted_results = []
-            for _, row in results.iterrows():
-                project_data = {}
-                for field, display_name, *format_type in self.general_project_fields:
-                    if field in row.index:
-                        value = self.format_value(row[field], format_type[0] if format_type else None)
-                        project_data[display_name] = value
-                formatted_results.append(project_data)
+            formatted_results = self.general_project_plan.format_frame(results)
             
             return {
                 "type": "list",
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse
-from typing import Dict, Any
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import AsyncIterator, Awaitable, Dict, Any
+import asyncio
+import json
 import logging
 import traceback
 import os
@@ -10,7 +12,13 @@ import sqlite3
 
 from app.database.langchain_sql import LangChainSQLIntegration
 from app.core.config import settings
+from app.core.metrics import RequestTrace, render_metrics, request_trace
 from app.models import ChatRequest  # Import shared ChatRequest model
+from app.dependencies import get_sql_chain
+from app.database.pool import get_pool_stats
+from app.database.async_executor import get_db_executor_stats
+from app.database.query_templates import QUERY_TEMPLATES
+from app.database.result_cache import get_result_cache_stats
 
 # Initialize router
 router = APIRouter(
@@ -98,34 +106,66 @@ def _is_aggregate_query(query: str) -> bool:
     query_lower = query.lower()
     return any(keyword in query_lower for keyword in aggregate_keywords)
 
+# Seconds between checks for a client that went away during a query
+DISCONNECT_POLL_INTERVAL = 0.25
+
+async def _cancel_on_disconnect(request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Await ``work``, cancelling it if the client disconnects first. Queries it
+    was running are dropped or interrupted by the database executor.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected from {request.url.path}; cancelling its query")
+                task.cancel()
+                # Nobody is listening; 499 is the conventional "client closed request"
+                return JSONResponse(status_code=499, content={"detail": "Client closed request"})
+    finally:
+        if not task.done():
+            task.cancel()
+
+def _add_stage_breakdown(response: Any, trace: RequestTrace) -> Any:
+    """Add the request's per-stage timings to the response metadata"""
+    if isinstance(response, dict):
+        metadata = response.get("metadata")
+        if metadata is None and isinstance(response.get("response"), dict):
+            metadata = response["response"].get("metadata")
+        if isinstance(metadata, dict):
+            metadata["request_id"] = trace.request_id
+            metadata["stages"] = trace.breakdown()
+    return response
+
 @router.post("/chat", response_model=Dict[str, Any])
 @router.post("/query", response_model=Dict[str, Any])
-async def handle_request(chat_request: ChatRequest, request: Request):
+async def handle_request(
+    chat_request: ChatRequest,
+    request: Request,
+    sql_chain: LangChainSQLIntegration = Depends(get_sql_chain)
+):
     """Handle both chat and query requests with direct SQL execution"""
     try:
         endpoint = request.url.path.split('/')[-1]
         logger.info(f"Received {endpoint} request: {chat_request}")
-        sql_chain = LangChainSQLIntegration()
         
         try:
-            # Generate the SQL query
-            start_time = time.time()
-            sql_query, query_type = await sql_chain.generate_sql_query(chat_request.message)
-            logger.info(f"Generated SQL query: {sql_query}, type: {query_type}")
-            
-            # Execute the query directly
-            query_results = await sql_chain.execute_query(sql_query)
-            query_time = time.time() - start_time
-            
-            # Format response using the format_response method
-            response = await sql_chain.format_response(
-                query_results=query_results,
-                sql_query=sql_query,
-                query_time=query_time,
-                user_query=chat_request.message,
-                query_type=query_type
-            )
+            # Stage spans of this request are collected under its request ID
+            with request_trace(request.headers.get("X-Request-ID")) as trace:
+                # "show more": continue a listing from the cursor of the previous page
+                if chat_request.cursor:
+                    response = await _cancel_on_disconnect(
+                        request, sql_chain.process_paginated_query(chat_request.message, cursor=chat_request.cursor)
+                    )
+                else:
+                    # Generate, execute and format; identical concurrent questions share one run
+                    response = await _cancel_on_disconnect(request, sql_chain.answer_query(chat_request.message))
             
+            if settings.METRICS_STAGE_BREAKDOWN:
+                _add_stage_breakdown(response, trace)
             return response
             
         except Exception as query_err:
@@ -146,15 +186,77 @@ async def handle_request(chat_request: ChatRequest, request: Request):
             detail=f"Error processing request: {str(e)}"
         )
 
-async def process_request(chat_request: ChatRequest):
+def _encode_event(event: Dict[str, Any], sse: bool) -> str:
+    """Serialise one stream event as an SSE frame or an NDJSON line"""
+    payload = json.dumps(event, default=str)
+    if sse:
+        return f"event: {event.get('event', 'message')}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+@router.post("/chat/stream")
+async def handle_stream_request(
+    chat_request: ChatRequest,
+    request: Request,
+    sql_chain: LangChainSQLIntegration = Depends(get_sql_chain)
+):
+    """
+    Streaming variant of /chat.
+    
+    Sends the summary line as soon as the query has run, then the project rows
+    in chunks, then the LLM narrative token by token. Clients that accept
+    ``text/event-stream`` get server-sent events; everyone else gets
+    newline-delimited JSON. The last event reports time to first byte
+    separately from the total time.
+    """
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    logger.info(f"Received streaming chat request: {chat_request}")
+    
+    async def events() -> AsyncIterator[str]:
+        start_time = time.perf_counter()
+        first_byte = None
+        try:
+            async for event in sql_chain.stream_answer(chat_request.message):
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start_time
+                yield _encode_event(event, sse)
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            logger.error(traceback.format_exc())
+            if first_byte is None:
+                first_byte = time.perf_counter() - start_time
+            yield _encode_event({
+                "event": "error",
+                "message": f"I encountered an error while processing your query about {chat_request.message}. Please try again.",
+                "error": str(e)
+            }, sse)
+        total = time.perf_counter() - start_time
+        logger.info(f"Streamed response: time to first byte {first_byte:.3f}s, total {total:.3f}s")
+        yield _encode_event({
+            "event": "done",
+            "timing": {
+                "time_to_first_byte": f"{first_byte:.3f}s",
+                "total_time": f"{total:.3f}s"
+            }
+        }, sse)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "Access-Control-Allow-Origin": "*"
+        }
+    )
+
+async def process_request(chat_request: ChatRequest, sql_chain: LangChainSQLIntegration):
     """
     Chat endpoint for RAG SQL Chatbot
     """
     try:
         logger.info(f"Received chat request: {chat_request}")
         
-        # Use LangChainSQLIntegration directly instead of QueryClassificationService
-        sql_chain = LangChainSQLIntegration()
+        # Use the shared LangChainSQLIntegration instead of QueryClassificationService
         response = await sql_chain.process_query(chat_request.message)
         
         return JSONResponse(
@@ -176,16 +278,23 @@ async def process_request(chat_request: ChatRequest):
         )
 
 @router.get("/health")
-async def health_check():
+async def health_check(sql_chain: LangChainSQLIntegration = Depends(get_sql_chain)):
     """Health check endpoint"""
     try:
-        # Initialize SQL integration to test database connection
-        sql_chain = LangChainSQLIntegration()
+        # The shared SQL integration is created at startup; just make sure it is there
+        if sql_chain is None:
+            raise RuntimeError("SQL integration is not initialised")
         
         return JSONResponse(
             content={
                 "status": "healthy",
-                "message": "RAG SQL Chatbot is running"
+                "message": "RAG SQL Chatbot is running",
+                "database_pools": get_pool_stats(),
+                "database_executor": get_db_executor_stats(),
+                "query_templates": QUERY_TEMPLATES.get_stats(),
+                "result_caches": get_result_cache_stats(),
+                "intent_classifier": sql_chain.intent_classifier.get_stats(),
+                "single_flight": sql_chain.in_flight.get_stats()
             },
             headers={
                 "Access-Control-Allow-Origin": "*",
@@ -208,6 +317,11 @@ async def health_check():
             }
         )
 
+@router.get("/metrics")
+async def metrics():
+    """Stage and request latency histograms in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @router.options("/health")
 async def health_options():
     """Handle OPTIONS requests for health endpoint"""
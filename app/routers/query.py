@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from typing import Dict, Any
 import logging
@@ -7,6 +7,9 @@ import traceback
 
 from app.database.langchain_sql import LangChainSQLIntegration
 from app.models import ChatRequest
+from app.dependencies import get_sql_chain
+from app.database.query_templates import display_sql
+from app.database.column_plan import ColumnPlan, column
 
 router = APIRouter(
     tags=["query"],
@@ -18,13 +21,38 @@ router = APIRouter(
 
 logger = logging.getLogger(__name__)
 
+
+def _known(value):
+    return "Unknown" if value is None else value
+
+
+def _budget(value):
+    try:
+        return f"MWK {float(value):,.2f}"
+    except (ValueError, TypeError):
+        return "Unknown"
+
+
+# Project fields of the response: display label <- source columns -> formatter
+QUERY_PROJECT_PLAN = ColumnPlan([
+    column("Name of project", "PROJECTNAME", "project_name", format=_known, missing="Unknown"),
+    column("Fiscal year", "FISCALYEAR", "fiscal_year", format=_known, missing="Unknown"),
+    column("Location", "DISTRICT", "location", format=_known, missing="Unknown"),
+    column("Budget", "BUDGET", "total_budget", format=_budget, missing="Unknown"),
+    column("Status", "PROJECTSTATUS", "status", format=_known, missing="Unknown"),
+    column("Sector", "PROJECTSECTOR", "project_sector", format=_known, missing="Unknown"),
+])
+
+
 @router.post("/", response_model=Dict[str, Any])
 @router.post("/query", response_model=Dict[str, Any])
-async def handle_query(chat_request: ChatRequest):
+async def handle_query(
+    chat_request: ChatRequest,
+    sql_chain: LangChainSQLIntegration = Depends(get_sql_chain)
+):
     """Handle query requests with direct SQL execution"""
     try:
         logger.info(f"Received query request: {chat_request}")
-        sql_chain = LangChainSQLIntegration()
         
         try:
             # Generate the SQL query
@@ -36,58 +64,31 @@ async def handle_query(chat_request: ChatRequest):
             results = await sql_chain.execute_query(sql_query)
             query_time = time.time() - start_time
             
-            # Format results manually
-            formatted_projects = []
-            for project in results[:10]:  # Limit to 10 projects for display
-                try:
-                    # Extract key fields with case-insensitive handling
-                    project_data = {}
-                    
-                    # Helper function to get value with case-insensitive keys
-                    def get_value(keys):
-                        for key in keys:
-                            if key in project and project[key] is not None:
-                                return project[key]
-                        return "Unknown"
-                    
-                    # Get basic project info - prioritize the uppercase keys as they match the DB schema
-                    project_data["Name of project"] = get_value(["PROJECTNAME", "project_name", "projectname"])
-                    project_data["Fiscal year"] = get_value(["FISCALYEAR", "fiscal_year", "fiscalyear"])
-                    project_data["Location"] = get_value(["DISTRICT", "district", "location"])
-                    
-                    # Handle budget with formatting - prioritize the uppercase BUDGET field
-                    budget = None
-                    for key in ["BUDGET", "total_budget", "budget"]:
-                        if key in project and project[key] is not None:
-                            try:
-                                budget = float(project[key])
-                                break
-                            except (ValueError, TypeError):
-                                continue
-                    project_data["Budget"] = f"MWK {budget:,.2f}" if budget is not None else "Unknown"
-                    
-                    # Get remaining fields - prioritize uppercase fields
-                    project_data["Status"] = get_value(["PROJECTSTATUS", "status", "projectstatus"])
-                    project_data["Sector"] = get_value(["PROJECTSECTOR", "project_sector", "projectsector"])
-                    
-                    # Add to formatted results
-                    formatted_projects.append(project_data)
-                except Exception as e:
-                    logger.error(f"Error formatting project: {str(e)}")
+            # Listings report their total once, alongside the page of rows
+            if isinstance(results, tuple):
+                total_results, results = results
+            else:
+                total_results = len(results)
+            
+            # Columns are resolved once for the whole result set
+            formatted_projects = QUERY_PROJECT_PLAN.format_rows(
+                results[:10],  # Limit to 10 projects for display
+                on_error=lambda e: logger.error(f"Error formatting project: {str(e)}")
+            )
             
             # Prepare metadata
             metadata = {
-                "total_results": len(results),
+                "total_results": total_results,
                 "query_time": f"{query_time:.2f}s",
-                "sql_query": sql_query[1] if isinstance(sql_query, tuple) else sql_query,
+                "sql_query": display_sql(sql_query),
                 "original_query": chat_request.message,
                 "query_type": query_type
             }
             
             # Create final response
             if formatted_projects:
-                response_text = f"Found {len(results)} projects in the {query_type} sector." if query_type else f"Found {len(results)} projects matching your query."
-                if len(results) > 10:
+                response_text = f"Found {total_results} projects in the {query_type} sector." if query_type else f"Found {total_results} projects matching your query."
+                if total_results > 10:
                     response_text += " Showing the first 10 results."
             else:
                 response_text = "No projects found matching your query."
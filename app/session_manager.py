@@ -1,112 +1,262 @@
-from typing import Dict, Any, List, Optional
+"""
+Query sessions for paging through results.
+
+A session keeps the listing's query plan (a ``PageCursor``: the listing kind
+and its bound filters) and the seek position of each page it has reached,
+not the rows themselves; pages are fetched from the database on demand. The
+store is an LRU capped both in sessions and in approximate bytes, and expired
+sessions are swept by a background thread, so a long-running worker's memory
+stays flat however many users page through large listings. Queries that
+cannot be paged fall back to keeping their rows, within the same budget.
+"""
+
+import json
+import logging
+import threading
 import time
 import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional
+
+from .core.config import settings
+from .database.pagination import PageCursor, strip_sort_keys
+from .database.query_templates import SQLQuery, display_sql
+
+logger = logging.getLogger(__name__)
+
+PAGE_HEADERS = ["Project Name", "District", "Fiscal Year", "Budget", "Status", "Sector"]
+
+
+def _session_size(session: Mapping[str, Any]) -> int:
+    """Approximate in-memory size of a session, from its JSON length"""
+    try:
+        return len(json.dumps(session, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
 
 class SessionManager:
-    """Manages query sessions for pagination and result caching"""
-    
-    def __init__(self, ttl: int = 3600):
-        """Initialize session manager with time-to-live in seconds"""
-        self.sessions: Dict[str, Dict[str, Any]] = {}
-        self.ttl = ttl  # Time to live in seconds
-    
+    """Manages query sessions for pagination"""
+
+    def __init__(
+        self,
+        ttl: Optional[int] = None,
+        db_manager=None,
+        max_sessions: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sweep_interval: Optional[float] = None
+    ):
+        """
+        ``db_manager`` (a ``DatabaseManager``) is used to fetch pages; without
+        it only sessions that stored their rows can be paged.
+        """
+        self.ttl = ttl if ttl is not None else settings.SESSION_TTL  # Time to live in seconds
+        self.db_manager = db_manager
+        self.max_sessions = max_sessions if max_sessions is not None else settings.SESSION_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else settings.SESSION_MAX_BYTES
+        self.sweep_interval = sweep_interval if sweep_interval is not None else settings.SESSION_SWEEP_INTERVAL
+        # Least recently used first; approximate sizes are kept alongside
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self.stats = {"created": 0, "expired": 0, "evicted": 0, "page_fetches": 0}
+
+    # Session store
+
+    def _ensure_sweeper(self) -> None:
+        """Start the background expiry thread on first use"""
+        if self._sweeper is None and self.sweep_interval > 0:
+            self._sweeper = threading.Thread(target=self._sweep, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.cleanup_expired_sessions()
+            except Exception as e:
+                logger.error(f"Error sweeping expired sessions: {str(e)}")
+
+    def close(self) -> None:
+        """Stop the background expiry thread"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _resize(self, session_id: str) -> None:
+        """Re-measure a session and evict least recently used ones over the caps (lock held)"""
+        size = _session_size(self.sessions[session_id])
+        self._bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+        while len(self.sessions) > 1 and (len(self.sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            oldest = next(iter(self.sessions))
+            if oldest == session_id:
+                break
+            self._remove(oldest)
+            self.stats["evicted"] += 1
+
+    def _remove(self, session_id: str) -> None:
+        """Drop a session (lock held)"""
+        del self.sessions[session_id]
+        self._bytes -= self._sizes.pop(session_id, 0)
+
     def create_session(self, query: str) -> str:
         """Create a new session for a query"""
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
-            "query": query,
-            "original_query": query,
-            "results": [],
-            "total_results": 0,
-            "current_page": 1,
-            "page_size": 10,
-            "created_at": time.time(),
-            "last_accessed": time.time(),
-            "sql_query": "",
-            "is_paginated": False
-        }
+        now = time.time()
+        with self._lock:
+            self.sessions[session_id] = {
+                "query": query,
+                "original_query": query,
+                "results": [],
+                "total_results": 0,
+                "current_page": 1,
+                "page_size": settings.PAGE_SIZE,
+                "created_at": now,
+                "last_accessed": now,
+                "sql_query": "",
+                "is_paginated": False,
+                # Listing plan and the cursor of each page reached, by page number
+                "plan": None,
+                "cursors": {}
+            }
+            self.stats["created"] += 1
+            self._resize(session_id)
+        self._ensure_sweeper()
         return session_id
-    
+
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session data for a session ID"""
-        if session_id not in self.sessions:
-            return None
-            
-        session = self.sessions[session_id]
-        # Check if session has expired
-        if time.time() - session["last_accessed"] > self.ttl:
-            self.delete_session(session_id)
-            return None
-            
-        # Update last accessed time
-        session["last_accessed"] = time.time()
-        return session
-    
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+
+            # Check if session has expired
+            if time.time() - session["last_accessed"] > self.ttl:
+                self._remove(session_id)
+                self.stats["expired"] += 1
+                return None
+
+            # Update last accessed time
+            session["last_accessed"] = time.time()
+            self.sessions.move_to_end(session_id)
+            return session
+
     def update_session(self, session_id: str, data: Dict[str, Any]) -> bool:
         """Update session data"""
-        session = self.get_session(session_id)
-        if not session:
-            return False
-            
-        self.sessions[session_id].update(data)
-        return True
-    
+        with self._lock:
+            session = self.get_session(session_id)
+            if not session:
+                return False
+
+            session.update(data)
+            self._resize(session_id)
+            return True
+
     def delete_session(self, session_id: str) -> bool:
         """Delete a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            return True
-        return False
-    
-    def store_results(self, session_id: str, results: List[Dict[str, Any]], 
-                     total_results: int, sql_query: str) -> bool:
-        """Store query results in the session"""
-        session = self.get_session(session_id)
-        if not session:
+        with self._lock:
+            if session_id in self.sessions:
+                self._remove(session_id)
+                return True
             return False
-            
-        self.sessions[session_id].update({
-            "results": results,
-            "total_results": total_results,
-            "sql_query": sql_query,
-            "is_paginated": total_results > session["page_size"]
-        })
-        return True
-    
+
+    def store_results(self, session_id: str, results: List[Dict[str, Any]],
+                      total_results: int, sql_query: SQLQuery) -> bool:
+        """
+        Store the query behind a session's results.
+
+        A pageable listing keeps only its plan and fetches pages when asked;
+        any other query keeps ``results``.
+        """
+        with self._lock:
+            session = self.get_session(session_id)
+            if not session:
+                return False
+
+            plan = PageCursor.for_listing(sql_query, session["page_size"]) if self.db_manager is not None else None
+            session.update({
+                "results": [] if plan is not None else [dict(row) for row in results],
+                "total_results": total_results,
+                "sql_query": display_sql(sql_query),
+                "is_paginated": total_results > session["page_size"],
+                "plan": plan,
+                "cursors": {1: plan} if plan is not None else {}
+            })
+            self._resize(session_id)
+            return True
+
+    # Pages
+
+    def _fetch_page(self, session_id: str, session: Dict[str, Any], page: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Rows of a page of a listing session, seeking from the nearest page
+        already reached; None if the page does not exist.
+        """
+        cursors = session["cursors"]
+        reached = max(number for number in cursors if number <= page)
+        cursor = cursors[reached]
+        try:
+            while True:
+                rows, _ = self.db_manager.execute_query(cursor.page_query())
+                following = cursor.next(rows, session["total_results"])
+                with self._lock:
+                    self.stats["page_fetches"] += 1
+                    if following is not None:
+                        cursors[following.page] = following
+                if cursor.page == page:
+                    return strip_sort_keys(rows)
+                if following is None:
+                    return None
+                cursor = following
+        finally:
+            with self._lock:
+                if session_id in self.sessions:
+                    self._resize(session_id)
+
     def get_page_results(self, session_id: str, page: int) -> Optional[Dict[str, Any]]:
         """Get results for a specific page"""
         session = self.get_session(session_id)
-        if not session or not session["results"]:
+        if not session:
             return None
-            
+
         page_size = session["page_size"]
         total_results = session["total_results"]
         total_pages = (total_results + page_size - 1) // page_size
-        
+
         if page < 1 or page > total_pages:
             return None
-            
+
         start_idx = (page - 1) * page_size
         end_idx = min(start_idx + page_size, total_results)
-        
-        # Calculate actual results based on stored data
-        if len(session["results"]) >= end_idx:
-            # We have the full cached results
+
+        if session["plan"] is not None:
+            page_results = self._fetch_page(session_id, session, page)
+            if page_results is None:
+                return None
+        elif len(session["results"]) >= end_idx:
+            # The rows were stored with the session
             page_results = session["results"][start_idx:end_idx]
         else:
-            # We need to fetch more results
             return None
-            
+
+        with self._lock:
+            session["current_page"] = page
+
         # Format the results as table data
         formatted_results = [{
             "type": "table",
             "message": f"Projects (Page {page} of {total_pages})",
             "data": {
-                "headers": ["Project Name", "District", "Fiscal Year", "Budget", "Status", "Sector"],
+                "headers": PAGE_HEADERS,
                 "rows": page_results
             }
         }]
-            
+
         return {
             "results": formatted_results,
             "metadata": {
@@ -124,14 +274,33 @@ class SessionManager:
                 "prev_page_command": "previous page"
             }
         }
-    
-    def cleanup_expired_sessions(self):
-        """Clean up expired sessions"""
-        current_time = time.time()
-        expired_sessions = [
-            session_id for session_id, session in self.sessions.items()
-            if current_time - session["last_accessed"] > self.ttl
-        ]
-        
-        for session_id in expired_sessions:
-            self.delete_session(session_id) 
\ No newline at end of file
+
+    def cleanup_expired_sessions(self) -> int:
+        """
+        Remove expired sessions and return how many there were.
+
+        Sessions are kept in access order, so only the expired ones at the
+        front are visited.
+        """
+        cutoff = time.time() - self.ttl
+        expired = 0
+        with self._lock:
+            while self.sessions:
+                session_id, session = next(iter(self.sessions.items()))
+                if session["last_accessed"] >= cutoff:
+                    break
+                self._remove(session_id)
+                expired += 1
+            self.stats["expired"] += expired
+        return expired
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Session count, approximate bytes held and counters"""
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                **self.stats
+            }
@@ -4,10 +4,10 @@ This module provides functionality to track SQL query execution and sources.
 """
 
 import pandas as pd
-import sqlite3
 from typing import List, Tuple, Dict, Any
 import logging
 from .models import QuerySource
+from .database.pool import get_pool
 import re
 from datetime import datetime
 
@@ -18,6 +18,7 @@ class SQLTracker:
     
     def __init__(self, database: str = 'pmisProjects.db'):
         self.database = database
+        self.pool = get_pool(database)
         self.connection = None
         self.last_page = 1
         self.last_query = None
@@ -25,20 +26,20 @@ class SQLTracker:
         logger.info(f"Initialized SQLTracker with database: {database}")
         
     def _connect(self):
-        """Create database connection"""
+        """Borrow a connection from the shared pool"""
         try:
-            self.connection = sqlite3.connect(self.database)
-            logger.info(f"Connected to database: {self.database}")
+            self.connection = self.pool.acquire()
+            logger.debug(f"Acquired pooled connection to: {self.database}")
         except Exception as e:
             logger.error(f"Error connecting to database: {e}")
             raise
         
     def _disconnect(self):
-        """Close database connection"""
+        """Return the connection to the shared pool"""
         if self.connection:
-            self.connection.close()
+            self.pool.release(self.connection)
             self.connection = None
-            logger.info("Disconnected from database")
+            logger.debug("Released pooled connection")
         
     def _parse_query(self, query: str) -> List[QuerySource]:
         """Parse SQL query to extract table and column information"""
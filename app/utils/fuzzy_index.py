@@ -0,0 +1,160 @@
+"""
+Approximate name matching over a character trigram index.
+
+Misspelt project and district names ("Nyandula clasroom block", "Zomda")
+used to be compared against every candidate with fuzzywuzzy, or not matched
+at all. Names are split into padded character trigrams once, up front, and
+kept in an inverted index; a lookup only scores the names that share a
+trigram with the query, ranked by the Dice coefficient of the two trigram
+sets, counted for all names at once with numpy. The indexes built from the
+database are rebuilt whenever it changes.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from ..database.migrations import TABLE, table_columns
+from ..database.result_cache import file_version
+
+logger = logging.getLogger(__name__)
+
+# Name kinds indexed from the database, and the column each comes from
+INDEX_COLUMNS = {
+    "project": "PROJECTNAME",
+    "district": "DISTRICT",
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalise_name(text: str) -> str:
+    """Lower-case, with punctuation and repeated whitespace collapsed to one space"""
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of a name, padded so word starts and ends count"""
+    padded = f"  {normalise_name(text)} "
+    if len(padded) <= 3:
+        return frozenset()
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Inverted trigram index returning the closest names with Dice scores"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._values: List[str] = []
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._ids: Dict[str, int] = {}
+        # Posting lists as arrays, built on the first search after an add
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        self._size_array: Optional[np.ndarray] = None
+        for value in values:
+            self.add(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: str) -> None:
+        """Index a name; names that normalise to one already indexed are skipped"""
+        key = normalise_name(value)
+        grams = trigrams(value)
+        if not grams or key in self._ids:
+            return
+        value_id = len(self._values)
+        self._ids[key] = value_id
+        self._values.append(value)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(value_id)
+        self._arrays = None
+
+    def _freeze(self) -> None:
+        # Sizes first: a concurrent search only reads them once the arrays exist
+        self._size_array = np.array(self._sizes, dtype=np.float64)
+        self._arrays = {gram: np.array(ids, dtype=np.int32) for gram, ids in self._postings.items()}
+
+    def search(self, text: str, limit: int = 5, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """Up to ``limit`` ``(name, score)`` pairs, best first; scores run from 0 to 1"""
+        grams = trigrams(text)
+        if not grams:
+            return []
+        if self._arrays is None:
+            self._freeze()
+        hits = [self._arrays[gram] for gram in grams if gram in self._arrays]
+        if not hits:
+            return []
+        # Shared trigram counts for every name at once, then the Dice coefficient
+        shared = np.bincount(np.concatenate(hits), minlength=len(self._values))
+        scores = 2.0 * shared / (len(grams) + self._size_array)
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((top, -scores[top]))]
+        return [
+            (self._values[value_id], round(float(scores[value_id]), 4))
+            for value_id in top
+            if shared[value_id] and scores[value_id] >= min_score
+        ]
+
+    def best(self, text: str, min_score: float = 0.0) -> Optional[str]:
+        """The closest name scoring at least ``min_score``, or None"""
+        matches = self.search(text, limit=1, min_score=min_score)
+        return matches[0][0] if matches else None
+
+
+def build_name_index(db_path: Optional[str], kind: str, static_values: Iterable[str] = ()) -> TrigramIndex:
+    """Index ``static_values`` plus the distinct values of the ``kind`` column"""
+    index = TrigramIndex(static_values)
+    column = INDEX_COLUMNS[kind]
+    if db_path and os.path.exists(db_path):
+        try:
+            conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True)
+            try:
+                if column in {name.upper() for name in table_columns(conn)}:
+                    rows = conn.execute(
+                        f"SELECT DISTINCT TRIM({column}) FROM {TABLE} "
+                        f"WHERE {column} IS NOT NULL AND TRIM({column}) != ''"
+                    )
+                    for (value,) in rows:
+                        index.add(str(value))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read {kind} names from {db_path}: {str(e)}")
+    return index
+
+
+_indexes: Dict[Tuple[str, str], Tuple[Tuple, TrigramIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_name_index(db_path: str, kind: str, static_values: Iterable[str] = ()) -> TrigramIndex:
+    """
+    Shared name index of one kind for a database file, rebuilt when the file changes.
+
+    ``static_values`` must be the same on every call for a given file and kind.
+    """
+    key = (os.path.realpath(db_path), kind)
+    version = file_version(key[0])
+    entry = _indexes.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is None or entry[0] != version:
+            index = build_name_index(key[0], kind, static_values)
+            logger.info(f"Built {kind} name index for {key[0]} with {len(index)} names")
+            entry = (version, index)
+            _indexes[key] = entry
+    return entry[1]
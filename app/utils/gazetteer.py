@@ -0,0 +1,275 @@
+"""
+Gazetteer of the entities users name in questions.
+
+Districts, traditional authorities, regions, sectors, project codes and
+contractors are read from ``proj_dashboard`` and merged with the static
+district spellings and sector keywords. Every term is compiled into one
+Aho-Corasick automaton, so tagging a query is a single pass over its text
+however many names the database holds, instead of a substring check per
+name. The gazetteer is rebuilt whenever the database file changes.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from ..database.migrations import TABLE, table_columns
+from ..database.result_cache import file_version
+
+logger = logging.getLogger(__name__)
+
+# Entity kinds read from the database, and the column each comes from
+ENTITY_COLUMNS = {
+    "district": "DISTRICT",
+    "traditional_authority": "TRADITIONALAUTHORITY",
+    "region": "REGION",
+    "sector": "PROJECTSECTOR",
+    "project_code": "PROJECTCODE",
+    "contractor": "CONTRACTORNAME",
+}
+
+# Shorter terms match inside too many ordinary words to be useful
+MIN_TERM_LENGTH = 3
+
+# Column values that mean "no value" rather than naming anything
+_PLACEHOLDERS = frozenset({"unknown", "n/a", "na", "none", "null", "nil", "tbd", "-"})
+
+# Title prefixes of traditional authority names ("TA Mwambo" is also "Mwambo")
+_AUTHORITY_PREFIXES = ("ta ", "sc ", "stc ", "t/a ", "s/c ")
+
+
+def normalise_term(text: str) -> str:
+    """Lower-case and collapse whitespace, as terms are stored in the automaton"""
+    return " ".join(str(text).lower().split())
+
+
+def _fold(text: str) -> str:
+    """Lower-case ``text`` without changing its length, so offsets stay valid"""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher: every occurrence of every pattern in one pass"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Pattern ids ending at each state, including those reached by failure links
+        self._out: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+        self._payloads: List[List[Any]] = []
+        self._ids: Dict[str, int] = {}
+        self._built = True
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, pattern: str, payload: Any) -> None:
+        """Add a pattern; adding the same pattern again attaches another payload"""
+        if not pattern:
+            return
+        pattern_id = self._ids.get(pattern)
+        if pattern_id is not None:
+            self._payloads[pattern_id].append(payload)
+            return
+
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+
+        pattern_id = len(self._lengths)
+        self._ids[pattern] = pattern_id
+        self._lengths.append(len(pattern))
+        self._payloads.append([payload])
+        self._out[state].append(pattern_id)
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links breadth-first; called automatically before matching"""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, List[Any]]]:
+        """Yield ``(start, end, payloads)`` for every pattern occurrence in ``text``"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in out[state]:
+                end = index + 1
+                yield end - self._lengths[pattern_id], end, self._payloads[pattern_id]
+
+
+@dataclass(frozen=True)
+class EntityMatch:
+    """An entity found in a query"""
+    kind: str
+    value: str      # the canonical value, as stored in proj_dashboard
+    start: int
+    end: int
+    text: str       # the matched query text, lower-cased
+
+
+class Gazetteer:
+    """Tags entity names in text with one automaton pass"""
+
+    def __init__(self, terms: Iterable[Tuple[str, str, str]] = ()):
+        self._automaton = AhoCorasick()
+        self._exact: Dict[Tuple[str, str], str] = {}
+        for term, kind, value in terms:
+            self.add(term, kind, value)
+
+    def __len__(self) -> int:
+        return len(self._automaton)
+
+    def add(self, term: str, kind: str, value: str) -> None:
+        """Add a term that names ``value``; the first value added for a term wins lookups"""
+        term = normalise_term(term)
+        if len(term) < MIN_TERM_LENGTH or term in _PLACEHOLDERS:
+            return
+        if (term, kind) in self._exact:
+            return
+        self._exact[(term, kind)] = value
+        self._automaton.add(term, (kind, value))
+
+    def tag(self, text: str) -> List[EntityMatch]:
+        """
+        Every entity in ``text``, left to right.
+
+        Matches must start and end on word boundaries. Overlapping matches are
+        resolved leftmost-longest, so "roads and bridges" is one sector rather
+        than the "roads" keyword. A span naming several kinds (a district that
+        is also a region) yields one match per kind.
+        """
+        folded = _fold(text)
+        spans = []
+        for start, end, payloads in self._automaton.iter_matches(folded):
+            if start > 0 and folded[start - 1].isalnum():
+                continue
+            if end < len(folded) and folded[end].isalnum():
+                continue
+            spans.append((start, end, payloads))
+        spans.sort(key=lambda span: (span[0], -span[1]))
+
+        matches = []
+        covered = 0
+        for start, end, payloads in spans:
+            if start < covered:
+                continue
+            covered = end
+            for kind, value in payloads:
+                matches.append(EntityMatch(kind, value, start, end, folded[start:end]))
+        return matches
+
+    def first(self, text: str, kind: str) -> Optional[str]:
+        """Canonical value of the first entity of ``kind`` in ``text``, or None"""
+        for match in self.tag(text):
+            if match.kind == kind:
+                return match.value
+        return None
+
+    def lookup(self, term: str, kind: str) -> Optional[str]:
+        """Canonical value if the whole of ``term`` names an entity of ``kind``"""
+        return self._exact.get((normalise_term(term), kind))
+
+
+def _authority_aliases(name: str) -> List[str]:
+    """Names an authority goes by without its title ("Mwambo" for "TA Mwambo")"""
+    lowered = normalise_term(name)
+    return [lowered[len(prefix):] for prefix in _AUTHORITY_PREFIXES if lowered.startswith(prefix)]
+
+
+def load_database_terms(conn: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+    """(term, kind, value) for every distinct entity value in proj_dashboard"""
+    columns = {column.upper() for column in table_columns(conn)}
+    terms = []
+    for kind, column in ENTITY_COLUMNS.items():
+        if column not in columns:
+            continue
+        rows = conn.execute(
+            f"SELECT DISTINCT TRIM({column}) FROM {TABLE} "
+            f"WHERE {column} IS NOT NULL AND TRIM({column}) != ''"
+        ).fetchall()
+        for (value,) in rows:
+            value = str(value)
+            terms.append((value, kind, value))
+            if kind == "traditional_authority":
+                terms.extend((alias, kind, value) for alias in _authority_aliases(value))
+    return terms
+
+
+def build_gazetteer(db_path: Optional[str], static_terms: Iterable[Tuple[str, str, str]] = ()) -> Gazetteer:
+    """
+    Gazetteer of ``static_terms`` followed by the entity values in the database.
+
+    Static terms come first so curated spellings win over raw column values
+    for the same term. A missing or unreadable database leaves only them.
+    """
+    terms = list(static_terms)
+    if db_path and os.path.exists(db_path):
+        try:
+            conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True)
+            try:
+                terms.extend(load_database_terms(conn))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read gazetteer terms from {db_path}: {str(e)}")
+    return Gazetteer(terms)
+
+
+_gazetteers: Dict[str, Tuple[Tuple, Gazetteer]] = {}
+_gazetteers_lock = threading.Lock()
+
+
+def get_gazetteer(db_path: str, static_terms: Iterable[Tuple[str, str, str]] = ()) -> Gazetteer:
+    """
+    Shared gazetteer for a database file, rebuilt when the file changes.
+
+    ``static_terms`` must be the same on every call for a given file; they are
+    only read when the gazetteer is (re)built.
+    """
+    key = os.path.realpath(db_path)
+    version = file_version(key)
+    entry = _gazetteers.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _gazetteers_lock:
+        entry = _gazetteers.get(key)
+        if entry is None or entry[0] != version:
+            gazetteer = build_gazetteer(key, static_terms)
+            logger.info(f"Built gazetteer for {key} with {len(gazetteer)} terms")
+            entry = (version, gazetteer)
+            _gazetteers[key] = entry
+    return entry[1]
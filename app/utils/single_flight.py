@@ -0,0 +1,97 @@
+"""
+Single-flight coalescing of identical concurrent requests.
+
+During training sessions and demos many users send the same question within
+seconds. The first request for a key starts the computation; requests for
+the same key that arrive while it is running wait for that computation
+instead of starting their own. Every caller gets its own deep copy of the
+result, so one caller mutating its response cannot affect another.
+
+The shared computation runs as its own task, so a caller that disconnects
+and is cancelled does not cancel it for the others; it is cancelled only
+once every caller waiting for it has gone.
+"""
+
+import asyncio
+import copy
+import logging
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+
+def canonical_question(text: str) -> str:
+    """Key for a question: lower-cased, whitespace collapsed, trailing punctuation dropped"""
+    text = _WHITESPACE.sub(" ", str(text).lower()).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one in-flight task"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "leaders": 0, "coalesced": 0, "errors": 0, "max_waiters": 0}
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return a copy of ``await factory()``, sharing one call among concurrent callers.
+
+        Exceptions propagate to every caller waiting on the key.
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            task = self._in_flight.get(key)
+            if task is None or task.done():
+                task = asyncio.ensure_future(factory())
+                self._in_flight[key] = task
+                self._waiters[key] = 1
+                self.stats["leaders"] += 1
+                task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            else:
+                self._waiters[key] += 1
+                self.stats["coalesced"] += 1
+                self.stats["max_waiters"] = max(self.stats["max_waiters"], self._waiters[key])
+                logger.info(f"Coalesced request for {key!r} ({self._waiters[key]} waiting)")
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            self._leave(key, task)
+            raise
+        return copy.deepcopy(result)
+
+    def _leave(self, key: Hashable, task: asyncio.Future) -> None:
+        """A waiter was cancelled; cancel the shared call once nobody is waiting for it"""
+        with self._lock:
+            if self._in_flight.get(key) is not task:
+                return
+            self._waiters[key] -= 1
+            if self._waiters[key] > 0:
+                return
+        if not task.done():
+            logger.info(f"Every caller for {key!r} went away; cancelling it")
+            task.cancel()
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+                self._waiters.pop(key, None)
+            if not task.cancelled() and task.exception() is not None:
+                self.stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.stats["calls"]
+            return {
+                **self.stats,
+                "in_flight": len(self._in_flight),
+                "coalesced_ratio": self.stats["coalesced"] / calls if calls else 0.0,
+            }
@@ -0,0 +1,93 @@
+"""
+Speculative execution of alternative answer paths.
+
+Several ways of answering a question are started together. Each result is
+offered to an ``accept`` callback as it arrives. The first result accepted
+is committed and every path still running is cancelled. A deadline bounds
+the whole race.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# accept(name, result, results so far) -> commit this result?
+AcceptFn = Callable[[str, Any, Dict[str, Any]], bool]
+
+
+@dataclass
+class SpeculationResult:
+    """Outcome of a speculative race"""
+    winner: Optional[str] = None
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    cancelled: List[str] = field(default_factory=list)
+    timed_out: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def value(self) -> Any:
+        """Result of the committed path (None if nothing was committed)"""
+        return self.results.get(self.winner) if self.winner else None
+
+
+async def speculate(
+    candidates: Mapping[str, Awaitable[Any]],
+    accept: AcceptFn,
+    deadline: Optional[float] = None
+) -> SpeculationResult:
+    """
+    Run ``candidates`` concurrently and commit the first result ``accept`` takes.
+
+    Paths start in the order given. A path that raises is recorded in
+    ``errors`` and never committed. When a result is committed, or
+    ``deadline`` seconds pass, the paths still running are cancelled and
+    listed in ``cancelled``.
+    """
+    start_time = time.perf_counter()
+    outcome = SpeculationResult()
+    tasks = {asyncio.ensure_future(coro): name for name, coro in candidates.items()}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = None if deadline is None else deadline - (time.perf_counter() - start_time)
+            if remaining is not None and remaining <= 0:
+                outcome.timed_out = True
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                outcome.timed_out = True
+                break
+            # Several paths may finish in the same tick; offer them in start order
+            for task in sorted(done, key=list(tasks).index):
+                name = tasks[task]
+                if task.cancelled():
+                    outcome.cancelled.append(name)
+                    continue
+                error = task.exception()
+                if error is not None:
+                    logger.info(f"Speculative path '{name}' failed: {str(error)}")
+                    outcome.errors[name] = error
+                    continue
+                outcome.results[name] = task.result()
+                if outcome.winner is None and accept(name, outcome.results[name], outcome.results):
+                    outcome.winner = name
+            if outcome.winner is not None:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+            outcome.cancelled.append(tasks[task])
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        outcome.elapsed = time.perf_counter() - start_time
+    if outcome.winner or outcome.cancelled:
+        logger.info(
+            f"Speculation committed '{outcome.winner}' after {outcome.elapsed:.3f}s, "
+            f"cancelled {outcome.cancelled or 'nothing'}"
+        )
+    return outcome
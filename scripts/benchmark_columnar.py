@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Columnar Engine Benchmark
+
+Compares classified queries answered by SQLite (the classification.* key
+templates on a migrated database) with the same queries answered by the
+in-memory columnar snapshot, on synthetic proj_dashboard tables of 1k, 100k
+and 1M rows. Each query is run through both paths, the results are checked
+to be identical and the median time of each is reported.
+
+Usage:
+    python scripts/benchmark_columnar.py [--sizes 1000,100000,1000000] [--repeat 5]
+"""
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.database.columnar import ColumnarSnapshot
+from app.database.migrations import apply_migrations
+from app.llm_classification.service import QueryClassificationService
+
+DISTRICTS = [
+    "Balaka", "Blantyre", "Chikwawa", "Chiradzulu", "Chitipa", "Dedza", "Dowa", "Karonga", "Kasungu",
+    "Likoma", "Lilongwe", "Machinga", "Mangochi", "Mchinji", "Mulanje", "Mwanza", "Mzimba", "Neno",
+    "Nkhata Bay", "Nkhotakota", "Nsanje", "Ntcheu", "Ntchisi", "Phalombe", "Rumphi", "Salima", "Thyolo", "Zomba"
+]
+SECTORS = [
+    "Education", "Health", "Water and sanitation", "Roads and bridges", "Agriculture and environment",
+    "Commercial services", "Community security initiatives"
+]
+STATUSES = ["Completed", "Implementation: On track", "Implementation: Delayed", "Stalled", "Approved", "Cancelled"]
+REGIONS = ["Northern Region", "Central Region", "Southern Region"]
+NOUNS = ["Classroom Block", "Health Centre", "Borehole", "Bridge", "Market Shed", "Staff House", "Maternity Wing"]
+
+COLUMNS = (
+    "PROJECTNAME", "PROJECTCODE", "PROJECTSECTOR", "PROJECTSTATUS", "REGION", "DISTRICT", "BUDGET",
+    "TOTALEXPENDITUREYEAR", "STARTDATE", "COMPLETIONESTIDATE", "COMPLETIONPERCENTAGE", "FISCALYEAR"
+)
+
+
+def synthetic_rows(count: int, seed: int = 42):
+    """Deterministic proj_dashboard-like rows"""
+    rng = random.Random(seed)
+    for i in range(count):
+        district = rng.choice(DISTRICTS)
+        budget = None if rng.random() < 0.05 else round(rng.uniform(1e6, 5e8), 2)
+        year = rng.randint(2018, 2025)
+        yield (
+            f"{district} {rng.choice(NOUNS)} {i}",
+            f"MW-{i:07d}",
+            rng.choice(SECTORS),
+            rng.choice(STATUSES),
+            rng.choice(REGIONS),
+            district,
+            budget,
+            None if budget is None else round(budget * rng.random(), 2),
+            f"{year}-{rng.randint(1, 12):02d}-01",
+            f"{year + rng.randint(1, 3)}-{rng.randint(1, 12):02d}-28",
+            float(rng.randint(0, 100)),
+            f"April {year} / March {year + 1}",
+        )
+
+
+def build_database(path: str, count: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"CREATE TABLE proj_dashboard ({', '.join(f'{column} TEXT' for column in COLUMNS)}, "
+        "TRADITIONALAUTHORITY TEXT, CONTRACTORNAME TEXT, PROJECTDESC TEXT, STAGE TEXT, FUNDINGSOURCE TEXT, "
+        "LASTVISIT TEXT, SIGNINGDATE TEXT)"
+    )
+    conn.executemany(
+        f"INSERT INTO proj_dashboard ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+        synthetic_rows(count)
+    )
+    conn.commit()
+    apply_migrations(conn)
+    conn.close()
+
+
+def classification(districts=(), sectors=(), projects=(), status=(), budget=(None, None), time_range=(None, None)):
+    return SimpleNamespace(parameters=SimpleNamespace(
+        districts=list(districts),
+        sectors=list(sectors),
+        projects=list(projects),
+        status=list(status),
+        budget_range={"min": budget[0], "max": budget[1]},
+        time_range={"start": time_range[0], "end": time_range[1]}
+    ))
+
+
+SCENARIOS = {
+    "all projects": classification(),
+    "one district": classification(districts=["Zomba"]),
+    "districts + sector": classification(districts=["Zomba", "Dowa", "Lilongwe"], sectors=["education"]),
+    "status + budget": classification(status=["ongoing"], budget=(1e8, 3e8)),
+    "date range": classification(time_range=("2021-01-01", "2023-12-31")),
+    "project name": classification(projects=["maternity wing 12"]),
+}
+
+
+def median_time(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def benchmark(size: int, repeat: int) -> None:
+    service = QueryClassificationService.__new__(QueryClassificationService)
+    service.use_filter_keys = True
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.db")
+        start = time.perf_counter()
+        build_database(path, size)
+        print(f"\n{size:,} rows (database built in {time.perf_counter() - start:.1f}s)")
+
+        conn = sqlite3.connect(path)
+        start = time.perf_counter()
+        snapshot = ColumnarSnapshot.load(conn)
+        print(f"  snapshot load: {time.perf_counter() - start:.3f}s")
+
+        def run(query):
+            return conn.execute(query.sql, query.params).fetchall()
+
+        print(f"  {'query':<22}{'sqlite ms':>12}{'columnar ms':>14}{'speedup':>10}")
+        for name, scenario in SCENARIOS.items():
+            sql_time, expected = median_time(lambda: run(service.generate_sql_from_classification(scenario)), repeat)
+            columnar_time, actual = median_time(lambda: run(service.columnar_query(scenario, snapshot)), repeat)
+            check = "" if actual == expected else "  MISMATCH"
+            print(f"  {name:<22}{sql_time * 1000:>12.2f}{columnar_time * 1000:>14.2f}"
+                  f"{sql_time / columnar_time:>9.1f}x{check}")
+
+        group_sql = (
+            "SELECT district_key, COUNT(*), COALESCE(SUM(budget_num), 0) FROM proj_dashboard "
+            "WHERE status_key = 'ongoing' GROUP BY district_key"
+        )
+        sql_time, expected = median_time(lambda: conn.execute(group_sql).fetchall(), repeat)
+        columnar_time, actual = median_time(
+            lambda: snapshot.group_totals(snapshot.mask(statuses=["ongoing"]), "district"), repeat
+        )
+        # Float sums depend on addition order, so compare them with a tolerance
+        expected = {row[0]: (row[1], row[2]) for row in expected}
+        same = expected.keys() == actual.keys() and all(
+            expected[key][0] == actual[key][0] and math.isclose(expected[key][1], actual[key][1], rel_tol=1e-9)
+            for key in expected
+        )
+        check = "" if same else "  MISMATCH"
+        print(f"  {'group sum by district':<22}{sql_time * 1000:>12.2f}{columnar_time * 1000:>14.2f}"
+              f"{sql_time / columnar_time:>9.1f}x{check}")
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar snapshot against SQLite")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma separated row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the median is reported")
+    args = parser.parse_args()
+    for size in (int(value) for value in args.sizes.split(",")):
+        benchmark(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Response Formatting Benchmark
+
+Measures the per-row cost of formatting project listings before and after
+column plans:
+
+- project list: the per-row ``get_value`` probing over dict rows with
+  lower-case aliases that format_response used, against
+  ``PROJECT_LIST_PLAN`` applied to ``Row``s
+- general query: ``ResponseFormatter.format_general_query``'s former
+  ``iterrows`` + ``format_value`` loop, against the vectorised column plan
+
+Usage:
+    python scripts/benchmark_formatting.py [--sizes 1000,10000,100000] [--repeat 5]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.database.langchain_sql import PROJECT_LIST_PLAN
+from app.database.rows import make_rows
+from app.response_formatter import ResponseFormatter
+
+COLUMNS = ["PROJECTNAME", "FISCALYEAR", "DISTRICT", "REGION", "TRADITIONALAUTHORITY", "BUDGET",
+           "PROJECTSTATUS", "PROJECTSECTOR"]
+
+
+def synthetic_values(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        (
+            f"Project {i}",
+            f"April {2018 + i % 7} / March {2019 + i % 7}",
+            rng.choice(["Zomba", "Dowa", "Lilongwe", "Mzimba"]),
+            rng.choice(["Southern Region", "Central Region", "Northern Region"]),
+            None if i % 5 else "TA Kalembo",
+            None if i % 20 == 0 else round(rng.uniform(1e6, 5e8), 2),
+            rng.choice(["Completed", "Implementation: On track", "Stalled"]),
+            rng.choice(["Education", "Health", "Roads and bridges"]),
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_project(project):
+    """format_response's per-row formatting before column plans"""
+    def get_value(keys):
+        for key in keys:
+            if key in project:
+                return project[key]
+            if key.lower() in project:
+                return project[key.lower()]
+        return "Unknown"
+
+    project_data = {}
+    project_data["Name of project"] = get_value(["PROJECTNAME", "project_name"])
+    project_data["Fiscal year"] = get_value(["FISCALYEAR", "fiscal_year"])
+    district = get_value(["DISTRICT", "district"])
+    region = get_value(["REGION", "region"])
+    ta = get_value(["TRADITIONALAUTHORITY", "traditional_authority"])
+    location_parts = [p for p in [district, region, ta] if p != "Unknown" and p is not None]
+    project_data["Location"] = ", ".join(location_parts) if location_parts else "Unknown"
+    budget = None
+    for key in ["BUDGET", "total_budget", "budget"]:
+        if key in project and project[key] is not None:
+            try:
+                budget = float(project[key])
+                break
+            except (ValueError, TypeError):
+                continue
+    project_data["Budget"] = f"MWK {budget:,.2f}" if budget is not None else "Unknown"
+    project_data["Status"] = get_value(["PROJECTSTATUS", "status", "projectstatus"])
+    project_data["Sector"] = get_value(["PROJECTSECTOR", "project_sector", "projectsector"])
+    return project_data
+
+
+def legacy_general_query(formatter, frame):
+    """format_general_query before column plans"""
+    formatted_results = []
+    for _, row in frame.iterrows():
+        project_data = {}
+        for field, display_name, *format_type in formatter.general_project_fields:
+            if field in row.index:
+                project_data[display_name] = formatter.format_value(row[field], format_type[0] if format_type else None)
+        formatted_results.append(project_data)
+    return formatted_results
+
+
+def median_time(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def report(name: str, size: int, before: float, after: float) -> None:
+    print(f"  {name:<16}{before / size * 1e6:>15.2f}{after / size * 1e6:>15.2f}{before / after:>9.1f}x")
+
+
+def benchmark(size: int, repeat: int) -> None:
+    values = synthetic_values(size)
+    print(f"\n{size:,} rows")
+    print(f"  {'formatting':<16}{'before us/row':>15}{'after us/row':>15}{'speedup':>10}")
+
+    dict_rows = []
+    for row in values:
+        result = {}
+        for name, value in zip(COLUMNS, row):
+            result[name] = value
+            result.setdefault(name.lower(), value)
+        dict_rows.append(result)
+    rows = make_rows(COLUMNS, values)
+    before, expected = median_time(lambda: [legacy_project(row) for row in dict_rows], repeat)
+    after, actual = median_time(lambda: PROJECT_LIST_PLAN.format_rows(rows), repeat)
+    assert actual == expected, "project list output changed"
+    report("project list", size, before, after)
+
+    formatter = ResponseFormatter()
+    frame = pd.DataFrame(values, columns=COLUMNS).rename(columns={"BUDGET": "TOTALBUDGET"})
+    frame["SIGNINGDATE"] = [f"{2018 + i % 7}-{1 + i % 12:02d}-15" for i in range(size)]
+    before, expected = median_time(lambda: legacy_general_query(formatter, frame), repeat)
+    after, actual = median_time(lambda: formatter.format_general_query(frame)["data"]["values"], repeat)
+    assert actual == expected, "general query output changed"
+    report("general query", size, before, after)
+
+    dates = frame["SIGNINGDATE"]
+    before, expected = median_time(lambda: [formatter.format_value(value, "date") for value in dates], repeat)
+    after, actual = median_time(lambda: list(formatter.format_series(dates, "date")), repeat)
+    assert actual == expected, "date output changed"
+    report("dates", size, before, after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-row response formatting")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the median is reported")
+    args = parser.parse_args()
+    for size in (int(value) for value in args.sizes.split(",")):
+        benchmark(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Offline Pipeline Benchmark
+
+Replays the questions in test_queries.csv through the stages of the answer
+path (the local intent classifier with its LLM fallback, generate_sql_query,
+execute_query and format_response) against a local copy of proj_dashboard.
+Every question goes through every stage, whatever its intent, so each run
+does the same work. The shared LLM client is answered by a deterministic fake
+endpoint with a configurable latency, so no network or API key is needed and
+runs can be compared with each other. ``--llm-recordings`` replays responses
+recorded with ``LLM_TRANSPORT_MODE=record`` instead of the fake answers.
+
+Each concurrency level replays every question ``--rounds`` times and reports
+per-stage p50/p95/p99 latency and throughput. A separate sequential pass under
+tracemalloc reports the memory each stage allocates. The results are written
+as a JSON baseline into test_results/; ``--compare`` prints the change
+against an earlier baseline.
+
+The result cache is off unless ``--result-cache`` is given, so repeated
+rounds measure query execution rather than cache hits.
+
+Usage:
+    python scripts/benchmark_pipeline.py [--db PATH] [--concurrency 1,4,16] [--rounds 3]
+                                         [--llm-latency 0.05] [--compare test_results/pipeline_....json]
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pandas as pd
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import app.llm.client as llm_client_module
+from app.database.async_executor import shutdown_db_executor
+from app.database.langchain_sql import (
+    DISTRICT_VARIATIONS, SECTOR_MAPPING, VALID_DISTRICTS, LangChainSQLIntegration
+)
+from app.database.migrations import apply_migrations
+from app.database.pagination import PageCountCache
+from app.database.pool import close_all_pools
+from app.database.result_cache import ResultCache
+from app.core.config import settings
+from app.llm.client import LLMClient
+from app.llm.transport import RecordingStore, ReplayTransport
+from app.llm_classification.intent import LocalIntentClassifier
+from app.models import DatabaseManager
+from app.utils.single_flight import SingleFlight
+
+# Per-question INFO logging would dominate the timings and the output
+logging.disable(logging.INFO)
+
+STAGES = ("intent", "llm_intent", "generate_sql", "execute", "format", "total")
+
+# Answer of the fake LLM to chat calls (the LLMClassifier prompt)
+CLASSIFICATION_ANSWER = json.dumps({
+    "query_type": "general",
+    "confidence": 0.5,
+    "project_identifier": None,
+    "filters": {}
+})
+
+
+class FakeLLMTransport(httpx.AsyncBaseTransport):
+    """
+    Together-compatible endpoint answering every call after a fixed latency.
+
+    Answers depend only on the prompt, and the optional jitter is seeded by
+    the prompt hash, so a run is reproducible.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    def _delay(self, prompt: str) -> float:
+        if not self.jitter:
+            return self.latency
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        return max(0.0, self.latency + random.Random(seed).uniform(-self.jitter, self.jitter))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        payload = json.loads(request.content)
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        if request.url.path.endswith("/chat/completions"):
+            prompt = payload["messages"][-1]["content"]
+            await asyncio.sleep(self._delay(prompt))
+            return httpx.Response(200, json={
+                "model": payload["model"],
+                "choices": [{"message": {"role": "assistant", "content": CLASSIFICATION_ANSWER}}],
+                "usage": usage
+            })
+        prompt = payload["prompt"]
+        await asyncio.sleep(self._delay(prompt))
+        if "Respond with just one word" in prompt:
+            # The intent prompt
+            text = "SQL"
+        else:
+            text = "Here are the results from the database based on your query."
+        return httpx.Response(200, json={"model": payload["model"], "choices": [{"text": text}], "usage": usage})
+
+
+def load_questions(path: Path) -> List[str]:
+    """Question texts of test_queries.csv, in file order"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["query_text"].strip() for row in csv.DictReader(f) if row.get("query_text", "").strip()]
+
+
+def build_database(directory: str, source: Optional[str]) -> str:
+    """
+    Local migrated copy of proj_dashboard: a copy of ``source`` if given,
+    otherwise built from pmisProjects.csv.
+    """
+    path = os.path.join(directory, "benchmark.db")
+    if source:
+        shutil.copyfile(source, path)
+    else:
+        frame = pd.read_csv(project_root / "pmisProjects.csv", low_memory=False)
+        conn = sqlite3.connect(path)
+        frame.to_sql("proj_dashboard", conn, index=False)
+        conn.close()
+    apply_migrations(path)
+    return path
+
+
+def build_chain(db_path: str, result_cache: bool) -> LangChainSQLIntegration:
+    """A LangChainSQLIntegration on the local database, without the Together client"""
+    sql_chain = LangChainSQLIntegration.__new__(LangChainSQLIntegration)
+    sql_chain.llm = llm_client_module.get_llm_client()
+    sql_chain.model = sql_chain.llm.model
+    sql_chain.temperature = 0.1
+    sql_chain.db_manager = DatabaseManager(db_path)
+    sql_chain.valid_districts = VALID_DISTRICTS
+    sql_chain.district_variations = DISTRICT_VARIATIONS
+    sql_chain.sector_mapping = SECTOR_MAPPING
+    sql_chain.filter_keys, sql_chain.search_index, sql_chain.rollups = sql_chain._detect_schema_features()
+    sql_chain.page_counts = PageCountCache()
+    # A zero byte budget stores nothing, so every query is executed
+    sql_chain.result_cache = ResultCache(db_path) if result_cache else ResultCache(db_path, max_bytes=0)
+    sql_chain.in_flight = SingleFlight()
+    sql_chain.intent_classifier = LocalIntentClassifier()
+    return sql_chain
+
+
+class StageTimer:
+    """Times the stages of one question and optionally the memory they allocate"""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.times: Dict[str, float] = {}
+        self.allocated: Dict[str, int] = {}
+        # Stage running (or last run), to attribute failures
+        self.stage = "total"
+
+    async def run(self, stage: str, work):
+        self.stage = stage
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = work()
+        if asyncio.iscoroutine(result):
+            result = await result
+        self.times[stage] = time.perf_counter() - start
+        if self.trace_memory:
+            self.allocated[stage] = tracemalloc.get_traced_memory()[1] - before
+        return result
+
+
+async def answer(sql_chain: LangChainSQLIntegration, question: str, timer: StageTimer) -> None:
+    """Run one question through every stage; the LLM intent only runs when the local rules are unsure"""
+    start = time.perf_counter()
+    prediction = await timer.run("intent", lambda: sql_chain.intent_classifier.predict(question))
+    if not sql_chain.intent_classifier.should_skip_llm(prediction):
+        await timer.run("llm_intent", lambda: sql_chain._llm_intent(question, prediction))
+    sql_query, query_type = await timer.run("generate_sql", lambda: sql_chain.generate_sql_query(question))
+    results = await timer.run("execute", lambda: sql_chain.execute_query(sql_query))
+    await timer.run("format", lambda: sql_chain.format_response(
+        results, sql_query, time.perf_counter() - start, question, query_type
+    ))
+    timer.times["total"] = time.perf_counter() - start
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of ``values`` in milliseconds"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    return {
+        "p50_ms": round(at(0.50), 3),
+        "p95_ms": round(at(0.95), 3),
+        "p99_ms": round(at(0.99), 3),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "count": len(ordered)
+    }
+
+
+async def run_level(sql_chain: LangChainSQLIntegration, questions: List[str], concurrency: int,
+                    rounds: int) -> Dict[str, Any]:
+    """Replay the questions ``rounds`` times with at most ``concurrency`` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    errors: Dict[str, int] = {}
+
+    async def one(question: str) -> None:
+        async with semaphore:
+            timer = StageTimer()
+            try:
+                await answer(sql_chain, question, timer)
+            except Exception as e:
+                failed = timer.stage
+                errors[failed] = errors.get(failed, 0) + 1
+                print(f"    error in {failed} for {question!r}: {e}")
+                return
+            for stage, elapsed in timer.times.items():
+                samples[stage].append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(question) for _ in range(rounds) for question in questions))
+    elapsed = time.perf_counter() - start
+    completed = len(samples["total"])
+    return {
+        "concurrency": concurrency,
+        "questions": len(questions) * rounds,
+        "completed": completed,
+        "errors": errors,
+        "wall_time_s": round(elapsed, 3),
+        "throughput_qps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "stages": {stage: percentiles(values) for stage, values in samples.items()}
+    }
+
+
+async def measure_allocations(sql_chain: LangChainSQLIntegration, questions: List[str]) -> Dict[str, Any]:
+    """Peak bytes allocated by each stage, over one sequential pass"""
+    allocated: Dict[str, List[int]] = {stage: [] for stage in STAGES if stage != "total"}
+    tracemalloc.start()
+    try:
+        for question in questions:
+            timer = StageTimer(trace_memory=True)
+            try:
+                await answer(sql_chain, question, timer)
+            except Exception:
+                continue
+            for stage, size in timer.allocated.items():
+                allocated[stage].append(size)
+    finally:
+        tracemalloc.stop()
+    return {
+        stage: {
+            "median_kb": round(statistics.median(sizes) / 1024, 1),
+            "max_kb": round(max(sizes) / 1024, 1)
+        }
+        for stage, sizes in allocated.items() if sizes
+    }
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    print(f"\n  concurrency {level['concurrency']}: {level['completed']}/{level['questions']} answered "
+          f"in {level['wall_time_s']:.2f}s, {level['throughput_qps']:.1f} questions/s")
+    print(f"    {'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for stage, stats in level["stages"].items():
+        if stats:
+            print(f"    {stage:<14}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                  f"{stats['p99_ms']:>10.2f}{stats['mean_ms']:>10.2f}")
+
+
+def compare(baseline: Dict[str, Any], previous_path: str) -> None:
+    """Print the p50/p95 and throughput change against an earlier baseline"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    before_levels = {level["concurrency"]: level for level in previous.get("levels", [])}
+    print(f"\nChange against {previous_path}")
+    for level in baseline["levels"]:
+        before = before_levels.get(level["concurrency"])
+        if before is None:
+            continue
+        change = level["throughput_qps"] / before["throughput_qps"] - 1 if before["throughput_qps"] else 0.0
+        print(f"  concurrency {level['concurrency']}: throughput {change:+.1%}")
+        for stage, stats in level["stages"].items():
+            old = before["stages"].get(stage)
+            if not stats or not old:
+                continue
+            print(f"    {stage:<14}p50 {stats['p50_ms'] - old['p50_ms']:+9.2f} ms"
+                  f"   p95 {stats['p95_ms'] - old['p95_ms']:+9.2f} ms")
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    questions = load_questions(Path(args.queries))
+    if args.limit:
+        questions = questions[:args.limit]
+    if args.llm_recordings:
+        # Responses recorded with LLM_TRANSPORT_MODE=record instead of the fake answers
+        store = RecordingStore(args.llm_recordings)
+        transport = ReplayTransport(store, args.llm_latency, args.llm_jitter)
+        model = settings.LLM_MODEL
+    else:
+        transport = FakeLLMTransport(args.llm_latency, args.llm_jitter)
+        model = "offline-benchmark"
+    # Every LLM call site reads the shared client, so this routes them all to the fake endpoint
+    llm_client = LLMClient(api_key="offline", model=model, transport=transport, transport_mode="live")
+    llm_client_module._llm_client = llm_client
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        db_path = build_database(directory, args.db)
+        sql_chain = build_chain(db_path, args.result_cache)
+        print(f"{len(questions)} questions, database ready in {time.perf_counter() - start:.1f}s, "
+              f"fake LLM latency {args.llm_latency * 1000:.0f} ms")
+        try:
+            # One untimed pass loads the name indexes and warms the connection pool
+            for question in questions:
+                try:
+                    await answer(sql_chain, question, StageTimer())
+                except Exception:
+                    pass
+
+            levels = []
+            for concurrency in args.concurrency:
+                calls = llm_client.stats["calls"]
+                level = await run_level(sql_chain, questions, concurrency, args.rounds)
+                level["llm_calls"] = llm_client.stats["calls"] - calls
+                print_level(level)
+                levels.append(level)
+
+            allocations = await measure_allocations(sql_chain, questions)
+            print("\n  allocations per question (sequential pass under tracemalloc)")
+            print(f"    {'stage':<14}{'median KB':>12}{'max KB':>12}")
+            for stage, sizes in allocations.items():
+                print(f"    {stage:<14}{sizes['median_kb']:>12.1f}{sizes['max_kb']:>12.1f}")
+        finally:
+            await llm_client_module.close_llm_client()
+            shutdown_db_executor()
+            close_all_pools()
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "questions": len(questions),
+            "rounds": args.rounds,
+            "llm_latency_s": args.llm_latency,
+            "llm_jitter_s": args.llm_jitter,
+            "llm_recordings": args.llm_recordings,
+            "result_cache": args.result_cache,
+            "database": args.db or "pmisProjects.csv"
+        },
+        "levels": levels,
+        "allocations": allocations
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the query pipeline offline with a fake LLM")
+    parser.add_argument("--queries", default=str(project_root / "test_queries.csv"), help="Questions CSV")
+    parser.add_argument("--db", help="Database to copy instead of building one from pmisProjects.csv")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated concurrency levels")
+    parser.add_argument("--rounds", type=int, default=3, help="Times each question is asked per level")
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N questions")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="Deterministic +/- latency jitter in seconds")
+    parser.add_argument("--llm-recordings", help="Replay this LLM recording store instead of the fake answers")
+    parser.add_argument("--result-cache", action="store_true", help="Keep the result cache on")
+    parser.add_argument("--output", help="Baseline path (default test_results/pipeline_baseline_<time>.json)")
+    parser.add_argument("--compare", help="Earlier baseline to compare with")
+    args = parser.parse_args()
+    args.concurrency = [int(value) for value in args.concurrency.split(",")]
+
+    baseline = asyncio.run(benchmark(args))
+
+    output = Path(args.output) if args.output else (
+        project_root / "test_results" / f"pipeline_baseline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"\nBaseline written to {output}")
+
+    if args.compare:
+        compare(baseline, args.compare)
+
+
+if __name__ == "__main__":
+    main()
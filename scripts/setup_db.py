@@ -9,6 +9,13 @@ import random
 import os
 import sys
 import logging
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.database.migrations import apply_migrations
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, 
@@ -124,7 +131,9 @@ def setup_database():
         table_names = [table[0] for table in tables]
         
         if 'proj_dashboard' in table_names:
-            logger.info("Database setup completed successfully.")
+            # Add the indexed filter key columns the query templates rely on
+            version = apply_migrations(conn)
+            logger.info(f"Database setup completed successfully (schema version {version}).")
         else:
             logger.error("Failed to create tables.")
             
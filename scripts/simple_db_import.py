@@ -3,6 +3,12 @@ import sqlite3
 import os
 import re
 import subprocess
+import sys
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database.migrations import apply_migrations, rebuild_rollups, rebuild_search_index
 
 def import_database():
     """Import the database using sqlite3 command line tool"""
@@ -131,6 +137,14 @@ def import_database():
         # Commit changes
         conn.commit()
         
+        # Add the canonical filter columns and search index to proj_dashboard
+        version = apply_migrations(conn)
+        print(f"Database schema is at version {version}")
+        
+        # Re-sync the project search index and aggregate rollups with the imported rows
+        rebuild_search_index(conn)
+        rebuild_rollups(conn)
+        
         # Get table information
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
         tables = cursor.fetchall()
@@ -8,6 +8,8 @@ import sqlite3
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+from app.database.async_executor import get_db_executor
+
 # Load environment variables
 load_dotenv()
 
@@ -23,24 +25,18 @@ class DatabaseService:
         self.db_path = "malawi_projects1.db"
         logger.info(f"Initializing DatabaseService with {self.db_path}")
     
-    async def check_connection(self) -> bool:
-        """Check database connection"""
+    def _count_projects(self) -> int:
+        conn = sqlite3.connect(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM projects")
-            count = cursor.fetchone()[0]
+            return cursor.fetchone()[0]
+        finally:
             conn.close()
-            logger.info(f"Database connection successful. Found {count} projects.")
-            return True
-        except Exception as e:
-            logger.error(f"Database connection check failed: {str(e)}")
-            return False
     
-    async def execute_query(self, query: str) -> Dict:
-        """Execute a natural language query"""
+    def _fetch_projects(self) -> List[Dict]:
+        conn = sqlite3.connect(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             # Get all projects
@@ -52,15 +48,25 @@ class DatabaseService:
             
             # Fetch results
             columns = [desc[0] for desc in cursor.description]
-            results = cursor.fetchall()
-            
-            # Format results
-            projects = []
-            for row in results:
-                project = dict(zip(columns, row))
-                projects.append(project)
-            
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
             conn.close()
+    
+    async def check_connection(self) -> bool:
+        """Check database connection"""
+        try:
+            # sqlite3 blocks, so it runs on the shared database threads
+            count = await get_db_executor().run(self._count_projects)
+            logger.info(f"Database connection successful. Found {count} projects.")
+            return True
+        except Exception as e:
+            logger.error(f"Database connection check failed: {str(e)}")
+            return False
+    
+    async def execute_query(self, query: str) -> Dict:
+        """Execute a natural language query"""
+        try:
+            projects = await get_db_executor().run(self._fetch_projects)
             
             # Format response with only Project and Location information
             response = "Here are the relevant projects:\n\n"
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+from app.database.migrations import apply_migrations
+
+PROJ_DASHBOARD_COLUMNS = [
+    "PROJECTNAME", "PROJECTCODE", "PROJECTSECTOR", "PROJECTSTATUS", "STAGE",
+    "REGION", "DISTRICT", "TRADITIONALAUTHORITY", "BUDGET", "TOTALEXPENDITUREYEAR",
+    "FUNDINGSOURCE", "STARTDATE", "COMPLETIONESTIDATE", "LASTVISIT",
+    "COMPLETIONPERCENTAGE", "CONTRACTORNAME", "SIGNINGDATE", "PROJECTDESC", "FISCALYEAR"
+]
+
+SAMPLE_PROJECTS = [
+    ("Construction of Maternity Wing", "MW-SR-ZA-01", "Health", "Implementation: On track", "Implementation",
+     "Southern Region", "Zomba", "TA Mwambo", 250000000.0, 120000000.0,
+     "DDF", "2023-07-01", "2025-06-30", "2024-10-01",
+     60.0, "Zomba Builders", "2023-06-15", "New maternity wing", "April 2023 / March 2024"),
+    ("Chikwawa Primary School Block", "MW-SR-CK-02", "Education", "Completed", "Completed",
+     "Southern Region", "Chikwawa", "TA Kasisi", 90000000.0, 90000000.0,
+     "DDF", "2022-04-01", "2023-03-31", "2023-04-10",
+     100.0, "Lower Shire Contractors", "2022-03-20", "Two classroom block", "April 2022 / March 2023"),
+    ("Lenengwe Concrete Deck Bridge", "MW-CR-NU-03", "Roads and bridges", "Implementation: Delayed", "Implementation",
+     "Central Region", "Ntcheu", "SC Goodson Ganya", 56687132.0, 20000000.0,
+     "PBG", "2024-01-10", "2025-01-10", "2024-09-03",
+     35.0, "LD Building and Civil Engineering", "2024-01-05", "Concrete deck bridge", "April 2023 / March 2024"),
+    ("Dowa Staff House", "MW-CR-DO-04", "Education", "Implementation: On track", "Implementation",
+     "Central Region", "Dowa", "TA Msakambewa", 128000000.0, 700000.0,
+     "DDF", "2024-05-01", "2025-04-30", None,
+     10.0, None, None, "Teacher house construction", "April 2024 / March 2025"),
+    ("Zomba Borehole Drilling", "MW-SR-ZA-05", "Water and sanitation", "Completed", "Completed",
+     "Southern Region", "Zomba", "TA Kuntumanji", 15000000.0, 15000000.0,
+     "DDF", "2023-01-01", "2023-06-30", "2023-07-02",
+     100.0, "Aqua Drillers", "2022-12-15", "Five boreholes", "April 2022 / March 2023"),
+    ("Lilongwe Market Shed", "MW-CR-LL-06", "Commercial services", "Implementation: On track", "Implementation",
+     "Central Region", "Lilongwe", "TA Kalumba", None, None,
+     "LDF", "2024-08-01", "2025-07-31", None,
+     5.0, None, None, "Market shed", "April 2024 / March 2025"),
+]
+
+
+def create_proj_dashboard(path, rows=SAMPLE_PROJECTS):
+    """Create a small proj_dashboard database with the production column names"""
+    conn = sqlite3.connect(path)
+    columns = ", ".join(
+        f"{name} REAL" if name in ("BUDGET", "TOTALEXPENDITUREYEAR", "COMPLETIONPERCENTAGE") else f"{name} TEXT"
+        for name in PROJ_DASHBOARD_COLUMNS
+    )
+    conn.execute(f"CREATE TABLE proj_dashboard ({columns})")
+    placeholders = ", ".join("?" for _ in PROJ_DASHBOARD_COLUMNS)
+    conn.executemany(f"INSERT INTO proj_dashboard VALUES ({placeholders})", rows)
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+@pytest.fixture
+def projects_db(tmp_path):
+    """Path to a temporary proj_dashboard database with a handful of projects"""
+    return create_proj_dashboard(tmp_path / "projects.db")
+
+
+@pytest.fixture
+def migrated_projects_db(projects_db):
+    """The sample database with the indexed filter key columns applied"""
+    apply_migrations(projects_db)
+    return projects_db
+
+
+def _make_sql_chain(db_path):
+    """A LangChainSQLIntegration wired to a test database, without the LLM client"""
+    from app.database.langchain_sql import (
+        DISTRICT_VARIATIONS, SECTOR_MAPPING, VALID_DISTRICTS, LangChainSQLIntegration
+    )
+    from app.database.pagination import PageCountCache
+    from app.database.result_cache import ResultCache
+    from app.llm_classification.intent import LocalIntentClassifier
+    from app.models import DatabaseManager
+    from app.utils.single_flight import SingleFlight
+
+    sql_chain = LangChainSQLIntegration.__new__(LangChainSQLIntegration)
+    sql_chain.db_manager = DatabaseManager(db_path)
+    sql_chain.valid_districts = VALID_DISTRICTS
+    sql_chain.district_variations = DISTRICT_VARIATIONS
+    sql_chain.sector_mapping = SECTOR_MAPPING
+    sql_chain.filter_keys, sql_chain.search_index, sql_chain.rollups = sql_chain._detect_schema_features()
+    sql_chain.page_counts = PageCountCache()
+    sql_chain.result_cache = ResultCache(db_path)
+    sql_chain.intent_classifier = LocalIntentClassifier()
+    sql_chain.in_flight = SingleFlight()
+    return sql_chain
+
+
+@pytest.fixture
+def make_sql_chain():
+    """Factory for LangChainSQLIntegration instances bound to a test database"""
+    return _make_sql_chain
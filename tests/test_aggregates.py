@@ -0,0 +1,139 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.database.aggregates import (
+    AggregateRequest, bind_aggregate, format_aggregate_results, match_fiscal_year, parse_aggregate_question
+)
+from app.database.migrations import ROLLUP_TABLE, has_rollups, rebuild_rollups
+
+ALL = {"region": "*", "district": "*", "sector": "*", "status": "*", "fiscal_year": "*"}
+
+
+def _cell(conn, **filters):
+    keys = {**ALL, **filters}
+    return conn.execute(
+        f"SELECT project_count, budget_sum, budget_n, expenditure_sum, completion_sum FROM {ROLLUP_TABLE} "
+        "WHERE region = :region AND district = :district AND sector = :sector "
+        "AND status = :status AND fiscal_year = :fiscal_year",
+        keys
+    ).fetchone()
+
+
+def _rollup_rows(conn):
+    return sorted(conn.execute(f"SELECT * FROM {ROLLUP_TABLE}").fetchall())
+
+
+def test_backfill_matches_group_by(migrated_projects_db):
+    conn = sqlite3.connect(migrated_projects_db)
+    assert has_rollups(conn)
+    assert _cell(conn) == (6, 539687132.0, 5, 245700000.0, 310.0)
+    assert _cell(conn, district="zomba") == (2, 265000000.0, 2, 135000000.0, 160.0)
+    assert _cell(conn, sector="education", fiscal_year="April 2024 / March 2025") == (1, 128000000.0, 1, 700000.0, 10.0)
+
+    expected = conn.execute(
+        "SELECT status_key, COUNT(*), COALESCE(SUM(budget_num), 0) FROM proj_dashboard GROUP BY status_key"
+    ).fetchall()
+    for status, count, budget in expected:
+        assert _cell(conn, status=status)[:2] == (count, budget)
+    conn.close()
+
+
+def test_triggers_update_rollups_incrementally(migrated_projects_db):
+    conn = sqlite3.connect(migrated_projects_db)
+    conn.execute(
+        "INSERT INTO proj_dashboard (PROJECTNAME, REGION, DISTRICT, PROJECTSECTOR, PROJECTSTATUS, BUDGET, FISCALYEAR) "
+        "VALUES ('Zomba Clinic', 'Southern Region', 'Zomba', 'Health', 'Stalled', '1,000,000', 'April 2024 / March 2025')"
+    )
+    assert _cell(conn, district="zomba") == (3, 266000000.0, 3, 135000000.0, 160.0)
+    assert _cell(conn, district="zomba", status="stalled") == (1, 1000000.0, 1, 0.0, 0.0)
+
+    conn.execute("UPDATE proj_dashboard SET DISTRICT = 'Dedza', BUDGET = 2000000 WHERE PROJECTNAME = 'Zomba Clinic'")
+    assert _cell(conn, district="zomba")[0] == 2
+    assert _cell(conn, district="dedza") == (1, 2000000.0, 1, 0.0, 0.0)
+    assert _cell(conn, district="zomba", status="stalled") is None
+
+    conn.execute("DELETE FROM proj_dashboard WHERE PROJECTNAME = 'Zomba Clinic'")
+    assert _cell(conn, district="dedza") is None
+    assert _cell(conn)[0] == 6
+
+    # The incremental rows match a rebuild from scratch
+    incremental = _rollup_rows(conn)
+    conn.commit()
+    rebuild_rollups(conn)
+    assert _rollup_rows(conn) == incremental
+    conn.close()
+
+
+@pytest.mark.parametrize("question, measure, group_by", [
+    ("How many projects are there in Lilongwe?", "count", None),
+    ("What is the total budget for education projects?", "total_budget", None),
+    ("Show me the average completion percentage of education projects", "average_completion", None),
+    ("Give me a breakdown of projects by sector", "count", "sector"),
+    ("Which district has the highest budget?", "total_budget", "district"),
+    ("Average budget per region", "average_budget", "region"),
+])
+def test_parse_aggregate_question(question, measure, group_by):
+    request = parse_aggregate_question(question)
+    assert (request.measure, request.group_by) == (measure, group_by)
+
+
+@pytest.mark.parametrize("question", ["List all projects in Lilongwe", "Tell me about education projects in Zomba"])
+def test_listing_questions_are_not_aggregates(question):
+    assert parse_aggregate_question(question) is None
+
+
+def test_match_fiscal_year():
+    labels = ["April 2022 / March 2023", "April 2023 / March 2024"]
+    assert match_fiscal_year("budget in 2023/24", labels) == "April 2023 / March 2024"
+    assert match_fiscal_year("projects in fiscal year 2022", labels) == "April 2022 / March 2023"
+    assert match_fiscal_year("projects in 2030", labels) is None
+
+
+@pytest.mark.parametrize("rollups", [True, False])
+def test_rollup_and_scan_agree(migrated_projects_db, rollups):
+    request = AggregateRequest("total_budget", group_by="district", filters={"region": "southern region"})
+    query = bind_aggregate(request, rollups=rollups)
+    assert query.template == ("aggregate.rollup.by_district" if rollups else "aggregate.scan")
+
+    conn = sqlite3.connect(migrated_projects_db)
+    rows = conn.execute(query.sql, query.params).fetchall()
+    conn.close()
+    assert [(row[3], row[7], row[8]) for row in rows] == [("zomba", 2, 265000000.0), ("chikwawa", 1, 90000000.0)]
+
+
+def test_aggregate_question_is_answered_from_rollups(migrated_projects_db, make_sql_chain):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    question = "How many completed projects are in the Southern Region?"
+
+    sql_query, query_type = asyncio.run(sql_chain.generate_sql_query(question))
+    assert (query_type, sql_query.template) == ("aggregate", "aggregate.rollup")
+    assert sql_query.params["region"] == "southern region"
+    assert sql_query.params["status"] == "completed"
+
+    results = asyncio.run(sql_chain.execute_query(sql_query))
+    response = asyncio.run(sql_chain.format_response(results, sql_query, 0.0, question, query_type))
+    summary, table = response["response"]
+    assert summary["message"] == "There are 2 projects in the Southern Region that are completed."
+    assert table["data"]["rows"] == [["2", "MWK 105,000,000.00", "MWK 52,500,000.00", "MWK 105,000,000.00", "100.0%"]]
+
+
+@pytest.mark.parametrize("question", ["How many projects are not completed?", "How many incomplete projects are there?"])
+def test_negated_status_is_not_answered_as_the_status(migrated_projects_db, make_sql_chain, question):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    sql_query, query_type = asyncio.run(sql_chain.generate_sql_query(question))
+    assert query_type != "aggregate"
+    assert "completed" not in getattr(sql_query, "params", {}).values()
+
+
+def test_unmigrated_database_scans_for_aggregates(projects_db, make_sql_chain):
+    sql_chain = make_sql_chain(projects_db)
+    assert not sql_chain.rollups
+    sql_query, query_type = asyncio.run(sql_chain.generate_sql_query("What is the total budget by sector?"))
+    assert sql_query.template == "aggregate.scan"
+
+    rows = asyncio.run(sql_chain.execute_query(sql_query))
+    summary, table = format_aggregate_results(rows)
+    assert summary["message"] == "Health has the highest total budget (MWK 250,000,000.00) of the 5 sectors."
+    assert table["data"]["headers"][0] == "Sector"
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.database.async_executor import AsyncDatabaseExecutor
+from app.database.pool import SQLiteConnectionPool
+from app.utils.single_flight import SingleFlight
+
+# A query that keeps SQLite busy for several seconds unless interrupted
+SLOW_QUERY = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+    "SELECT COUNT(*) FROM n"
+)
+
+
+@pytest.fixture
+def pool(projects_db):
+    pool = SQLiteConnectionPool(projects_db, pool_size=2, max_overflow=0)
+    yield pool
+    pool.close()
+
+
+def test_queries_do_not_block_the_event_loop(pool):
+    executor = AsyncDatabaseExecutor(max_workers=2)
+
+    def slow_count(conn):
+        time.sleep(0.2)
+        return conn.execute("SELECT COUNT(*) FROM proj_dashboard").fetchone()[0]
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        count = await executor.run_on(pool, slow_count)
+        ticking.cancel()
+        return count, ticks
+
+    count, ticks = asyncio.run(main())
+    assert count == 6
+    assert ticks >= 5
+    stats = executor.get_stats()
+    assert (stats["submitted"], stats["completed"], stats["queued"], stats["running"]) == (1, 1, 0, 0)
+    executor.shutdown()
+
+
+def test_cancelling_a_running_query_interrupts_it(pool):
+    executor = AsyncDatabaseExecutor(max_workers=1)
+
+    async def main():
+        query = asyncio.ensure_future(executor.run_on(pool, lambda conn: conn.execute(SLOW_QUERY).fetchone()))
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        query.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await query
+        # The worker is free again as soon as SQLite notices the interrupt
+        await executor.run(lambda: None)
+        return time.perf_counter() - started
+
+    assert asyncio.run(main()) < 2
+    stats = executor.get_stats()
+    assert stats["interrupted"] == 1 and stats["cancelled"] == 1
+    assert pool.get_stats()["in_use"] == 0
+    executor.shutdown()
+
+
+def test_cancelled_jobs_still_queued_never_run():
+    executor = AsyncDatabaseExecutor(max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    async def main():
+        blocker = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(ran.append, "queued"))
+        await asyncio.sleep(0.05)
+        assert executor.get_stats()["queued"] == 1
+        queued.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await blocker
+
+    asyncio.run(main())
+    executor.shutdown()
+    assert ran == []
+    stats = executor.get_stats()
+    assert (stats["queued"], stats["cancelled"], stats["completed"]) == (0, 1, 1)
+    assert stats["peak_queued"] >= 1
+
+
+def test_shared_call_is_cancelled_when_every_caller_leaves():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        callers = [asyncio.ensure_future(flight.run("slow", slow)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        callers[0].cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled
+        callers[1].cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert cancelled == [True]
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_query_builder_lookups_run_on_database_threads(migrated_projects_db, make_sql_chain, monkeypatch):
+    from app.database import langchain_sql
+    from app.utils import gazetteer as gazetteer_module
+
+    sql_chain = make_sql_chain(migrated_projects_db)
+    calls = []
+    real_build, real_fetch_all = gazetteer_module.build_gazetteer, langchain_sql._fetch_all
+
+    def build_gazetteer(*args):
+        calls.append(("gazetteer", threading.current_thread()))
+        return real_build(*args)
+
+    def fetch_all(*args):
+        calls.append(("fiscal_years", threading.current_thread()))
+        return real_fetch_all(*args)
+
+    monkeypatch.setattr(gazetteer_module, "build_gazetteer", build_gazetteer)
+    monkeypatch.setattr(langchain_sql, "_fetch_all", fetch_all)
+    query, query_type = asyncio.run(sql_chain.generate_sql_query("How many projects in Zomba in 2023/2024?"))
+    assert query_type == "aggregate"
+    # The gazetteer build and the fiscal year lookup both left the event loop thread
+    assert {name for name, _ in calls} == {"gazetteer", "fiscal_years"}
+    assert all(thread is not threading.main_thread() for _, thread in calls)
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.database.column_plan import OMIT, ColumnPlan, DisplayField, column
+from app.database.rows import make_rows
+from app.response_formatter import ResponseFormatter
+
+PLAN = ColumnPlan([
+    column("Name", "PROJECTNAME", "project_name", missing="Unknown"),
+    DisplayField("Place", (("DISTRICT",), ("REGION",)), lambda district, region: f"{district}, {region}"),
+    column("Budget", "BUDGET", format=lambda value: f"MWK {value:,.2f}"),
+    column("Code", "PROJECTCODE", missing=OMIT),
+])
+
+
+def test_plan_resolves_columns_once_for_every_row():
+    rows = make_rows(["project_name", "district", "region", "budget"], [
+        ("Zomba Bridge", "Zomba", "Southern", 5000.0),
+        ("Dowa Clinic", "Dowa", "Central", 120.5),
+    ])
+    assert PLAN.format_rows(rows) == [
+        {"Name": "Zomba Bridge", "Place": "Zomba, Southern", "Budget": "MWK 5,000.00"},
+        {"Name": "Dowa Clinic", "Place": "Dowa, Central", "Budget": "MWK 120.50"},
+    ]
+
+
+def test_missing_columns_use_the_field_default():
+    rows = make_rows(["DISTRICT"], [("Zomba",)])
+    assert PLAN.format_rows(rows) == [{"Name": "Unknown", "Place": "Zomba, None", "Budget": None}]
+
+
+def test_rows_that_fail_are_reported_and_skipped():
+    rows = make_rows(["PROJECTNAME", "BUDGET"], [("A", 1.0), ("B", "n/a"), ("C", 3.0)])
+    errors = []
+    formatted = PLAN.format_rows(rows, on_error=errors.append)
+    assert [row["Name"] for row in formatted] == ["A", "C"]
+    assert len(errors) == 1
+
+
+def test_frames_and_rows_format_alike():
+    names = ["PROJECTNAME", "DISTRICT", "REGION", "BUDGET", "PROJECTCODE"]
+    values = [("Zomba Bridge", "Zomba", "Southern", 5000.0, "Z-1"), ("Dowa Clinic", "Dowa", "Central", 7.0, "D-2")]
+    assert PLAN.format_frame(pd.DataFrame(values, columns=names)) == PLAN.format_rows(make_rows(names, values))
+
+
+def _format_general_query_per_row(formatter, frame):
+    """The row-by-row formatting format_general_query used to do"""
+    formatted = []
+    for _, row in frame.iterrows():
+        project = {}
+        for field, display_name, *format_type in formatter.general_project_fields:
+            if field in row.index:
+                project[display_name] = formatter.format_value(row[field], format_type[0] if format_type else None)
+        formatted.append(project)
+    return formatted
+
+
+def test_vectorised_general_query_matches_per_value_formatting():
+    formatter = ResponseFormatter()
+    frame = pd.DataFrame({
+        "PROJECTNAME": ["Zomba Bridge", "", None, "Dowa Clinic", "Mzuzu Market"],
+        "FISCALYEAR": ["2023/24", "2022/23", np.nan, "2021/22", "2024/25"],
+        "DISTRICT": ["Zomba", "Lilongwe", "Dowa", "Dowa", None],
+        "TOTALBUDGET": [1250000.5, "MWK 2,000,000", "", np.nan, "unknown"],
+        "PROJECTSTATUS": ["Ongoing", "Completed", "Stalled", "  ", "Ongoing"],
+    })
+    expected = _format_general_query_per_row(formatter, frame)
+    assert formatter.format_general_query(frame)["data"]["values"] == expected
+    assert expected[0]["Budget"] == "MWK 1,250,000.50"
+    assert expected[1]["Budget"] == "MWK 2,000,000.00"
+    assert "Project Sector" not in expected[0]
+
+
+@pytest.mark.parametrize("format_type, values", [
+    ("date", ["2023-05-15", "15/05/2023", "12/31/2023", "2023/01/02", "not a date", None, "",
+              datetime(2024, 1, 12), "31-12-2023"]),
+    ("currency", [120000000.0, "MK 1,500", "MWK 0", 0, None, "TBC", 42]),
+    ("percentage", ["65%", 12.345, None, "n/a"]),
+    (None, ["text", 3, 2.5, None, ""]),
+    # Edge values the vectorised parse rejects fall back to format_value
+    ("date", ["2999-01-01", "1500-01-01", "0001-01-01", "2023-02-30", 20230515, True]),
+    ("currency", ["nan", "NaN", True, False, -0.0, "-0", "1e6", "inf", float("inf"), "1_000", "", " "]),
+])
+def test_format_series_matches_format_value(format_type, values):
+    formatter = ResponseFormatter()
+    series = pd.Series(values, dtype=object)
+    assert list(formatter.format_series(series, format_type)) == [
+        formatter.format_value(value, format_type) for value in values
+    ]
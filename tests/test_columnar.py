@@ -0,0 +1,183 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.database.aggregates import AggregateRequest, bind_aggregate
+from app.database.columnar import ColumnarSnapshot, current_snapshot, encode, get_snapshot, select_in_memory
+from app.database.migrations import apply_migrations
+from app.database.query_templates import QUERY_TEMPLATES
+from app.llm_classification.service import QueryClassificationService
+
+from .conftest import SAMPLE_PROJECTS, create_proj_dashboard
+
+
+def _classification(districts=(), sectors=(), projects=(), status=(), budget=(None, None), time=(None, None)):
+    return SimpleNamespace(parameters=SimpleNamespace(
+        districts=list(districts),
+        sectors=list(sectors),
+        projects=list(projects),
+        status=list(status),
+        budget_range={"min": budget[0], "max": budget[1]},
+        time_range={"start": time[0], "end": time[1]}
+    ))
+
+
+def _service():
+    service = QueryClassificationService.__new__(QueryClassificationService)
+    service.use_filter_keys = True
+    return service
+
+
+def _run(db_path, query):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(query.sql, query.params).fetchall()]
+    finally:
+        conn.close()
+
+
+def test_encode_keeps_value_order():
+    codes, vocabulary = encode(["b", None, "a", "b"])
+    assert vocabulary == ["a", "b"]
+    assert codes.tolist() == [2, 0, 1, 2]
+
+
+@pytest.mark.parametrize("classification", [
+    _classification(),
+    _classification(districts=["Zomba", "Dowa"]),
+    _classification(sectors=["education"]),
+    _classification(status=["completed"]),
+    _classification(budget=(50000000, 200000000)),
+    _classification(time=("2023-01-01", "2025-06-30")),
+    _classification(projects=["bridge"]),
+    _classification(districts=["Zomba"], projects=["maternity wing"]),
+    _classification(districts=["Nowhere"]),
+])
+def test_columnar_rows_match_sql(migrated_projects_db, classification):
+    service = _service()
+    query = service.columnar_query(classification, get_snapshot(migrated_projects_db))
+    assert query.template.endswith(".rows")
+    expected = _run(migrated_projects_db, service.generate_sql_from_classification(classification))
+    assert _run(migrated_projects_db, query) == expected
+
+
+def test_unknown_sector_falls_back_to_sql(migrated_projects_db):
+    query = _service().columnar_query(_classification(sectors=["space travel"]), get_snapshot(migrated_projects_db))
+    assert query is None
+
+
+def test_top_k_keeps_ties_at_the_cut(tmp_path):
+    budgets = [5.0, 7.0, 7.0, np.nan, 7.0, 1.0]
+    snapshot = ColumnarSnapshot(
+        rowids=np.arange(1, 7),
+        codes={"name": np.zeros(6, dtype=np.int32)},
+        vocabularies={"name": []},
+        numbers={"budget": np.array(budgets), "status_rank": np.array([3, 3, 2, 3, 1, 3], dtype=np.float64)}
+    )
+    assert snapshot.top_k(np.ones(6, dtype=bool), 2) == [5, 3]
+    assert snapshot.top_k(np.ones(6, dtype=bool), 6) == [5, 3, 2, 1, 6, 4]
+
+
+def test_group_totals_match_group_by(migrated_projects_db):
+    snapshot = get_snapshot(migrated_projects_db)
+    totals = snapshot.group_totals(snapshot.mask(statuses=["ongoing", "completed"]), "district")
+
+    conn = sqlite3.connect(migrated_projects_db)
+    expected = {
+        district: (count, budget)
+        for district, count, budget in conn.execute(
+            "SELECT district_key, COUNT(*), COALESCE(SUM(budget_num), 0) FROM proj_dashboard "
+            "WHERE status_key IN ('ongoing', 'completed') GROUP BY district_key"
+        )
+    }
+    conn.close()
+    assert totals == expected
+
+
+def test_snapshot_is_rebuilt_when_the_database_changes(migrated_projects_db):
+    first = get_snapshot(migrated_projects_db)
+    assert get_snapshot(migrated_projects_db) is first
+
+    conn = sqlite3.connect(migrated_projects_db)
+    conn.execute("INSERT INTO proj_dashboard (PROJECTNAME, DISTRICT, BUDGET) VALUES ('Dedza Clinic', 'Dedza', 1000)")
+    conn.commit()
+    conn.close()
+    assert len(get_snapshot(migrated_projects_db)) == len(first) + 1
+
+
+def test_database_path_is_quoted_in_the_uri(tmp_path):
+    db_path = create_proj_dashboard(tmp_path / "pmis #1?.db")
+    apply_migrations(db_path)
+    snapshot = get_snapshot(db_path)
+    assert snapshot is not None and len(snapshot) == len(SAMPLE_PROJECTS)
+
+
+@pytest.mark.parametrize("listing", [
+    ("project.district.results", {"district": "Zomba"}),
+    ("project.sector.results", {"sector": "education"}),
+    ("project.district.results", {"district": "Nowhere"}),
+    ("project.general", {}),
+])
+def test_listings_match_sql(migrated_projects_db, listing):
+    query = QUERY_TEMPLATES.bind(listing[0], **listing[1])
+    in_memory = select_in_memory(get_snapshot(migrated_projects_db), query)
+    assert in_memory.template == "project.listing.rows"
+    assert _run(migrated_projects_db, in_memory) == _run(migrated_projects_db, query)
+
+
+@pytest.mark.parametrize("request_", [
+    AggregateRequest("count"),
+    AggregateRequest("total_budget", filters={"district": "zomba"}),
+    AggregateRequest("count", group_by="district"),
+    AggregateRequest("average_budget", group_by="sector", filters={"status": "ongoing"}),
+    AggregateRequest("average_completion", group_by="status"),
+    AggregateRequest("total_expenditure", group_by="fiscal_year"),
+    AggregateRequest("count", filters={"district": "nowhere"}),
+])
+def test_aggregates_match_scan(migrated_projects_db, request_):
+    query = bind_aggregate(request_, rollups=False)
+    in_memory = select_in_memory(get_snapshot(migrated_projects_db), query)
+    assert in_memory.template == "aggregate.rows"
+
+    def by_group(rows):
+        return {row[row["group_by"]] if row["group_by"] else None: row for row in rows}
+
+    actual, expected = _run(migrated_projects_db, in_memory), _run(migrated_projects_db, query)
+    groups = by_group(actual)
+    assert groups.keys() == by_group(expected).keys()
+    for key, row in by_group(expected).items():
+        assert groups[key] == pytest.approx(row)
+    measure = request_.measure if request_.measure != "count" else "project_count"
+    assert [row[measure] for row in actual] == pytest.approx([row[measure] for row in expected])
+
+
+def test_requests_use_the_snapshot_once_it_is_built(migrated_projects_db, make_sql_chain, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "COLUMNAR_ENGINE", True)
+    sql_chain = make_sql_chain(migrated_projects_db)
+    query = QUERY_TEMPLATES.bind("project.district.results", district="Zomba")
+
+    def executions():
+        return QUERY_TEMPLATES.get_stats().get("project.listing.rows", {}).get("executions", 0)
+
+    async def main():
+        before = executions()
+        # No snapshot yet: answered by SQL while one is built on a database thread
+        from_sql = await sql_chain.execute_query(query)
+        assert executions() == before
+        await sql_chain._snapshot_build
+        assert current_snapshot(migrated_projects_db) is not None
+
+        sql_chain.result_cache.clear()
+        from_snapshot = await sql_chain.execute_query(query)
+        assert executions() == before + 1
+        return from_sql, from_snapshot
+
+    from_sql, from_snapshot = asyncio.run(main())
+    assert from_snapshot[0] == from_sql[0]
+    assert [dict(row) for row in from_snapshot[1]] == [dict(row) for row in from_sql[1]]
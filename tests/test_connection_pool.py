@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.database.pool import PoolTimeoutError, SQLiteConnectionPool
+from app.models import DatabaseManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "projects.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE proj_dashboard (projectname TEXT, district TEXT)")
+    conn.executemany(
+        "INSERT INTO proj_dashboard VALUES (?, ?)",
+        [("School Block", "Zomba"), ("Health Post", "Dedza")]
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def test_connections_are_read_only_and_tuned(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=1, max_overflow=0, mmap_size=1048576, cache_size_kib=2048)
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2048
+        assert conn.execute("SELECT COUNT(*) FROM proj_dashboard").fetchone()[0] == 2
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM proj_dashboard")
+    pool.close()
+
+
+def test_connections_are_reused(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=2, max_overflow=0)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    stats = pool.get_stats()
+    assert stats["checkouts"] == 2
+    assert stats["connections_created"] == 1
+    assert stats["in_use"] == 0
+    pool.close()
+
+
+def test_overflow_connections_are_closed_on_release(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=1, max_overflow=1, timeout=0.05)
+    first = pool.acquire()
+    second = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(second)
+    pool.release(first)
+
+    stats = pool.get_stats()
+    assert stats["peak_in_use"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["idle_connections"] == 1
+    assert stats["connections_closed"] == 1
+    pool.close()
+
+
+def test_pool_is_shared_across_threads(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=2, max_overflow=1)
+    counts = []
+
+    def worker():
+        for _ in range(20):
+            with pool.connection() as conn:
+                counts.append(conn.execute("SELECT COUNT(*) FROM proj_dashboard").fetchone()[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counts == [2] * 120
+    stats = pool.get_stats()
+    assert stats["connections_created"] <= 3
+    assert stats["in_use"] == 0
+    pool.close()
+
+
+def test_database_manager_uses_shared_pool(db_path):
+    first = DatabaseManager(db_path)
+    second = DatabaseManager(db_path)
+    assert first.pool is second.pool
+
+    results, _ = first.execute_query("SELECT projectname FROM proj_dashboard ORDER BY projectname")
+    assert [row["projectname"] for row in results] == ["Health Post", "School Block"]
+    with second.get_connection() as conn:
+        assert conn.execute("SELECT district FROM proj_dashboard LIMIT 1").fetchone()["district"]
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.database.migrations import apply_migrations
+from app.llm_classification.classifier import LLMClassifier
+from app.utils.fuzzy_index import TrigramIndex, get_name_index
+
+from .conftest import create_proj_dashboard
+
+
+def test_search_ranks_closest_names_with_scores():
+    index = TrigramIndex(["Nyandule Classroom Block", "Nyambadwe Market Shed", "Zomba Borehole Drilling"])
+    results = index.search("nyandula clasroom blok", limit=2)
+    assert results[0][0] == "Nyandule Classroom Block"
+    assert 0.5 < results[0][1] < 1.0
+    assert len(results) == 2 and results[0][1] > results[1][1]
+    assert index.search("Nyandule Classroom Block")[0] == ("Nyandule Classroom Block", 1.0)
+    assert index.best("qqqq xxxx", min_score=0.5) is None
+    assert index.search("  ") == []
+
+
+def test_indexes_are_built_from_the_database(migrated_projects_db):
+    projects = get_name_index(migrated_projects_db, "project")
+    assert projects.best("Lenengwe concreet deck brige") == "Lenengwe Concrete Deck Bridge"
+    districts = get_name_index(migrated_projects_db, "district", ["Mzimba"])
+    assert districts.best("Chikwaw") == "Chikwawa"
+    assert districts.best("Mzimb") == "Mzimba"
+    assert get_name_index(migrated_projects_db, "project") is projects
+
+
+def test_misspelt_project_names_resolve_without_the_llm(make_sql_chain, migrated_projects_db):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    question = "Tell me about the Lenengwe Concreet Dek Bridge project"
+    assert asyncio.run(sql_chain._extract_project_name(question)) == "Lenengwe Concrete Deck Bridge"
+    assert sql_chain._validate_district("Zomda") == "Zomba"
+
+
+def test_classifier_district_matching_uses_the_index():
+    classifier = LLMClassifier()
+    assert classifier.match_district("Lilongway") == ["Lilongwe"]
+    assert classifier._validate_district("nkhotakotta") == "Nkhotakota"
+
+
+def test_database_path_is_quoted_in_the_uri(tmp_path):
+    db_path = create_proj_dashboard(tmp_path / "pmis #1?.db")
+    apply_migrations(db_path)
+    assert get_name_index(db_path, "district").best("Chikwaw") == "Chikwawa"
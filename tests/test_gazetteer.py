@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sqlite3
+
+from app.database.migrations import apply_migrations
+from app.utils.gazetteer import AhoCorasick, Gazetteer, get_gazetteer
+
+from .conftest import PROJ_DASHBOARD_COLUMNS, create_proj_dashboard
+
+
+def test_automaton_finds_overlapping_patterns_in_one_pass():
+    automaton = AhoCorasick()
+    for pattern in ("he", "she", "his", "hers"):
+        automaton.add(pattern, pattern)
+    found = sorted((start, end, payloads[0]) for start, end, payloads in automaton.iter_matches("ushers"))
+    assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_tag_respects_word_boundaries_and_prefers_longest():
+    gazetteer = Gazetteer([
+        ("roads", "sector", "Roads and bridges"),
+        ("roads and bridges", "sector", "Roads and bridges"),
+        ("dowa", "district", "Dowa"),
+        ("nkhata bay", "district", "Nkhata Bay"),
+    ])
+    matches = gazetteer.tag("Roads and Bridges in NKHATA BAY, not Dowatown")
+    assert [(m.kind, m.value, m.text) for m in matches] == [
+        ("sector", "Roads and bridges", "roads and bridges"),
+        ("district", "Nkhata Bay", "nkhata bay"),
+    ]
+    assert gazetteer.first("projects in Nkhata Bay and Dowa", "district") == "Nkhata Bay"
+    assert gazetteer.lookup(" DOWA ", "district") == "Dowa"
+    assert gazetteer.lookup("dowa", "sector") is None
+
+
+def test_database_values_are_tagged(migrated_projects_db):
+    gazetteer = get_gazetteer(migrated_projects_db, [("zomba city", "district", "Zomba")])
+    tags = {(m.kind, m.value) for m in gazetteer.tag(
+        "Aqua Drillers work for Mwambo in zomba city on MW-CR-NU-03, Southern Region"
+    )}
+    assert tags == {
+        ("contractor", "Aqua Drillers"),
+        ("traditional_authority", "TA Mwambo"),
+        ("district", "Zomba"),
+        ("project_code", "MW-CR-NU-03"),
+        ("region", "Southern Region"),
+    }
+
+
+def test_gazetteer_is_rebuilt_when_the_data_changes(migrated_projects_db):
+    before = get_gazetteer(migrated_projects_db)
+    assert get_gazetteer(migrated_projects_db) is before
+    assert before.lookup("Likoma", "district") is None
+
+    conn = sqlite3.connect(migrated_projects_db)
+    row = ["Likoma Jetty"] + [None] * (len(PROJ_DASHBOARD_COLUMNS) - 1)
+    row[PROJ_DASHBOARD_COLUMNS.index("DISTRICT")] = "Likoma"
+    conn.execute(f"INSERT INTO proj_dashboard ({', '.join(PROJ_DASHBOARD_COLUMNS)}) "
+                 f"VALUES ({', '.join('?' for _ in row)})", row)
+    conn.commit()
+    conn.close()
+    os.utime(migrated_projects_db, ns=(0, os.stat(migrated_projects_db).st_mtime_ns + 1))
+
+    after = get_gazetteer(migrated_projects_db)
+    assert after is not before
+    assert after.lookup("likoma", "district") == "Likoma"
+
+
+def test_sql_chain_extracts_entities_through_the_gazetteer(make_sql_chain, migrated_projects_db):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    assert asyncio.run(sql_chain._extract_district("boreholes in lilongway please")) == "Lilongwe"
+    assert asyncio.run(sql_chain._extract_district("projects in Zombaa district")) == "Zomba"
+    assert asyncio.run(sql_chain._extract_sector("how many schools are there?")) == "Education"
+    assert asyncio.run(sql_chain._extract_sector("Water and Sanitation in Zomba")) == "Water and sanitation"
+    assert asyncio.run(sql_chain._extract_sector("as well as this")) is None
+    assert sql_chain._validate_district("nkhata bay") == "Nkhata Bay"
+
+
+def test_database_path_is_quoted_in_the_uri(tmp_path):
+    db_path = create_proj_dashboard(tmp_path / "pmis #1?.db")
+    apply_migrations(db_path)
+    assert get_gazetteer(db_path).lookup("chikwawa", "district") == "Chikwawa"
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.llm_classification.intent import LocalIntentClassifier
+
+
+@pytest.mark.parametrize("query, intent, confident", [
+    ("hi", "GREETING", True),
+    ("Good morning!", "GREETING", True),
+    ("What can you do?", "GENERAL", True),
+    ("projects in Zomba district", "SQL", True),
+    ("Hello, show me projects in Zomba", "SQL", True),
+    ("How many schools are being built?", "SQL", True),
+    ("Tell me about MW-CR-DO-04", "SQL", True),
+    ("Show me completed health projects", "SQL", True),
+    ("thanks", "OTHER", True),
+    ("Is there anything about bridges?", "SQL", False),
+    ("hello what is the age of the minister", "OTHER", False),
+    ("What is the meaning of life?", "GENERAL", False),
+])
+def test_local_predictions(query, intent, confident):
+    classifier = LocalIntentClassifier(threshold=0.85)
+    prediction = classifier.predict(query)
+    assert prediction.intent == intent
+    assert classifier.should_skip_llm(prediction) is confident
+
+
+def test_get_answer_skips_the_intent_prompt_when_confident(make_sql_chain, migrated_projects_db):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    prompts = []
+
+    async def llm_response(prompt):
+        prompts.append(prompt)
+        return "GENERAL"
+    sql_chain._get_llm_response = llm_response
+
+    response = asyncio.run(sql_chain.get_answer("projects in Zomba district"))
+    assert response["metadata"]["total_results"] == 2
+    assert prompts == []
+
+    asyncio.run(sql_chain.get_answer("Is there anything about bridges?"))
+    assert "Respond with just one word" in prompts[0]
+
+    stats = sql_chain.intent_classifier.get_stats()
+    assert (stats["predictions"], stats["skipped"], stats["llm_checked"]) == (2, 1, 1)
+    assert stats["skip_rate"] == 0.5
+    assert stats["disagreement_rate"] == 1.0
+    assert stats["bands"] == {"0.6": {"checked": 1, "disagreed": 1}}
+
+
+def test_audit_rate_sends_confident_predictions_to_the_llm():
+    classifier = LocalIntentClassifier(threshold=0.85, audit_rate=1.0)
+    prediction = classifier.predict("hi")
+    assert classifier.should_skip_llm(prediction) is False
+    classifier.record("hi", prediction, "GREETING")
+    stats = classifier.get_stats()
+    assert (stats["audited"], stats["disagreements"], stats["skip_rate"]) == (1, 0, 0.0)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.llm.client import LLMClient, LLMClientError
+
+
+def _completion_handler(delay: float = 0.0, counter: dict = None):
+    """Build a mock Together endpoint that echoes the prompt back"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if counter is not None:
+            counter["active"] += 1
+            counter["peak"] = max(counter["peak"], counter["active"])
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+        finally:
+            if counter is not None:
+                counter["active"] -= 1
+        if request.url.path.endswith("/chat/completions"):
+            content = payload["messages"][-1]["content"]
+            return httpx.Response(200, json={
+                "model": payload["model"],
+                "choices": [{"message": {"role": "assistant", "content": f"chat:{content}"}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}
+            })
+        return httpx.Response(200, json={
+            "model": payload["model"],
+            "choices": [{"text": f"echo:{payload['prompt']}"}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}
+        })
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_complete_and_chat_parse_payloads():
+    client = LLMClient(api_key="test", model="test-model",
+                       transport=httpx.MockTransport(_completion_handler()))
+    try:
+        completion = await client.complete("hello")
+        assert completion.text == "echo:hello"
+        assert completion.model == "test-model"
+        assert completion.usage["total_tokens"] == 5
+
+        chat = await client.chat([{"role": "user", "content": "hi"}])
+        assert chat.text == "chat:hi"
+        assert client.stats["calls"] == 2
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight_is_respected():
+    counter = {"active": 0, "peak": 0}
+    client = LLMClient(api_key="test", max_in_flight=2,
+                       transport=httpx.MockTransport(_completion_handler(0.05, counter)))
+    try:
+        results = await asyncio.gather(*(client.complete(f"q{i}") for i in range(6)))
+        assert [r.text for r in results] == [f"echo:q{i}" for i in range(6)]
+        assert counter["peak"] <= 2
+        assert client.stats["max_in_flight_seen"] == 2
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http_errors_raise_llm_client_error():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, text="overloaded")
+
+    client = LLMClient(api_key="test", transport=httpx.MockTransport(handler))
+    try:
+        with pytest.raises(LLMClientError) as exc_info:
+            await client.complete("hello")
+        assert exc_info.value.status_code == 503
+        assert client.stats["failures"] == 1
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_text_deltas_until_done():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        events = [{"choices": [{"text": piece}]} for piece in ("Three ", "projects", ".")]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+        body += "data: [DONE]\n\ndata: {\"choices\": [{\"text\": \"ignored\"}]}\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    client = LLMClient(api_key="test", transport=httpx.MockTransport(handler))
+    try:
+        assert [text async for text in client.stream("summarise")] == ["Three ", "projects", "."]
+        assert client.stats["calls"] == 1
+        assert client.stats["in_flight"] == 0
+    finally:
+        await client.aclose()
+
+
+def test_client_from_a_previous_event_loop_is_closed():
+    client = LLMClient(api_key="test", transport=httpx.MockTransport(_completion_handler()))
+
+    async def complete():
+        await client.complete("hello")
+        return client._http
+
+    first = asyncio.run(complete())
+
+    async def complete_and_close():
+        second = await complete()
+        await client.aclose()
+        return second
+
+    second = asyncio.run(complete_and_close())
+    assert second is not first
+    assert first.is_closed and second.is_closed
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.llm.client import LLMClient
+from app.llm.llm_response_manager import LLMResponseManager
+from app.llm.response_cache import ResponseCache
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(db_path=None, max_bytes=200, max_entries=100)
+    cache.set("ns", "a", "x" * 80)
+    cache.set("ns", "b", "y" * 80)
+    assert cache.get("ns", "a") == "x" * 80  # a is now most recent
+    cache.set("ns", "c", "z" * 80)
+
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "a") == "x" * 80
+    assert cache.stats["evictions"] == 1
+    assert cache.get_stats()["memory_bytes"] <= 200
+
+
+def test_persistent_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "llm_cache.db")
+    first = ResponseCache(db_path=db_path)
+    first.set("ns", "prompt", "cached answer", "sql_generation")
+    first.close()
+
+    second = ResponseCache(db_path=db_path)
+    assert second.get("ns", "prompt") == "cached answer"
+    assert second.stats["disk_hits"] == 1
+    # Promoted into memory on the first read
+    assert second.get("ns", "prompt") == "cached answer"
+    assert second.stats["memory_hits"] == 1
+    assert second.get("other-ns", "prompt") is None
+    second.close()
+
+
+def test_ttl_per_prompt_type(tmp_path, monkeypatch):
+    cache = ResponseCache(db_path=str(tmp_path / "ttl.db"), ttls={"short": 10, "off": 0})
+    now = [1000.0]
+    monkeypatch.setattr("app.llm.response_cache.time.time", lambda: now[0])
+
+    cache.set("ns", "p", "value", "short")
+    cache.set("ns", "q", "value", "off")
+    assert cache.get("ns", "p") == "value"
+    assert cache.get("ns", "q") is None
+
+    now[0] += 11
+    assert cache.get("ns", "p") is None
+    assert cache.stats["expirations"] >= 1
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_manager_serves_repeated_prompts_from_cache(tmp_path):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        calls.append(payload)
+        return httpx.Response(200, json={
+            "model": payload["model"],
+            "choices": [{"message": {"content": "SELECT 1;"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13}
+        })
+
+    client = LLMClient(api_key="test", transport=httpx.MockTransport(handler))
+    manager = LLMResponseManager(
+        api_key="test",
+        llm_client=client,
+        response_cache=ResponseCache(db_path=str(tmp_path / "manager.db"))
+    )
+    try:
+        first = await manager.generate_sql("count projects", "schema", {})
+        second = await manager.generate_sql("count projects", "schema", {})
+        assert first == second == "SELECT 1;"
+        assert len(calls) == 1
+
+        # Changing the template moves sql_generation prompts to a new namespace
+        manager.add_prompt_template("sql_generation", manager.prompt_templates["sql_generation"] + "\n")
+        await manager.generate_sql("count projects", "schema", {})
+        assert len(calls) == 2
+
+        stats = manager.get_usage_stats()
+        assert stats["cache_hits"] == 1
+        assert stats["cache_misses"] == 2
+        assert stats["cache_evictions"] == 0
+        assert stats["token_usage"]["total_tokens"] == 26
+    finally:
+        manager.cache.close()
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_access_runs_the_store_off_the_loop(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "async.db")
+    writer = ResponseCache(db_path=db_path)
+    await writer.aset("ns", "prompt", "stored answer")
+    writer.close()
+
+    cache = ResponseCache(db_path=db_path)
+    offloaded = []
+    real_to_thread = asyncio.to_thread
+
+    async def to_thread(fn, *args):
+        offloaded.append(fn.__name__)
+        return await real_to_thread(fn, *args)
+
+    monkeypatch.setattr("app.llm.response_cache.asyncio.to_thread", to_thread)
+    try:
+        assert await cache.aget("ns", "prompt") == "stored answer"
+        # Promoted into memory, so the second lookup never leaves the loop
+        assert await cache.aget("ns", "prompt") == "stored answer"
+        assert await cache.aget("ns", "missing") is None
+        await cache.aset("ns", "new", "fresh answer")
+    finally:
+        cache.close()
+    assert offloaded == ["_store_get", "_store_get", "_store_put"]
+    assert cache.stats["disk_hits"] == 1 and cache.stats["memory_hits"] == 1
+    assert cache.stats["misses"] == 1
@@ -0,0 +1,110 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from app.llm.client import LLMClient, LLMClientError
+from app.llm.transport import RecordingStore, check_mode, make_transport
+
+
+def _counting_handler(counter: dict):
+    """Mock Together endpoint numbering its answers, so replays are recognisable"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter["calls"] += 1
+        payload = json.loads(request.content)
+        if payload.get("stream"):
+            body = f"data: {json.dumps({'choices': [{'text': 'streamed'}]})}\n\ndata: [DONE]\n\n"
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json={
+            "model": payload["model"],
+            "choices": [{"text": f"answer {counter['calls']} to {payload['prompt']}"}]
+        })
+    return handler
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordingStore(str(tmp_path / "recordings.db"))
+    yield store
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(store, monkeypatch):
+    counter = {"calls": 0}
+    monkeypatch.setattr("app.llm.transport.get_recording_store", lambda: store)
+
+    recorder = LLMClient(api_key="test", model="m", transport_mode="record",
+                         transport=httpx.MockTransport(_counting_handler(counter)))
+    try:
+        first = await recorder.complete("zomba")
+        # Record mode answers requests it has already seen from the store
+        again = await recorder.complete("zomba")
+        streamed = [text async for text in recorder.stream("summary")]
+    finally:
+        await recorder.aclose()
+    assert first.text == again.text == "answer 1 to zomba"
+    assert streamed == ["streamed"]
+    assert counter["calls"] == 2
+    assert store.get_stats()["recorded"] == 2
+
+    replayer = LLMClient(api_key="", model="m", transport_mode="replay")
+    try:
+        assert (await replayer.complete("zomba")).text == "answer 1 to zomba"
+        assert [text async for text in replayer.stream("summary")] == ["streamed"]
+        # Different sampling parameters are a different request
+        with pytest.raises(LLMClientError) as exc_info:
+            await replayer.complete("zomba", temperature=0.9)
+        assert exc_info.value.status_code == 404
+    finally:
+        await replayer.aclose()
+    assert counter["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_recordings_survive_reopening(tmp_path):
+    path = str(tmp_path / "recordings.db")
+    counter = {"calls": 0}
+    store = RecordingStore(path)
+    client = LLMClient(api_key="test", model="m", transport=make_transport(
+        "record", httpx.MockTransport(_counting_handler(counter)), store=store
+    ))
+    try:
+        await client.complete("dowa")
+    finally:
+        await client.aclose()
+        store.close()
+
+    reopened = RecordingStore(path)
+    try:
+        client = LLMClient(api_key="", model="m", transport=make_transport("replay", store=reopened))
+        assert (await client.complete("dowa")).text == "answer 1 to dowa"
+        await client.aclose()
+    finally:
+        reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_replay_injects_latency(store, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LLM_REPLAY_LATENCY", 0.05)
+    monkeypatch.setattr(settings, "LLM_REPLAY_JITTER", 0.0)
+    recorder = LLMClient(api_key="test", model="m", transport=make_transport(
+        "record", httpx.MockTransport(_counting_handler({"calls": 0})), store=store
+    ))
+    await recorder.complete("mzimba")
+    await recorder.aclose()
+
+    replayer = LLMClient(api_key="", model="m", transport=make_transport("replay", store=store))
+    start = time.perf_counter()
+    await replayer.complete("mzimba")
+    await replayer.aclose()
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_unknown_modes_are_rejected():
+    assert check_mode("RECORD") == "record"
+    with pytest.raises(ValueError):
+        LLMClient(api_key="test", transport_mode="offline")
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry, current_trace, get_metrics, request_trace, span, timed
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    get_metrics().reset()
+    yield
+    get_metrics().reset()
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.05, 2.0):
+        registry.observe_stage("sql_execution", seconds)
+    registry.observe_stage("llm_call", 0.2, failed=True)
+
+    text = registry.render()
+    assert 'chatbot_stage_duration_seconds_bucket{stage="sql_execution",le="0.01"} 1' in text
+    assert 'chatbot_stage_duration_seconds_bucket{stage="sql_execution",le="0.1"} 3' in text
+    assert 'chatbot_stage_duration_seconds_bucket{stage="sql_execution",le="+Inf"} 4' in text
+    assert 'chatbot_stage_duration_seconds_count{stage="sql_execution"} 4' in text
+    assert 'chatbot_stage_errors_total{stage="llm_call"} 1' in text
+    assert "# TYPE chatbot_request_duration_seconds histogram" in text
+
+
+def test_spans_join_the_request_trace_and_its_tasks():
+    @timed("sql_build")
+    async def build():
+        await asyncio.sleep(0)
+        return "sql"
+
+    async def handle():
+        with request_trace("req-1") as trace:
+            with span("classification"):
+                pass
+            # Tasks started inside the request inherit its trace
+            await asyncio.gather(asyncio.ensure_future(build()), asyncio.ensure_future(build()))
+        return trace
+
+    trace = asyncio.run(handle())
+    assert trace.request_id == "req-1"
+    breakdown = trace.breakdown()
+    assert list(breakdown) == ["classification", "sql_build"]
+    assert breakdown["sql_build"]["count"] == 2
+    assert current_trace() is None
+
+    text = get_metrics().render()
+    assert 'chatbot_stage_duration_seconds_count{stage="sql_build"} 2' in text
+    assert "chatbot_request_duration_seconds_count 1" in text
+
+
+def test_spans_outside_a_request_only_feed_the_histograms():
+    with span("formatting"):
+        pass
+    assert current_trace() is None
+    assert 'chatbot_stage_duration_seconds_count{stage="formatting"} 1' in get_metrics().render()
+
+
+def test_failed_spans_are_counted_and_reraised():
+    @timed("entity_extraction")
+    def extract():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        extract()
+    assert 'chatbot_stage_errors_total{stage="entity_extraction"} 1' in get_metrics().render()
+
+
+def test_async_generators_are_timed_until_exhausted():
+    @timed("llm_call")
+    async def tokens():
+        for token in ("a", "b"):
+            await asyncio.sleep(0.01)
+            yield token
+
+    async def consume():
+        with request_trace() as trace:
+            items = [token async for token in tokens()]
+        return items, trace
+
+    items, trace = asyncio.run(consume())
+    assert items == ["a", "b"]
+    assert trace.breakdown()["llm_call"]["seconds"] >= 0.02
+
+
+def test_metrics_can_be_disabled(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    with request_trace() as trace:
+        with span("formatting"):
+            pass
+    assert trace.spans == []
+    assert "formatting" not in get_metrics().render()
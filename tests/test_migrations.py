@@ -0,0 +1,152 @@
+import sqlite3
+
+import pytest
+
+from app.database.migrations import (
+    FILTER_KEY_COLUMNS, SEARCH_TABLE, apply_migrations, canonical_status, has_filter_keys,
+    has_rollups, has_search_index, rebuild_search_index, table_columns
+)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def test_migration_adds_and_backfills_filter_keys(migrated_projects_db):
+    conn = _connect(migrated_projects_db)
+    assert has_filter_keys(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 3
+
+    rows = {
+        row["PROJECTNAME"]: row
+        for row in conn.execute("SELECT * FROM proj_dashboard").fetchall()
+    }
+    bridge = rows["Lenengwe Concrete Deck Bridge"]
+    assert bridge["district_key"] == "ntcheu"
+    assert bridge["sector_key"] == "roads and bridges"
+    assert bridge["status_key"] == "delayed"
+    assert bridge["budget_num"] == 56687132.0
+    assert rows["Lilongwe Market Shed"]["budget_num"] is None
+    assert rows["Chikwawa Primary School Block"]["status_key"] == "completed"
+    conn.close()
+
+
+def test_triggers_keep_keys_in_sync(migrated_projects_db):
+    conn = _connect(migrated_projects_db)
+    conn.execute(
+        "INSERT INTO proj_dashboard (PROJECTNAME, DISTRICT, PROJECTSECTOR, PROJECTSTATUS, BUDGET) "
+        "VALUES ('Dedza Clinic', ' Dedza ', 'Health', 'Stalled', '1,250,000')"
+    )
+    conn.execute("UPDATE proj_dashboard SET PROJECTSTATUS = 'Completed' WHERE PROJECTNAME = 'Dowa Staff House'")
+    conn.commit()
+
+    clinic = conn.execute(
+        "SELECT district_key, status_key, budget_num FROM proj_dashboard WHERE PROJECTNAME = 'Dedza Clinic'"
+    ).fetchone()
+    assert tuple(clinic) == ("dedza", "stalled", 1250000.0)
+    assert conn.execute(
+        "SELECT status_key FROM proj_dashboard WHERE PROJECTNAME = 'Dowa Staff House'"
+    ).fetchone()[0] == "completed"
+    conn.close()
+
+
+def test_filters_use_indexes(migrated_projects_db):
+    conn = _connect(migrated_projects_db)
+    plan = " ".join(
+        row["detail"] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT PROJECTNAME FROM proj_dashboard "
+            "WHERE district_key = 'zomba' ORDER BY budget_num DESC LIMIT 10"
+        ).fetchall()
+    )
+    assert "idx_proj_dashboard_district_key" in plan
+    assert "TEMP B-TREE" not in plan
+    conn.close()
+
+
+def _search(conn, match):
+    return [
+        row[0] for row in conn.execute(
+            f"SELECT PROJECTNAME FROM proj_dashboard WHERE rowid IN "
+            f"(SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?)",
+            (match,)
+        ).fetchall()
+    ]
+
+
+def test_search_index_follows_table_changes(migrated_projects_db):
+    conn = _connect(migrated_projects_db)
+    assert has_search_index(conn)
+    assert _search(conn, '"lenen"*') == ["Lenengwe Concrete Deck Bridge"]
+    assert _search(conn, '"kuntumanji"') == ["Zomba Borehole Drilling"]
+
+    conn.execute("UPDATE proj_dashboard SET PROJECTNAME = 'Dowa Teachers House' WHERE PROJECTNAME = 'Dowa Staff House'")
+    conn.execute("DELETE FROM proj_dashboard WHERE PROJECTNAME = 'Lilongwe Market Shed'")
+    conn.commit()
+    assert _search(conn, '"teachers"') == ["Dowa Teachers House"]
+    assert _search(conn, '"staff"') == []
+    assert _search(conn, '"shed"') == []
+
+    rebuild_search_index(conn)
+    conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('integrity-check')")
+    conn.close()
+
+
+def test_migrations_are_idempotent(migrated_projects_db):
+    assert apply_migrations(migrated_projects_db) == 3
+    conn = _connect(migrated_projects_db)
+    columns = [column.lower() for column in table_columns(conn)]
+    assert all(columns.count(column) == 1 for column in FILTER_KEY_COLUMNS)
+    conn.close()
+
+
+def test_skipped_search_index_is_retried(projects_db):
+    conn = sqlite3.connect(projects_db)
+    conn.execute("ALTER TABLE proj_dashboard DROP COLUMN PROJECTDESC")
+    conn.commit()
+    assert apply_migrations(conn) == 1
+    assert not has_search_index(conn) and has_rollups(conn)
+
+    conn.execute("ALTER TABLE proj_dashboard ADD COLUMN PROJECTDESC TEXT")
+    assert apply_migrations(conn) == 3
+    assert has_search_index(conn)
+    conn.close()
+
+
+def test_skipped_rollups_are_retried(projects_db):
+    conn = sqlite3.connect(projects_db)
+    conn.execute("ALTER TABLE proj_dashboard DROP COLUMN TOTALEXPENDITUREYEAR")
+    conn.commit()
+    assert apply_migrations(conn) == 2
+    assert has_search_index(conn) and not has_rollups(conn)
+
+    conn.execute("ALTER TABLE proj_dashboard ADD COLUMN TOTALEXPENDITUREYEAR REAL")
+    assert apply_migrations(conn) == 3
+    assert has_rollups(conn)
+    conn.close()
+
+
+def test_database_without_projects_is_left_alone(tmp_path):
+    path = str(tmp_path / "empty.db")
+    assert apply_migrations(path) == 0
+    conn = sqlite3.connect(path)
+    assert not has_filter_keys(conn)
+    conn.close()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Implementation: On track", "ongoing"),
+    ("in progress", "ongoing"),
+    ("Completed", "completed"),
+    ("Planning", "approved"),
+    ("stalled", "stalled"),
+    ("whatever", None),
+    ("not started", "approved"),
+    ("not completed", None),
+    ("Incomplete", None),
+    ("Uncompleted", None),
+    ("isn't finished", None),
+])
+def test_canonical_status(text, expected):
+    assert canonical_status(text) == expected
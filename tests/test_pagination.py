@@ -0,0 +1,135 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from app.database.migrations import apply_migrations
+from app.database.pagination import InvalidCursorError, PageCountCache, PageCursor
+from app.database.query_templates import QUERY_TEMPLATES
+
+from .conftest import SAMPLE_PROJECTS, create_proj_dashboard
+
+
+def _extra_project(name, district, budget):
+    row = list(SAMPLE_PROJECTS[4])
+    row[0], row[6], row[8] = name, district, budget
+    return tuple(row)
+
+
+# Budget ties and a second project without a budget exercise the tie-breaker
+# and the NULL tail of the keyset ordering
+EXTRA_PROJECTS = [
+    _extra_project("Zomba Water Kiosk", "Zomba", 15000000.0),
+    _extra_project("Dowa Borehole", "Dowa", 15000000.0),
+    _extra_project("Zomba Latrines", "Zomba", None),
+]
+
+
+@pytest.fixture
+def listing_db(tmp_path):
+    path = create_proj_dashboard(tmp_path / "listing.db", SAMPLE_PROJECTS + EXTRA_PROJECTS)
+    apply_migrations(path)
+    return path
+
+
+def _walk(sql_chain, first_response):
+    """Follow next_cursor tokens to the end, collecting project names per page"""
+    pages = []
+    response = first_response
+    while True:
+        table = [item for item in response["results"] if item["type"] == "table"]
+        rows = table[0]["data"]["rows"] if table else []
+        assert all("sort_budget" not in row and "sort_rowid" not in row for row in rows)
+        pages.append([row["project_name"] for row in rows])
+        cursor = response["pagination"]["next_cursor"]
+        if cursor is None:
+            return pages
+        response = asyncio.run(sql_chain.process_paginated_query("show more", cursor=cursor))
+
+
+def test_pages_cover_listing_once_in_order(listing_db, make_sql_chain):
+    sql_chain = make_sql_chain(listing_db)
+    first = asyncio.run(sql_chain.process_paginated_query("Show me all projects", limit=2))
+    assert first["metadata"]["total_results"] == 9
+    assert first["pagination"]["total_pages"] == 5
+
+    pages = _walk(sql_chain, first)
+    assert [len(page) for page in pages] == [2, 2, 2, 2, 1]
+    names = [name for page in pages for name in page]
+    assert names == [
+        "Construction of Maternity Wing", "Dowa Staff House", "Chikwawa Primary School Block",
+        "Lenengwe Concrete Deck Bridge", "Zomba Borehole Drilling", "Zomba Water Kiosk",
+        "Dowa Borehole", "Lilongwe Market Shed", "Zomba Latrines",
+    ]
+
+
+@pytest.mark.parametrize("limit, sizes", [(4, [4, 4, 1]), (20, [9])])
+def test_cursors_round_trip_for_any_requested_page_size(listing_db, make_sql_chain, limit, sizes):
+    sql_chain = make_sql_chain(listing_db)
+    first = asyncio.run(sql_chain.process_paginated_query("Show me all projects", limit=limit))
+    # Oversized requests are clamped to the page size a cursor may carry
+    assert first["pagination"]["total_pages"] == len(sizes)
+    assert [len(page) for page in _walk(sql_chain, first)] == sizes
+
+    cursor = PageCursor.for_listing(QUERY_TEMPLATES.bind("project.general"), page_size=limit)
+    assert PageCursor.decode(cursor.encode()) == cursor
+
+
+def test_total_is_counted_once_per_filter(listing_db, make_sql_chain):
+    sql_chain = make_sql_chain(listing_db)
+    executions = lambda: QUERY_TEMPLATES.get_stats()["project.district.count"]["executions"]
+    before = executions()
+
+    first = asyncio.run(sql_chain.process_paginated_query("Show projects in Zomba district", limit=1))
+    pages = _walk(sql_chain, first)
+    assert pages == [["Construction of Maternity Wing"], ["Zomba Borehole Drilling"],
+                     ["Zomba Water Kiosk"], ["Zomba Latrines"]]
+    assert executions() == before + 1
+    assert sql_chain.page_counts.get_stats()["hits"] >= 3
+
+
+def test_first_listing_response_carries_cursor(listing_db, make_sql_chain):
+    sql_chain = make_sql_chain(listing_db)
+    query, query_type = asyncio.run(sql_chain.generate_sql_query("Show me all projects"))
+    results = asyncio.run(sql_chain.execute_query(query))
+    response = asyncio.run(sql_chain.format_response(results, query, 0.0, "Show me all projects", query_type))
+    # Nine projects fit on the first page of ten
+    assert response["pagination"]["has_more"] is False
+    assert response["pagination"]["next_cursor"] is None
+
+
+def test_cursor_round_trip_and_rejection():
+    cursor = PageCursor(kind="district", filters={"district": "Zomba"}, page_size=5, page=3,
+                        after=(15000000.0, 7))
+    assert PageCursor.decode(cursor.encode()) == cursor
+    for token in ("not a cursor", cursor.encode()[:-6], "eyJ2IjoyfQ"):
+        with pytest.raises(InvalidCursorError):
+            PageCursor.decode(token)
+
+
+def test_tampered_cursor_bounds_are_rejected():
+    cursor = PageCursor(kind="general", page_size=5)
+    for tampered in (replace(cursor, page_size=100000), replace(cursor, page_size=0),
+                     replace(cursor, page=0), replace(cursor, page=-3)):
+        with pytest.raises(InvalidCursorError):
+            PageCursor.decode(tampered.encode())
+
+
+def test_invalid_cursor_gets_friendly_error(listing_db, make_sql_chain):
+    sql_chain = make_sql_chain(listing_db)
+    response = asyncio.run(sql_chain.process_paginated_query("show more", cursor="garbage"))
+    assert response["results"][0]["type"] == "error"
+    assert response["metadata"]["total_results"] == 0
+
+
+def test_count_cache_expires_and_evicts():
+    cache = PageCountCache(max_entries=2, ttl=60)
+    cursors = [PageCursor(kind="district", filters={"district": name}) for name in ("Zomba", "Dowa", "Ntcheu")]
+    for total, cursor in enumerate(cursors):
+        cache.set(cursor, total)
+    assert cache.get(cursors[0]) is None
+    assert cache.get(cursors[2]) == 2
+
+    expired = PageCountCache(ttl=-1)
+    expired.set(cursors[0], 5)
+    assert expired.get(cursors[0]) is None
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+
+def test_unmigrated_database_uses_like_templates(projects_db, make_sql_chain):
+    sql_chain = make_sql_chain(projects_db)
+    assert (sql_chain.filter_keys, sql_chain.search_index) == (False, False)
+    assert sql_chain._build_specific_project_sql("Lenengwe bridge").template == "project.specific.like"
+    assert sql_chain._build_district_sql("Zomba").template == "project.district.results.like"
+
+
+def test_migrated_database_uses_indexes(migrated_projects_db, make_sql_chain):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    assert (sql_chain.filter_keys, sql_chain.search_index) == (True, True)
+    assert sql_chain._build_specific_project_sql("Lenengwe bridge").template == "project.specific"
+    assert sql_chain._build_sector_sql("roads").params == {"sector": "Roads and bridges"}
+    assert sql_chain._build_district_sql("Mzuzu").params == {"district": "Mzimba"}
+    assert sql_chain._build_district_sql("Somewhere").template == "project.district.results.like"
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Tell me about Lenengwe", "Lenengwe Concrete Deck Bridge"),
+    ("Can I get details of the maternity wing?", "Construction of Maternity Wing"),
+    ("Tell me about projects in Zomba", ""),
+])
+def test_project_name_falls_back_to_search_index(migrated_projects_db, question, expected, make_sql_chain):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    assert asyncio.run(sql_chain._extract_project_name(question)) == expected
+
+
+@pytest.mark.parametrize("migrate", [False, True])
+def test_listing_returns_total_once(projects_db, migrate, make_sql_chain):
+    if migrate:
+        from app.database.migrations import apply_migrations
+        apply_migrations(projects_db)
+    sql_chain = make_sql_chain(projects_db)
+
+    total, rows = asyncio.run(sql_chain.execute_query(sql_chain._build_sector_sql("education")))
+    assert total == 2
+    assert [row["project_name"] for row in rows] == ["Dowa Staff House", "Chikwawa Primary School Block"]
+    assert all("total_count" not in row and "total_projects" not in row for row in rows)
+
+    assert asyncio.run(sql_chain.execute_query(sql_chain._build_district_sql("Mchinji"))) == (0, [])
@@ -0,0 +1,120 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from app.database.pagination import strip_sort_keys
+from app.database.query_templates import QUERY_TEMPLATES, BoundQuery, display_sql, fts_prefix_query
+from app.llm_classification.service import QueryClassificationService
+
+
+def _run(db_path, query: BoundQuery):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in QUERY_TEMPLATES.execute_fetchall(conn.cursor(), query)]
+    finally:
+        conn.close()
+
+
+def test_statement_text_is_identical_across_requests():
+    first = QUERY_TEMPLATES.bind("project.district.results", district="Zomba")
+    second = QUERY_TEMPLATES.bind("project.district.results", district="Dowa")
+    assert first.sql == second.sql
+    assert first.params != second.params
+
+
+def test_bind_validates_parameters():
+    with pytest.raises(ValueError):
+        QUERY_TEMPLATES.bind("project.sector.results")
+    with pytest.raises(ValueError):
+        QUERY_TEMPLATES.bind("project.sector.results", sector="Health", district="Zomba")
+    with pytest.raises(KeyError):
+        QUERY_TEMPLATES.bind("project.unknown")
+
+
+def test_user_text_cannot_change_query_shape(projects_db):
+    hostile = "x') OR 1=1 --"
+    assert _run(projects_db, QUERY_TEMPLATES.bind("project.specific.like", name=hostile)) == []
+    rows = _run(projects_db, QUERY_TEMPLATES.bind("project.specific.like", name="maternity"))
+    assert [row["project_name"] for row in rows] == ["Construction of Maternity Wing"]
+
+
+def test_fts_prefix_query():
+    assert fts_prefix_query("the Lenengwe bridge project") == '"lenengwe"* OR "bridge"*'
+    assert fts_prefix_query("x\" OR 1=1 --") == '"x"* OR "or"* OR "1"*'
+    assert fts_prefix_query("  ?! ") is None
+
+
+def test_specific_lookup_ranks_with_bm25(migrated_projects_db):
+    def search(name):
+        query = QUERY_TEMPLATES.bind("project.specific", match=fts_prefix_query(name), name=name)
+        return [row["project_name"] for row in _run(migrated_projects_db, query)]
+
+    assert search("Lenengwe Concrete Deck Bridge")[0] == "Lenengwe Concrete Deck Bridge"
+    assert search("zomba borehole")[0] == "Zomba Borehole Drilling"
+    assert search("matern")[0] == "Construction of Maternity Wing"
+    assert search("Aqua Drillers") == ["Zomba Borehole Drilling"]
+    assert search("x') OR 1=1 --") == []
+
+
+def test_basic_query_optional_filters(projects_db):
+    everything = _run(projects_db, QUERY_TEMPLATES.bind("project.basic.like", district=None, status=None))
+    zomba = _run(projects_db, QUERY_TEMPLATES.bind("project.basic.like", district="zomba", status=None))
+    assert len(everything) == 6
+    assert {row["DISTRICT"] for row in zomba} == {"Zomba"}
+
+
+def test_key_templates_match_like_fallbacks(migrated_projects_db):
+    for name, params in (
+        ("project.district.results", {"district": "Zomba"}),
+        ("project.sector.results", {"sector": "Education"}),
+        ("project.general", {}),
+    ):
+        keyed = strip_sort_keys(_run(migrated_projects_db, QUERY_TEMPLATES.bind(name, **params)))
+        like = _run(migrated_projects_db, QUERY_TEMPLATES.bind(f"{name}.like", **params))
+        assert [row["project_name"] for row in keyed] == [row["project_name"] for row in like]
+
+    ongoing_in_zomba = _run(
+        migrated_projects_db,
+        QUERY_TEMPLATES.bind("project.basic.district_status", district="Zomba", status="ongoing")
+    )
+    assert [row["project_name"] for row in ongoing_in_zomba] == ["Construction of Maternity Wing"]
+
+
+def test_per_template_timing_is_recorded(migrated_projects_db):
+    before = QUERY_TEMPLATES.get_stats()["project.sector.results"]["executions"]
+    rows = _run(migrated_projects_db, QUERY_TEMPLATES.bind("project.sector.results", sector="education"))
+    assert [row["total_count"] for row in rows] == [2, 2]
+    stats = QUERY_TEMPLATES.get_stats()["project.sector.results"]
+    assert stats["executions"] == before + 1
+    assert stats["total_time"] >= stats["last_time"] > 0
+    assert QUERY_TEMPLATES.statement_cache_size > len(QUERY_TEMPLATES.names)
+
+
+def test_display_sql_inlines_parameters():
+    query = QUERY_TEMPLATES.bind("project.district.results", district="O'Neill")
+    rendered = display_sql((query, query))
+    assert "'O''Neill'" in rendered
+    assert ":district" not in rendered
+
+
+@pytest.mark.parametrize("use_filter_keys, template", [
+    (False, "classification.general.like"),
+    (True, "classification.general"),
+])
+def test_classification_sql_uses_list_filters(migrated_projects_db, use_filter_keys, template):
+    service = QueryClassificationService.__new__(QueryClassificationService)
+    service.use_filter_keys = use_filter_keys
+    parameters = SimpleNamespace(
+        districts=["Zomba", "Dowa"],
+        sectors=["water"],
+        projects=[],
+        status=[],
+        budget_range={"min": None, "max": None},
+        time_range={"start": None, "end": None}
+    )
+    query = service.generate_sql_from_classification(SimpleNamespace(parameters=parameters))
+    assert query.template == template
+    rows = _run(migrated_projects_db, query)
+    assert [row["project_name"] for row in rows] == ["Zomba Borehole Drilling"]
@@ -0,0 +1,75 @@
+import asyncio
+import sqlite3
+
+from app.database.query_templates import QUERY_TEMPLATES
+from app.database.result_cache import ResultCache, normalise_sql
+
+
+def test_hits_return_independent_copies(projects_db):
+    cache = ResultCache(projects_db)
+    query = QUERY_TEMPLATES.bind("project.specific.like", name="bridge")
+    cache.set(query, (1, [{"project_name": "Bridge", "sort_rowid": 3}]))
+
+    first = cache.get(query)
+    first[1][0].pop("sort_rowid")
+    assert cache.get(query) == (1, [{"project_name": "Bridge", "sort_rowid": 3}])
+    assert cache.get(QUERY_TEMPLATES.bind("project.specific.like", name="school")) is None
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_ratio"] == 2 / 3
+
+
+def test_keys_ignore_formatting_and_skip_writes(projects_db):
+    cache = ResultCache(projects_db)
+    cache.set("SELECT  COUNT(*)\n FROM proj_dashboard;", [{"n": 6}])
+    assert cache.get("select count(*) from proj_dashboard") is None
+    assert cache.get("SELECT COUNT(*) FROM proj_dashboard") == [{"n": 6}]
+    assert normalise_sql(" SELECT 1 ;\n") == "SELECT 1"
+
+    cache.set("DELETE FROM proj_dashboard", [])
+    assert cache.get("DELETE FROM proj_dashboard") is None
+    assert cache.get_stats()["uncacheable"] == 1
+
+
+def test_lru_eviction_respects_entry_and_byte_caps(projects_db):
+    cache = ResultCache(projects_db, max_entries=2)
+    for n in range(3):
+        cache.set(f"SELECT {n}", [{"n": n}])
+    assert cache.get("SELECT 0") is None
+    assert cache.get("SELECT 2") == [{"n": 2}]
+    assert cache.get_stats()["evictions"] == 1
+
+    small = ResultCache(projects_db, max_bytes=200)
+    small.set("SELECT 'a'", [{"text": "x" * 120}])
+    small.set("SELECT 'b'", [{"text": "y" * 120}])
+    assert small.get("SELECT 'a'") is None
+    assert small.get_stats()["bytes"] <= 200
+
+
+def test_database_changes_invalidate_entries(projects_db):
+    cache = ResultCache(projects_db)
+    cache.set("SELECT COUNT(*) FROM proj_dashboard", [{"n": 6}])
+
+    conn = sqlite3.connect(projects_db)
+    conn.execute("DELETE FROM proj_dashboard WHERE DISTRICT = 'Dowa'")
+    conn.commit()
+    conn.close()
+
+    assert cache.get("SELECT COUNT(*) FROM proj_dashboard") is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_execute_query_is_served_from_cache(migrated_projects_db, make_sql_chain):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    query = sql_chain._build_district_sql("Zomba")
+    executions = lambda: QUERY_TEMPLATES.get_stats()["project.district.results"]["executions"]
+
+    first = asyncio.run(sql_chain.execute_query(query))
+    before = executions()
+    second = asyncio.run(sql_chain.execute_query(query))
+    assert second == first
+    assert executions() == before
+
+    response = asyncio.run(sql_chain.format_response(second, query, 0.0, "projects in Zomba", "district_query"))
+    assert response["metadata"]["result_cache"]["hits"] == 1
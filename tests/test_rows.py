@@ -0,0 +1,84 @@
+import copy
+import sqlite3
+import tracemalloc
+
+from app.database.langchain_sql import LangChainSQLIntegration
+from app.database.pagination import strip_sort_keys
+from app.database.rows import Columns, Row, as_rows, make_rows
+
+NAMES = ["PROJECTNAME", "DISTRICT", "BUDGET", "sort_budget", "sort_rowid"]
+
+
+def _rows():
+    return make_rows(NAMES, [("Zomba Bridge", "Zomba", 5000.0, 5000.0, 1), ("Dowa Clinic", "Dowa", None, None, 2)])
+
+
+def test_rows_are_case_insensitive_mappings():
+    row = _rows()[0]
+    assert row["PROJECTNAME"] == row["projectname"] == "Zomba Bridge"
+    assert "district" in row and "region" not in row
+    assert row.get("REGION", "Unknown") == "Unknown"
+    assert list(row) == NAMES
+    assert dict(row)["BUDGET"] == 5000.0
+    assert row == {"PROJECTNAME": "Zomba Bridge", "DISTRICT": "Zomba", "BUDGET": 5000.0,
+                   "sort_budget": 5000.0, "sort_rowid": 1}
+
+
+def test_rows_share_one_column_index():
+    rows = _rows()
+    assert rows[0].columns is rows[1].columns
+    assert copy.deepcopy(rows)[0] is rows[0]
+
+
+def test_getter_resolves_candidates_once():
+    columns = Columns(NAMES)
+    name = columns.getter("project_name", "projectname")
+    region = columns.getter("REGION", default="Unknown")
+    assert [name(row) for row in _rows()] == ["Zomba Bridge", "Dowa Clinic"]
+    assert region(_rows()[0]) == "Unknown"
+
+
+def test_strip_sort_keys_hides_columns_of_every_row():
+    rows = _rows()
+    assert strip_sort_keys(rows) is rows
+    assert all(list(row) == ["PROJECTNAME", "DISTRICT", "BUDGET"] for row in rows)
+    assert "sort_rowid" not in rows[1]
+    assert rows[0].columns is rows[1].columns
+
+
+def test_total_column_is_lifted_out_of_the_rows():
+    conn = sqlite3.connect(":memory:")
+    query = "SELECT 'Zomba Bridge' AS PROJECTNAME, 7 AS total_count UNION ALL SELECT 'Dowa Clinic', 7"
+    rows, total = LangChainSQLIntegration._fetch_rows(None, conn.cursor(), query, "total_count")
+    assert total == 7
+    assert [dict(row) for row in rows] == [{"PROJECTNAME": "Zomba Bridge"}, {"PROJECTNAME": "Dowa Clinic"}]
+
+
+def test_dict_rows_are_formatted_like_result_rows():
+    dicts = [{"projectname": "Zomba Bridge", "district": "Zomba", "budget": "5000"}]
+    assert isinstance(as_rows(dicts)[0], Row)
+    chain = LangChainSQLIntegration.__new__(LangChainSQLIntegration)
+    formatted = chain._format_projects(dicts)
+    assert formatted == chain._format_projects(_rows()[:1])
+    assert formatted[0]["Budget"] == "MWK 5,000.00"
+    assert formatted[0]["Location"] == "Zomba"
+    assert formatted[0]["Status"] == "Unknown"
+
+
+def test_rows_take_less_memory_than_aliased_dicts():
+    values = [(f"Project {i}", "Zomba", float(i), "Health", "Completed", "2023/24") for i in range(5000)]
+    names = ["PROJECTNAME", "DISTRICT", "BUDGET", "PROJECTSECTOR", "PROJECTSTATUS", "FISCALYEAR"]
+
+    def measure(build):
+        tracemalloc.start()
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+        return size
+
+    dict_size = measure(lambda: [
+        {**dict(zip(names, row)), **{name.lower(): value for name, value in zip(names, row)}} for row in values
+    ])
+    row_size = measure(lambda: make_rows(names, values))
+    assert row_size * 4 < dict_size
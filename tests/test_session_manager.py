@@ -0,0 +1,83 @@
+import time
+
+from app.database.query_templates import QUERY_TEMPLATES
+from app.models import DatabaseManager
+from app.session_manager import SessionManager
+
+LISTING = [
+    "Construction of Maternity Wing", "Dowa Staff House", "Chikwawa Primary School Block",
+    "Lenengwe Concrete Deck Bridge", "Zomba Borehole Drilling", "Lilongwe Market Shed",
+]
+
+
+def _listing_session(manager, page_size=2):
+    session_id = manager.create_session("Show me all projects")
+    manager.update_session(session_id, {"page_size": page_size})
+    manager.store_results(session_id, [], len(LISTING), QUERY_TEMPLATES.bind("project.general"))
+    return session_id
+
+
+def _names(page):
+    return [row["project_name"] for row in page["results"][0]["data"]["rows"]]
+
+
+def test_pages_are_fetched_lazily_from_the_plan(migrated_projects_db):
+    manager = SessionManager(db_manager=DatabaseManager(migrated_projects_db), sweep_interval=0)
+    session_id = _listing_session(manager)
+    session = manager.get_session(session_id)
+    assert session["results"] == [] and session["plan"].kind == "general"
+
+    # Jumping ahead walks the pages in between once; going back seeks directly
+    assert _names(manager.get_page_results(session_id, 3)) == LISTING[4:6]
+    assert manager.stats["page_fetches"] == 3
+    assert _names(manager.get_page_results(session_id, 2)) == LISTING[2:4]
+    assert _names(manager.get_page_results(session_id, 1)) == LISTING[0:2]
+    assert manager.stats["page_fetches"] == 5
+
+    page = manager.get_page_results(session_id, 3)
+    assert page["pagination"]["has_more"] is False
+    assert all("sort_rowid" not in row for row in page["results"][0]["data"]["rows"])
+    assert manager.get_page_results(session_id, 4) is None
+
+
+def test_rows_are_kept_without_a_pageable_plan():
+    manager = SessionManager(sweep_interval=0)
+    session_id = manager.create_session("Which project has the largest budget?")
+    manager.store_results(session_id, [{"project_name": name} for name in LISTING], 6, "SELECT 1")
+    assert _names(manager.get_page_results(session_id, 1)) == LISTING
+    assert manager.get_page_results(session_id, 2) is None
+
+
+def test_least_recently_used_sessions_are_evicted():
+    manager = SessionManager(max_sessions=2, sweep_interval=0)
+    first, second = manager.create_session("a"), manager.create_session("b")
+    manager.get_session(first)
+    third = manager.create_session("c")
+    assert manager.get_session(second) is None
+    assert manager.get_session(first) and manager.get_session(third)
+    assert manager.stats["evicted"] == 1
+
+
+def test_memory_budget_evicts_sessions_holding_rows():
+    manager = SessionManager(max_bytes=4096, sweep_interval=0)
+    rows = [{"project_name": f"Project {i}", "district": "Zomba"} for i in range(50)]
+    for _ in range(5):
+        manager.store_results(manager.create_session("big"), rows, len(rows), "SELECT 1")
+    stats = manager.get_stats()
+    assert stats["sessions"] < 5
+    assert stats["bytes"] <= 4096 or stats["sessions"] == 1
+
+
+def test_expired_sessions_are_swept_in_the_background():
+    manager = SessionManager(ttl=0.05, sweep_interval=0.02)
+    try:
+        manager.create_session("a")
+        manager.create_session("b")
+        deadline = time.time() + 2
+        while manager.sessions and time.time() < deadline:
+            time.sleep(0.02)
+        assert not manager.sessions
+        assert manager.get_stats()["bytes"] == 0
+        assert manager.stats["expired"] == 2
+    finally:
+        manager.close()
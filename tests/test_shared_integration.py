@@ -0,0 +1,33 @@
+import os
+import pytest
+
+os.environ.setdefault("TOGETHER_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+from app import dependencies
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_shared_sql_chain_is_reused():
+    """get_shared_sql_chain should hand out a single instance per process"""
+    first = dependencies.get_shared_sql_chain()
+    second = dependencies.get_shared_sql_chain()
+    assert first is second
+
+
+def test_lifespan_sets_and_releases_sql_chain(client):
+    """The lifespan hook should publish the shared integration on app.state"""
+    sql_chain = client.app.state.sql_chain
+    assert sql_chain is dependencies.get_shared_sql_chain()
+
+    response = client.get("/api/rag-sql-chatbot/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert client.app.state.sql_chain is sql_chain
@@ -0,0 +1,81 @@
+import asyncio
+
+from app.utils.single_flight import SingleFlight, canonical_question
+
+
+def test_canonical_question():
+    assert canonical_question("  Projects in   ZOMBA?? ") == "projects in zomba"
+    assert canonical_question("projects in zomba") == canonical_question("Projects in Zomba.")
+
+
+def test_concurrent_calls_share_one_computation_and_get_copies():
+    flight = SingleFlight()
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.02)
+        return {"rows": [1, 2]}
+
+    async def main():
+        results = await asyncio.gather(*(flight.run("q", compute) for _ in range(5)))
+        results[0]["rows"].append(3)
+        later = await flight.run("q", compute)
+        return results, later
+
+    results, later = asyncio.run(main())
+    assert [r["rows"] for r in results[1:]] == [[1, 2]] * 4
+    assert later == {"rows": [1, 2]}
+    assert len(runs) == 2
+    stats = flight.get_stats()
+    assert (stats["calls"], stats["leaders"], stats["coalesced"], stats["in_flight"]) == (6, 2, 4, 0)
+    assert stats["max_waiters"] == 5
+
+
+def test_errors_reach_every_waiter_and_cancelled_callers_do_not_cancel_others():
+    flight = SingleFlight()
+
+    async def broken():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        errors = await asyncio.gather(*(flight.run("bad", broken) for _ in range(3)), return_exceptions=True)
+        leader = asyncio.ensure_future(flight.run("slow", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run("slow", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return errors, await follower
+
+    errors, followed = asyncio.run(main())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert followed == "done"
+    assert flight.get_stats()["errors"] == 1
+
+
+def test_identical_questions_run_the_pipeline_once(make_sql_chain, migrated_projects_db):
+    sql_chain = make_sql_chain(migrated_projects_db)
+    generated = []
+    generate_sql_query = sql_chain.generate_sql_query
+
+    async def counting_generate(query):
+        generated.append(query)
+        await asyncio.sleep(0.01)
+        return await generate_sql_query(query)
+    sql_chain.generate_sql_query = counting_generate
+
+    async def main():
+        return await asyncio.gather(
+            sql_chain.answer_query("Show me projects in Zomba district"),
+            sql_chain.answer_query("show me projects in zomba district?"),
+        )
+
+    first, second = asyncio.run(main())
+    assert len(generated) == 1
+    assert first == second and first is not second
+    assert first["metadata"]["total_results"] == 2
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from app.utils.speculation import speculate
+
+
+async def _after(delay, value, log=None, name=None):
+    try:
+        await asyncio.sleep(delay)
+        return value
+    except asyncio.CancelledError:
+        if log is not None:
+            log.append(name)
+        raise
+
+
+async def _fail():
+    raise ValueError("boom")
+
+
+def test_first_accepted_result_wins_and_losers_are_cancelled():
+    cancelled = []
+    outcome = asyncio.run(speculate(
+        {"slow": _after(5, "slow", cancelled, "slow"), "broken": _fail(), "fast": _after(0.01, "fast")},
+        accept=lambda name, result, results: True
+    ))
+    assert (outcome.winner, outcome.value) == ("fast", "fast")
+    assert cancelled == ["slow"] and outcome.cancelled == ["slow"]
+    assert isinstance(outcome.errors["broken"], ValueError)
+
+
+def test_rejected_results_keep_waiting_until_the_deadline():
+    outcome = asyncio.run(speculate(
+        {"rejected": _after(0, "no"), "slow": _after(5, "late")},
+        accept=lambda name, result, results: result != "no",
+        deadline=0.05
+    ))
+    assert outcome.winner is None and outcome.timed_out
+    assert outcome.results == {"rejected": "no"}
+    assert outcome.cancelled == ["slow"]
+    assert outcome.elapsed < 1
+
+
+def _speculating_chain(make_sql_chain, db_path, llm_delay, llm_intent):
+    sql_chain = make_sql_chain(db_path)
+    calls = []
+
+    async def llm_response(prompt):
+        calls.append("started")
+        await asyncio.sleep(llm_delay)
+        calls.append("finished")
+        return llm_intent
+    sql_chain._get_llm_response = llm_response
+    return sql_chain, calls
+
+
+def test_structured_rule_answer_beats_a_slow_llm(make_sql_chain, migrated_projects_db):
+    sql_chain, calls = _speculating_chain(make_sql_chain, migrated_projects_db, 5, "SQL")
+
+    start = time.perf_counter()
+    response = asyncio.run(sql_chain.get_answer("Tell me about Lenengwe"))
+    assert time.perf_counter() - start < 2
+    assert response["metadata"]["query_type"] == "specific"
+    assert calls == ["started"]
+    assert sql_chain.intent_classifier.get_stats()["skipped"] == 1
+
+
+def test_llm_intent_wins_for_non_sql_questions(make_sql_chain, migrated_projects_db):
+    sql_chain, calls = _speculating_chain(make_sql_chain, migrated_projects_db, 0, "GREETING")
+
+    response = asyncio.run(sql_chain.get_answer("what's up with you today"))
+    assert response["response"]["query_type"] == "chat"
+    assert calls == ["started", "finished"]
+    assert sql_chain.intent_classifier.get_stats()["llm_checked"] == 1
@@ -0,0 +1,73 @@
+import pytest
+
+from app.database.langchain_sql import PROJECT_LIST_FIELDS
+from app.database.query_templates import QUERY_TEMPLATES
+from app.llm.client import LLMClientError
+from app.routers.chat import _encode_event
+
+
+class _FakeLLM:
+    def __init__(self, pieces=None, error=None):
+        self.pieces = pieces or []
+        self.error = error
+        self.prompts = []
+
+    async def stream(self, prompt, **params):
+        self.prompts.append(prompt)
+        for piece in self.pieces:
+            yield piece
+        if self.error:
+            raise self.error
+
+
+def _streaming_chain(make_sql_chain, db_path, llm, query):
+    sql_chain = make_sql_chain(db_path)
+    sql_chain.llm = llm
+    sql_chain.model = "test-model"
+    sql_chain.temperature = 0.1
+
+    async def generate_sql_query(user_query):
+        return query, "district_query"
+    sql_chain.generate_sql_query = generate_sql_query
+    return sql_chain
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_sends_summary_rows_then_tokens(make_sql_chain, migrated_projects_db):
+    llm = _FakeLLM(pieces=["Zomba has ", "two projects."])
+    query = QUERY_TEMPLATES.bind("project.district.results", district="zomba")
+    sql_chain = _streaming_chain(make_sql_chain, migrated_projects_db, llm, query)
+
+    events = [event async for event in sql_chain.stream_answer("projects in Zomba", chunk_size=1)]
+
+    assert events[0] == {"event": "result", "result": {
+        "type": "text", "message": "Found 2 projects matching your query.", "data": {}
+    }}
+    tables = [event["result"] for event in events if event["event"] == "result"][1:]
+    assert [table["type"] for table in tables] == ["table", "table"]
+    assert tables[0]["data"]["headers"] == list(PROJECT_LIST_FIELDS)
+    assert tables[0]["data"]["rows"][0][0] == "Construction of Maternity Wing"
+    assert [event["text"] for event in events if event["event"] == "token"] == ["Zomba has ", "two projects."]
+    assert "Construction of Maternity Wing" in llm.prompts[0]
+
+    metadata = events[-1]
+    assert metadata["event"] == "metadata"
+    assert metadata["metadata"]["total_results"] == 2
+    assert metadata["metadata"]["pagination"]["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_survives_narrative_failure(make_sql_chain, migrated_projects_db):
+    llm = _FakeLLM(pieces=["Partial"], error=LLMClientError("boom"))
+    query = QUERY_TEMPLATES.bind("project.district.results", district="zomba")
+    sql_chain = _streaming_chain(make_sql_chain, migrated_projects_db, llm, query)
+
+    events = [event async for event in sql_chain.stream_answer("projects in Zomba")]
+
+    assert [event["event"] for event in events] == ["result", "result", "token", "error", "metadata"]
+
+
+def test_events_encode_as_sse_or_ndjson():
+    event = {"event": "token", "text": "hi"}
+    assert _encode_event(event, sse=True) == 'event: token\ndata: {"event": "token", "text": "hi"}\n\n'
+    assert _encode_event(event, sse=False) == '{"event": "token", "text": "hi"}\n'